@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+屏幕帧提供者性能基准测试
+使用合成帧来源在Linux上测量：截图转换为NumPy数组的耗时、瓦片哈希变化检测的耗时，
+以及搜索区域未变化时跳过重新匹配带来的收益
+
+运行方式：
+    python benchmarks/frame_provider_benchmark.py
+"""
+
+import sys
+import os
+import time
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from core.frame_provider import ImageGrabFrameProvider, SyntheticFrameSource
+from core.template_matcher import TemplateMatcher
+
+
+# 测试的屏幕尺寸 (名称, 宽, 高)
+SCREEN_SIZES = [
+    ("1920x1080", 1920, 1080),
+    ("2560x1440", 2560, 1440),
+    ("3840x2160", 3840, 2160),
+]
+
+REPEAT = 5
+
+
+def time_call(func):
+    """多次执行并返回平均耗时（毫秒）和最后一次结果"""
+    result = None
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func()
+    return (time.perf_counter() - start) * 1000 / REPEAT, result
+
+
+def old_conversion(image):
+    """原有转换方式：np.array复制一次，cv2.cvtColor再复制一次"""
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+
+def main():
+    matcher = TemplateMatcher()
+
+    print(f"{'屏幕尺寸':<12}{'原转换(ms)':>12}{'新转换(ms)':>12}{'整帧哈希(ms)':>14}"
+          f"{'重新匹配(ms)':>14}{'跳过匹配(ms)':>14}")
+    for name, width, height in SCREEN_SIZES:
+        source = SyntheticFrameSource(width, height)
+
+        # 截图转换：PIL图像 -> BGR数组
+        pil_image = Image.fromarray(cv2.cvtColor(source.image, cv2.COLOR_BGR2RGB))
+        old_ms, _ = time_call(lambda: old_conversion(pil_image))
+        new_ms, _ = time_call(lambda: ImageGrabFrameProvider.image_to_array(pil_image))
+
+        # 在窗口区域内放置图标，窗口外的画面持续变化
+        roi = (width // 4, height // 4, width // 2, height // 2)
+        icon = source.image[roi[1] + 40:roi[1] + 72, roi[0] + 40:roi[0] + 72].copy()
+        prepared = matcher.prepare(cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY))
+        source.history = REPEAT * 4  # 保证基准帧在测试期间不被淘汰
+        base_frame = source.grab()
+
+        def hash_full_frame():
+            frame = source.grab()
+            return frame.get_tile_hashes(tile_size=source.tile_size)
+        hash_ms, _ = time_call(hash_full_frame)
+
+        # 预先生成窗口区域外有变化的帧序列，画面修改的耗时不计入匹配耗时
+        frames = []
+        for i in range(REPEAT * 2):
+            source.paint((width - 100, height - 100, width - 50, height - 50), (i * 20, 0, 0))
+            frames.append(source.grab())
+        rematch_frames = iter(frames[:REPEAT])
+        skip_frames = iter(frames[REPEAT:])
+
+        def rematch():
+            return matcher.match(next(rematch_frames).crop(roi), prepared)
+
+        def skip_unchanged():
+            frame = next(skip_frames)
+            if source.changed_since(base_frame.frame_id, roi, frame):
+                return matcher.match(frame.crop(roi), prepared)
+            return None
+
+        rematch_ms, _ = time_call(rematch)
+        skip_ms, _ = time_call(skip_unchanged)
+
+        print(f"{name:<12}{old_ms:>12.1f}{new_ms:>12.1f}{hash_ms:>14.1f}"
+              f"{rematch_ms:>14.1f}{skip_ms:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板匹配性能基准测试
+使用合成截图对比单尺度全帧cv2.matchTemplate与TemplateMatcher在不同屏幕尺寸下的单次查找耗时
+
+运行方式：
+    python benchmarks/template_matching_benchmark.py
+"""
+
+import sys
+import os
+import time
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import cv2
+import numpy as np
+
+from core.screen_frame import ScreenFrame
+from core.template_matcher import TemplateMatcher
+
+
+# 测试的屏幕尺寸 (名称, 宽, 高)
+SCREEN_SIZES = [
+    ("1280x720", 1280, 720),
+    ("1920x1080", 1920, 1080),
+    ("2560x1440", 2560, 1440),
+    ("3840x2160", 3840, 2160),
+]
+
+# 模板在屏幕上的DPI缩放比例
+DPI_SCALES = [1.0, 1.25, 1.5]
+
+REPEAT = 5
+
+
+def make_synthetic_screenshot(width, height, seed=0):
+    """生成合成截图：浅色背景上随机分布的窗口、按钮和文字状条纹
+
+    Args:
+        width: 截图宽度
+        height: 截图高度
+        seed: 随机种子
+
+    Returns:
+        BGR截图
+    """
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 240, dtype=np.uint8)
+    for _ in range(width * height // 20000):
+        x = int(rng.integers(0, width - 40))
+        y = int(rng.integers(0, height - 20))
+        w = int(rng.integers(20, 200))
+        h = int(rng.integers(10, 60))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(image, (x, y), (x + w, y + h), color, -1 if rng.random() < 0.5 else 1)
+        if rng.random() < 0.5:
+            cv2.putText(image, "Item %d" % rng.integers(0, 1000), (x + 2, y + h - 2),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1)
+    return image
+
+
+def make_icon(size=32):
+    """生成一个图标模板"""
+    icon = np.full((size, size, 3), 255, dtype=np.uint8)
+    cv2.circle(icon, (size // 2, size // 2), size // 3, (0, 0, 200), -1)
+    cv2.line(icon, (4, 4), (size - 5, size - 5), (30, 30, 30), 2)
+    cv2.putText(icon, "X", (size // 3, size - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    return icon
+
+
+def place_icon(screenshot, icon, scale, rng):
+    """将按比例缩放后的图标放到截图的随机位置
+
+    Returns:
+        图标左上角坐标 (x, y)
+    """
+    scaled = cv2.resize(icon, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    h, w = scaled.shape[:2]
+    x = int(rng.integers(0, screenshot.shape[1] - w))
+    y = int(rng.integers(0, screenshot.shape[0] - h))
+    screenshot[y:y + h, x:x + w] = scaled
+    return x, y
+
+
+def time_call(func):
+    """多次执行并返回平均耗时（毫秒）和最后一次结果"""
+    result = None
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func()
+    return (time.perf_counter() - start) * 1000 / REPEAT, result
+
+
+def single_scale_baseline(screenshot_gray, template_gray):
+    """生成代码原有的单尺度全帧匹配"""
+    response = cv2.matchTemplate(screenshot_gray, template_gray, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(response)
+    return max_val, max_loc
+
+
+def main():
+    rng = np.random.default_rng(42)
+    icon = make_icon()
+    icon_gray = cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY)
+    matcher = TemplateMatcher()
+    prepared = matcher.prepare(icon_gray)
+
+    print(f"{'屏幕尺寸':<12}{'DPI缩放':>8}{'单尺度(ms)':>12}{'单尺度置信度':>14}"
+          f"{'金字塔(ms)':>12}{'金字塔置信度':>14}{'位置误差':>10}")
+    for name, width, height in SCREEN_SIZES:
+        for scale in DPI_SCALES:
+            screenshot = make_synthetic_screenshot(width, height)
+            expected = place_icon(screenshot, icon, scale, rng)
+            screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+
+            baseline_ms, (baseline_val, _) = time_call(lambda: single_scale_baseline(screenshot_gray, icon_gray))
+
+            # 每次查找使用新帧，金字塔构建时间计入查找耗时
+            def pyramid_lookup():
+                return matcher.match(ScreenFrame(screenshot), prepared, threshold=0.8)
+            pyramid_ms, result = time_call(pyramid_lookup)
+
+            if result is not None:
+                error = max(abs(result.x - expected[0]), abs(result.y - expected[1]))
+                confidence = f"{result.confidence:.3f}"
+            else:
+                error = "-"
+                confidence = "未找到"
+            print(f"{name:<12}{int(scale * 100):>7}%{baseline_ms:>12.1f}{baseline_val:>14.3f}"
+                  f"{pyramid_ms:>12.1f}{confidence:>14}{error:>10}")
+
+
+if __name__ == '__main__':
+    main()
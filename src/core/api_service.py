@@ -5,10 +5,18 @@ API服务模块
 暴露核心功能API，支持其他工具通过HTTP或本地调用集成Locator_desktop的能力
 """
 
+import os
 import threading
 import json
+import time
 from flask import Flask, request, jsonify
 
+from .app_health import get_app_health_monitor
+from .automation_executor import get_automation_executor, PRIORITY_INTERACTIVE
+from .backend_warmup import get_backend_warmup
+from .tree_diff import diff_trees
+from .tree_snapshot import TreeSnapshot
+
 
 class APIService:
     """API服务类"""
@@ -24,6 +32,8 @@ class APIService:
         self.server_thread = None
         self.is_running = False
         self.port = 5000
+        # 快照API将快照写入此目录，元素树比较API只能读取此目录中的快照文件
+        self.snapshot_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'snapshots')
         
         # 注册路由
         self._register_routes()
@@ -34,7 +44,8 @@ class APIService:
         def capture_element():
             """捕获元素API"""
             try:
-                element = self.app.element_capture.capture_element()
+                element = get_automation_executor().call(self.app.element_capture.capture_element,
+                                                         priority=PRIORITY_INTERACTIVE, name='api_capture_element')
                 if element:
                     return jsonify({
                         "success": True,
@@ -136,8 +147,10 @@ class APIService:
                 # 转换为元素对象
                 element = self._create_element_from_data(element_data)
                 
-                # 测试定位
-                result = self.app.element_capture.test_element_location(element)
+                # 测试定位，结果计入定位统计
+                found = get_automation_executor().call(self.app.hybrid_locator.test_location, element,
+                                                       priority=PRIORITY_INTERACTIVE, name='api_test_location')
+                result = found is not None
                 
                 return jsonify({
                     "success": True,
@@ -174,6 +187,152 @@ class APIService:
             except Exception as e:
                 return jsonify({"success": False, "error": str(e)}), 500
         
+        @self.flask_app.route('/api/v1/locator_stats', methods=['GET'])
+        def get_locator_stats():
+            """获取定位统计API，可通过app参数筛选应用程序"""
+            try:
+                locator_stats = getattr(self.app, 'locator_stats', None)
+                if locator_stats is None:
+                    return jsonify({"success": False, "error": "定位统计未启用"}), 400
+                
+                return jsonify({
+                    "success": True,
+                    "data": {
+                        "stats": locator_stats.get_stats(request.args.get('app'))
+                    }
+                })
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 500
+        
+        @self.flask_app.route('/api/v1/locate_cache', methods=['GET'])
+        def get_locate_cache_metrics():
+            """获取定位结果缓存指标API"""
+            try:
+                locate_cache = getattr(self.app, 'locate_cache', None)
+                if locate_cache is None:
+                    return jsonify({"success": False, "error": "定位结果缓存未启用"}), 400
+                
+                return jsonify({
+                    "success": True,
+                    "data": locate_cache.get_metrics()
+                })
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 500
+        
+        @self.flask_app.route('/api/v1/automation_executor', methods=['GET'])
+        def get_automation_executor_metrics():
+            """获取自动化执行器指标API，包括队列深度和超时次数"""
+            try:
+                return jsonify({
+                    "success": True,
+                    "data": get_automation_executor().get_metrics()
+                })
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 500
+        
+        @self.flask_app.route('/api/v1/app_health', methods=['GET'])
+        def get_app_health():
+            """获取目标应用健康状态API，列出被标记为无响应的应用"""
+            try:
+                return jsonify({
+                    "success": True,
+                    "data": get_app_health_monitor().get_status()
+                })
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 500
+        
+        @self.flask_app.route('/api/v1/backend_warmup', methods=['GET'])
+        def get_backend_warmup_status():
+            """获取自动化后端预热状态API，包括是否就绪和各阶段耗时"""
+            try:
+                return jsonify({
+                    "success": True,
+                    "data": get_backend_warmup().get_status()
+                })
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 500
+        
+        @self.flask_app.route('/api/v1/tree_snapshot', methods=['POST'])
+        def tree_snapshot():
+            """保存窗口元素树快照API，快照写入快照目录，供元素树比较API使用"""
+            try:
+                data = request.json
+                if not data:
+                    return jsonify({"success": False, "error": "请求数据不能为空"}), 400
+                
+                window_handle = data.get('window_handle')
+                if not window_handle:
+                    return jsonify({"success": False, "error": "窗口句柄不能为空"}), 400
+                window_handle = int(window_handle)
+                
+                created = time.strftime('%Y%m%d_%H%M%S')
+                name = data.get('name') or f"{window_handle}_{created}.snap"
+                path = self._resolve_snapshot_path(name)
+                if path is None:
+                    return jsonify({"success": False, "error": "快照文件必须位于快照目录中"}), 400
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                
+                metadata = {'window_handle': window_handle, 'created': created}
+                nodes = get_automation_executor().call(self.app.element_analyzer.snapshot_window, window_handle,
+                                                       path, metadata, name='api_tree_snapshot')
+                
+                return jsonify({
+                    "success": True,
+                    "data": {
+                        "snapshot": os.path.relpath(path, os.path.realpath(self.snapshot_dir)),
+                        "nodes": nodes
+                    }
+                })
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 500
+        
+        @self.flask_app.route('/api/v1/tree_diff', methods=['POST'])
+        def tree_diff():
+            """比较两个元素树快照API，返回差异和受影响的收藏夹、历史记录定位"""
+            try:
+                data = request.json
+                if not data:
+                    return jsonify({"success": False, "error": "请求数据不能为空"}), 400
+                
+                old_snapshot = data.get('old_snapshot')
+                new_snapshot = data.get('new_snapshot')
+                if not old_snapshot or not new_snapshot:
+                    return jsonify({"success": False, "error": "快照文件路径不能为空"}), 400
+                
+                old_path = self._resolve_snapshot_path(old_snapshot)
+                new_path = self._resolve_snapshot_path(new_snapshot)
+                if old_path is None or new_path is None:
+                    return jsonify({"success": False, "error": "快照文件必须位于快照目录中"}), 400
+                
+                old_tree = TreeSnapshot(old_path)
+                try:
+                    new_tree = TreeSnapshot(new_path)
+                    try:
+                        result = diff_trees(old_tree, new_tree, compare_rect=data.get('compare_rect', False))
+                    finally:
+                        new_tree.close()
+                finally:
+                    old_tree.close()
+                
+                affected = []
+                favorites_manager = getattr(self.app, 'favorites_manager', None)
+                if favorites_manager is not None:
+                    affected += result.find_affected_locators(favorites_manager.get_all_favorites(), 'favorites')
+                history_manager = getattr(self.app, 'history_manager', None)
+                if history_manager is not None:
+                    affected += result.find_affected_locators(history_manager.iter_records(), 'history')
+                
+                return jsonify({
+                    "success": True,
+                    "data": {
+                        "summary": result.summary(),
+                        "entries": result.get_entries(),
+                        "affected_locators": affected
+                    }
+                })
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 500
+        
         @self.flask_app.route('/api/v1/ping', methods=['GET'])
         def ping():
             """心跳检测API"""
@@ -185,6 +344,24 @@ class APIService:
                 }
             })
     
+    def _resolve_snapshot_path(self, path):
+        """将客户端提供的快照路径解析为快照目录中的文件路径
+        
+        Args:
+            path: 快照文件路径，相对路径相对于快照目录
+            
+        Returns:
+            绝对路径，路径不在快照目录中时返回None
+        """
+        snapshot_dir = os.path.realpath(self.snapshot_dir)
+        resolved = os.path.realpath(os.path.join(snapshot_dir, str(path)))
+        try:
+            inside = os.path.commonpath([snapshot_dir, resolved]) == snapshot_dir
+        except ValueError:
+            # Windows下位于不同驱动器
+            inside = False
+        return resolved if inside and resolved != snapshot_dir else None
+    
     def _create_element_from_data(self, element_data):
         """从数据创建元素对象
         
@@ -264,6 +441,13 @@ class APIService:
                 "/api/v1/generate_code",
                 "/api/v1/generate_complete_script",
                 "/api/v1/test_location",
-                "/api/v1/get_window_list"
+                "/api/v1/get_window_list",
+                "/api/v1/locator_stats",
+                "/api/v1/locate_cache",
+                "/api/v1/automation_executor",
+                "/api/v1/app_health",
+                "/api/v1/backend_warmup",
+                "/api/v1/tree_snapshot",
+                "/api/v1/tree_diff"
             ]
         }
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目标应用健康监控模块
+为每次后端调用设置超时，按进程熔断：连续超时的应用被标记为降级，降级期间的调用立即失败，
+后台线程定期探测降级应用是否恢复响应
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from .automation_executor import AutomationTimeoutError, get_automation_executor, init_com_thread
+
+
+class AppUnresponsiveError(Exception):
+    """目标应用无响应异常，应用处于降级状态时调用立即抛出"""
+
+    def __init__(self, process_id, message=None):
+        self.process_id = process_id
+        super().__init__(message or f"目标应用(PID: {process_id})无响应，已暂停对其的自动化调用，"
+                                    f"请等待应用恢复响应或重启应用")
+
+
+class GuardPoolExhaustedError(RuntimeError):
+    """守护线程全部被未返回的调用占用，新的调用立即失败，不计入目标应用的超时"""
+
+    def __init__(self, busy):
+        self.busy = busy
+        super().__init__(f"{busy}个后端调用仍未返回，守护线程已全部占用，请等待目标应用恢复响应后重试")
+
+
+class _ProcessHealth:
+    """单个进程的健康状态"""
+
+    def __init__(self, process_id):
+        self.process_id = process_id
+        self.state = AppHealthMonitor.HEALTHY
+        self.consecutive_timeouts = 0
+        self.total_timeouts = 0
+        self.degraded_since = None
+        self.last_error = None
+        self.last_probe = None
+        self.window_handle = None  # 用于健康探测的窗口句柄
+        self.trial_in_progress = False  # 半开状态下是否已有试探调用
+
+
+class AppHealthMonitor:
+    """目标应用健康监控，每个进程一个熔断器"""
+
+    HEALTHY = 'healthy'
+    DEGRADED = 'degraded'
+
+    def __init__(self, failure_threshold=3, default_timeout=10.0, probe_interval=2.0,
+                 probe_timeout=0.5, retry_after=30.0, guard_workers=8):
+        """初始化健康监控
+
+        Args:
+            failure_threshold: 连续超时多少次后标记为降级
+            default_timeout: 后端调用的默认超时时间，单位：秒
+            probe_interval: 后台健康探测间隔，单位：秒
+            probe_timeout: 单次探测的超时时间，单位：秒
+            retry_after: 无法探测（没有窗口句柄）的降级应用在多久后允许一次试探调用，单位：秒
+            guard_workers: 在自动化工作线程内发起调用时，用于执行带超时调用的线程数；
+                超时的调用仍占用守护线程，全部占用时新的调用立即失败而不是排队等待超时
+        """
+        self.failure_threshold = failure_threshold
+        self.default_timeout = default_timeout
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.retry_after = retry_after
+        self.guard_workers = guard_workers
+
+        self._processes = {}  # 进程ID -> _ProcessHealth
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._guard_pool = None
+        self._guard_busy = 0  # 已提交到守护线程池且尚未返回的调用数，包括已超时的调用
+        self._probe_thread = None
+        self._stop_event = threading.Event()
+
+    def _get_health(self, process_id):
+        """获取进程的健康状态，不存在时创建"""
+        health = self._processes.get(process_id)
+        if health is None:
+            health = self._processes[process_id] = _ProcessHealth(process_id)
+        return health
+
+    def _get_guard_pool(self):
+        """获取执行带超时调用的线程池"""
+        if self._guard_pool is None:
+            def initializer():
+                init_com_thread()
+                self._local.is_guard = True
+            self._guard_pool = ThreadPoolExecutor(max_workers=self.guard_workers,
+                                                  thread_name_prefix='app-health-guard',
+                                                  initializer=initializer)
+        return self._guard_pool
+
+    def _submit_guarded(self, func, *args, **kwargs):
+        """提交到守护线程池执行，守护线程全部被占用时立即失败
+
+        Returns:
+            Future对象
+
+        Raises:
+            GuardPoolExhaustedError: 守护线程全部被未返回的调用占用
+        """
+        with self._lock:
+            if self._guard_busy >= self.guard_workers:
+                raise GuardPoolExhaustedError(self._guard_busy)
+            self._guard_busy += 1
+        try:
+            future = self._get_guard_pool().submit(func, *args, **kwargs)
+        except Exception:
+            self._release_guard()
+            raise
+        future.add_done_callback(lambda _: self._release_guard())
+        return future
+
+    def _release_guard(self):
+        """一个守护线程上的调用已返回"""
+        with self._lock:
+            self._guard_busy -= 1
+
+    def check(self, process_id):
+        """检查进程是否允许调用
+
+        Args:
+            process_id: 进程ID
+
+        Raises:
+            AppUnresponsiveError: 进程处于降级状态
+        """
+        if process_id is None:
+            return
+        with self._lock:
+            health = self._processes.get(process_id)
+            if health is None or health.state == self.HEALTHY:
+                return
+            # 降级时间足够长且没有其他试探调用时，放行一次试探调用（半开状态）
+            if (health.window_handle is None and not health.trial_in_progress
+                    and time.time() - health.degraded_since >= self.retry_after):
+                health.trial_in_progress = True
+                return
+            raise AppUnresponsiveError(process_id)
+
+    def call(self, process_id, func, *args, timeout=None, window_handle=None, **kwargs):
+        """带超时和熔断地调用后端函数
+
+        在自动化执行器之外调用时提交到执行器；已在执行器工作线程中时由守护线程池执行并等待，
+        保证任何调用都不会无限期阻塞。
+
+        Args:
+            process_id: 目标进程ID，None表示不做熔断
+            func: 后端函数
+            *args: 位置参数
+            timeout: 超时时间（秒），默认使用default_timeout
+            window_handle: 目标窗口句柄，用于后台健康探测
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+
+        Raises:
+            AppUnresponsiveError: 进程处于降级状态
+            AutomationTimeoutError: 调用超时
+            GuardPoolExhaustedError: 守护线程全部被未返回的调用占用
+        """
+        self.check(process_id)
+        if timeout is None:
+            timeout = self.default_timeout
+        if window_handle and process_id is not None:
+            with self._lock:
+                self._get_health(process_id).window_handle = window_handle
+
+        try:
+            if getattr(self._local, 'is_guard', False):
+                # 已在守护线程中（嵌套调用），外层调用已受超时保护
+                result = func(*args, **kwargs)
+            else:
+                executor = get_automation_executor()
+                if executor.is_worker_thread():
+                    future = self._submit_guarded(func, *args, **kwargs)
+                    try:
+                        result = future.result(timeout)
+                    except FutureTimeoutError:
+                        raise AutomationTimeoutError(f"后端调用超时: {getattr(func, '__name__', 'call')}")
+                else:
+                    result = executor.call(func, *args, timeout=timeout, **kwargs)
+        except AutomationTimeoutError as e:
+            self.record_timeout(process_id, str(e))
+            raise
+        except GuardPoolExhaustedError:
+            # 调用没有执行，不能说明目标应用是否响应，只结束可能的试探调用
+            with self._lock:
+                health = self._processes.get(process_id)
+                if health is not None:
+                    health.trial_in_progress = False
+            raise
+        except Exception:
+            # 调用有返回（即使是异常）说明应用仍在响应
+            self.record_success(process_id)
+            raise
+
+        self.record_success(process_id)
+        return result
+
+    def call_for_window(self, window_handle, func, *args, timeout=None, **kwargs):
+        """按窗口句柄所属进程带超时和熔断地调用后端函数
+
+        Args:
+            window_handle: 目标窗口句柄
+            func: 后端函数
+            *args: 位置参数
+            timeout: 超时时间（秒）
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+        """
+        return self.call(self.get_window_process_id(window_handle), func, *args,
+                         timeout=timeout, window_handle=window_handle, **kwargs)
+
+    @staticmethod
+    def get_window_process_id(window_handle):
+        """获取窗口所属的进程ID，获取失败返回None"""
+        if not window_handle:
+            return None
+        try:
+            import win32process
+            return win32process.GetWindowThreadProcessId(window_handle)[1]
+        except Exception:
+            return None
+
+    def record_timeout(self, process_id, error=None):
+        """记录一次超时，连续超时达到阈值时标记为降级
+
+        Args:
+            process_id: 进程ID
+            error: 错误信息
+        """
+        if process_id is None:
+            return
+        with self._lock:
+            health = self._get_health(process_id)
+            health.consecutive_timeouts += 1
+            health.total_timeouts += 1
+            health.last_error = error
+            health.trial_in_progress = False
+            if health.state == self.HEALTHY and health.consecutive_timeouts >= self.failure_threshold:
+                health.state = self.DEGRADED
+                print(f"目标应用(PID: {process_id})连续{health.consecutive_timeouts}次调用超时，已标记为无响应")
+            if health.state == self.DEGRADED:
+                # 每次超时都重新计算试探调用的等待时间
+                health.degraded_since = time.time()
+        self._ensure_probe_thread()
+
+    def record_success(self, process_id):
+        """记录一次成功调用，降级的进程恢复为健康
+
+        Args:
+            process_id: 进程ID
+        """
+        if process_id is None:
+            return
+        with self._lock:
+            health = self._processes.get(process_id)
+            if health is None:
+                return
+            if health.state == self.DEGRADED:
+                print(f"目标应用(PID: {process_id})已恢复响应")
+            health.state = self.HEALTHY
+            health.consecutive_timeouts = 0
+            health.degraded_since = None
+            health.trial_in_progress = False
+
+    def is_degraded(self, process_id):
+        """进程是否处于降级状态"""
+        with self._lock:
+            health = self._processes.get(process_id)
+            return health is not None and health.state == self.DEGRADED
+
+    def get_status(self):
+        """获取所有已跟踪进程的健康状态
+
+        Returns:
+            字典，键为进程ID，值为状态字典
+        """
+        with self._lock:
+            return {
+                process_id: {
+                    'state': health.state,
+                    'consecutive_timeouts': health.consecutive_timeouts,
+                    'total_timeouts': health.total_timeouts,
+                    'degraded_since': health.degraded_since,
+                    'last_error': health.last_error,
+                    'last_probe': health.last_probe,
+                }
+                for process_id, health in self._processes.items()
+            }
+
+    def _ensure_probe_thread(self):
+        """启动后台健康探测线程"""
+        with self._lock:
+            if self._probe_thread is None or not self._probe_thread.is_alive():
+                self._stop_event.clear()
+                self._probe_thread = threading.Thread(target=self._probe_loop, name='app-health-probe', daemon=True)
+                self._probe_thread.start()
+
+    def _probe_loop(self):
+        """后台健康探测：定期探测降级进程的窗口是否恢复响应"""
+        while not self._stop_event.wait(self.probe_interval):
+            with self._lock:
+                targets = [(health.process_id, health.window_handle) for health in self._processes.values()
+                           if health.state == self.DEGRADED and health.window_handle]
+            for process_id, window_handle in targets:
+                responsive = self.probe_window(window_handle, self.probe_timeout)
+                with self._lock:
+                    self._get_health(process_id).last_probe = time.time()
+                if responsive:
+                    self.record_success(process_id)
+
+    @staticmethod
+    def probe_window(window_handle, timeout=0.5):
+        """探测窗口的消息循环是否响应
+
+        向窗口发送WM_NULL消息，窗口被系统判定为挂起或超时未处理时视为无响应。
+
+        Args:
+            window_handle: 窗口句柄
+            timeout: 超时时间，单位：秒
+
+        Returns:
+            窗口是否响应
+        """
+        try:
+            import win32con
+            import win32gui
+            win32gui.SendMessageTimeout(window_handle, win32con.WM_NULL, 0, 0,
+                                        win32con.SMTO_ABORTIFHUNG, int(timeout * 1000))
+            return True
+        except Exception:
+            return False
+
+    def shutdown(self):
+        """停止后台探测线程和守护线程池"""
+        self._stop_event.set()
+        if self._guard_pool is not None:
+            self._guard_pool.shutdown(wait=False)
+            self._guard_pool = None
+
+
+_app_health_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_app_health_monitor():
+    """获取全局目标应用健康监控，首次调用时创建
+
+    Returns:
+        AppHealthMonitor实例
+    """
+    global _app_health_monitor
+    with _monitor_lock:
+        if _app_health_monitor is None:
+            _app_health_monitor = AppHealthMonitor()
+        return _app_health_monitor
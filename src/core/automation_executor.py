@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自动化执行器模块
+由少量已初始化COM的工作线程统一执行pywinauto/uiautomation调用，GUI、API和插件按优先级提交任务
+"""
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+# 任务优先级，数值越小越先执行
+PRIORITY_INTERACTIVE = 0  # 交互操作，如捕获元素、测试定位
+PRIORITY_NORMAL = 10  # 普通操作，如分析窗口、展开节点
+PRIORITY_BACKGROUND = 20  # 后台操作，如刷新、预热
+
+
+class AutomationTimeoutError(FutureTimeoutError):
+    """自动化任务超时异常"""
+    pass
+
+
+def init_com_thread():
+    """初始化当前线程的COM环境，pywinauto的uia backend需要在每个线程中初始化COM
+
+    Returns:
+        是否初始化成功
+    """
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+        return True
+    except Exception:
+        return False
+
+
+def uninit_com_thread():
+    """释放当前线程的COM环境"""
+    try:
+        import pythoncom
+        pythoncom.CoUninitialize()
+    except Exception:
+        pass
+
+
+class _Job:
+    """执行器中的一个任务"""
+
+    def __init__(self, func, args, kwargs, priority, timeout, name):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.timeout = timeout
+        self.name = name or getattr(func, '__name__', 'job')
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        # 超时从提交时开始计算，排队时间也计入
+        self.deadline = self.submitted_at + timeout if timeout else None
+
+
+class AutomationExecutor:
+    """自动化执行器，提供优先级队列、Future、单任务超时和队列深度指标
+
+    工作线程无法被强制终止：任务超时后Future立即以AutomationTimeoutError结束，
+    卡住的工作线程在任务返回后退出，同时启动一个新的工作线程补充处理能力。
+    """
+
+    def __init__(self, num_workers=2, name='automation', watchdog_interval=0.05):
+        """初始化自动化执行器
+
+        Args:
+            num_workers: 工作线程数
+            name: 工作线程名称前缀
+            watchdog_interval: 超时检查间隔，单位：秒
+        """
+        self.num_workers = num_workers
+        self.name = name
+        self.watchdog_interval = watchdog_interval
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # 同优先级任务按提交顺序执行
+        self._lock = threading.Lock()
+        self._workers = {}  # 线程 -> 正在执行的任务
+        self._abandoned = set()  # 任务超时后被放弃的线程
+        self._worker_ids = itertools.count(1)
+        self._local = threading.local()
+        self._shutdown = False
+
+        self._metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'cancelled': 0,
+            'replaced_workers': 0,
+            'total_wait_ms': 0.0,
+            'total_run_ms': 0.0,
+        }
+        self._queued_by_priority = {}
+
+        for _ in range(num_workers):
+            self._start_worker()
+
+        self._watchdog = threading.Thread(target=self._watchdog_loop, name=f"{name}-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def _start_worker(self):
+        """启动一个工作线程"""
+        worker = threading.Thread(target=self._worker_loop, name=f"{self.name}-{next(self._worker_ids)}", daemon=True)
+        with self._lock:
+            self._workers[worker] = None
+        worker.start()
+
+    def submit(self, func, *args, priority=PRIORITY_NORMAL, timeout=None, name=None, **kwargs):
+        """提交任务
+
+        Args:
+            func: 要执行的函数
+            *args: 位置参数
+            priority: 优先级，PRIORITY_INTERACTIVE/PRIORITY_NORMAL/PRIORITY_BACKGROUND
+            timeout: 超时时间（秒），从提交时开始计算，None表示不限时
+            name: 任务名称，用于日志
+            **kwargs: 关键字参数
+
+        Returns:
+            concurrent.futures.Future对象
+        """
+        if self._shutdown:
+            raise RuntimeError("自动化执行器已关闭")
+
+        job = _Job(func, args, kwargs, priority, timeout, name)
+        with self._lock:
+            self._metrics['submitted'] += 1
+            self._queued_by_priority[priority] = self._queued_by_priority.get(priority, 0) + 1
+        self._queue.put((priority, next(self._sequence), job))
+        return job.future
+
+    def call(self, func, *args, priority=PRIORITY_NORMAL, timeout=None, name=None, **kwargs):
+        """提交任务并等待结果
+
+        在工作线程中调用时直接执行，避免任务等待自身所在线程造成死锁。
+
+        Args:
+            func: 要执行的函数
+            *args: 位置参数
+            priority: 优先级
+            timeout: 超时时间（秒）
+            name: 任务名称
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+
+        Raises:
+            AutomationTimeoutError: 任务超时
+        """
+        if self.is_worker_thread():
+            return func(*args, **kwargs)
+        future = self.submit(func, *args, priority=priority, timeout=timeout, name=name, **kwargs)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError as e:
+            if isinstance(e, AutomationTimeoutError):
+                raise
+            raise AutomationTimeoutError(f"自动化任务超时: {name or getattr(func, '__name__', 'job')}")
+
+    def is_worker_thread(self):
+        """当前线程是否为本执行器的工作线程"""
+        return getattr(self._local, 'is_worker', False)
+
+    def _worker_loop(self):
+        """工作线程主循环"""
+        self._local.is_worker = True
+        # 取到第一个任务时才初始化COM，执行器在启动时创建，不在首次绘制前导入pythoncom
+        com_initialized = None
+        current = threading.current_thread()
+        try:
+            while True:
+                _, _, job = self._queue.get()
+                if job is None:
+                    break
+                if com_initialized is None:
+                    com_initialized = init_com_thread()
+                self._run_job(current, job)
+                with self._lock:
+                    if current in self._abandoned:
+                        # 超时后已有新线程接替，当前线程退出
+                        self._abandoned.discard(current)
+                        break
+        finally:
+            with self._lock:
+                self._workers.pop(current, None)
+            if com_initialized:
+                uninit_com_thread()
+
+    def _run_job(self, worker, job):
+        """执行单个任务
+
+        Args:
+            worker: 执行任务的线程
+            job: 任务
+        """
+        with self._lock:
+            self._queued_by_priority[job.priority] -= 1
+
+        if not job.future.set_running_or_notify_cancel():
+            with self._lock:
+                self._metrics['cancelled'] += 1
+            return
+
+        job.started_at = time.perf_counter()
+        with self._lock:
+            self._metrics['total_wait_ms'] += (job.started_at - job.submitted_at) * 1000
+
+        # 排队期间已超时的任务不再执行
+        if job.deadline is not None and job.started_at >= job.deadline:
+            self._set_timeout(job)
+            return
+
+        with self._lock:
+            self._workers[worker] = job
+        try:
+            result = job.func(*job.args, **job.kwargs)
+        except BaseException as e:
+            self._finish(worker, job, exception=e)
+        else:
+            self._finish(worker, job, result=result)
+
+    def _finish(self, worker, job, result=None, exception=None):
+        """记录任务结果
+
+        Args:
+            worker: 执行任务的线程
+            job: 任务
+            result: 返回值
+            exception: 异常
+        """
+        with self._lock:
+            self._workers[worker] = None
+            self._metrics['total_run_ms'] += (time.perf_counter() - job.started_at) * 1000
+            if job.future.done():
+                # 已被超时检查结束
+                return
+            self._metrics['failed' if exception is not None else 'completed'] += 1
+        try:
+            if exception is not None:
+                job.future.set_exception(exception)
+            else:
+                job.future.set_result(result)
+        except Exception:
+            # 与超时检查同时结束任务时，以先到者为准
+            pass
+
+    def _set_timeout(self, job):
+        """以超时异常结束任务"""
+        with self._lock:
+            if job.future.done():
+                return
+            self._metrics['timed_out'] += 1
+        try:
+            job.future.set_exception(AutomationTimeoutError(f"自动化任务超时: {job.name}"))
+        except Exception:
+            pass
+
+    def _watchdog_loop(self):
+        """超时检查线程：结束超时的运行中任务，并用新线程替换被卡住的工作线程"""
+        while not self._shutdown:
+            time.sleep(self.watchdog_interval)
+            now = time.perf_counter()
+            with self._lock:
+                expired = [(worker, job) for worker, job in self._workers.items()
+                           if job is not None and job.deadline is not None and now >= job.deadline
+                           and not job.future.done() and worker not in self._abandoned]
+            for worker, job in expired:
+                print(f"自动化任务超时: {job.name}，已运行{(now - job.started_at):.1f}秒")
+                self._set_timeout(job)
+                with self._lock:
+                    self._abandoned.add(worker)
+                    self._metrics['replaced_workers'] += 1
+                if not self._shutdown:
+                    self._start_worker()
+
+    def get_metrics(self):
+        """获取执行器指标
+
+        Returns:
+            包含队列深度、运行中任务数、完成/失败/超时计数和平均等待/执行耗时的字典
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            started = metrics['completed'] + metrics['failed'] + metrics['timed_out']
+            metrics['queue_depth'] = sum(self._queued_by_priority.values())
+            metrics['queue_depth_by_priority'] = {priority: count for priority, count
+                                                  in sorted(self._queued_by_priority.items()) if count}
+            metrics['running'] = sum(1 for job in self._workers.values() if job is not None)
+            metrics['workers'] = len(self._workers) - len(self._abandoned)
+            metrics['avg_wait_ms'] = metrics['total_wait_ms'] / started if started else 0.0
+            metrics['avg_run_ms'] = metrics['total_run_ms'] / started if started else 0.0
+        return metrics
+
+    def shutdown(self, wait=True, timeout=None):
+        """关闭执行器，已提交的任务执行完后工作线程退出
+
+        Args:
+            wait: 是否等待工作线程退出
+            timeout: 等待每个工作线程的超时时间（秒）
+        """
+        if self._shutdown:
+            return
+        self._shutdown = True
+        with self._lock:
+            workers = list(self._workers)
+        # 哨兵任务排在所有任务之后
+        for _ in workers:
+            self._queue.put((float('inf'), next(self._sequence), None))
+        if wait:
+            for worker in workers:
+                worker.join(timeout)
+
+
+_automation_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_automation_executor():
+    """获取全局自动化执行器，首次调用时创建
+
+    Returns:
+        AutomationExecutor实例
+    """
+    global _automation_executor
+    with _executor_lock:
+        if _automation_executor is None:
+            _automation_executor = AutomationExecutor()
+        return _automation_executor
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自动化后端预热模块
+启动后在自动化工作线程中导入pywinauto/uiautomation、生成comtypes包装模块、初始化两个后端的UIA客户端，
+并预先连接当前选择的进程，避免用户第一次捕获元素时承担这些耗时
+"""
+
+import threading
+import time
+
+from utils.lazy_import import lazy_import, preload_modules
+from utils.startup_timeline import get_startup_timeline
+from .app_health import AppUnresponsiveError, get_app_health_monitor
+
+
+# 预热阶段状态
+PENDING = 'pending'
+RUNNING = 'running'
+READY = 'ready'
+FAILED = 'failed'
+
+# 预热阶段，connect阶段不影响后端是否就绪
+STAGE_IMPORT = 'import'
+STAGE_COMTYPES = 'comtypes'
+STAGE_PYWINAUTO = 'pywinauto'
+STAGE_UIAUTOMATION = 'uiautomation'
+STAGE_CONNECT = 'connect'
+BACKEND_STAGES = (STAGE_IMPORT, STAGE_COMTYPES, STAGE_PYWINAUTO, STAGE_UIAUTOMATION)
+
+# 预先导入的模块
+WARMUP_MODULES = ('pywinauto', 'uiautomation', 'win32gui', 'win32api', 'win32con', 'win32process',
+                  'pygetwindow')
+
+
+def _import_modules():
+    """导入自动化依赖"""
+    errors = preload_modules(WARMUP_MODULES)
+    if errors:
+        raise ImportError("; ".join(f"{name}: {error}" for name, error in errors.items()))
+
+
+def _generate_comtypes_wrappers():
+    """生成UIAutomationCore的comtypes包装模块，首次运行时需要读取类型库并写入comtypes.gen"""
+    from comtypes.client import GetModule
+    GetModule('UIAutomationCore.dll')
+
+
+def _init_pywinauto():
+    """创建pywinauto uia backend的UIA客户端和根元素"""
+    from pywinauto.uia_defines import IUIA
+    IUIA().root
+
+
+def _init_uiautomation():
+    """创建uiautomation的UIA客户端并读取根元素"""
+    auto = lazy_import('uiautomation')
+    auto.GetRootControl().Name
+
+
+def _connect_process(process_id):
+    """连接进程并读取第一个顶层窗口，目标进程的UIA提供程序随之加载"""
+    pywinauto = lazy_import('pywinauto')
+    app = pywinauto.Application(backend='uia').connect(process=process_id)
+    windows = app.windows()
+    if windows:
+        windows[0].element_info.name
+
+
+class BackendWarmup:
+    """自动化后端预热，记录各阶段的状态和耗时
+
+    run和connect应在自动化执行器的工作线程中调用；状态可在任意线程中读取。
+    """
+
+    def __init__(self, startup_timeline=None, connect_timeout=5.0):
+        """初始化后端预热
+
+        Args:
+            startup_timeline: 启动时间线，不为None时启动预热的各阶段同时记录到时间线
+            connect_timeout: 预先连接进程的超时时间，单位：秒
+        """
+        self.startup_timeline = startup_timeline
+        self.connect_timeout = connect_timeout
+        self._lock = threading.Lock()
+        self._stages = {name: self._new_stage() for name in BACKEND_STAGES + (STAGE_CONNECT,)}
+        self._ready = threading.Event()
+        self.process_id = None  # 已预先连接的进程ID
+        self._startup_done = False  # 启动预热是否已结束，之后切换进程时的预先连接不再记录到启动时间线
+
+    @staticmethod
+    def _new_stage():
+        return {'state': PENDING, 'duration_ms': None, 'error': None}
+
+    def run(self, process_id=None):
+        """依次执行各预热阶段，某个阶段失败时继续执行后续阶段
+
+        Args:
+            process_id: 要预先连接的进程ID，为None时跳过连接
+
+        Returns:
+            后端是否就绪
+        """
+        self._run_stage(STAGE_IMPORT, _import_modules)
+        self._run_stage(STAGE_COMTYPES, _generate_comtypes_wrappers)
+        self._run_stage(STAGE_PYWINAUTO, _init_pywinauto)
+        self._run_stage(STAGE_UIAUTOMATION, _init_uiautomation)
+        with self._lock:
+            ready = all(self._stages[name]['state'] == READY for name in BACKEND_STAGES)
+        if ready:
+            self._ready.set()
+        if process_id is not None:
+            self.connect(process_id)
+        self._startup_done = True
+        return ready
+
+    def connect(self, process_id):
+        """预先连接进程，已连接同一进程时跳过
+
+        Args:
+            process_id: 进程ID
+
+        Returns:
+            是否连接成功
+        """
+        with self._lock:
+            if process_id == self.process_id and self._stages[STAGE_CONNECT]['state'] == READY:
+                return True
+            self._stages[STAGE_CONNECT] = self._new_stage()
+
+        monitor = get_app_health_monitor()
+
+        def pre_connect():
+            # 已熔断的应用不连接；预先连接只是优化，超时不计入熔断，不会让用户的调用因此被拒绝
+            if monitor.is_degraded(process_id):
+                raise AppUnresponsiveError(process_id)
+            monitor.call(None, _connect_process, process_id, timeout=self.connect_timeout)
+
+        ok = self._run_stage(STAGE_CONNECT, pre_connect)
+        with self._lock:
+            self.process_id = process_id if ok else None
+        return ok
+
+    def _run_stage(self, name, func, *args, **kwargs):
+        """执行一个预热阶段并记录状态和耗时"""
+        with self._lock:
+            self._stages[name]['state'] = RUNNING
+        start = time.perf_counter()
+        timeline_start = self.startup_timeline.now() if self.startup_timeline else None
+        error = None
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"预热自动化后端失败 ({name}): {error}")
+        duration = time.perf_counter() - start
+        if self.startup_timeline is not None and not self._startup_done:
+            self.startup_timeline.record_phase(f"预热 {name}", timeline_start, duration)
+        with self._lock:
+            self._stages[name] = {
+                'state': FAILED if error else READY,
+                'duration_ms': round(duration * 1000, 1),
+                'error': error,
+            }
+        return error is None
+
+    def is_ready(self):
+        """后端是否已就绪（连接阶段除外的所有阶段都已成功）"""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        """等待后端就绪
+
+        Args:
+            timeout: 超时时间，单位：秒，None表示一直等待
+
+        Returns:
+            是否已就绪
+        """
+        return self._ready.wait(timeout)
+
+    def get_status(self):
+        """获取预热状态
+
+        Returns:
+            状态字典，包含是否就绪、已连接的进程ID、各阶段的状态和耗时（毫秒）及总耗时
+        """
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in self._stages.items()}
+            process_id = self.process_id
+        return {
+            'ready': self.is_ready(),
+            'process_id': process_id,
+            'stages': stages,
+            'total_ms': round(sum(stage['duration_ms'] or 0 for stage in stages.values()), 1),
+        }
+
+
+_backend_warmup = None
+_warmup_lock = threading.Lock()
+
+
+def get_backend_warmup():
+    """获取全局自动化后端预热对象，首次调用时创建，各阶段记录到全局启动时间线
+
+    Returns:
+        BackendWarmup实例
+    """
+    global _backend_warmup
+    with _warmup_lock:
+        if _backend_warmup is None:
+            _backend_warmup = BackendWarmup(get_startup_timeline())
+        return _backend_warmup
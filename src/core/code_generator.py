@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from utils.lazy_import import lazy_import
+
+win32gui = lazy_import('win32gui')
+win32con = lazy_import('win32con')
+
 
 class CodeGenerator:
     """定位代码生成器类"""
@@ -234,11 +239,13 @@ class CodeGenerator:
         
         return code
     
-    def generate_image_recognition_code(self, element):
+    def generate_image_recognition_code(self, element, roi=None):
         """生成图像识别定位代码
         
         Args:
             element: 元素对象
+            roi: 搜索区域，可以是窗口句柄、矩形 (left, top, right, bottom) 或父元素Element对象，
+                指定时生成的代码只截取该区域并将匹配坐标换算回屏幕坐标
             
         Returns:
             图像识别定位代码字符串
@@ -246,15 +253,37 @@ class CodeGenerator:
         if not element:
             return ""
         
-        code = f"# 图像识别定位代码\nimport cv2\nimport numpy as np\nfrom PIL import ImageGrab\nimport win32api\nimport win32con\n\n"
+        roi_code = self._build_image_roi_code(roi)
+        
+        code = f"# 图像识别定位代码\nimport cv2\nimport numpy as np\nfrom PIL import ImageGrab\nimport win32api\nimport win32con\n"
+        if "win32gui." in roi_code:
+            code += "import win32gui\n"
+        code += "\n"
         code += f"# 读取模板图像（需要提前截图保存）\ntemplate_path = 'element_template.png'\ntemplate = cv2.imread(template_path)\n\n"
-        code += f"# 获取屏幕截图\nscreenshot = ImageGrab.grab()\nscreenshot = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)\n\n"
-        code += f"# 模板匹配\nresult = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)\nmin_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)\n\n"
+        if roi_code:
+            code += roi_code
+            code += f"# 获取搜索区域截图\nscreenshot = ImageGrab.grab(bbox=roi, all_screens=True)\nscreenshot = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)\n\n"
+        else:
+            code += f"# 获取屏幕截图\nscreenshot = ImageGrab.grab()\nscreenshot = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)\n\n"
+        code += f"# 模板匹配：依次尝试100%/125%/150%显示缩放下的模板尺寸，取置信度最高的结果\n"
+        code += f"max_val, max_loc, match_size = -1.0, (0, 0), template.shape[:2]\n"
+        code += f"for scale in (1.0, 1.25, 1.5):\n"
+        code += f"    scaled = template if scale == 1.0 else cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)\n"
+        code += f"    if scaled.shape[0] > screenshot.shape[0] or scaled.shape[1] > screenshot.shape[1]:\n"
+        code += f"        continue\n"
+        code += f"    result = cv2.matchTemplate(screenshot, scaled, cv2.TM_CCOEFF_NORMED)\n"
+        code += f"    _, scale_val, _, scale_loc = cv2.minMaxLoc(result)\n"
+        code += f"    if scale_val > max_val:\n"
+        code += f"        max_val, max_loc, match_size = scale_val, scale_loc, scaled.shape[:2]\n\n"
         code += f"# 设置匹配阈值\nthreshold = 0.8\n\n"
         code += f"if max_val >= threshold:\n"
         code += f"    # 计算元素中心坐标\n"
-        code += f"    center_x = max_loc[0] + template.shape[1] // 2\n"
-        code += f"    center_y = max_loc[1] + template.shape[0] // 2\n\n"
+        if roi_code:
+            code += f"    center_x = roi[0] + max_loc[0] + match_size[1] // 2\n"
+            code += f"    center_y = roi[1] + max_loc[1] + match_size[0] // 2\n\n"
+        else:
+            code += f"    center_x = max_loc[0] + match_size[1] // 2\n"
+            code += f"    center_y = max_loc[1] + match_size[0] // 2\n\n"
         code += f"    # 移动鼠标到元素中心\n"
         code += f"    win32api.SetCursorPos((center_x, center_y))\n\n"
         code += f"    # 模拟鼠标点击\n"
@@ -265,6 +294,58 @@ class CodeGenerator:
         
         return code
     
+    def _build_image_roi_code(self, roi):
+        """构建图像识别搜索区域代码
+        
+        Args:
+            roi: 搜索区域，可以是窗口句柄、矩形 (left, top, right, bottom) 或父元素Element对象
+            
+        Returns:
+            搜索区域代码字符串，roi为None时返回空字符串
+        """
+        if roi is None:
+            return ""
+        
+        if isinstance(roi, int):
+            return self._build_window_roi_code(roi)
+        
+        if hasattr(roi, 'x') and hasattr(roi, 'width'):
+            # 父元素使用其矩形作为搜索区域
+            rect = (roi.x, roi.y, roi.x + roi.width, roi.y + roi.height)
+        else:
+            rect = tuple(roi)
+        
+        return f"# 搜索区域：屏幕矩形 (left, top, right, bottom)\nroi = {rect}\n\n"
+    
+    def _build_window_roi_code(self, hwnd):
+        """构建以窗口矩形为搜索区域的代码
+
+        窗口句柄每次启动目标应用都会变化，生成的代码在运行时按顶层窗口的类名和标题查找窗口，
+        子窗口使用其顶层窗口的矩形作为搜索区域。
+
+        Args:
+            hwnd: 窗口句柄
+
+        Returns:
+            搜索区域代码字符串，无法获取窗口类名和标题时返回空字符串（搜索整个屏幕）
+        """
+        try:
+            root = win32gui.GetAncestor(hwnd, win32con.GA_ROOT) or hwnd
+            class_name = win32gui.GetClassName(root) or None
+            title = win32gui.GetWindowText(root) or None
+        except Exception as e:
+            print(f"获取搜索区域窗口信息失败: {e}")
+            return ""
+        if class_name is None and title is None:
+            return ""
+
+        code = "# 搜索区域：目标窗口矩形 (left, top, right, bottom)，按窗口类名和标题查找窗口\n"
+        code += f"hwnd = win32gui.FindWindow({class_name!r}, {title!r})\n"
+        code += "if not hwnd:\n"
+        code += "    raise RuntimeError('未找到目标窗口，请确认应用已启动')\n"
+        code += "roi = win32gui.GetWindowRect(hwnd)\n\n"
+        return code
+
     def generate_pyautogui_code(self, element):
         """生成pyautogui定位代码
         
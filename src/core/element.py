@@ -35,6 +35,7 @@ class Element:
         # 其他属性
         self.process_id = None  # 所属进程ID
         self.window_handle = None  # 所属窗口句柄
+        self.runtime_id = None  # UIA运行时ID（元组），元素存在期间保持不变
         
         # 元素特定属性
         self.attributes = {}    # 其他自定义属性
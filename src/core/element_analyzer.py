@@ -1,13 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pywinauto
+import threading
+import weakref
+from collections import deque
 
+from utils.lazy_import import lazy_import
+from .app_health import get_app_health_monitor
 from .element import Element
+from .tree_compression import CompressedTree
+from .tree_snapshot import TreeSnapshot
+from .warm_start import SkeletonStore
+
+# pywinauto导入耗时较长，第一次使用时才导入
+pywinauto = lazy_import('pywinauto')
 
 
 class ElementAnalyzer:
     """元素分析器类，负责分析窗口的UI元素结构"""
+    
+    # 优先通过Grid模式按行号直接取子元素的控件类型
+    GRID_CONTROL_TYPES = ('DataGrid', 'Table', 'List', 'Tree')
+    # "更多"虚拟节点的元素类型
+    MORE_ELEMENT_TYPE = 'More'
 
     def __init__(self):
         self.max_depth = 10  # 最大分析深度
@@ -16,15 +31,58 @@ class ElementAnalyzer:
         # 元素树缓存，键为 (process_id, window_handle)，值为 (element_tree, timestamp)
         self.element_tree_cache = {}
         self.cache_expiry_time = 600  # 缓存过期时间，单位：秒（10分钟）
+        self.compress_trees = False  # 压缩模式：缓存中以共享结构的压缩树保存元素树
+        self.call_timeout = 10.0  # 单次后端调用的超时时间，单位：秒
+        
+        # 兄弟节点分页：子元素数量超过阈值时只加载一页，其余以"更多 (N)"虚拟节点表示
+        self.paging_threshold = 500
+        self.page_size = 200
+        self._page_parents = weakref.WeakKeyDictionary()  # "更多"虚拟节点 -> 父pywinauto元素
+        
+        # 预热启动：分析同一应用的窗口时先返回上次保存的骨架，再在后台校验
+        self.warm_start = True
+        self.skeleton_store = None  # 骨架存储，SkeletonStore对象
+        self._verifying = {}  # 窗口句柄 -> 正在后台校验的骨架根元素
+        self._verify_lock = threading.Lock()
+    
+    def _call_backend(self, process_id, func, *args, window_handle=None):
+        """带超时和熔断地调用后端函数，目标应用无响应时不会无限期阻塞
+        
+        Args:
+            process_id: 目标进程ID
+            func: 后端函数
+            *args: 位置参数
+            window_handle: 目标窗口句柄，用于后台健康探测
+            
+        Returns:
+            函数返回值
+        """
+        return get_app_health_monitor().call(process_id, func, *args, timeout=self.call_timeout,
+                                             window_handle=window_handle)
+    
+    def _get_skeleton_store(self):
+        """获取骨架存储"""
+        if self.skeleton_store is None:
+            self.skeleton_store = SkeletonStore()
+        return self.skeleton_store
     
-    def analyze_window(self, window):
-        """分析窗口的UI元素结构，支持缓存机制
+    def analyze_window(self, window, on_verified=None, on_progress=None, cancel_event=None, on_reconciled=None):
+        """分析窗口的UI元素结构，支持缓存机制和预热启动
+        
+        有同一应用（可执行文件、版本和窗口类名相同）保存的骨架时立即返回骨架，
+        骨架元素的attributes中带有unverified标记，后台校验完成后调用on_verified。
+        同一窗口的骨架正在校验时直接返回该骨架，不重复校验。
         
         Args:
             window: 窗口对象，包含hwnd属性
+            on_verified: 骨架校验完成后的回调函数，参数为校验后的根元素，在后台线程中调用
+            on_progress: 分析进度回调函数，参数为(父元素, 新添加的子元素列表)，连接窗口后先以(None, [根元素])调用；
+                使用缓存或骨架时不调用
+            cancel_event: threading.Event对象，设置后尽快停止分析并返回None
+            on_reconciled: 骨架校验时每校正一个元素的子元素列表后调用的回调函数，参数为该元素，在后台线程中调用
             
         Returns:
-            根元素对象，分析失败返回None
+            根元素对象，分析失败或取消时返回None
         """
         if not hasattr(window, 'hwnd'):
             print("无效的窗口对象")
@@ -48,64 +106,434 @@ class ElementAnalyzer:
                 cached_element_tree, cached_time = self.element_tree_cache[cache_key]
                 if current_time - cached_time < self.cache_expiry_time:
                     print(f"使用缓存的元素树，缓存时间: {time.ctime(cached_time)}")
+                    if isinstance(cached_element_tree, CompressedTree):
+                        return cached_element_tree.materialize()
                     return cached_element_tree
                 else:
                     # 缓存过期，删除缓存
                     print(f"缓存过期，重新分析窗口，过期时间: {time.ctime(cached_time)}")
                     del self.element_tree_cache[cache_key]
             
-            # 使用pywinauto分析窗口
-            app = pywinauto.Application(backend='uia').connect(handle=window_handle)
-            window_element = app.window(handle=window_handle)
+            # 预热启动：先返回保存的骨架，后台校验
+            with self._verify_lock:
+                skeleton = self._verifying.get(window_handle)
+            if skeleton is not None:
+                print("元素树骨架正在后台校验，使用同一骨架")
+                return skeleton
+            signature = self._get_skeleton_store().get_signature(window_handle, process_id) if self.warm_start else None
+            if signature is not None:
+                skeleton = self.skeleton_store.load(signature, window_handle, process_id)
+                if skeleton is not None:
+                    print("使用保存的元素树骨架，后台校验中")
+                    from .automation_executor import get_automation_executor, PRIORITY_BACKGROUND
+                    with self._verify_lock:
+                        self._verifying[window_handle] = skeleton
+                    get_automation_executor().submit(self.verify_skeleton, skeleton, window_handle, process_id,
+                                                     signature, on_verified, on_reconciled,
+                                                     priority=PRIORITY_BACKGROUND, name='verify_skeleton')
+                    return skeleton
             
-            # 转换为自定义Element对象
-            root_element = self._convert_pywinauto_to_element(window_element.element_info)
+            # 使用pywinauto分析窗口
+            window_element, root_element = self._connect_window(window_handle, process_id)
+            if on_progress is not None:
+                on_progress(None, [root_element])
             
             # 递归分析子元素
-            self._analyze_element_children(window_element, root_element, 1)
+            self._analyze_element_children(window_element, root_element, 1,
+                                           on_progress=on_progress, cancel_event=cancel_event)
+            
+            # 取消时元素树不完整，不缓存
+            if cancel_event is not None and cancel_event.is_set():
+                print("窗口分析已取消")
+                return None
             
             # 缓存元素树
-            self.element_tree_cache[cache_key] = (root_element, current_time)
-            print(f"元素树已缓存，缓存键: {cache_key}")
+            self._cache_tree(cache_key, root_element)
+            if signature is not None:
+                self.skeleton_store.save(signature, root_element)
             
             return root_element
         except Exception as e:
             print(f"分析窗口元素失败: {e}")
             return None
     
-    def _analyze_element_children(self, parent_pywinauto_element, parent_element, current_depth):
-        """递归分析元素的子元素，支持分层懒加载
+    def _connect_window(self, window_handle, process_id):
+        """连接窗口并转换根元素
+        
+        Args:
+            window_handle: 窗口句柄
+            process_id: 进程ID
+            
+        Returns:
+            (窗口pywinauto元素, 根元素对象)
+        """
+        def connect():
+            app = pywinauto.Application(backend='uia').connect(handle=window_handle)
+            window_element = app.window(handle=window_handle)
+            # 转换为自定义Element对象
+            return window_element, self._convert_pywinauto_to_element(window_element.element_info)
+        
+        return self._call_backend(process_id, connect, window_handle=window_handle)
+    
+    def _cache_tree(self, cache_key, root_element):
+        """缓存元素树
+        
+        Args:
+            cache_key: 缓存键 (process_id, window_handle)
+            root_element: 根元素对象
+        """
+        import time
+        
+        if self.compress_trees:
+            self.element_tree_cache[cache_key] = (self.compress_tree(root_element), time.time())
+        else:
+            self.element_tree_cache[cache_key] = (root_element, time.time())
+        print(f"元素树已缓存，缓存键: {cache_key}")
+    
+    def verify_skeleton(self, skeleton, window_handle, process_id, signature=None, on_verified=None,
+                        on_reconciled=None):
+        """逐层校验骨架元素树
+        
+        从根元素开始按层获取实际子元素并与骨架子元素对齐：对应上的元素更新属性并去掉未校验标记，
+        已不存在的元素被删除，新出现的元素被添加。骨架中已展开的子树都会被校验。
+        每个元素的子元素列表校正后整体替换，随后调用on_reconciled，之后不再修改该列表，
+        显示骨架的界面据此按层更新，不需要重新加载整棵树。
+        
+        Args:
+            skeleton: 骨架根元素
+            window_handle: 窗口句柄
+            process_id: 进程ID
+            signature: 应用签名，校验完成后重新保存骨架
+            on_verified: 校验完成后的回调函数，参数为根元素
+            on_reconciled: 每校正一个元素的子元素列表后调用的回调函数，参数为该元素
+            
+        Returns:
+            校验后的根元素，校验失败返回None
+        """
+        try:
+            window_element, root_element = self._connect_window(window_handle, process_id)
+            self._refresh_element(skeleton, root_element)
+            
+            queue = deque([(window_element, skeleton, 1)])
+            while queue:
+                parent_pywinauto_element, parent_element, depth = queue.popleft()
+                queue.extend(self._reconcile_children(parent_pywinauto_element, parent_element, depth))
+                if on_reconciled is not None:
+                    on_reconciled(parent_element)
+            
+            self._cache_tree((process_id, window_handle), skeleton)
+            if signature is not None:
+                self._get_skeleton_store().save(signature, skeleton)
+        except Exception as e:
+            print(f"校验元素树骨架失败: {e}")
+            return None
+        finally:
+            # 先调用完所有on_reconciled再结束校验状态，界面据此判断校验已结束
+            with self._verify_lock:
+                self._verifying.pop(window_handle, None)
+        
+        if on_verified is not None:
+            on_verified(skeleton)
+        return skeleton
+    
+    def is_verifying(self, root_element):
+        """元素树是否为正在后台校验的骨架
+        
+        Args:
+            root_element: 根元素对象
+            
+        Returns:
+            是否正在校验
+        """
+        with self._verify_lock:
+            return any(skeleton is root_element for skeleton in self._verifying.values())
+    
+    def _reconcile_children(self, parent_pywinauto_element, parent_element, depth):
+        """用实际子元素校正骨架元素的子元素
+        
+        Args:
+            parent_pywinauto_element: 父pywinauto元素
+            parent_element: 骨架中的父元素
+            depth: 子元素深度
+            
+        Returns:
+            需要继续校验的 (pywinauto元素, 元素, 子元素深度) 列表
+        """
+        if depth > self.max_depth:
+            return []
+        
+        def get_children():
+            page, total = self._get_children_page(parent_pywinauto_element, parent_element.control_type)
+            return [(child, self._convert_pywinauto_to_element(child.element_info)) for child in page], total
+        
+        children, total = self._call_backend(parent_element.process_id, get_children)
+        
+        # 按属性对齐：先完全匹配，名称变化的元素再按类型、automation_id和类名匹配
+        candidates = {}
+        for element in parent_element.children:
+            if element.attributes.get('unverified'):
+                for key in self._skeleton_keys(element):
+                    candidates.setdefault(key, []).append(element)
+        
+        matched = set()
+        new_children = []
+        pending = []
+        for child_pywinauto_element, live_element in children:
+            element = None
+            for key in self._skeleton_keys(live_element):
+                element = next((item for item in candidates.get(key, []) if id(item) not in matched), None)
+                if element is not None:
+                    break
+            
+            if element is not None:
+                matched.add(id(element))
+                self._refresh_element(element, live_element)
+            else:
+                element = live_element
+            element.parent = parent_element
+            element.depth = depth
+            new_children.append(element)
+            
+            if depth < self.initial_load_depth or element.children:
+                pending.append((child_pywinauto_element, element, depth + 1))
+            else:
+                element.has_children = True
+        
+        # 一次性替换子元素列表，界面使用校验开始时的副本，收到on_reconciled后再按差异更新
+        parent_element.children = new_children
+        parent_element.has_children = False
+        if len(children) < total:
+            self._page_parents[self._create_more_element(parent_element, len(children), total)] = \
+                parent_pywinauto_element
+        return pending
+    
+    @staticmethod
+    def _skeleton_keys(element):
+        """骨架元素对齐所用的键，按优先级排列"""
+        return [
+            ('exact', element.element_type, element.automation_id, element.name, element.class_name),
+            ('renamed', element.element_type, element.automation_id, element.class_name),
+        ]
+    
+    @staticmethod
+    def _refresh_element(element, live_element):
+        """用实际元素的属性更新骨架元素，保留骨架元素的子元素
+        
+        Args:
+            element: 骨架元素
+            live_element: 实际元素
+        """
+        for field in ('name', 'text', 'x', 'y', 'width', 'height', 'is_enabled', 'is_visible', 'is_checked',
+                      'runtime_id', 'process_id', 'window_handle'):
+            setattr(element, field, getattr(live_element, field))
+        element.attributes.pop('unverified', None)
+    
+    def _analyze_element_children(self, parent_pywinauto_element, parent_element, current_depth, start=0,
+                                  on_progress=None, cancel_event=None):
+        """递归分析元素的子元素，支持分层懒加载和兄弟节点分页
         
         Args:
             parent_pywinauto_element: 父pywinauto元素
             parent_element: 父自定义元素
             current_depth: 当前深度
+            start: 从第几个子元素开始加载，用于加载后续分页
+            on_progress: 进度回调函数，每个父元素的一页子元素添加完成后以(父元素, 新添加的子元素列表)调用
+            cancel_event: threading.Event对象，设置后停止分析
         """
         if current_depth > self.max_depth:
             return
+        if cancel_event is not None and cancel_event.is_set():
+            return
         
         try:
-            # 获取子元素
-            children_pywinauto_elements = parent_pywinauto_element.children()
+            # 获取子元素并转换为自定义Element对象，读取属性也是跨进程调用，一并受超时保护
+            def get_children():
+                page, total = self._get_children_page(parent_pywinauto_element, parent_element.control_type, start)
+                return [(child, self._convert_pywinauto_to_element(child.element_info)) for child in page], total
+            
+            children, total = self._call_backend(parent_element.process_id, get_children)
+            loaded_count = len(parent_element.children)
             
-            for child_pywinauto_element in children_pywinauto_elements:
-                # 转换为自定义Element对象
-                child_element = self._convert_pywinauto_to_element(child_pywinauto_element.element_info)
+            for child_pywinauto_element, child_element in children:
                 child_element.depth = current_depth
                 
                 # 添加到父元素
                 parent_element.add_child(child_element)
                 
-                # 检查是否需要加载子元素
-                if current_depth < self.initial_load_depth:
-                    # 当前深度小于初始加载深度，递归加载子元素
-                    self._analyze_element_children(child_pywinauto_element, child_element, current_depth + 1)
-                else:
-                    # 当前深度达到初始加载深度，标记该元素有子元素但未加载
+                # 当前深度达到初始加载深度，标记该元素有子元素但未加载
+                if current_depth >= self.initial_load_depth:
                     child_element.has_children = True
+            
+            # 还有未加载的子元素时，添加"更多"虚拟节点
+            next_start = start + len(children)
+            if next_start < total:
+                more_element = self._create_more_element(parent_element, next_start, total)
+                self._page_parents[more_element] = parent_pywinauto_element
+            
+            if on_progress is not None:
+                on_progress(parent_element, parent_element.children[loaded_count:])
+            
+            # 当前深度小于初始加载深度，递归加载子元素
+            if current_depth < self.initial_load_depth:
+                for child_pywinauto_element, child_element in children:
+                    self._analyze_element_children(child_pywinauto_element, child_element, current_depth + 1,
+                                                   on_progress=on_progress, cancel_event=cancel_event)
         except Exception as e:
             print(f"分析子元素失败: {e}")
     
+    def _get_children_page(self, parent_pywinauto_element, control_type, start=0):
+        """获取一页子元素
+        
+        子元素数量不超过分页阈值且从头加载时返回全部子元素，否则返回从start开始的一页。
+        支持Grid模式的表格和列表按行号直接取行，不枚举前面的行；
+        其他控件一次取回子元素引用数组，只为当前页创建pywinauto元素。
+        
+        Args:
+            parent_pywinauto_element: 父pywinauto元素
+            control_type: 父元素的控件类型
+            start: 起始序号
+            
+        Returns:
+            (当前页的pywinauto元素列表, 子元素总数)
+        """
+        try:
+            from pywinauto.uia_defines import IUIA
+        except Exception:
+            IUIA = None
+        parent = getattr(parent_pywinauto_element.element_info, 'element', None)
+        if IUIA is None or parent is None:
+            # win32 backend等没有UIA元素的情况，只能枚举全部子元素
+            children = parent_pywinauto_element.children()
+            return children[start:], len(children)
+        
+        if control_type in self.GRID_CONTROL_TYPES:
+            grid = self._get_pattern(parent, 'Grid')
+            if grid is not None:
+                total = grid.CurrentRowCount
+                if total > self.paging_threshold:
+                    end = min(total, start + self.page_size)
+                    return [self._wrap_uia_element(self._get_grid_row(parent, grid, row))
+                            for row in range(start, end)], total
+        
+        iuia = IUIA()
+        elements = parent.FindAll(iuia.tree_scope['children'], iuia.true_condition)
+        total = elements.Length
+        if start == 0 and total <= self.paging_threshold:
+            end = total
+        else:
+            end = min(total, start + self.page_size)
+        return [self._wrap_uia_element(elements.GetElement(index)) for index in range(start, end)], total
+    
+    @staticmethod
+    def _get_pattern(uia_element, pattern_name):
+        """获取UIA元素的控件模式接口，不支持时返回None"""
+        try:
+            from pywinauto.uia_defines import get_elem_interface
+            return get_elem_interface(uia_element, pattern_name)
+        except Exception:
+            return None
+    
+    def _get_grid_row(self, parent, grid, row):
+        """通过Grid模式直接获取第row行对应的子元素
+        
+        GetItem返回单元格，向上查找到父元素的直接子元素（行）；
+        虚拟化的行会先被实例化。
+        
+        Args:
+            parent: 父UIA元素
+            grid: Grid模式接口
+            row: 行号
+            
+        Returns:
+            UIA元素
+        """
+        from pywinauto.uia_defines import IUIA
+        
+        iuia = IUIA().iuia
+        walker = iuia.RawViewWalker
+        element = grid.GetItem(row, 0)
+        # 单元格可能嵌套在行中，最多向上查找几层
+        for _ in range(3):
+            ancestor = walker.GetParentElement(element)
+            if not ancestor or iuia.CompareElements(ancestor, parent):
+                break
+            element = ancestor
+        
+        virtualized = self._get_pattern(element, 'VirtualizedItem')
+        if virtualized is not None:
+            try:
+                virtualized.Realize()
+            except Exception:
+                pass
+        return element
+    
+    @staticmethod
+    def _wrap_uia_element(uia_element):
+        """将UIA元素包装为pywinauto元素"""
+        from pywinauto.controls.uiawrapper import UIAWrapper
+        from pywinauto.uia_element_info import UIAElementInfo
+        return UIAWrapper(UIAElementInfo(uia_element))
+    
+    def _create_more_element(self, parent_element, start, total):
+        """创建表示剩余子元素的"更多 (N)"虚拟节点并添加到父元素
+        
+        Args:
+            parent_element: 父元素
+            start: 下一页的起始序号
+            total: 子元素总数
+            
+        Returns:
+            虚拟节点元素
+        """
+        more_element = Element()
+        more_element.element_type = self.MORE_ELEMENT_TYPE
+        more_element.name = f"更多 ({total - start})"
+        more_element.process_id = parent_element.process_id
+        more_element.window_handle = parent_element.window_handle
+        more_element.attributes = {'virtual': 'more', 'page_start': start, 'total': total}
+        parent_element.add_child(more_element)
+        return more_element
+    
+    def is_more_element(self, element):
+        """是否为"更多"虚拟节点
+        
+        Args:
+            element: 元素对象
+            
+        Returns:
+            是否为虚拟节点
+        """
+        return element is not None and element.attributes.get('virtual') == 'more'
+    
+    def load_more_children(self, more_element, parent_pywinauto_element=None):
+        """加载"更多"虚拟节点代表的下一页子元素
+        
+        Args:
+            more_element: "更多"虚拟节点
+            parent_pywinauto_element: 父pywinauto元素，默认使用分析时记录的父元素
+            
+        Returns:
+            新加载的子元素列表，可能以新的"更多"虚拟节点结尾；加载失败时返回空列表并保留虚拟节点，可以重试
+        """
+        parent_element = more_element.parent
+        if parent_pywinauto_element is None:
+            parent_pywinauto_element = self._page_parents.get(more_element)
+        if parent_element is None or parent_pywinauto_element is None:
+            return []
+        if more_element not in parent_element.children:
+            # 已被其他加载替换
+            return []
+        
+        # 新的一页追加在虚拟节点之后，加载成功后才移除虚拟节点
+        loaded_count = len(parent_element.children)
+        self._analyze_element_children(parent_pywinauto_element, parent_element, parent_element.depth + 1,
+                                       start=more_element.attributes['page_start'])
+        loaded = parent_element.children[loaded_count:]
+        if loaded:
+            parent_element.children.remove(more_element)
+            self._page_parents.pop(more_element, None)
+        return loaded
+    
     def _convert_pywinauto_to_element(self, pywinauto_element_info):
         """将pywinauto元素信息转换为自定义Element对象
         
@@ -141,9 +569,72 @@ class ElementAnalyzer:
         # 其他属性
         element.process_id = pywinauto_element_info.process_id
         element.window_handle = pywinauto_element_info.handle
+        try:
+            element.runtime_id = tuple(pywinauto_element_info.runtime_id)
+        except Exception:
+            element.runtime_id = None  # win32 backend没有运行时ID
         
         return element
     
+    def compress_tree(self, root_element):
+        """压缩元素树并按结构计算稳定性评分
+        
+        Args:
+            root_element: 根元素对象
+            
+        Returns:
+            CompressedTree对象，还原出的元素已包含稳定性评分和定位策略
+        """
+        compressed_tree = CompressedTree(root_element)
+        compressed_tree.analyze(self)
+        stats = compressed_tree.get_stats()
+        print(f"元素树已压缩: {stats['nodes']}个节点，{stats['shapes']}种结构")
+        return compressed_tree
+    
+    def save_snapshot(self, root_element, path, metadata=None):
+        """将元素树保存为二进制快照文件，用于离线查看、搜索和比较
+        
+        Args:
+            root_element: 根元素对象
+            path: 快照文件路径
+            metadata: 附加的元数据字典
+            
+        Returns:
+            写入的节点数
+        """
+        return TreeSnapshot.write(path, root_element, metadata)
+    
+    def snapshot_window(self, window_handle, path, metadata=None):
+        """重新分析窗口并保存为快照文件
+        
+        不使用缓存的元素树和保存的骨架，快照反映窗口当前的元素树，可用于元素树比较。
+        
+        Args:
+            window_handle: 窗口句柄
+            path: 快照文件路径
+            metadata: 附加的元数据字典
+            
+        Returns:
+            写入的节点数
+        """
+        import win32process
+        
+        _, process_id = win32process.GetWindowThreadProcessId(window_handle)
+        window_element, root_element = self._connect_window(window_handle, process_id)
+        self._analyze_element_children(window_element, root_element, 1)
+        return self.save_snapshot(root_element, path, metadata)
+    
+    def load_snapshot(self, path):
+        """以内存映射方式打开快照文件，节点按需读取
+        
+        Args:
+            path: 快照文件路径
+            
+        Returns:
+            TreeSnapshot对象
+        """
+        return TreeSnapshot(path)
+    
     def get_element_path(self, element):
         """获取元素的定位路径
         
@@ -2,14 +2,18 @@
 # -*- coding: utf-8 -*-
 
 import time
-import win32gui
-import win32con
-import win32api
-import pywinauto
-import uiautomation as auto
 
+from utils.lazy_import import lazy_import
+from .app_health import AppUnresponsiveError, get_app_health_monitor
 from .element import Element
 
+# 自动化依赖导入耗时较长，第一次使用时才导入
+win32gui = lazy_import('win32gui')
+win32con = lazy_import('win32con')
+win32api = lazy_import('win32api')
+pywinauto = lazy_import('pywinauto')
+auto = lazy_import('uiautomation')
+
 
 class ElementCapture:
     """元素捕获核心逻辑类"""
@@ -21,12 +25,16 @@ class ElementCapture:
     def capture_element(self):
         """捕获元素
         
+        可以在独立线程中运行：等待Ctrl键的轮询不占用自动化执行器的工作线程，
+        只有鼠标所在位置的元素查找提交到执行器中执行。
+        
         Returns:
             捕获到的元素对象，没有捕获到返回None
         """
         print("开始捕获元素，请将鼠标移动到目标元素上，按下Ctrl键确认...")
         
         self.capturing = True
+        self.last_captured_element = None
         captured_element = None
         
         try:
@@ -38,8 +46,10 @@ class ElementCapture:
                 # 获取鼠标下的窗口
                 hwnd = win32gui.WindowFromPoint((x, y))
                 if hwnd:
-                    # 使用pywinauto获取元素
-                    element = self._get_element_by_coordinate(hwnd, x, y)
+                    # 使用pywinauto获取元素，UIA调用在自动化执行器的工作线程中进行
+                    from .automation_executor import get_automation_executor, PRIORITY_INTERACTIVE
+                    element = get_automation_executor().call(self._get_element_by_coordinate, hwnd, x, y,
+                                                             priority=PRIORITY_INTERACTIVE, name='capture_point')
                     if element:
                         self.last_captured_element = element
                         print(f"捕获到元素: {element}")
@@ -136,13 +146,17 @@ class ElementCapture:
         Returns:
             元素对象，获取失败返回None
         """
-        try:
-            # 使用pywinauto获取元素
+        def from_point():
             app = pywinauto.Application(backend=backend).connect(handle=hwnd)
             window = app.window(handle=hwnd)
             element = window.from_point((x, y))
             if element:
                 return self._convert_pywinauto_to_element(element)
+            return None
+        
+        try:
+            # 使用pywinauto获取元素，目标应用无响应时超时返回
+            return get_app_health_monitor().call_for_window(hwnd, from_point, timeout=self.call_timeout)
         except Exception as e:
             print(f"使用{backend} backend获取元素失败: {e}")
         
@@ -211,6 +225,10 @@ class ElementCapture:
         # 其他属性
         element.process_id = automation_element.ProcessId
         element.window_handle = automation_element.NativeWindowHandle
+        try:
+            element.runtime_id = tuple(automation_element.GetRuntimeId())
+        except Exception:
+            element.runtime_id = None
         
         return element
     
@@ -249,14 +267,19 @@ class ElementCapture:
         # 其他属性
         element.process_id = pywinauto_element.element_info.process_id
         element.window_handle = pywinauto_element.element_info.handle
+        try:
+            element.runtime_id = tuple(pywinauto_element.element_info.runtime_id)
+        except Exception:
+            element.runtime_id = None
         
         return element
     
-    def test_element_location(self, element):
+    def test_element_location(self, element, cancel_event=None):
         """测试元素定位是否有效
         
         Args:
             element: 元素对象
+            cancel_event: threading.Event对象，被设置后在下一次尝试前放弃定位
             
         Returns:
             定位是否成功
@@ -287,17 +310,27 @@ class ElementCapture:
                 backends = ['uia', 'win32']  # 默认先尝试uia backend
             
             print(f"测试定位: 应用类型={app_type}, 尝试backends={backends}")
+            monitor = get_app_health_monitor()
             
             # 尝试不同的backend
             for backend in backends:
+                if cancel_event is not None and cancel_event.is_set():
+                    print("测试定位已取消")
+                    return False
                 try:
                     # 使用pywinauto测试定位
                     print(f"尝试使用{backend} backend定位...")
-                    app = pywinauto.Application(backend=backend).connect(handle=element.window_handle)
-                    window = app.window(handle=element.window_handle)
+                    
+                    def connect():
+                        app = pywinauto.Application(backend=backend).connect(handle=element.window_handle)
+                        window = app.window(handle=element.window_handle)
+                        return window, window.exists()
+                    
+                    window, window_exists = monitor.call_for_window(element.window_handle, connect,
+                                                                    timeout=self.call_timeout)
                     
                     # 检查窗口是否存在
-                    if not window.exists():
+                    if not window_exists:
                         print(f"{backend} backend: 窗口不存在")
                         continue
                     
@@ -335,17 +368,26 @@ class ElementCapture:
                     
                     # 尝试不同的定位条件
                     for condition_name, conditions in conditions_list:
+                        if cancel_event is not None and cancel_event.is_set():
+                            print("测试定位已取消")
+                            return False
                         try:
                             print(f"  尝试条件: {condition_name} = {conditions}")
                             found_element = window.child_window(**conditions)
-                            if found_element.exists():
+                            if monitor.call_for_window(element.window_handle, found_element.exists,
+                                                       timeout=self.call_timeout):
                                 print(f"  ✓ 使用{backend} backend的{condition_name}定位成功")
+                                self._update_located_element(element, found_element)
                                 return True
                             else:
                                 print(f"  ✗ 使用{backend} backend的{condition_name}定位失败，元素不存在")
+                        except AppUnresponsiveError:
+                            raise
                         except Exception as e:
                             print(f"  ✗ 使用{backend} backend的{condition_name}定位失败: {type(e).__name__}: {str(e)}")
                     
+                except AppUnresponsiveError:
+                    raise
                 except Exception as e:
                     error_type = type(e).__name__
                     error_msg = str(e)
@@ -360,6 +402,9 @@ class ElementCapture:
             print("3. 考虑使用图像识别定位")
             print("4. 确认应用程序没有更新或重启")
             return False
+        except AppUnresponsiveError as e:
+            print(f"测试定位失败: {e}")
+            return False
         except Exception as e:
             error_type = type(e).__name__
             error_msg = str(e)
@@ -371,86 +416,411 @@ class ElementCapture:
             print("4. 检查应用是否具有UIA支持")
             return False
     
+    def _update_located_element(self, element, found_element):
+        """用定位到的控件更新元素的位置和运行时ID，供定位结果缓存校验使用
+        
+        Args:
+            element: 元素对象
+            found_element: pywinauto定位到的控件
+        """
+        def read_located():
+            wrapper = found_element.wrapper_object()
+            rect = wrapper.rectangle()
+            try:
+                runtime_id = tuple(wrapper.element_info.runtime_id)
+            except Exception:
+                runtime_id = None  # win32 backend没有运行时ID
+            return (rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top), runtime_id
+
+        try:
+            # 跨进程调用，带超时和熔断执行
+            rect, runtime_id = get_app_health_monitor().call_for_window(element.window_handle, read_located,
+                                                                        timeout=self.call_timeout)
+        except Exception as e:
+            print(f"  获取定位到的控件位置失败: {e}")
+            return
+        element.x, element.y, element.width, element.height = rect
+        element.runtime_id = runtime_id
+    
     def __init__(self):
         self.capturing = False
         self.last_captured_element = None
-        self.template_cache = {}  # 模板缓存
-        self.screenshot_cache = None  # 截图缓存
-        self.screenshot_time = 0  # 截图时间
+        self.template_store = None  # 模板磁盘缓存，TemplateStore对象
+        self.screenshot_cache = None  # 截图缓存，ScreenFrame对象
+        self.screenshot_max_age = 0.5  # 截图缓存有效期，单位：秒
+        self.roi_frame_cache = {}  # 区域截图缓存，键为屏幕矩形，值为ScreenFrame对象
+        self.frame_provider = None  # 屏幕帧提供者，FrameProvider对象
+        self.image_match_cache = {}  # 图像识别结果缓存，键为 (图像路径, 搜索区域, 匹配方式, 置信度)，值为 (帧序号, 模板, 元素)
+        self._orb = None  # 复用的ORB特征检测器
+        self._matcher = None  # 复用的特征匹配器
+        self._template_matcher = None  # 多尺度模板匹配引擎
+        # 默认图像匹配方式: 'template' 或 'feature'；早期版本默认为'feature'，需要原来的行为时设置为'feature'
+        self.image_match_method = 'template'
+        self.call_timeout = 5.0  # 单次后端调用的超时时间，单位：秒
+    
+    def _get_orb(self):
+        """获取复用的ORB特征检测器"""
+        if self._orb is None:
+            import cv2
+            self._orb = cv2.ORB_create()
+        return self._orb
+    
+    def _get_matcher(self):
+        """获取复用的BFMatcher特征匹配器"""
+        if self._matcher is None:
+            import cv2
+            self._matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        return self._matcher
+    
+    def _get_template_matcher(self):
+        """获取复用的多尺度模板匹配引擎"""
+        if self._template_matcher is None:
+            from .template_matcher import TemplateMatcher
+            self._template_matcher = TemplateMatcher()
+        return self._template_matcher
+    
+    def _get_frame_provider(self):
+        """获取屏幕帧提供者"""
+        if self.frame_provider is None:
+            from .frame_provider import ImageGrabFrameProvider
+            self.frame_provider = ImageGrabFrameProvider()
+        return self.frame_provider
+    
+    def _get_template_store(self):
+        """获取模板磁盘缓存"""
+        if self.template_store is None:
+            from .template_store import TemplateStore
+            self.template_store = TemplateStore()
+        return self.template_store
     
-    def capture_element_by_image(self, image_path, confidence=0.8):
-        """通过图像识别捕获元素，使用SIFT/ORB特征匹配
+    def _template_params(self):
+        """影响模板预处理结果的参数，参数变化时磁盘缓存自动失效"""
+        matcher = self._get_template_matcher()
+        orb = self._get_orb()
+        return {
+            'version': 1,
+            'contrast_alpha': 1.2,
+            'scales': list(matcher.scales),
+            'max_levels': matcher.max_levels,
+            'min_template_size': matcher.min_template_size,
+            'orb_features': orb.getMaxFeatures(),
+        }
+    
+    def _resolve_roi(self, roi):
+        """将搜索区域参数转换为屏幕坐标矩形
+        
+        Args:
+            roi: 搜索区域，可以是窗口句柄、矩形 (left, top, right, bottom) 或父元素Element对象
+            
+        Returns:
+            屏幕坐标矩形 (left, top, right, bottom)，roi为None时返回None
+        """
+        if roi is None:
+            return None
+        if isinstance(roi, Element):
+            return (roi.x, roi.y, roi.x + roi.width, roi.y + roi.height)
+        if isinstance(roi, int):
+            return tuple(win32gui.GetWindowRect(roi))
+        if len(roi) == 4:
+            return tuple(int(value) for value in roi)
+        raise ValueError(f"无效的搜索区域: {roi}")
+    
+    def capture_frame(self, max_age=None, roi=None):
+        """获取屏幕帧，带缓存机制
+        
+        同一帧上的灰度图和特征点只计算一次，可将返回的帧传给多次图像查找共享。
+        
+        Args:
+            max_age: 缓存帧的最大有效期，单位：秒，默认使用screenshot_max_age
+            roi: 搜索区域，可以是窗口句柄、矩形 (left, top, right, bottom) 或父元素Element对象，
+                指定时只截取该区域
+            
+        Returns:
+            ScreenFrame对象，搜索区域不在屏幕内时返回None
+        """
+        if max_age is None:
+            max_age = self.screenshot_max_age
+        
+        current_time = time.time()
+        rect = self._resolve_roi(roi)
+        
+        if rect is not None:
+            # 全屏缓存未过期且包含该区域时直接裁剪，不再截图
+            if (self.screenshot_cache is not None and not self.screenshot_cache.is_expired(max_age, current_time)
+                    and self.screenshot_cache.contains(rect)):
+                return self.screenshot_cache.crop(rect)
+            
+            # 清理过期的区域截图缓存
+            self.roi_frame_cache = {key: frame for key, frame in self.roi_frame_cache.items()
+                                    if not frame.is_expired(max_age, current_time)}
+            if rect not in self.roi_frame_cache:
+                # 只截取搜索区域
+                frame = self._get_frame_provider().grab(rect)
+                if frame is None:
+                    return None
+                self.roi_frame_cache[rect] = frame
+            return self.roi_frame_cache[rect]
+        
+        if self.screenshot_cache is None or self.screenshot_cache.is_expired(max_age, current_time):
+            # 缓存过期，重新截图
+            self.screenshot_cache = self._get_frame_provider().grab()
+        
+        return self.screenshot_cache
+    
+    def _load_template(self, image_path):
+        """读取模板并提取特征，结果保存在按内容寻址的磁盘缓存中
+        
+        Args:
+            image_path: 图像文件路径
+            
+        Returns:
+            (模板图像, 模板灰度图, 模板特征点, 模板描述符, 多尺度金字塔模板)，读取失败返回None
+        """
+        return self._get_template_store().load(image_path, self._template_params(),
+                                               lambda: self._build_template(image_path))
+    
+    def _build_template(self, image_path):
+        """解码模板图像，预处理并提取特征
+        
+        Args:
+            image_path: 图像文件路径
+            
+        Returns:
+            (模板图像, 模板灰度图, 模板特征点, 模板描述符, 多尺度金字塔模板)，读取失败返回None
+        """
+        import cv2
+        
+        # 读取模板图像
+        template = cv2.imread(image_path)
+        if template is None:
+            print("无法读取模板图像")
+            return None
+        
+        # 图像预处理：裁剪边缘冗余区域、调整对比度
+        template = self._preprocess_image(template)
+        
+        # 转换为灰度图
+        template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        
+        # 使用复用的ORB特征检测器提取特征
+        template_kp, template_des = self._get_orb().detectAndCompute(template_gray, None)
+        
+        # 生成各缩放比例的模板金字塔
+        prepared_template = self._get_template_matcher().prepare(template_gray)
+        
+        return template, template_gray, template_kp, template_des, prepared_template
+    
+    def capture_element_by_image(self, image_path, confidence=0.8, frame=None, roi=None, method=None,
+                                 cancel_event=None):
+        """通过图像识别捕获元素，支持多尺度模板匹配和ORB特征匹配
         
         Args:
             image_path: 图像文件路径
             confidence: 识别置信度
+            frame: 共享的屏幕帧，默认使用capture_frame()获取的缓存帧
+            roi: 搜索区域，可以是窗口句柄、矩形 (left, top, right, bottom) 或父元素Element对象，
+                特征提取前先裁剪到该区域，结果坐标仍为屏幕坐标
+            method: 匹配方式，'template'为金字塔多尺度NCC模板匹配，'feature'为ORB特征匹配，
+                默认使用image_match_method
+            cancel_event: threading.Event对象，被设置后尽快放弃匹配，如并发定位中其他策略已成功
             
         Returns:
-            元素对象，识别失败返回None
+            元素对象，识别失败或被取消返回None
         """
         try:
-            import cv2
-            import numpy as np
-            from PIL import ImageGrab
-            import time
-            
-            # 检查模板缓存
-            if image_path in self.template_cache:
-                # 使用缓存的模板和特征
-                template, template_gray, template_kp, template_des = self.template_cache[image_path]
-            else:
-                # 读取模板图像
-                template = cv2.imread(image_path)
-                if template is None:
-                    print("无法读取模板图像")
-                    return None
-                
-                # 图像预处理：裁剪边缘冗余区域、调整对比度
-                template = self._preprocess_image(template)
-                
-                # 转换为灰度图
-                template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-                
-                # 使用ORB特征检测器提取特征
-                orb = cv2.ORB_create()
-                template_kp, template_des = orb.detectAndCompute(template_gray, None)
-                
-                # 缓存模板和特征
-                self.template_cache[image_path] = (template, template_gray, template_kp, template_des)
-            
-            # 获取屏幕截图，带缓存机制
-            current_time = time.time()
-            if self.screenshot_cache is None or current_time - self.screenshot_time > 0.5:
-                # 超过0.5秒，重新截图
-                screenshot = ImageGrab.grab()
-                self.screenshot_cache = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-                self.screenshot_time = current_time
-            
-            # 使用缓存的截图
-            screenshot = self.screenshot_cache
-            screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-            
-            # 特征匹配
-            max_val, max_loc, matched_template = self._feature_match(screenshot, screenshot_gray, template, template_kp, template_des)
-            
-            if max_val >= confidence:
-                # 创建元素对象
-                element = Element()
-                element.element_type = "ImageMatched"
-                element.x = max_loc[0]
-                element.y = max_loc[1]
-                element.width = matched_template.shape[1]
-                element.height = matched_template.shape[0]
-                element.name = f"ImageMatched_{max_val:.2f}"
-                
-                return element
-            else:
-                print(f"图像匹配置信度不足: {max_val:.2f} < {confidence}")
+            cached = self._load_template(image_path)
+            if cached is None:
+                return None
+            template, template_gray, template_kp, template_des, prepared_template = cached
+            
+            # 获取屏幕帧，帧上的特征点只提取一次
+            if frame is None:
+                frame = self.capture_frame(roi=roi)
+            elif roi is not None:
+                frame = frame.crop(self._resolve_roi(roi))
+            
+            if frame is None:
+                print("搜索区域不在屏幕范围内")
+                return None
+            
+            method = method or self.image_match_method
+            
+            # 搜索区域自上次匹配以来未变化时直接复用上次的结果
+            cache_key = (image_path, frame.rect, method, confidence)
+            cached_result = self.image_match_cache.get(cache_key)
+            if (cached_result is not None and cached_result[1] is prepared_template and frame.frame_id is not None
+                    and self.frame_provider is not None
+                    and not self.frame_provider.changed_since(cached_result[0], frame.rect, frame)):
+                return cached_result[2]
+            
+            element = self._match_image(frame, method, confidence, template, template_kp, template_des,
+                                        prepared_template, cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                # 被取消的匹配结果不完整，不缓存
                 return None
+            if frame.frame_id is not None:
+                self._cache_image_match(cache_key, frame.frame_id, prepared_template, element)
+            return element
         except Exception as e:
             print(f"图像识别捕获元素失败: {e}")
             return None
     
+    def _cache_image_match(self, cache_key, frame_id, prepared_template, element):
+        """缓存图像识别结果，同时清理基准帧已被淘汰、无法再做变化检测的结果
+        
+        Args:
+            cache_key: 缓存键
+            frame_id: 匹配所用帧的序号
+            prepared_template: 匹配所用的模板，模板文件变化后缓存失效
+            element: 识别结果
+        """
+        if len(self.image_match_cache) >= 256 and self.frame_provider is not None:
+            self.image_match_cache = {key: value for key, value in self.image_match_cache.items()
+                                      if self.frame_provider.get_frame(value[0]) is not None}
+        self.image_match_cache[cache_key] = (frame_id, prepared_template, element)
+    
+    def _match_image(self, frame, method, confidence, template, template_kp, template_des, prepared_template,
+                     cancel_event=None):
+        """在帧上匹配模板
+        
+        Args:
+            frame: 屏幕帧
+            method: 匹配方式，'template'或'feature'
+            confidence: 识别置信度
+            template: 模板图像
+            template_kp: 模板特征点
+            template_des: 模板特征描述符
+            prepared_template: 多尺度金字塔模板
+            cancel_event: 取消事件
+            
+        Returns:
+            元素对象，识别失败或被取消返回None
+        """
+        if method == 'template':
+            # 金字塔多尺度模板匹配，置信度为NCC值
+            result = self._get_template_matcher().match(frame, prepared_template, confidence,
+                                                        cancel_event=cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if result is None:
+                print(f"图像匹配失败: 未找到置信度不低于{confidence}的匹配")
+                return None
+            return self._create_image_matched_element(frame, result)
+            
+        # 特征匹配
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        max_val, max_loc, matched_template = self._feature_match(frame, template, template_kp, template_des)
+        
+        if max_val >= confidence:
+            # 创建元素对象
+            element = Element()
+            element.element_type = "ImageMatched"
+            element.x, element.y = frame.to_screen(max_loc[0], max_loc[1])
+            element.width = matched_template.shape[1]
+            element.height = matched_template.shape[0]
+            element.name = f"ImageMatched_{max_val:.2f}"
+            
+            return element
+        else:
+            print(f"图像匹配置信度不足: {max_val:.2f} < {confidence}")
+            return None
+    
+    def _create_image_matched_element(self, frame, result):
+        """将模板匹配结果转换为元素对象
+        
+        Args:
+            frame: 匹配所用的屏幕帧
+            result: MatchResult对象（帧内坐标）
+            
+        Returns:
+            元素对象，坐标为屏幕坐标
+        """
+        element = Element()
+        element.element_type = "ImageMatched"
+        element.x, element.y = frame.to_screen(result.x, result.y)
+        element.width = result.width
+        element.height = result.height
+        element.name = f"ImageMatched_{result.confidence:.2f}"
+        element.attributes['confidence'] = result.confidence
+        element.attributes['scale'] = result.scale
+        return element
+    
+    def capture_elements_by_image(self, image_paths, confidence=0.8, frame=None, roi=None):
+        """在同一帧上批量识别多个模板
+        
+        所有模板共享一帧截图及其特征点，定位N个图标只需一次特征提取。
+        
+        Args:
+            image_paths: 图像文件路径列表
+            confidence: 识别置信度
+            frame: 共享的屏幕帧，默认使用capture_frame()获取的缓存帧
+            roi: 搜索区域，可以是窗口句柄、矩形 (left, top, right, bottom) 或父元素Element对象
+            
+        Returns:
+            字典，键为图像文件路径，值为元素对象或None
+        """
+        # 先裁剪出共享的子帧，避免每个模板重复裁剪和提取特征
+        try:
+            if frame is None:
+                frame = self.capture_frame(roi=roi)
+            elif roi is not None:
+                frame = frame.crop(self._resolve_roi(roi))
+        except Exception as e:
+            print(f"获取屏幕帧失败: {e}")
+            frame = None
+        
+        if frame is None:
+            return {image_path: None for image_path in image_paths}
+        
+        return {image_path: self.capture_element_by_image(image_path, confidence, frame=frame)
+                for image_path in image_paths}
+    
+    def find_all_by_image(self, template, roi=None, max_results=50, confidence=0.8, frame=None, sort_by='position'):
+        """查找屏幕上模板的所有匹配，如列表中的所有复选框、工具栏中的重复图标
+        
+        每个缩放比例的响应图只计算一次，取所有高于阈值的峰值并做非极大值抑制。
+        
+        Args:
+            template: 图像文件路径，或BGR/灰度格式的模板图像（NumPy数组）
+            roi: 搜索区域，可以是窗口句柄、矩形 (left, top, right, bottom) 或父元素Element对象
+            max_results: 最多返回的匹配数量
+            confidence: 识别置信度
+            frame: 共享的屏幕帧，默认使用capture_frame()获取的缓存帧
+            sort_by: 排序方式，'position'为从上到下、从左到右，'score'为按置信度从高到低
+            
+        Returns:
+            元素对象列表，识别失败返回空列表
+        """
+        try:
+            if isinstance(template, str):
+                cached = self._load_template(template)
+                if cached is None:
+                    return []
+                prepared_template = cached[4]
+            else:
+                import cv2
+                template_gray = template if template.ndim == 2 else cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+                prepared_template = self._get_template_matcher().prepare(template_gray)
+            
+            if frame is None:
+                frame = self.capture_frame(roi=roi)
+            elif roi is not None:
+                frame = frame.crop(self._resolve_roi(roi))
+            
+            if frame is None:
+                print("搜索区域不在屏幕范围内")
+                return []
+            
+            results = self._get_template_matcher().match_all(frame, prepared_template, confidence, max_results)
+            if sort_by == 'position':
+                results.sort(key=lambda r: (r.y, r.x))
+            
+            return [self._create_image_matched_element(frame, result) for result in results]
+        except Exception as e:
+            print(f"图像识别查找所有匹配失败: {e}")
+            return []
+    
     def _preprocess_image(self, image):
         """图像预处理
         
@@ -479,33 +849,30 @@ class ElementCapture:
         
         return adjusted
     
-    def _feature_match(self, screenshot, screenshot_gray, template, template_kp, template_des):
+    def _feature_match(self, frame, template, template_kp, template_des):
         """使用ORB特征匹配图像
         
         Args:
-            screenshot: 截图图像（彩色）
-            screenshot_gray: 截图图像（灰度）
+            frame: 屏幕帧（ScreenFrame），帧上的特征点会被缓存复用
             template: 模板图像（彩色）
             template_kp: 模板特征点
             template_des: 模板特征描述符
             
         Returns:
-            (匹配置信度, 匹配位置, 匹配的模板图像)
+            (匹配置信度, 帧内匹配位置, 匹配的模板图像)
         """
         import cv2
         import numpy as np
         
-        # 使用ORB特征检测器提取截图特征
-        orb = cv2.ORB_create()
-        screenshot_kp, screenshot_des = orb.detectAndCompute(screenshot_gray, None)
+        # 获取帧的特征点，同一帧只提取一次
+        screenshot_kp, screenshot_des = frame.get_features(self._get_orb())
         
         # 检查是否检测到特征点
         if len(screenshot_kp) < 10 or len(template_kp) < 10:
             return 0.0, (0, 0), template
         
-        # 使用BFMatcher进行特征匹配
-        bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-        matches = bf.match(template_des, screenshot_des)
+        # 使用复用的BFMatcher进行特征匹配
+        matches = self._get_matcher().match(template_des, screenshot_des)
         
         # 根据匹配距离排序
         matches = sorted(matches, key=lambda x: x.distance)
@@ -543,8 +910,8 @@ class ElementCapture:
         # 确保坐标在截图范围内
         min_x = max(0, min_x)
         min_y = max(0, min_y)
-        max_x = min(screenshot.shape[1], max_x)
-        max_y = min(screenshot.shape[0], max_y)
+        max_x = min(frame.width, max_x)
+        max_y = min(frame.height, max_y)
         
         return confidence, (min_x, min_y), template
     
@@ -674,27 +1041,25 @@ class ElementCapture:
             hwnd = win32gui.WindowFromPoint((mouse_x, mouse_y))
             
             if hwnd:
-                # 使用pywinauto获取窗口内的所有元素
-                app = pywinauto.Application(backend='uia').connect(handle=hwnd)
-                window = app.window(handle=hwnd)
-                
-                # 获取所有子元素
-                all_elements = window.descendants()
-                
-                for pywinauto_element in all_elements:
-                    # 获取元素的位置和尺寸
-                    rect = pywinauto_element.rectangle()
-                    element_left = rect.left
-                    element_top = rect.top
-                    element_right = rect.right
-                    element_bottom = rect.bottom
+                def get_elements():
+                    # 使用pywinauto获取窗口内的所有元素
+                    app = pywinauto.Application(backend='uia').connect(handle=hwnd)
+                    window = app.window(handle=hwnd)
                     
-                    # 检查元素是否在区域内
-                    if (element_right >= left and element_left <= right and
-                        element_bottom >= top and element_top <= bottom):
-                        # 转换为自定义Element对象
-                        element = self._convert_pywinauto_to_element(pywinauto_element)
-                        elements.append(element)
+                    # 获取所有子元素
+                    found = []
+                    for pywinauto_element in window.descendants():
+                        # 获取元素的位置和尺寸
+                        rect = pywinauto_element.rectangle()
+                        
+                        # 检查元素是否在区域内
+                        if (rect.right >= left and rect.left <= right and
+                            rect.bottom >= top and rect.top <= bottom):
+                            # 转换为自定义Element对象
+                            found.append(self._convert_pywinauto_to_element(pywinauto_element))
+                    return found
+                
+                elements = get_app_health_monitor().call_for_window(hwnd, get_elements, timeout=self.call_timeout)
         except Exception as e:
             print(f"获取区域内元素失败: {e}")
         
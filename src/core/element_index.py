@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树搜索索引模块
+为已分析的整个元素树（包括尚未在界面中展开的元素）建立按元素类型和名称搜索的索引，
+支持子串、前缀和正则表达式三种匹配方式，搜索结果以生成器逐个返回
+"""
+
+import re
+from bisect import bisect_right
+
+
+SUBSTRING = 'substring'
+PREFIX = 'prefix'
+REGEX = 'regex'
+SEARCH_MODES = (SUBSTRING, PREFIX, REGEX)
+
+# 索引文本中元素之间、元素类型和名称之间的分隔符
+_ELEMENT_SEP = '\x00'
+_FIELD_SEP = '\x01'
+
+
+class _Chunk:
+    """一批元素的索引文本
+
+    文本为每个元素的 "\\x00类型\\x01名称"（小写）依次拼接，offsets[i]为第i个元素文本的起始位置，
+    子串和前缀搜索直接在整段文本上查找，再按位置二分查找对应的元素。
+    """
+
+    def __init__(self, base, elements):
+        self.base = base  # 第一个元素在索引中的序号
+        parts = []
+        self.offsets = []
+        position = 0
+        for element in elements:
+            text = f"{_ELEMENT_SEP}{(element.element_type or '').lower()}{_FIELD_SEP}{(element.name or '').lower()}"
+            self.offsets.append(position)
+            parts.append(text)
+            position += len(text)
+        self.text = ''.join(parts)
+
+    def find(self, needle):
+        """查找包含needle的元素序号，按序号递增返回
+
+        Args:
+            needle: 查找的文本
+
+        Returns:
+            元素序号生成器
+        """
+        text = self.text
+        last = -1
+        position = text.find(needle)
+        while position >= 0:
+            index = bisect_right(self.offsets, position) - 1
+            if index != last:
+                last = index
+                yield self.base + index
+            # 同一元素的其他匹配位置不再重复返回
+            next_offset = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(text)
+            position = text.find(needle, max(position + 1, next_offset))
+
+
+class ElementIndex:
+    """元素树搜索索引
+
+    索引只追加：新加载的子元素通过add_subtree加入，"更多"虚拟节点不加入索引。
+    元素树被替换时应新建索引。
+    """
+
+    def __init__(self, root_element=None, chunk_size=4096):
+        """初始化搜索索引
+
+        Args:
+            root_element: 根元素对象，不为None时索引整棵树
+            chunk_size: 每段索引文本包含的元素数量
+        """
+        self.chunk_size = chunk_size
+        self.elements = []
+        self._indexed = set()
+        self._chunks = []
+        self._pending = []  # 尚未生成索引文本的元素
+        if root_element is not None:
+            self.add_subtree(root_element)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __contains__(self, element):
+        return element in self._indexed
+
+    def add_subtree(self, element):
+        """将元素及其已加载的子孙元素加入索引，已在索引中的元素跳过
+
+        Args:
+            element: 子树根元素
+
+        Returns:
+            新加入的元素数量
+        """
+        added = 0
+        stack = [element]
+        while stack:
+            current = stack.pop()
+            if current.attributes.get('virtual') == 'more':
+                continue
+            if current not in self._indexed:
+                self._indexed.add(current)
+                self.elements.append(current)
+                self._pending.append(current)
+                added += 1
+            # 子元素列表可能正在工作线程中追加，复制后再遍历
+            stack.extend(reversed(list(current.children)))
+        return added
+
+    def _flush(self):
+        """为新加入的元素生成索引文本"""
+        pending = self._pending
+        if not pending:
+            return
+        base = len(self.elements) - len(pending)
+        # 补齐最后一段未满的索引文本，避免增量加载产生大量很小的段
+        if self._chunks and len(self._chunks[-1].offsets) < self.chunk_size:
+            last = self._chunks.pop()
+            base = last.base
+            pending = self.elements[base:base + len(last.offsets)] + pending
+        for start in range(0, len(pending), self.chunk_size):
+            self._chunks.append(_Chunk(base + start, pending[start:start + self.chunk_size]))
+        self._pending = []
+
+    def search(self, query, mode=SUBSTRING):
+        """按元素类型或名称搜索
+
+        Args:
+            query: 搜索文本，子串和前缀匹配不区分大小写
+            mode: 匹配方式，substring/prefix/regex
+
+        Returns:
+            匹配元素的生成器，按加入索引的顺序返回
+
+        Raises:
+            ValueError: 不支持的匹配方式或无效的正则表达式
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"不支持的匹配方式: {mode}")
+        if mode == REGEX:
+            try:
+                pattern = re.compile(query, re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"无效的正则表达式: {e}")
+            return self._search_regex(pattern)
+        self._flush()
+        return self._search_text(query.lower(), mode == PREFIX)
+
+    def _search_text(self, keyword, prefix):
+        """子串或前缀搜索"""
+        if not keyword or _ELEMENT_SEP in keyword or _FIELD_SEP in keyword:
+            return
+        if prefix:
+            needles = (_ELEMENT_SEP + keyword, _FIELD_SEP + keyword)
+        else:
+            needles = (keyword,)
+        for chunk in list(self._chunks):
+            if len(needles) == 1:
+                hits = chunk.find(needles[0])
+            else:
+                hits = sorted(set(chunk.find(needles[0])) | set(chunk.find(needles[1])))
+            for index in hits:
+                yield self.elements[index]
+
+    def _search_regex(self, pattern):
+        """正则表达式搜索，逐个元素匹配类型和名称"""
+        for element in list(self.elements):
+            if pattern.search(element.element_type or '') or pattern.search(element.name or ''):
+                yield element
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素定位到元素树模块
+维护元素树中元素的身份映射（UIA运行时ID，或从根元素开始的路径），
+并将新捕获的元素解析为元素树中的节点，需要时按祖先链逐层加载子元素
+"""
+
+
+def step_key(element):
+    """元素在路径中的一级：控件类型，以及automation_id、名称或类名"""
+    return element.control_type or element.element_type, element.automation_id or element.name or element.class_name or ''
+
+
+def matches(node, descriptor):
+    """元素树节点是否与实际元素对应
+
+    双方都有运行时ID且节点已校验时比较运行时ID，否则比较路径中的一级。
+
+    Args:
+        node: 元素树节点
+        descriptor: 实际元素
+
+    Returns:
+        是否对应
+    """
+    if node.runtime_id and descriptor.runtime_id and not node.attributes.get('unverified'):
+        return tuple(node.runtime_id) == tuple(descriptor.runtime_id)
+    return step_key(node) == step_key(descriptor)
+
+
+def find_child(node, descriptor):
+    """在节点已加载的子元素中查找与实际元素对应的子元素
+
+    Args:
+        node: 元素树节点
+        descriptor: 实际元素
+
+    Returns:
+        子元素，未找到返回None
+    """
+    for child in list(node.children):
+        if child.attributes.get('virtual') != 'more' and matches(child, descriptor):
+            return child
+    return None
+
+
+class ElementIdentityMap:
+    """元素身份映射，按运行时ID或路径O(1)查找元素树中的节点
+
+    映射只追加：新加载的子元素通过add_subtree加入，元素树被替换时应新建映射。
+    """
+
+    def __init__(self, root_element=None):
+        """初始化身份映射
+
+        Args:
+            root_element: 根元素对象，不为None时加入整棵树
+        """
+        self._by_runtime_id = {}
+        self._by_path = {}
+        self._paths = {}  # 元素 -> 路径
+        if root_element is not None:
+            self.add_subtree(root_element)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def add_subtree(self, element):
+        """将元素及其已加载的子孙元素加入映射，已在映射中的元素跳过
+
+        Args:
+            element: 子树根元素，其父元素应已在映射中（根元素除外）
+        """
+        parent_path = self._paths.get(element.parent, ()) if element.parent is not None else ()
+        stack = [(element, parent_path)]
+        while stack:
+            current, parent_path = stack.pop()
+            if current.attributes.get('virtual') == 'more':
+                continue
+            path = self._paths.get(current)
+            if path is None:
+                path = self._paths[current] = parent_path + (step_key(current),)
+                self._by_path.setdefault(path, current)
+                # 骨架元素的运行时ID来自上次运行，校验前不可信
+                if current.runtime_id and not current.attributes.get('unverified'):
+                    self._by_runtime_id[tuple(current.runtime_id)] = current
+            # 子元素列表可能正在工作线程中追加，复制后再遍历
+            stack.extend((child, path) for child in list(current.children))
+
+    def lookup(self, element):
+        """按运行时ID查找元素对应的节点
+
+        Args:
+            element: 元素对象，如新捕获的元素
+
+        Returns:
+            元素树节点，未找到返回None
+        """
+        if not element.runtime_id:
+            return None
+        return self._by_runtime_id.get(tuple(element.runtime_id))
+
+    def lookup_path(self, chain):
+        """按祖先链查找节点
+
+        Args:
+            chain: 从顶层窗口到目标元素的元素列表
+
+        Returns:
+            元素树节点，未找到返回None
+        """
+        return self._by_path.get(tuple(step_key(element) for element in chain))
+
+
+class ElementResolver:
+    """将新捕获的元素解析到元素树，实际的UIA调用在自动化执行器的工作线程中进行"""
+
+    def __init__(self, analyzer):
+        """初始化元素解析器
+
+        Args:
+            analyzer: ElementAnalyzer对象，用于转换元素和加载子元素
+        """
+        self.analyzer = analyzer
+
+    def get_ancestor_chain(self, element):
+        """获取实际元素从顶层窗口到元素本身的祖先链
+
+        按元素中心点重新获取UIA元素，有运行时ID时校验是否为同一元素，再沿原始视图逐级向上。
+
+        Args:
+            element: 捕获到的元素对象，需要包含位置和尺寸
+
+        Returns:
+            [(pywinauto元素, 元素对象), ...]，从顶层窗口开始，获取失败返回空列表
+        """
+        if element.x is None or element.y is None:
+            return []
+
+        def get_chain():
+            from pywinauto.uia_defines import IUIA
+            from pywinauto.uia_element_info import UIAElementInfo
+
+            x = element.x + (element.width or 0) // 2
+            y = element.y + (element.height or 0) // 2
+            info = UIAElementInfo.from_point(x, y)
+            if element.runtime_id and tuple(info.runtime_id) != tuple(element.runtime_id):
+                # 元素已被遮挡或移动
+                return []
+
+            iuia = IUIA()
+            uia_elements = []
+            current = info.element
+            while current and not iuia.iuia.CompareElements(current, iuia.root):
+                uia_elements.append(current)
+                current = iuia.raw_tree_walker.GetParentElement(current)
+            uia_elements.reverse()
+
+            chain = []
+            for uia_element in uia_elements:
+                wrapper = self.analyzer._wrap_uia_element(uia_element)
+                chain.append((wrapper, self.analyzer._convert_pywinauto_to_element(wrapper.element_info)))
+            return chain
+
+        try:
+            return self.analyzer._call_backend(element.process_id, get_chain)
+        except Exception as e:
+            print(f"获取元素祖先链失败: {e}")
+            return []
+
+    def load_children(self, node, parent_pywinauto_element, descriptor):
+        """为查找下一级元素加载节点的子元素，目标在后续分页中时继续加载分页
+
+        Args:
+            node: 元素树节点
+            parent_pywinauto_element: 节点对应的pywinauto元素
+            descriptor: 要查找的下一级实际元素
+
+        Returns:
+            找到的子元素，未找到返回None
+        """
+        if not node.children:
+            self.analyzer._analyze_element_children(parent_pywinauto_element, node, node.depth + 1)
+        child = find_child(node, descriptor)
+        while child is None:
+            more = next((c for c in node.children if self.analyzer.is_more_element(c)), None)
+            if more is None or not self.analyzer.load_more_children(more, parent_pywinauto_element):
+                break
+            child = find_child(node, descriptor)
+        return child
@@ -4,19 +4,31 @@ import json
 import os
 from datetime import datetime
 
+from .write_behind import WriteBehindJournal, atomic_write_text
+
 
 class FavoritesManager:
-    """元素收藏夹管理器"""
+    """元素收藏夹管理器
+
+    收藏夹以内存中的列表为准，修改后把快照追加到写后日志，由后台线程只写入最新的快照。
+    """
 
-    def __init__(self, favorites_file='favorites.json'):
+    def __init__(self, favorites_file='favorites.json', flush_interval=1.0, flush_threshold=50):
         """初始化收藏夹管理器
         
         Args:
             favorites_file: 收藏夹文件路径
+            flush_interval: 修改最多在日志中等待的时间，单位：秒
+            flush_threshold: 日志中的修改达到该数量时立即写入
         """
         self.favorites_file = os.path.join(os.path.dirname(__file__), '..', 'data', favorites_file)
         self._ensure_data_directory()
         self.favorites = self._load_favorites()
+        # 多个快照只需写入最后一个，无法写入的快照保存到错误日志中
+        error_log = os.path.join(os.path.dirname(self.favorites_file), 'favorites_errors.log')
+        self.journal = WriteBehindJournal(self._write_favorites, interval=flush_interval,
+                                          max_pending=flush_threshold, coalesce=lambda snapshots: snapshots[-1:],
+                                          name='favorites-writer', error_log=error_log)
     
     def _ensure_data_directory(self):
         """确保数据目录存在"""
@@ -41,13 +53,35 @@ class FavoritesManager:
             return []
     
     def _save_favorites(self):
-        """保存收藏夹"""
+        """保存收藏夹，序列化当前收藏夹后在后台写入文件"""
         try:
-            with open(self.favorites_file, 'w', encoding='utf-8') as f:
-                json.dump(self.favorites, f, ensure_ascii=False, indent=2)
+            self.journal.append(json.dumps(self.favorites, ensure_ascii=False, indent=2))
         except Exception as e:
             print(f"保存收藏夹失败: {e}")
     
+    def _write_favorites(self, snapshots):
+        """写入最新的收藏夹快照，在写入线程中调用
+        
+        Args:
+            snapshots: 收藏夹快照列表
+        """
+        atomic_write_text(self.favorites_file, snapshots[-1])
+    
+    def flush(self, timeout=None):
+        """将未写入的收藏夹修改写入文件
+        
+        Args:
+            timeout: 最长等待时间，单位：秒
+            
+        Returns:
+            是否写入完成
+        """
+        return self.journal.flush(timeout)
+    
+    def close(self):
+        """写入所有未写入的收藏夹修改"""
+        self.journal.close()
+    
     def add_favorite(self, element, tags=None):
         """添加元素到收藏夹
         
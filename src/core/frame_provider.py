@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+屏幕帧提供者模块
+统一截图来源，以不额外复制的方式交付NumPy帧，并通过瓦片哈希回答"某区域自第N帧以来是否变化"
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .screen_frame import ScreenFrame
+
+
+class FrameProvider:
+    """屏幕帧提供者基类
+
+    子类只需实现_grab_image()。每次截图得到的帧会分配递增的帧序号，
+    并保留最近若干帧用于变化检测。
+    """
+
+    def __init__(self, tile_size=64, history=4):
+        """初始化帧提供者
+
+        Args:
+            tile_size: 变化检测的瓦片边长，单位：像素
+            history: 保留的历史帧数量
+        """
+        self.tile_size = tile_size
+        self.history = history
+        self._frames = OrderedDict()  # 帧序号 -> ScreenFrame
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def _grab_image(self, rect):
+        """截取屏幕图像
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)，None表示主屏幕
+
+        Returns:
+            (BGR图像, 图像左上角的屏幕坐标)
+        """
+        raise NotImplementedError
+
+    def grab(self, rect=None):
+        """截取一帧
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)，None表示主屏幕
+
+        Returns:
+            ScreenFrame对象，矩形为空时返回None
+        """
+        if rect is not None and (rect[2] <= rect[0] or rect[3] <= rect[1]):
+            return None
+
+        image, origin = self._grab_image(rect)
+        frame = ScreenFrame(image, time.time(), origin)
+        with self._lock:
+            frame.frame_id = self._next_id
+            self._next_id += 1
+            self._frames[frame.frame_id] = frame
+            while len(self._frames) > self.history:
+                self._frames.popitem(last=False)
+        return frame
+
+    def get_frame(self, frame_id):
+        """获取仍保留在历史中的帧
+
+        Args:
+            frame_id: 帧序号
+
+        Returns:
+            ScreenFrame对象，已被淘汰时返回None
+        """
+        with self._lock:
+            return self._frames.get(frame_id)
+
+    @property
+    def latest(self):
+        """最近一次截取的帧"""
+        with self._lock:
+            return next(reversed(self._frames.values()), None)
+
+    def changed_since(self, frame_id, rect=None, frame=None):
+        """检查区域自第frame_id帧以来是否变化
+
+        两帧覆盖相同屏幕区域时比较瓦片哈希，否则直接比较区域像素。
+        无法确定时（历史帧已淘汰、区域不在帧内）按已变化处理。
+
+        Args:
+            frame_id: 作为基准的帧序号
+            rect: 屏幕坐标矩形 (left, top, right, bottom)，默认为整帧
+            frame: 用于比较的帧，默认为最近一帧
+
+        Returns:
+            区域是否变化
+        """
+        old_frame = self.get_frame(frame_id)
+        new_frame = frame if frame is not None else self.latest
+        if old_frame is None or new_frame is None:
+            return True
+        if old_frame is new_frame or old_frame.image is new_frame.image:
+            return False
+
+        if rect is None:
+            if old_frame.rect != new_frame.rect:
+                return True
+            rect = new_frame.rect
+        elif not (old_frame.contains(rect) and new_frame.contains(rect)):
+            return True
+
+        if old_frame.rect == new_frame.rect:
+            return (old_frame.get_tile_hashes(rect, self.tile_size) !=
+                    new_frame.get_tile_hashes(rect, self.tile_size))
+
+        return not np.array_equal(old_frame.crop(rect).image, new_frame.crop(rect).image)
+
+    def changed_tiles(self, frame_id, frame=None):
+        """获取自第frame_id帧以来变化的瓦片
+
+        Args:
+            frame_id: 作为基准的帧序号
+            frame: 用于比较的帧，默认为最近一帧
+
+        Returns:
+            变化瓦片的屏幕坐标矩形列表，两帧覆盖区域不同时返回None
+        """
+        old_frame = self.get_frame(frame_id)
+        new_frame = frame if frame is not None else self.latest
+        if old_frame is None or new_frame is None or old_frame.rect != new_frame.rect:
+            return None
+
+        old_hashes = old_frame.get_tile_hashes(tile_size=self.tile_size)
+        new_hashes = new_frame.get_tile_hashes(tile_size=self.tile_size)
+        size = self.tile_size
+        return [(col * size, row * size, (col + 1) * size, (row + 1) * size)
+                for (col, row), value in new_hashes.items() if old_hashes.get((col, row)) != value]
+
+
+class ImageGrabFrameProvider(FrameProvider):
+    """基于PIL.ImageGrab的帧提供者
+
+    PIL直接按BGR顺序导出像素，np.frombuffer零复制包装为数组，
+    避免np.array()与cv2.cvtColor()各产生一次整帧复制。
+    """
+
+    def _grab_image(self, rect):
+        """截取屏幕图像
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)，None表示主屏幕
+
+        Returns:
+            (BGR图像, 图像左上角的屏幕坐标)
+        """
+        from PIL import ImageGrab
+
+        if rect is None:
+            screenshot = ImageGrab.grab()
+            origin = (0, 0)
+        else:
+            # 支持多显示器的负坐标
+            screenshot = ImageGrab.grab(bbox=rect, all_screens=True)
+            origin = (rect[0], rect[1])
+        return self.image_to_array(screenshot), origin
+
+    @staticmethod
+    def image_to_array(image):
+        """将PIL图像转换为BGR格式的NumPy数组，只产生一次复制
+
+        Args:
+            image: PIL图像
+
+        Returns:
+            BGR格式的只读NumPy数组
+        """
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        width, height = image.size
+        return np.frombuffer(image.tobytes('raw', 'BGR'), dtype=np.uint8).reshape((height, width, 3))
+
+
+class SyntheticFrameSource(FrameProvider):
+    """合成帧来源，用于在无桌面环境（如Linux CI）中测试和基准测试帧处理流程
+
+    截图返回内部缓冲区的视图而不复制；修改画面时先复制缓冲区（写时复制），
+    已交付的帧不受影响。
+    """
+
+    def __init__(self, width=1920, height=1080, seed=0, image=None, tile_size=64, history=4):
+        """初始化合成帧来源
+
+        Args:
+            width: 屏幕宽度
+            height: 屏幕高度
+            seed: 生成随机画面的随机种子
+            image: 初始画面（BGR），指定时忽略width、height和seed
+            tile_size: 变化检测的瓦片边长，单位：像素
+            history: 保留的历史帧数量
+        """
+        super().__init__(tile_size, history)
+        if image is None:
+            rng = np.random.default_rng(seed)
+            image = np.full((height, width, 3), 240, dtype=np.uint8)
+            for _ in range(width * height // 20000):
+                x, y = int(rng.integers(0, width - 40)), int(rng.integers(0, height - 20))
+                w, h = int(rng.integers(10, 200)), int(rng.integers(5, 100))
+                image[y:y + h, x:x + w] = rng.integers(0, 255, 3, dtype=np.uint8)
+        self._image = image
+
+    @property
+    def image(self):
+        """当前画面"""
+        return self._image
+
+    def paint(self, rect, color=None, patch=None):
+        """修改画面的一块区域
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)
+            color: 填充颜色 (B, G, R)
+            patch: 填充图像，尺寸需与矩形一致，指定时忽略color
+        """
+        left, top, right, bottom = rect
+        self._image = self._image.copy()
+        self._image[top:bottom, left:right] = patch if patch is not None else color
+
+    def _grab_image(self, rect):
+        """返回当前画面的视图
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)，None表示整个画面
+
+        Returns:
+            (BGR图像, 图像左上角的屏幕坐标)
+        """
+        if rect is None:
+            return self._image, (0, 0)
+        left, top = max(0, rect[0]), max(0, rect[1])
+        return self._image[top:rect[3], left:rect[2]], (left, top)
@@ -1,65 +1,120 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import json
 import os
+import threading
+from collections import deque
 from datetime import datetime
 
+from .history_store import HistoryStore, DEFAULT_RETENTION, OP_ADD, OP_CLEAR, OP_DELETE
+from .write_behind import WriteBehindJournal
+
+
+def _coalesce_history(mutations):
+    """合并一批历史记录修改：清空之前的修改全部丢弃，随后又被删除的新增记录不再写入"""
+    result = []
+    added = set()
+    for op, value in mutations:
+        if op == OP_CLEAR:
+            result = []
+            added = set()
+        elif op == OP_DELETE and value in added:
+            result = [m for m in result if not (m[0] == OP_ADD and m[1]['id'] == value)]
+            added.discard(value)
+            continue
+        elif op == OP_ADD:
+            added.add(value['id'])
+        result.append((op, value))
+    return result
+
 
 class HistoryManager:
-    """定位历史记录管理器"""
+    """定位历史记录管理器，记录保存在SQLite数据库中
+
+    修改先追加到写后日志并立即返回，由后台线程批量写入数据库；查询前先写入日志中的修改，
+    保证能读到之前的所有修改。查询可能等待写入完成，界面应在后台线程中查询。
+    新记录的ID从启动时在数据库中预留的一段ID中分配，剩余不足一半时在后台线程中补充，
+    添加记录不访问数据库。
+    """
+
+    def __init__(self, history_file='history.json', db_file='history.db', retention=DEFAULT_RETENTION,
+                 flush_interval=1.0, flush_threshold=100, id_block_size=1000):
+        """初始化历史记录管理器，首次使用数据库时导入旧版history.json
 
-    def __init__(self, history_file='history.json'):
-        """初始化历史记录管理器
-        
         Args:
-            history_file: 历史记录文件路径
+            history_file: 旧版历史记录文件路径
+            db_file: 历史记录数据库文件路径
+            retention: 最多保留的记录数
+            flush_interval: 修改最多在日志中等待的时间，单位：秒
+            flush_threshold: 日志中的修改达到该数量时立即写入
+            id_block_size: 每次在数据库中预留的记录ID数量
         """
-        self.history_file = os.path.join(os.path.dirname(__file__), '..', 'data', history_file)
+        data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
+        self.history_file = os.path.join(data_dir, history_file)
+        self.db_file = os.path.join(data_dir, db_file)
         self._ensure_data_directory()
-        self.history = self._load_history()
-    
-    def _ensure_data_directory(self):
-        """确保数据目录存在"""
-        data_dir = os.path.dirname(self.history_file)
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-    
-    def _load_history(self):
-        """加载历史记录
-        
+        self.store = HistoryStore(self.db_file, retention=retention)
+        imported = self.store.import_json(self.history_file)
+        if imported:
+            print(f"已导入{imported}条历史记录: {self.history_file}")
+        # 无法写入的修改（如其他进程已写入同一ID）记录到错误日志，不阻塞后续的修改
+        error_log = os.path.join(os.path.dirname(self.db_file), 'history_errors.log')
+        self.journal = WriteBehindJournal(self.store.apply, interval=flush_interval, max_pending=flush_threshold,
+                                          coalesce=_coalesce_history, name='history-writer', error_log=error_log)
+        # 预留的记录ID，未用完的ID在关闭后作废
+        self.id_block_size = id_block_size
+        self._id_lock = threading.Lock()
+        self._ids = deque(self.store.reserve_ids(id_block_size))
+        self._id_refill = None  # 正在补充ID的线程
+
+    def _next_id(self):
+        """分配新记录的ID，剩余的预留ID不足一半时在后台补充
+
         Returns:
-            历史记录列表
+            记录ID
         """
+        with self._id_lock:
+            if not self._ids:
+                # 后台补充还没完成时预留的ID已用完，只在短时间内添加大量记录时发生
+                self._ids.extend(self.store.reserve_ids(self.id_block_size))
+            record_id = self._ids.popleft()
+            if len(self._ids) < self.id_block_size // 2 and self._id_refill is None:
+                self._id_refill = threading.Thread(target=self._refill_ids, name='history-ids', daemon=True)
+                self._id_refill.start()
+        return record_id
+
+    def _refill_ids(self):
+        """在数据库中预留下一段记录ID，在后台线程中运行"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                return []
-        except Exception as e:
-            print(f"加载历史记录失败: {e}")
-            return []
-    
-    def _save_history(self):
-        """保存历史记录"""
-        try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
+            ids = self.store.reserve_ids(self.id_block_size)
         except Exception as e:
-            print(f"保存历史记录失败: {e}")
-    
+            print(f"预留历史记录ID失败: {e}")
+            ids = ()
+        with self._id_lock:
+            # 同步预留的ID可能大于这一段，保持分配顺序与预留顺序一致
+            self._ids = deque(sorted(self._ids + deque(ids)))
+            self._id_refill = None
+
+    def _ensure_data_directory(self):
+        """确保数据目录存在"""
+        data_dir = os.path.dirname(self.db_file)
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+
     def add_record(self, element, method, code, result):
         """添加历史记录
-        
+
         Args:
             element: 元素对象
             method: 定位方法
             code: 生成的代码
             result: 定位结果
+
+        Returns:
+            新的历史记录，ID已分配，记录在后台写入数据库
         """
         # 构建历史记录
         record = {
-            'id': len(self.history) + 1,
+            'id': self._next_id(),
             'timestamp': datetime.now().isoformat(),
             'application': element.name or 'Unknown',
             'element_type': element.element_type,
@@ -76,68 +131,96 @@ class HistoryManager:
                 'height': element.height
             }
         }
-        
-        # 添加到历史记录列表
-        self.history.insert(0, record)  # 最新的记录放在最前面
-        
-        # 限制历史记录数量，最多保存100条
-        if len(self.history) > 100:
-            self.history = self.history[:100]
-        
-        # 保存到文件
-        self._save_history()
-    
+
+        self.journal.append((OP_ADD, record))
+        return record
+
+    def flush(self, timeout=None):
+        """将日志中的修改写入数据库
+
+        Args:
+            timeout: 最长等待时间，单位：秒
+
+        Returns:
+            是否写入完成
+        """
+        return self.journal.flush(timeout)
+
+    def close(self):
+        """写入日志中的所有修改并关闭数据库"""
+        refill = self._id_refill
+        if refill is not None:
+            refill.join()
+        self.journal.close()
+        self.store.close()
+
+    def get_records(self, limit=100, cursor=None, **filters):
+        """按时间倒序获取一页历史记录
+
+        Args:
+            limit: 每页记录数
+            cursor: 上一页返回的游标，None表示第一页
+            **filters: 过滤条件，见HistoryStore.query
+
+        Returns:
+            (历史记录列表, 下一页游标)，没有更多记录时游标为None
+        """
+        self.flush()
+        return self.store.query(limit=limit, cursor=cursor, **filters)
+
     def get_all_records(self):
-        """获取所有历史记录
-        
+        """获取所有历史记录，记录较多时应使用get_records分页或iter_records遍历
+
         Returns:
             历史记录列表
         """
-        return self.history
-    
-    def search_records(self, keyword):
-        """搜索历史记录
-        
+        self.flush()
+        return list(self.store.iter_records())
+
+    def iter_records(self):
+        """按时间倒序遍历所有历史记录，每次从数据库取一页
+
+        Yields:
+            历史记录
+        """
+        self.flush()
+        return self.store.iter_records()
+
+    def search_records(self, keyword, limit=None):
+        """搜索历史记录，关键词匹配应用、元素类型、元素名称、automation_id和代码
+
         Args:
             keyword: 搜索关键词
-            
+            limit: 最多返回的记录数，None表示全部
+
         Returns:
             匹配的历史记录列表
         """
-        if not keyword:
-            return self.history
-        
-        keyword = keyword.lower()
-        return [record for record in self.history if 
-                keyword in record['application'].lower() or 
-                keyword in record['element_type'].lower() or 
-                keyword in (record['element_name'] or '').lower() or 
-                keyword in (record['automation_id'] or '').lower()]
-    
+        self.flush()
+        if limit is not None:
+            return self.store.query(keyword=keyword, limit=limit)[0]
+        return list(self.store.iter_records(keyword=keyword))
+
     def delete_record(self, record_id):
         """删除历史记录
-        
+
         Args:
             record_id: 记录ID
         """
-        self.history = [record for record in self.history if record['id'] != record_id]
-        self._save_history()
-    
+        self.journal.append((OP_DELETE, record_id))
+
     def clear_history(self):
         """清空历史记录"""
-        self.history = []
-        self._save_history()
-    
+        self.journal.append((OP_CLEAR, None))
+
     def get_record_by_id(self, record_id):
         """根据ID获取历史记录
-        
+
         Args:
             record_id: 记录ID
-            
+
         Returns:
             匹配的历史记录或None
         """
-        for record in self.history:
-            if record['id'] == record_id:
-                return record
-        return None
+        self.flush()
+        return self.store.get(record_id)
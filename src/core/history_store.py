@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史记录存储模块
+基于sqlite3的定位历史记录存储：WAL日志模式，按常用查询条件建立索引，FTS5全文索引名称和代码，
+按ID分页（游标），保留数量上限可以达到数百万条，并支持导入旧版history.json
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+
+# 默认最多保留的记录数
+DEFAULT_RETENTION = 1000000
+
+# 建立索引的列，也是query支持的过滤条件
+INDEXED_COLUMNS = ('timestamp', 'application', 'element_type', 'automation_id', 'method', 'result')
+
+# 全文索引的列
+FTS_COLUMNS = ('application', 'element_type', 'element_name', 'automation_id', 'code')
+
+# apply支持的修改类型
+OP_ADD = 'add'  # (OP_ADD, 记录字典)
+OP_DELETE = 'delete'  # (OP_DELETE, 记录ID)
+OP_CLEAR = 'clear'  # (OP_CLEAR, None)
+
+_COLUMNS = ('id', 'timestamp', 'application', 'element_type', 'element_name', 'automation_id', 'class_name',
+            'method', 'code', 'result', 'x', 'y', 'width', 'height')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    application TEXT,
+    element_type TEXT,
+    element_name TEXT,
+    automation_id TEXT,
+    class_name TEXT,
+    method TEXT,
+    code TEXT,
+    result INTEGER NOT NULL DEFAULT 0,
+    x INTEGER,
+    y INTEGER,
+    width INTEGER,
+    height INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+""" + "".join(f"CREATE INDEX IF NOT EXISTS idx_history_{column} ON history({column});\n"
+              for column in INDEXED_COLUMNS)
+
+_FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, {columns}) VALUES (new.id, {new_values});
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+    INSERT INTO history_fts(rowid, {columns}) VALUES (new.id, {new_values});
+END;
+""".format(columns=", ".join(FTS_COLUMNS),
+           new_values=", ".join(f"new.{column}" for column in FTS_COLUMNS),
+           old_values=", ".join(f"old.{column}" for column in FTS_COLUMNS))
+
+
+def _escape_like(keyword):
+    """转义LIKE模式中的通配符"""
+    return keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class HistoryStore:
+    """定位历史记录存储
+
+    记录ID自增且不复用，按ID倒序即按时间倒序；分页使用上一页最后一条记录的ID作为游标，
+    翻页开销与页码无关。连接可在多个线程中使用，操作之间由锁串行化。
+    """
+
+    def __init__(self, db_path, retention=DEFAULT_RETENTION):
+        """初始化历史记录存储，数据库不存在时创建
+
+        Args:
+            db_path: 数据库文件路径，':memory:'表示内存数据库
+            retention: 最多保留的记录数，超出时删除最旧的记录，None表示不限制
+        """
+        self.db_path = db_path
+        self.retention = retention
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.fts_tokenizer = self._create_fts()
+        self._count = self._conn.execute("SELECT count(*) FROM history").fetchone()[0]
+
+    def _create_fts(self):
+        """创建全文索引，优先使用支持任意子串匹配的trigram分词器
+
+        Returns:
+            使用的分词器名称，SQLite不支持FTS5时返回None
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'fts_tokenizer'").fetchone()
+        if row is not None:
+            return row['value'] or None
+
+        for tokenizer in ('trigram', 'unicode61'):
+            try:
+                with self._conn:
+                    self._conn.execute(f"CREATE VIRTUAL TABLE history_fts USING fts5({', '.join(FTS_COLUMNS)}, "
+                                       f"content='history', content_rowid='id', tokenize='{tokenizer}')")
+                    self._conn.executescript(_FTS_TRIGGERS)
+                    # 为已有记录建立索引
+                    self._conn.execute("INSERT INTO history_fts(history_fts) VALUES ('rebuild')")
+                    self._set_meta('fts_tokenizer', tokenizer)
+                return tokenizer
+            except sqlite3.OperationalError:
+                continue
+        print("SQLite不支持FTS5，历史记录搜索使用LIKE")
+        with self._conn:
+            self._set_meta('fts_tokenizer', '')
+        return None
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row is not None else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def _to_row(record):
+        """记录字典转为插入参数"""
+        coordinates = record.get('coordinates') or {}
+        values = dict(record)
+        values['result'] = 1 if record.get('result') else 0
+        for key in ('x', 'y', 'width', 'height'):
+            values[key] = coordinates.get(key)
+        return tuple(values.get(column) for column in _COLUMNS)
+
+    @staticmethod
+    def _to_record(row):
+        """数据库行转为记录字典，格式与旧版history.json相同"""
+        return {
+            'id': row['id'],
+            'timestamp': row['timestamp'],
+            'application': row['application'],
+            'element_type': row['element_type'],
+            'element_name': row['element_name'],
+            'automation_id': row['automation_id'],
+            'class_name': row['class_name'],
+            'method': row['method'],
+            'code': row['code'],
+            'result': bool(row['result']),
+            'coordinates': {
+                'x': row['x'],
+                'y': row['y'],
+                'width': row['width'],
+                'height': row['height']
+            }
+        }
+
+    def add(self, record):
+        """添加记录
+
+        Args:
+            record: 记录字典，id为None或不存在时自动分配
+
+        Returns:
+            新记录的ID
+        """
+        return self.add_many([record])[-1]
+
+    def reserve_ids(self, count):
+        """预先分配一段连续的记录ID，用于写入数据库前就需要ID的记录（如写后日志中的记录）
+
+        在写事务中推进AUTOINCREMENT的序号，多个进程共用同一数据库时分配的ID也不会重复。
+
+        Args:
+            count: 分配的ID数量
+
+        Returns:
+            ID范围，之后由数据库分配的ID都大于其中的ID
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'history'").fetchone()
+                first = (row[0] if row is not None else 0) + 1
+                last = first + count - 1
+                if row is None:
+                    self._conn.execute("INSERT INTO sqlite_sequence(name, seq) VALUES ('history', ?)", (last,))
+                else:
+                    self._conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'history'", (last,))
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            return range(first, last + 1)
+
+    def add_many(self, records):
+        """在一个事务中添加多条记录
+
+        Args:
+            records: 记录字典列表，按时间从旧到新排列
+
+        Returns:
+            新记录的ID列表
+        """
+        with self._lock, self._conn:
+            return self._insert(records)
+
+    def _insert(self, records):
+        """插入记录并应用保留数量，在事务中调用"""
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        sql = f"INSERT INTO history({', '.join(_COLUMNS)}) VALUES ({placeholders})"
+        ids = []
+        for record in records:
+            # 没有ID的记录由AUTOINCREMENT分配，预先分配的ID已推进序号，不会冲突
+            ids.append(self._conn.execute(sql, self._to_row(record)).lastrowid)
+        self._count += len(ids)
+        self._apply_retention()
+        return ids
+
+    def apply(self, mutations):
+        """在一个事务中按顺序应用一批修改
+
+        Args:
+            mutations: [(修改类型, 参数), ...]，修改类型见OP_ADD、OP_DELETE、OP_CLEAR
+        """
+        with self._lock, self._conn:
+            for op, value in mutations:
+                if op == OP_ADD:
+                    self._insert([value])
+                elif op == OP_DELETE:
+                    self._count -= self._conn.execute("DELETE FROM history WHERE id = ?", (value,)).rowcount
+                elif op == OP_CLEAR:
+                    self._conn.execute("DELETE FROM history")
+                    self._count = 0
+                else:
+                    raise ValueError(f"不支持的修改类型: {op}")
+
+    def _apply_retention(self):
+        """删除超出保留数量的最旧记录，在事务中调用"""
+        if self.retention is None or self._count <= self.retention:
+            return
+        excess = self._count - self.retention
+        self._conn.execute("DELETE FROM history WHERE id IN (SELECT id FROM history ORDER BY id LIMIT ?)", (excess,))
+        self._count -= excess
+
+    def get(self, record_id):
+        """按ID获取记录
+
+        Args:
+            record_id: 记录ID
+
+        Returns:
+            记录字典，不存在返回None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM history WHERE id = ?", (record_id,)).fetchone()
+        return self._to_record(row) if row is not None else None
+
+    def delete(self, record_id):
+        """删除记录
+
+        Args:
+            record_id: 记录ID
+
+        Returns:
+            是否删除了记录
+        """
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM history WHERE id = ?", (record_id,)).rowcount
+            self._count -= deleted
+        return deleted > 0
+
+    def clear(self):
+        """删除所有记录，记录ID继续递增不复用"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history")
+            self._count = 0
+
+    def query(self, keyword=None, limit=100, cursor=None, since=None, until=None, **filters):
+        """按时间倒序查询一页记录
+
+        Args:
+            keyword: 搜索关键词，匹配应用、元素类型、元素名称、automation_id和代码，为空时不搜索
+            limit: 每页记录数
+            cursor: 上一页返回的游标，None表示第一页
+            since: 起始时间（含），ISO格式字符串
+            until: 结束时间（不含），ISO格式字符串
+            **filters: 按列精确过滤，列名见INDEXED_COLUMNS
+
+        Returns:
+            (记录列表, 下一页游标)，没有更多记录时游标为None
+        """
+        conditions = []
+        params = []
+        for column, value in filters.items():
+            if column not in INDEXED_COLUMNS:
+                raise ValueError(f"不支持的过滤条件: {column}")
+            conditions.append(f"history.{column} = ?")
+            params.append((1 if value else 0) if column == 'result' else value)
+        if since is not None:
+            conditions.append("history.timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("history.timestamp < ?")
+            params.append(until)
+        if cursor is not None:
+            conditions.append("history.id < ?")
+            params.append(cursor)
+        if keyword:
+            condition, values = self._keyword_condition(keyword)
+            conditions.append(condition)
+            params.extend(values)
+
+        sql = "SELECT history.* FROM history"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY history.id DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        records = [self._to_record(row) for row in rows[:limit]]
+        next_cursor = records[-1]['id'] if len(rows) > limit else None
+        return records, next_cursor
+
+    def _keyword_condition(self, keyword):
+        """关键词搜索条件
+
+        trigram分词器可以直接匹配3个及以上字符的任意子串；更短的关键词或没有FTS5时，
+        按ID倒序扫描并用LIKE匹配，找到一页记录即停止。
+        """
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        if self.fts_tokenizer == 'trigram' and len(keyword) >= 3:
+            return "history.id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)", [phrase]
+        if self.fts_tokenizer == 'unicode61':
+            # 按词前缀匹配
+            return "history.id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)", [phrase + '*']
+        pattern = f"%{_escape_like(keyword)}%"
+        like = " OR ".join(f"history.{column} LIKE ? ESCAPE '\\'" for column in FTS_COLUMNS)
+        return f"({like})", [pattern] * len(FTS_COLUMNS)
+
+    def iter_records(self, batch_size=1000, **kwargs):
+        """按时间倒序遍历所有匹配的记录，每次从数据库取一页
+
+        Args:
+            batch_size: 每页记录数
+            **kwargs: 查询条件，同query
+
+        Yields:
+            记录字典
+        """
+        cursor = None
+        while True:
+            records, cursor = self.query(limit=batch_size, cursor=cursor, **kwargs)
+            yield from records
+            if cursor is None:
+                return
+
+    def import_json(self, json_path):
+        """导入旧版history.json，同一数据库只导入一次
+
+        Args:
+            json_path: history.json路径
+
+        Returns:
+            导入的记录数
+        """
+        if not os.path.exists(json_path):
+            return 0
+        with self._lock:
+            if self._get_meta('json_imported'):
+                return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"导入历史记录失败: {e}")
+            return 0
+
+        # 旧版文件中最新的记录在最前面，按从旧到新插入，使ID顺序与时间顺序一致；旧ID可能重复，重新分配
+        records = [record for record in reversed(records) if isinstance(record, dict)]
+        for record in records:
+            record.pop('id', None)
+            record.setdefault('timestamp', '')
+        with self._lock, self._conn:
+            self._insert(records)
+            self._set_meta('json_imported', os.path.abspath(json_path))
+        return len(records)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -3,59 +3,370 @@
 混合定位器模块，实现混合定位策略
 """
 
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
+from .automation_executor import get_automation_executor, PRIORITY_INTERACTIVE
 from .element import Element
 from .locator_strategy import LocatorMethod
 
 
+_image_match_pool = None
+_image_match_pool_lock = threading.Lock()
+
+
+def get_image_match_pool():
+    """获取图像匹配线程池，首次调用时创建
+
+    图像匹配是CPU计算，不需要COM，并发定位时在该线程池中运行，不占用自动化执行器的工作线程。
+
+    Returns:
+        ThreadPoolExecutor实例
+    """
+    global _image_match_pool
+    with _image_match_pool_lock:
+        if _image_match_pool is None:
+            _image_match_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-match')
+        return _image_match_pool
+
+
 class HybridLocator:
     """混合定位器类，实现多种定位方法的结合使用"""
     
-    def __init__(self, element_capture, code_generator):
+    def __init__(self, element_capture, code_generator, concurrent=False, executor=None, stats=None,
+                 locate_cache=None, image_executor=None):
         """初始化混合定位器
         
         Args:
             element_capture: 元素捕获实例
             code_generator: 代码生成器实例
+            concurrent: 是否默认使用并发模式，同时启动属性定位和图像定位
+            executor: 并发模式运行其余策略的自动化执行器（AutomationExecutor），默认使用全局执行器
+            stats: 定位统计实例（LocatorStats），指定时记录每次定位结果并按期望成本调整策略顺序
+            locate_cache: 定位结果缓存实例（LocateCache），指定时先校验上次定位到的位置
+            image_executor: 并发模式运行图像定位的线程池，默认使用全局图像匹配线程池
         """
         self.element_capture = element_capture
         self.code_generator = code_generator
+        self.concurrent = concurrent
+        self.executor = executor
+        self.image_executor = image_executor
+        self.stats = stats
+        self.locate_cache = locate_cache
+        self.last_timings = {}  # 最近一次定位各策略的耗时（毫秒），被取消或未完成的策略为None
+        self.last_strategy = None  # 最近一次定位成功的策略名称
+        self._app_names = {}  # 窗口句柄 -> 应用程序名称
+        
+        # 参与排序的定位策略，按默认优先级排列；坐标定位始终作为最后的回退
+        self._ranked_locators = {
+            LocatorMethod.ATTRIBUTE.value: self._attribute_locator,
+            LocatorMethod.IMAGE.value: self._image_locator,
+        }
+    
+    def _get_executor(self):
+        """获取并发模式的自动化执行器"""
+        if self.executor is None:
+            self.executor = get_automation_executor()
+        return self.executor
+    
+    def _submit_locator(self, locator_func, element_info: Dict[str, Any], window_handle: int,
+                        cancel_event: threading.Event, context=None):
+        """并发模式下将定位策略提交到工作线程
+        
+        图像定位是CPU计算，提交到图像匹配线程池；其余策略需要COM，提交到自动化执行器。
+        
+        Args:
+            locator_func: 定位策略函数
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            cancel_event: 取消事件
+            context: (应用程序名称, 控件类型)
+            
+        Returns:
+            concurrent.futures.Future对象，结果为 (定位到的元素对象或None, 耗时毫秒)
+        """
+        if locator_func == self._image_locator:
+            if self.image_executor is None:
+                self.image_executor = get_image_match_pool()
+            return self.image_executor.submit(self._timed_locator, locator_func, element_info, window_handle,
+                                              cancel_event, context)
+        return self._get_executor().submit(self._timed_locator, locator_func, element_info, window_handle,
+                                           cancel_event, context, priority=PRIORITY_INTERACTIVE,
+                                           name=locator_func.__name__)
     
-    def locate_element(self, element_info: Dict[str, Any], window_handle: int = None) -> Element:
+    def locate_element(self, element_info: Dict[str, Any], window_handle: int = None,
+                       concurrent: bool = None) -> Element:
         """使用混合定位策略定位元素
         
         Args:
             element_info: 元素信息字典，包含各种定位属性
             window_handle: 窗口句柄，可选
+            concurrent: 是否使用并发模式，默认使用self.concurrent
+            
+        Returns:
+            定位到的元素对象，或None
+        """
+        if concurrent is None:
+            concurrent = self.concurrent
+        
+        timings = {}
+        self.last_strategy = None
+        try:
+            # 先校验上次定位到的位置，校验失败才完整搜索
+            if self.locate_cache is not None:
+                start_time = time.perf_counter()
+                element = self.locate_cache.lookup(element_info, window_handle)
+                timings['cache'] = (time.perf_counter() - start_time) * 1000
+                if element:
+                    self.last_strategy = 'cache'
+                    return element
+            
+            start_time = time.perf_counter()
+            element = self._locate_uncached(element_info, window_handle, concurrent, timings)
+            if (element and self.locate_cache is not None
+                    and self.last_strategy in ('_attribute_locator', '_image_locator')):
+                self.locate_cache.store(element_info, window_handle, element,
+                                        (time.perf_counter() - start_time) * 1000)
+            return element
+        finally:
+            self.last_timings = dict(timings)
+    
+    def test_location(self, element: Element, cancel_event: threading.Event = None) -> Element:
+        """测试元素的属性定位是否有效，结果计入定位统计
+        
+        与locate_element不同，不使用定位结果缓存，也不回退到图像或坐标定位。
+        
+        Args:
+            element: 元素对象，需要包含窗口句柄
+            cancel_event: 取消事件
+            
+        Returns:
+            定位到的元素对象，定位失败返回None
+        """
+        element_info = {key: getattr(element, key) for key in ('automation_id', 'name', 'class_name', 'process_id')
+                        if getattr(element, key, None)}
+        element_info['control_type'] = element.control_type or element.element_type
+        timings = {}
+        self.last_strategy = None
+        try:
+            context = self._get_locate_context(element_info, element.window_handle)
+            found = self._run_locator(self._attribute_locator, element_info, element.window_handle, timings,
+                                      cancel_event, context)
+            if found:
+                self.last_strategy = self._attribute_locator.__name__
+            return found
+        finally:
+            self.last_timings = dict(timings)
+    
+    def _locate_uncached(self, element_info: Dict[str, Any], window_handle: int, concurrent: bool,
+                         timings: Dict[str, Any]) -> Element:
+        """按策略顺序完整搜索元素
+        
+        Args:
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            concurrent: 是否使用并发模式
+            timings: 各策略耗时字典
+            
+        Returns:
+            定位到的元素对象，或None
+        """
+        context = self._get_locate_context(element_info, window_handle)
+        ranked_locators = self._order_locators(context)
+        if concurrent:
+            return self._locate_concurrent(ranked_locators, element_info, window_handle, timings, context)
+        
+        # 按优先级尝试各种定位方法，直到成功
+        for locator_func in ranked_locators + [self._coordinate_locator]:
+            element = self._run_locator(locator_func, element_info, window_handle, timings, context=context)
+            if element:
+                self.last_strategy = locator_func.__name__
+                return element
+        
+        return None
+    
+    def _get_locate_context(self, element_info: Dict[str, Any], window_handle: int):
+        """获取定位统计所用的 (应用程序, 控件类型)
+        
+        Args:
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            
+        Returns:
+            (应用程序名称, 控件类型)
+        """
+        app = element_info.get('process_name')
+        if not app and window_handle:
+            app = self._app_names.get(window_handle)
+            if app is None:
+                try:
+                    import win32process
+                    from utils.process_utils import ProcessUtils
+                    
+                    _, pid = win32process.GetWindowThreadProcessId(window_handle)
+                    exe_path = ProcessUtils.get_process_exe(pid)
+                    app = os.path.basename(exe_path).lower() if exe_path else 'unknown'
+                except Exception:
+                    app = 'unknown'
+                self._app_names[window_handle] = app
+        return app or 'unknown', element_info.get('control_type') or 'Unknown'
+    
+    def _order_locators(self, context):
+        """按定位统计的期望成本排序定位策略，没有统计或样本不足时使用默认优先级
+        
+        Args:
+            context: (应用程序名称, 控件类型)
+            
+        Returns:
+            定位策略函数列表
+        """
+        strategies = list(self._ranked_locators)
+        if self.stats is not None:
+            strategies = self.stats.order_strategies(context[0], context[1], strategies)
+        return [self._ranked_locators[strategy] for strategy in strategies]
+    
+    def _locate_concurrent(self, ranked_locators, element_info: Dict[str, Any], window_handle: int,
+                           timings: Dict[str, Any], context=None) -> Element:
+        """并发模式：同时启动属性定位和图像定位，返回优先级最高的成功结果
+        
+        优先级最高的策略在当前线程执行，其余策略提交到工作线程并行运行：图像定位在图像匹配线程池，
+        其余在自动化执行器。高优先级策略失败后立即采用已完成的低优先级结果；
+        高优先级策略成功后取消其余策略，最坏耗时约为最慢的单个策略，
+        而不是各策略耗时之和。等待时尚未开始的策略会被取消并在当前线程执行，
+        因此在执行器的工作线程中调用也不会因等待自身所在的执行器而死锁。
+        
+        Args:
+            ranked_locators: 按优先级排序的定位策略函数列表
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            timings: 各策略耗时字典，定位过程中填充
+            context: (应用程序名称, 控件类型)
             
         Returns:
             定位到的元素对象，或None
         """
-        # 定义定位方法优先级顺序
-        locator_order = [
-            self._attribute_locator,
-            self._image_locator,
-            self._coordinate_locator
-        ]
-        
-        # 尝试各种定位方法，直到成功
-        for locator_func in locator_order:
-            try:
-                element = locator_func(element_info, window_handle)
+        cancel_event = threading.Event()
+        # 各策略的耗时由当前线程写入，工作线程只返回结果
+        attempts = []
+        for index, locator_func in enumerate(ranked_locators):
+            timings[locator_func.__name__] = None
+            future = None
+            if index > 0:
+                future = self._submit_locator(locator_func, element_info, window_handle, cancel_event, context)
+            attempts.append((locator_func, future))
+        
+        try:
+            # 按优先级顺序等待，低优先级策略在此期间继续并行运行
+            for locator_func, future in attempts:
+                if future is None or future.cancel():
+                    element, latency = self._timed_locator(locator_func, element_info, window_handle,
+                                                           cancel_event, context)
+                else:
+                    element, latency = future.result()
+                if latency is not None:
+                    timings[locator_func.__name__] = latency
                 if element:
+                    self.last_strategy = locator_func.__name__
                     return element
-            except Exception as e:
-                print(f"{locator_func.__name__}定位失败: {e}")
-                continue
+        finally:
+            # 通知仍在运行的策略放弃，尚未开始的直接取消
+            cancel_event.set()
+            for _, future in attempts:
+                if future is not None:
+                    future.cancel()
+        
+        # 坐标定位不需要等待，最后回退
+        element = self._run_locator(self._coordinate_locator, element_info, window_handle, timings, context=context)
+        if element:
+            self.last_strategy = self._coordinate_locator.__name__
+        return element
+    
+    def _run_locator(self, locator_func, element_info: Dict[str, Any], window_handle: int,
+                     timings: Dict[str, Any], cancel_event: threading.Event = None, context=None) -> Element:
+        """执行单个定位策略，记录耗时并写入定位统计
+        
+        Args:
+            locator_func: 定位策略函数
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            timings: 各策略耗时字典
+            cancel_event: 取消事件
+            context: (应用程序名称, 控件类型)
+            
+        Returns:
+            定位到的元素对象，或None
+        """
+        element, latency = self._timed_locator(locator_func, element_info, window_handle, cancel_event, context)
+        if latency is not None:
+            timings[locator_func.__name__] = latency
+        return element
+    
+    def _timed_locator(self, locator_func, element_info: Dict[str, Any], window_handle: int,
+                       cancel_event: threading.Event = None, context=None):
+        """执行单个定位策略并写入定位统计，不修改定位器的状态，可在工作线程中调用
+        
+        Args:
+            locator_func: 定位策略函数
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            cancel_event: 取消事件
+            context: (应用程序名称, 控件类型)
+            
+        Returns:
+            (定位到的元素对象或None, 耗时毫秒)，被取消的策略耗时为None
+        """
+        start_time = time.perf_counter()
+        try:
+            element = locator_func(element_info, window_handle, cancel_event=cancel_event)
+        except Exception as e:
+            print(f"{locator_func.__name__}定位失败: {e}")
+            element = None
         
+        # 被取消的策略结果不完整，不计入耗时和统计
+        if cancel_event is not None and cancel_event.is_set():
+            return element, None
+        latency = (time.perf_counter() - start_time) * 1000
+        strategy = self._get_strategy_name(locator_func)
+        if (self.stats is not None and context is not None and strategy is not None
+                and self._is_applicable(strategy, element_info, window_handle)):
+            self.stats.record(context[0], context[1], strategy, bool(element), latency)
+        return element, latency
+    
+    def _get_strategy_name(self, locator_func):
+        """获取参与排序的定位策略名称，坐标定位返回None"""
+        for strategy, func in self._ranked_locators.items():
+            if func == locator_func:
+                return strategy
         return None
     
-    def _attribute_locator(self, element_info: Dict[str, Any], window_handle: int = None) -> Element:
+    @staticmethod
+    def _is_applicable(strategy: str, element_info: Dict[str, Any], window_handle: int) -> bool:
+        """检查定位策略是否适用于该元素，不适用的策略立即返回，不应计入统计
+        
+        Args:
+            strategy: 定位策略名称
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            
+        Returns:
+            是否适用
+        """
+        if strategy == LocatorMethod.ATTRIBUTE.value:
+            return bool(window_handle) and any(key in element_info for key in ['automation_id', 'name', 'class_name'])
+        if strategy == LocatorMethod.IMAGE.value:
+            return 'image_path' in element_info
+        return False
+    
+    def _attribute_locator(self, element_info: Dict[str, Any], window_handle: int = None,
+                           cancel_event: threading.Event = None) -> Element:
         """使用属性定位元素
         
         Args:
             element_info: 元素信息字典
             window_handle: 窗口句柄
+            cancel_event: 取消事件，被设置后放弃剩余的定位尝试
             
         Returns:
             定位到的元素对象，或None
@@ -75,17 +386,19 @@ class HybridLocator:
         # 测试定位
         if window_handle:
             element.window_handle = window_handle
-            if self.element_capture.test_element_location(element):
+            if self.element_capture.test_element_location(element, cancel_event=cancel_event):
                 return element
         
         return None
     
-    def _image_locator(self, element_info: Dict[str, Any], window_handle: int = None) -> Element:
+    def _image_locator(self, element_info: Dict[str, Any], window_handle: int = None,
+                       cancel_event: threading.Event = None) -> Element:
         """使用图像识别定位元素
         
         Args:
             element_info: 元素信息字典，需要包含image_path
             window_handle: 窗口句柄
+            cancel_event: 取消事件，被设置后在下一个缩放比例或候选位置前放弃匹配
             
         Returns:
             定位到的元素对象，或None
@@ -96,15 +409,18 @@ class HybridLocator:
         # 使用图像识别捕获元素
         return self.element_capture.capture_element_by_image(
             element_info['image_path'],
-            element_info.get('confidence', 0.8)
+            element_info.get('confidence', 0.8),
+            cancel_event=cancel_event
         )
     
-    def _coordinate_locator(self, element_info: Dict[str, Any], window_handle: int = None) -> Element:
+    def _coordinate_locator(self, element_info: Dict[str, Any], window_handle: int = None,
+                            cancel_event: threading.Event = None) -> Element:
         """使用坐标定位元素
         
         Args:
             element_info: 元素信息字典，需要包含x和y坐标
             window_handle: 窗口句柄
+            cancel_event: 取消事件
             
         Returns:
             定位到的元素对象，或None
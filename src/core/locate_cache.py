@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定位结果缓存模块
+记住每个定位条件上次定位到的运行时ID和位置，重复定位时先做一次O(1)校验，校验失败才回退到完整搜索
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from utils.lazy_import import lazy_import
+from .app_health import AppUnresponsiveError, get_app_health_monitor
+
+auto = lazy_import('uiautomation')
+
+
+class LocateCache:
+    """上次定位位置缓存"""
+
+    # 参与构成缓存键的定位条件
+    KEY_FIELDS = ('automation_id', 'name', 'class_name', 'control_type', 'image_path', 'confidence')
+    # 校验时需要保持不变的控件属性，(Element属性, uiautomation控件属性)
+    CHECK_FIELDS = (('automation_id', 'AutomationId'), ('name', 'Name'), ('class_name', 'ClassName'))
+    # 校验时从中心点控件向上检查的父控件层数
+    MAX_PARENT_LEVELS = 2
+
+    def __init__(self, element_capture, max_entries=512, image_padding=8, call_timeout=2.0):
+        """初始化定位结果缓存
+
+        Args:
+            element_capture: 元素捕获实例，用于校验图像定位结果
+            max_entries: 最多缓存的定位条件数量
+            image_padding: 校验图像定位结果时在原位置四周扩展的搜索范围，单位：像素
+            call_timeout: 校验控件定位结果的超时时间，单位：秒
+        """
+        self.element_capture = element_capture
+        self.max_entries = max_entries
+        self.image_padding = image_padding
+        self.call_timeout = call_timeout
+        self._entries = OrderedDict()  # 缓存键 -> 缓存项，按最近使用排序
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # 缓存项存在但校验失败的次数
+        self.saved_ms = 0.0  # 命中时节省的时间：完整搜索耗时减去校验耗时
+
+    def make_key(self, element_info, window_handle):
+        """根据定位条件和窗口计算缓存键
+
+        Args:
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+
+        Returns:
+            缓存键
+        """
+        return window_handle, tuple((field, element_info[field]) for field in self.KEY_FIELDS
+                                    if element_info.get(field) is not None)
+
+    def lookup(self, element_info, window_handle):
+        """查找并校验缓存的定位结果
+
+        Args:
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+
+        Returns:
+            校验通过的元素对象，未命中或校验失败返回None
+        """
+        key = self.make_key(element_info, window_handle)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        start_time = time.perf_counter()
+        try:
+            element = self._validate(entry, window_handle)
+        except AppUnresponsiveError:
+            # 目标应用无响应，无法校验，保留缓存项，应用恢复后仍可命中
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"校验定位缓存失败: {e}")
+            element = None
+        validate_ms = (time.perf_counter() - start_time) * 1000
+
+        with self._lock:
+            if element is None:
+                self.misses += 1
+                self.invalidations += 1
+                self._entries.pop(key, None)
+                return None
+            self.hits += 1
+            self.saved_ms += max(0.0, entry['search_ms'] - validate_ms)
+            entry['element'] = element
+        return element
+
+    def store(self, element_info, window_handle, element, search_ms):
+        """缓存一次完整搜索的定位结果
+
+        没有位置信息的结果无法校验，不会被缓存。
+
+        Args:
+            element_info: 元素信息字典
+            window_handle: 窗口句柄
+            element: 定位到的元素对象
+            search_ms: 完整搜索的耗时，单位：毫秒
+        """
+        if element is None or not element.width or not element.height or element.x is None or element.y is None:
+            return
+
+        entry = {
+            'element': element,
+            'kind': 'image' if element.element_type == "ImageMatched" else 'control',
+            'image_path': element_info.get('image_path'),
+            'confidence': element_info.get('confidence', 0.8),
+            'search_ms': search_ms,
+        }
+        key = self.make_key(element_info, window_handle)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, window_handle=None):
+        """清除缓存项
+
+        Args:
+            window_handle: 窗口句柄，默认清除所有缓存项
+        """
+        with self._lock:
+            if window_handle is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == window_handle]:
+                    del self._entries[key]
+
+    def get_metrics(self):
+        """获取缓存指标
+
+        Returns:
+            包含命中次数、未命中次数、命中率、校验失败次数和节省时间的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'invalidations': self.invalidations,
+                'saved_ms': round(self.saved_ms, 2),
+            }
+
+    def _validate(self, entry, window_handle):
+        """校验缓存项是否仍然有效
+
+        Args:
+            entry: 缓存项
+            window_handle: 窗口句柄
+
+        Returns:
+            有效时返回更新位置后的元素对象，否则返回None
+
+        Raises:
+            AppUnresponsiveError: 目标应用无响应
+        """
+        if entry['kind'] == 'image':
+            return self._validate_image(entry)
+        element = entry['element']
+        # 跨进程调用，带超时和熔断执行，目标应用无响应时不会阻塞定位
+        rect = get_app_health_monitor().call_for_window(window_handle, self._find_control_rect, element,
+                                                        timeout=self.call_timeout)
+        if rect is None:
+            return None
+        # 元素仍在原位置，更新位置以应对窗口内的小幅移动
+        left, top, right, bottom = rect
+        element.x, element.y = left, top
+        element.width, element.height = right - left, bottom - top
+        return element
+
+    def _find_control_rect(self, element):
+        """通过元素中心点取控件，校验运行时ID或属性是否一致
+
+        Args:
+            element: 缓存的元素对象
+
+        Returns:
+            一致时返回控件的位置(left, top, right, bottom)，否则返回None
+        """
+        control = auto.ControlFromPoint(element.x + element.width // 2, element.y + element.height // 2)
+
+        # 中心点可能落在元素的子控件上，向上检查几层父控件
+        for _ in range(self.MAX_PARENT_LEVELS + 1):
+            if not control:
+                return None
+            if self._control_matches(element, control):
+                break
+            control = control.GetParentControl()
+        else:
+            return None
+
+        rect = control.BoundingRectangle
+        return rect.left, rect.top, rect.right, rect.bottom
+
+    def _control_matches(self, element, control):
+        """检查控件是否就是缓存的元素：有运行时ID时比较运行时ID，否则比较属性
+
+        Args:
+            element: 缓存的元素对象
+            control: uiautomation控件
+
+        Returns:
+            是否一致，没有可比较的运行时ID和属性时返回False
+        """
+        if element.runtime_id:
+            return tuple(control.GetRuntimeId()) == tuple(element.runtime_id)
+        compared = False
+        for element_field, control_field in self.CHECK_FIELDS:
+            expected = getattr(element, element_field)
+            if expected:
+                if getattr(control, control_field) != expected:
+                    return False
+                compared = True
+        return compared
+
+    def _validate_image(self, entry):
+        """只在原位置附近重新匹配模板
+
+        Args:
+            entry: 缓存项
+
+        Returns:
+            匹配成功时返回新的元素对象，否则返回None
+        """
+        element = entry['element']
+        pad = self.image_padding
+        roi = (element.x - pad, element.y - pad, element.x + element.width + pad, element.y + element.height + pad)
+        return self.element_capture.capture_element_by_image(entry['image_path'], entry['confidence'], roi=roi)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定位统计模块
+按 (应用程序, 控件类型, 定位策略) 记录每次定位的结果和耗时，用于按期望成本调整定位策略顺序
+"""
+
+import json
+import os
+import threading
+
+from .write_behind import atomic_write_text
+
+
+class LocatorStats:
+    """定位结果统计"""
+
+    def __init__(self, stats_file='locator_stats.json', min_samples=5, max_latencies=50, save_interval=20):
+        """初始化定位统计
+
+        Args:
+            stats_file: 统计文件名，保存在data目录下
+            min_samples: 每个策略至少需要的定位次数，样本不足时不调整策略顺序
+            max_latencies: 每个策略保留的最近耗时数量，用于计算耗时中位数
+            save_interval: 累计多少次记录后自动保存
+        """
+        self.stats_file = os.path.join(os.path.dirname(__file__), '..', 'data', stats_file)
+        self.min_samples = min_samples
+        self.max_latencies = max_latencies
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.stats = self._load_stats()
+
+    def _load_stats(self):
+        """加载统计数据
+
+        Returns:
+            统计字典，结构为 {应用程序: {控件类型: {策略: {attempts, successes, latencies}}}}
+        """
+        try:
+            if os.path.exists(self.stats_file):
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"加载定位统计失败: {e}")
+        return {}
+
+    def save(self):
+        """保存统计数据，先写入临时文件再替换，保存中断不会损坏原有统计"""
+        try:
+            with self._lock:
+                data = json.dumps(self.stats, ensure_ascii=False, indent=2)
+                self._unsaved = 0
+            os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
+            atomic_write_text(self.stats_file, data)
+        except Exception as e:
+            print(f"保存定位统计失败: {e}")
+
+    def record(self, app, control_type, strategy, success, latency_ms):
+        """记录一次定位结果
+
+        Args:
+            app: 应用程序名称，如notepad.exe
+            control_type: 控件类型
+            strategy: 定位策略名称，如attribute、image
+            success: 是否定位成功
+            latency_ms: 定位耗时，单位：毫秒
+        """
+        with self._lock:
+            entry = (self.stats.setdefault(app or 'unknown', {})
+                     .setdefault(control_type or 'Unknown', {})
+                     .setdefault(strategy, {'attempts': 0, 'successes': 0, 'latencies': []}))
+            entry['attempts'] += 1
+            if success:
+                entry['successes'] += 1
+            entry['latencies'].append(round(latency_ms, 2))
+            del entry['latencies'][:-self.max_latencies]
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_interval
+
+        if should_save:
+            self.save()
+
+    def _get_entry(self, app, control_type, strategy):
+        """获取单个策略的统计项"""
+        return self.stats.get(app or 'unknown', {}).get(control_type or 'Unknown', {}).get(strategy)
+
+    @staticmethod
+    def _summarize(entry):
+        """计算统计项的成功率和耗时中位数
+
+        Args:
+            entry: 统计项
+
+        Returns:
+            包含attempts、successes、success_rate和median_latency的字典
+        """
+        latencies = sorted(entry['latencies'])
+        median = latencies[len(latencies) // 2] if latencies else None
+        return {
+            'attempts': entry['attempts'],
+            'successes': entry['successes'],
+            'success_rate': entry['successes'] / entry['attempts'] if entry['attempts'] else 0.0,
+            'median_latency': median,
+        }
+
+    def expected_cost(self, app, control_type, strategy):
+        """计算策略的期望成本：耗时中位数除以成功概率
+
+        成功概率使用拉普拉斯平滑，避免少量失败导致成本无穷大。
+
+        Args:
+            app: 应用程序名称
+            control_type: 控件类型
+            strategy: 定位策略名称
+
+        Returns:
+            期望成本（毫秒），样本不足时返回None
+        """
+        with self._lock:
+            entry = self._get_entry(app, control_type, strategy)
+            if entry is None or entry['attempts'] < self.min_samples:
+                return None
+            summary = self._summarize(entry)
+        probability = (summary['successes'] + 1) / (summary['attempts'] + 2)
+        return (summary['median_latency'] or 0.0) / probability
+
+    def order_strategies(self, app, control_type, strategies):
+        """按期望成本从低到高排序定位策略
+
+        任一策略样本不足时（冷启动的应用）保持原有顺序。
+
+        Args:
+            app: 应用程序名称
+            control_type: 控件类型
+            strategies: 定位策略名称列表，按默认优先级排序
+
+        Returns:
+            排序后的定位策略名称列表
+        """
+        costs = {strategy: self.expected_cost(app, control_type, strategy) for strategy in strategies}
+        if any(cost is None for cost in costs.values()):
+            return list(strategies)
+        return sorted(strategies, key=lambda strategy: costs[strategy])
+
+    def get_stats(self, app=None):
+        """获取统计摘要
+
+        Args:
+            app: 应用程序名称，默认返回所有应用
+
+        Returns:
+            字典，结构为 {应用程序: {控件类型: {策略: 摘要}}}
+        """
+        with self._lock:
+            apps = {app: self.stats.get(app, {})} if app else self.stats
+            return {
+                app_name: {
+                    control_type: {strategy: self._summarize(entry) for strategy, entry in strategies.items()}
+                    for control_type, strategies in control_types.items()
+                }
+                for app_name, control_types in apps.items()
+            }
+
+    def clear(self, app=None):
+        """清除统计数据
+
+        Args:
+            app: 应用程序名称，默认清除所有应用
+        """
+        with self._lock:
+            if app:
+                self.stats.pop(app, None)
+            else:
+                self.stats = {}
+        self.save()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+屏幕帧模块
+缓存一帧截图及其灰度图、特征点和描述符，供同一帧上的多次模板查找共享
+"""
+
+import threading
+import time
+import zlib
+
+
+class ScreenFrame:
+    """屏幕帧类，一帧截图上的昂贵中间结果只计算一次"""
+
+    def __init__(self, image, timestamp=None, origin=(0, 0)):
+        """初始化屏幕帧
+
+        Args:
+            image: BGR格式的截图（NumPy数组）
+            timestamp: 截图时间，默认为当前时间
+            origin: 帧左上角对应的屏幕坐标 (x, y)
+        """
+        self.image = image
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.origin = origin
+        self.frame_id = None  # 帧序号，由FrameProvider分配
+
+        self._gray = None
+        self._pyramid = None  # 灰度金字塔，第0层为灰度图
+        self._keypoints = None
+        self._descriptors = None
+        self._detector_id = None  # 计算特征时使用的检测器，检测器变化时需要重新计算
+        self._tile_hashes = {}  # (瓦片大小, 列, 行) -> 瓦片像素的CRC32
+        self._lock = threading.Lock()
+
+    @property
+    def width(self):
+        """帧宽度"""
+        return self.image.shape[1]
+
+    @property
+    def height(self):
+        """帧高度"""
+        return self.image.shape[0]
+
+    @property
+    def gray(self):
+        """灰度图，首次访问时计算"""
+        if self._gray is None:
+            import cv2
+
+            with self._lock:
+                if self._gray is None:
+                    self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def get_pyramid(self, levels):
+        """获取灰度金字塔，已计算的层会被复用
+
+        Args:
+            levels: 金字塔层数（不含原图）
+
+        Returns:
+            列表，第0层为灰度图，每层尺寸减半
+        """
+        import cv2
+
+        gray = self.gray
+        with self._lock:
+            if self._pyramid is None:
+                self._pyramid = [gray]
+            while len(self._pyramid) <= levels and min(self._pyramid[-1].shape[:2]) >= 2:
+                self._pyramid.append(cv2.pyrDown(self._pyramid[-1]))
+            return self._pyramid[:levels + 1]
+
+    def get_features(self, detector):
+        """获取帧的特征点和描述符，同一检测器只提取一次
+
+        Args:
+            detector: 特征检测器，如cv2.ORB_create()的返回值
+
+        Returns:
+            (特征点列表, 描述符数组)
+        """
+        gray = self.gray
+        with self._lock:
+            if self._detector_id != id(detector):
+                self._keypoints, self._descriptors = detector.detectAndCompute(gray, None)
+                self._detector_id = id(detector)
+            return self._keypoints, self._descriptors
+
+    def get_tile_hashes(self, rect=None, tile_size=64):
+        """获取与矩形相交的瓦片哈希，已计算的瓦片会被复用
+
+        瓦片网格以屏幕坐标对齐，帧边缘的瓦片按帧边界裁剪。
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)，默认为整帧
+            tile_size: 瓦片边长，单位：像素
+
+        Returns:
+            字典，键为瓦片的 (列, 行)，值为瓦片像素的CRC32
+        """
+        left, top = self.origin
+        right, bottom = left + self.width, top + self.height
+        if rect is not None:
+            left, top = max(left, int(rect[0])), max(top, int(rect[1]))
+            right, bottom = min(right, int(rect[2])), min(bottom, int(rect[3]))
+        if right <= left or bottom <= top:
+            return {}
+
+        hashes = {}
+        for row in range(top // tile_size, (bottom - 1) // tile_size + 1):
+            for col in range(left // tile_size, (right - 1) // tile_size + 1):
+                key = (tile_size, col, row)
+                value = self._tile_hashes.get(key)
+                if value is None:
+                    x0 = max(0, col * tile_size - self.origin[0])
+                    y0 = max(0, row * tile_size - self.origin[1])
+                    x1 = min(self.width, (col + 1) * tile_size - self.origin[0])
+                    y1 = min(self.height, (row + 1) * tile_size - self.origin[1])
+                    value = zlib.crc32(self.image[y0:y1, x0:x1].tobytes())
+                    self._tile_hashes[key] = value
+                hashes[(col, row)] = value
+        return hashes
+
+    def age(self, now=None):
+        """帧的存在时长，单位：秒"""
+        return (now if now is not None else time.time()) - self.timestamp
+
+    def is_expired(self, max_age, now=None):
+        """检查帧是否超过最大存在时长
+
+        Args:
+            max_age: 最大存在时长，单位：秒
+            now: 当前时间，默认为time.time()
+
+        Returns:
+            是否已过期
+        """
+        return self.age(now) > max_age
+
+    def crop(self, rect):
+        """按屏幕坐标裁剪出子帧，子帧与原帧共享像素内存
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)
+
+        Returns:
+            裁剪后的ScreenFrame对象，矩形与帧无交集时返回None
+        """
+        left = max(0, int(rect[0]) - self.origin[0])
+        top = max(0, int(rect[1]) - self.origin[1])
+        right = min(self.width, int(rect[2]) - self.origin[0])
+        bottom = min(self.height, int(rect[3]) - self.origin[1])
+        if right <= left or bottom <= top:
+            return None
+
+        sub_frame = ScreenFrame(self.image[top:bottom, left:right], self.timestamp,
+                                (self.origin[0] + left, self.origin[1] + top))
+        sub_frame.frame_id = self.frame_id
+        if self._gray is not None:
+            # 灰度图已计算时直接切片复用
+            sub_frame._gray = self._gray[top:bottom, left:right]
+        return sub_frame
+
+    def contains(self, rect):
+        """检查屏幕坐标矩形是否完全位于帧内
+
+        Args:
+            rect: 屏幕坐标矩形 (left, top, right, bottom)
+
+        Returns:
+            是否完全位于帧内
+        """
+        return (rect[0] >= self.origin[0] and rect[1] >= self.origin[1] and
+                rect[2] <= self.origin[0] + self.width and rect[3] <= self.origin[1] + self.height)
+
+    @property
+    def rect(self):
+        """帧覆盖的屏幕矩形 (left, top, right, bottom)"""
+        return self.origin[0], self.origin[1], self.origin[0] + self.width, self.origin[1] + self.height
+
+    def to_screen(self, x, y):
+        """将帧内坐标转换为屏幕坐标
+
+        Args:
+            x: 帧内x坐标
+            y: 帧内y坐标
+
+        Returns:
+            屏幕坐标 (x, y)
+        """
+        return x + self.origin[0], y + self.origin[1]
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板匹配引擎模块
+基于图像金字塔的由粗到精多尺度模板匹配，返回归一化互相关（NCC）置信度
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+class MatchResult:
+    """模板匹配结果类"""
+
+    def __init__(self, x, y, width, height, confidence, scale=1.0):
+        """初始化匹配结果
+
+        Args:
+            x: 匹配区域左上角x坐标（帧内坐标）
+            y: 匹配区域左上角y坐标（帧内坐标）
+            width: 匹配区域宽度
+            height: 匹配区域高度
+            confidence: NCC置信度（0-1）
+            scale: 命中的模板缩放比例
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+        self.scale = scale
+
+    def __repr__(self):
+        return (f"MatchResult(x={self.x}, y={self.y}, width={self.width}, height={self.height}, "
+                f"confidence={self.confidence:.3f}, scale={self.scale})")
+
+
+class PreparedTemplate:
+    """预处理后的模板，保存各缩放比例下的灰度金字塔，可在多次查找之间复用"""
+
+    def __init__(self, gray, scales, levels):
+        """初始化预处理模板
+
+        Args:
+            gray: 模板灰度图
+            scales: 缩放比例列表
+            levels: 每个缩放比例对应的金字塔，列表元素为 (缩放比例, [第0层, 第1层, ...])
+        """
+        self.gray = gray
+        self.scales = list(scales)
+        self.levels = levels
+
+    @property
+    def nbytes(self):
+        """所有金字塔层占用的字节数"""
+        return sum(level.nbytes for _, pyramid in self.levels for level in pyramid)
+
+
+class TemplateMatcher:
+    """由粗到精的多尺度模板匹配引擎
+
+    先在金字塔顶层（低分辨率）上找出少量候选位置，再只在候选位置附近以原分辨率精确匹配；
+    通过搜索少量模板缩放比例兼容100%/125%/150%的DPI缩放。
+    """
+
+    # 常见DPI缩放比例，按命中概率排序
+    DEFAULT_SCALES = (1.0, 1.25, 1.5)
+
+    def __init__(self, scales=DEFAULT_SCALES, max_levels=3, min_template_size=12,
+                 max_candidates=5, coarse_margin=0.25, refine_padding=2, early_accept=0.97):
+        """初始化模板匹配引擎
+
+        Args:
+            scales: 搜索的模板缩放比例
+            max_levels: 最大金字塔层数（不含原图）
+            min_template_size: 金字塔顶层模板的最小边长，决定实际使用的层数
+            max_candidates: 低分辨率上保留的候选数量
+            coarse_margin: 低分辨率候选相对目标阈值的放宽量
+            refine_padding: 精确匹配时候选窗口的额外边距，单位：原分辨率像素
+            early_accept: 某个缩放比例的置信度达到该值时不再尝试其余比例
+        """
+        self.scales = tuple(scales)
+        self.max_levels = max_levels
+        self.min_template_size = min_template_size
+        self.max_candidates = max_candidates
+        self.coarse_margin = coarse_margin
+        self.refine_padding = refine_padding
+        self.early_accept = early_accept
+
+    def prepare(self, template_gray, scales=None):
+        """预处理模板：生成各缩放比例的模板及其灰度金字塔
+
+        Args:
+            template_gray: 模板灰度图
+            scales: 缩放比例列表，默认使用引擎配置
+
+        Returns:
+            PreparedTemplate对象
+        """
+        levels = []
+        for scale in (scales or self.scales):
+            if scale == 1.0:
+                scaled = template_gray
+            else:
+                interpolation = cv2.INTER_LINEAR if scale > 1.0 else cv2.INTER_AREA
+                scaled = cv2.resize(template_gray, None, fx=scale, fy=scale, interpolation=interpolation)
+            if min(scaled.shape[:2]) < 1:
+                continue
+            levels.append((scale, self.build_pyramid(scaled, self._level_count(scaled.shape))))
+        return PreparedTemplate(template_gray, scales or self.scales, levels)
+
+    def _level_count(self, template_shape):
+        """根据模板尺寸计算金字塔层数，保证顶层模板不小于min_template_size"""
+        min_side = min(template_shape[:2])
+        if min_side < self.min_template_size * 2:
+            return 0
+        return min(self.max_levels, int(math.log2(min_side / self.min_template_size)))
+
+    @staticmethod
+    def build_pyramid(image, levels):
+        """构建图像金字塔
+
+        Args:
+            image: 灰度图
+            levels: 金字塔层数（不含原图）
+
+        Returns:
+            列表，第0层为原图，每层尺寸减半
+        """
+        pyramid = [image]
+        for _ in range(levels):
+            if min(pyramid[-1].shape[:2]) < 2:
+                break
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+
+    def match(self, frame, template, threshold=0.8, cancel_event=None):
+        """在帧上查找模板的最佳匹配
+
+        Args:
+            frame: 屏幕帧（ScreenFrame，金字塔在帧上缓存）或灰度图
+            template: PreparedTemplate对象或模板灰度图
+            threshold: 置信度阈值
+            cancel_event: threading.Event对象，被设置后在下一个缩放比例或候选位置前放弃匹配
+
+        Returns:
+            置信度最高的MatchResult（帧内坐标），低于阈值或被取消时返回None
+        """
+        if not isinstance(template, PreparedTemplate):
+            template = self.prepare(template)
+
+        best = None
+        for scale, template_pyramid in template.levels:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            result = self._match_scale(frame, template_pyramid, scale, threshold, cancel_event)
+            if result and (best is None or result.confidence > best.confidence):
+                best = result
+                if best.confidence >= self.early_accept:
+                    break
+
+        if best is not None and best.confidence >= threshold:
+            return best
+        return None
+
+    def match_all(self, frame, template, threshold=0.8, max_results=100, overlap=0.3):
+        """在帧上查找模板的所有匹配
+
+        每个缩放比例的响应图只计算一次，取其中所有高于阈值的局部峰值，
+        再跨缩放比例做非极大值抑制。
+
+        Args:
+            frame: 屏幕帧（ScreenFrame）或灰度图
+            template: PreparedTemplate对象或模板灰度图
+            threshold: 置信度阈值
+            max_results: 最多返回的匹配数量
+            overlap: 非极大值抑制的重叠度（IoU）阈值
+
+        Returns:
+            MatchResult列表（帧内坐标），按置信度从高到低排序
+        """
+        if not isinstance(template, PreparedTemplate):
+            template = self.prepare(template)
+
+        candidates = []
+        for scale, template_pyramid in template.levels:
+            candidates.extend(self._match_scale_all(frame, template_pyramid, scale, threshold, max_results))
+
+        return self.non_max_suppression(candidates, overlap)[:max_results]
+
+    def _match_scale_all(self, frame, template_pyramid, scale, threshold, max_results):
+        """在单个缩放比例下查找所有匹配
+
+        Args:
+            frame: 屏幕帧或灰度图
+            template_pyramid: 模板金字塔
+            scale: 缩放比例
+            threshold: 置信度阈值
+            max_results: 最多返回的匹配数量
+
+        Returns:
+            MatchResult列表
+        """
+        template_gray = template_pyramid[0]
+        th, tw = template_gray.shape[:2]
+        frame_pyramid = self._frame_pyramid(frame, len(template_pyramid) - 1)
+        frame_gray = frame_pyramid[0]
+        if th > frame_gray.shape[0] or tw > frame_gray.shape[1]:
+            return []
+
+        level = min(len(template_pyramid), len(frame_pyramid)) - 1
+        while level > 0 and (template_pyramid[level].shape[0] > frame_pyramid[level].shape[0] or
+                             template_pyramid[level].shape[1] > frame_pyramid[level].shape[1]):
+            level -= 1
+
+        if level == 0:
+            response = self.response_map(frame_gray, template_gray)
+            return [MatchResult(x, y, tw, th, self._calibrate(value), scale)
+                    for x, y, value in self.find_peaks(response, threshold, (tw, th), max_results)]
+
+        # 低分辨率响应图上取所有候选峰值，再逐个在原分辨率上精确匹配
+        coarse_h, coarse_w = template_pyramid[level].shape[:2]
+        coarse = self.response_map(frame_pyramid[level], template_pyramid[level])
+        peaks = self.find_peaks(coarse, threshold - self.coarse_margin, (coarse_w, coarse_h), max_results * 4)
+
+        factor = 2 ** level
+        pad = factor + self.refine_padding
+        results = []
+        for cx, cy, _ in peaks:
+            left = max(0, cx * factor - pad)
+            top = max(0, cy * factor - pad)
+            right = min(frame_gray.shape[1], cx * factor + tw + pad)
+            bottom = min(frame_gray.shape[0], cy * factor + th + pad)
+            window = frame_gray[top:bottom, left:right]
+            if window.shape[0] < th or window.shape[1] < tw:
+                continue
+            _, max_val, _, max_loc = cv2.minMaxLoc(self.response_map(window, template_gray))
+            if max_val >= threshold:
+                results.append(MatchResult(left + max_loc[0], top + max_loc[1], tw, th,
+                                           self._calibrate(max_val), scale))
+        return results
+
+    @staticmethod
+    def find_peaks(response, threshold, template_size, max_peaks):
+        """取响应图上所有高于阈值的局部峰值
+
+        局部峰值为模板大小邻域内的最大值，通过一次膨胀运算得到，无需反复屏蔽后重新搜索。
+
+        Args:
+            response: 响应图
+            threshold: 峰值最小值
+            template_size: 模板尺寸 (宽, 高)，决定邻域大小
+            max_peaks: 最多返回的峰值数量
+
+        Returns:
+            列表，元素为 (x, y, 响应值)，按响应值从高到低排序
+        """
+        kernel_w = max(1, template_size[0] // 2) | 1
+        kernel_h = max(1, template_size[1] // 2) | 1
+        dilated = cv2.dilate(response, np.ones((kernel_h, kernel_w), np.uint8))
+        ys, xs = np.nonzero((response >= dilated) & (response >= threshold))
+        values = response[ys, xs]
+        order = np.argsort(-values, kind='stable')[:max_peaks]
+        return [(int(xs[i]), int(ys[i]), float(values[i])) for i in order]
+
+    @staticmethod
+    def non_max_suppression(results, overlap=0.3):
+        """非极大值抑制：按置信度从高到低保留结果，去掉与已保留结果重叠过多的结果
+
+        Args:
+            results: MatchResult列表
+            overlap: 重叠度（IoU）阈值
+
+        Returns:
+            保留的MatchResult列表，按置信度从高到低排序
+        """
+        kept = []
+        for result in sorted(results, key=lambda r: r.confidence, reverse=True):
+            if all(TemplateMatcher._iou(result, other) <= overlap for other in kept):
+                kept.append(result)
+        return kept
+
+    @staticmethod
+    def _iou(a, b):
+        """计算两个匹配区域的交并比"""
+        inter_w = min(a.x + a.width, b.x + b.width) - max(a.x, b.x)
+        inter_h = min(a.y + a.height, b.y + b.height) - max(a.y, b.y)
+        if inter_w <= 0 or inter_h <= 0:
+            return 0.0
+        inter = inter_w * inter_h
+        return inter / float(a.width * a.height + b.width * b.height - inter)
+
+    def _match_scale(self, frame, template_pyramid, scale, threshold, cancel_event=None):
+        """在单个缩放比例下执行由粗到精匹配
+
+        Args:
+            frame: 屏幕帧或灰度图
+            template_pyramid: 模板金字塔
+            scale: 缩放比例
+            threshold: 置信度阈值
+            cancel_event: 取消事件，被设置后不再精确匹配剩余的候选
+
+        Returns:
+            MatchResult对象，无候选时返回None
+        """
+        template_gray = template_pyramid[0]
+        th, tw = template_gray.shape[:2]
+        frame_pyramid = self._frame_pyramid(frame, len(template_pyramid) - 1)
+        frame_gray = frame_pyramid[0]
+        if th > frame_gray.shape[0] or tw > frame_gray.shape[1]:
+            return None
+
+        # 金字塔层数取帧与模板都能支持的最大值
+        level = min(len(template_pyramid), len(frame_pyramid)) - 1
+        while level > 0 and (template_pyramid[level].shape[0] > frame_pyramid[level].shape[0] or
+                             template_pyramid[level].shape[1] > frame_pyramid[level].shape[1]):
+            level -= 1
+
+        if level == 0:
+            # 模板太小，无法降采样，直接在原分辨率上匹配
+            response = self.response_map(frame_gray, template_gray)
+            _, max_val, _, max_loc = cv2.minMaxLoc(response)
+            return MatchResult(max_loc[0], max_loc[1], tw, th, self._calibrate(max_val), scale)
+
+        # 低分辨率上找候选
+        coarse = self.response_map(frame_pyramid[level], template_pyramid[level])
+        factor = 2 ** level
+        best = None
+        coarse_h, coarse_w = template_pyramid[level].shape[:2]
+        peaks = self._top_peaks(coarse, self.max_candidates, threshold - self.coarse_margin,
+                                (max(1, coarse_w // 2), max(1, coarse_h // 2)))
+        for cx, cy, _ in peaks:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            # 只在候选附近以原分辨率精确匹配
+            pad = factor + self.refine_padding
+            left = max(0, cx * factor - pad)
+            top = max(0, cy * factor - pad)
+            right = min(frame_gray.shape[1], cx * factor + tw + pad)
+            bottom = min(frame_gray.shape[0], cy * factor + th + pad)
+            window = frame_gray[top:bottom, left:right]
+            if window.shape[0] < th or window.shape[1] < tw:
+                continue
+            response = self.response_map(window, template_gray)
+            _, max_val, _, max_loc = cv2.minMaxLoc(response)
+            confidence = self._calibrate(max_val)
+            if best is None or confidence > best.confidence:
+                best = MatchResult(left + max_loc[0], top + max_loc[1], tw, th, confidence, scale)
+        return best
+
+    @staticmethod
+    def _frame_pyramid(frame, levels):
+        """获取帧的灰度金字塔，ScreenFrame会缓存金字塔"""
+        if hasattr(frame, 'get_pyramid'):
+            return frame.get_pyramid(levels)
+        return TemplateMatcher.build_pyramid(frame, levels)
+
+    @staticmethod
+    def response_map(image_gray, template_gray):
+        """计算NCC响应图
+
+        纯色模板的方差为0，TM_CCOEFF_NORMED无定义，改用TM_SQDIFF_NORMED换算相似度。
+
+        Args:
+            image_gray: 搜索图像灰度图
+            template_gray: 模板灰度图
+
+        Returns:
+            响应图，取值范围[-1, 1]，越大越相似
+        """
+        if float(template_gray.std()) < 1e-3:
+            response = 1.0 - cv2.matchTemplate(image_gray, template_gray, cv2.TM_SQDIFF_NORMED)
+        else:
+            response = cv2.matchTemplate(image_gray, template_gray, cv2.TM_CCOEFF_NORMED)
+        # 图像区域方差为0时结果可能为NaN/Inf
+        return np.nan_to_num(response, nan=0.0, posinf=0.0, neginf=0.0, copy=False)
+
+    @staticmethod
+    def _calibrate(value):
+        """将NCC值限制到[0, 1]作为置信度"""
+        return float(min(1.0, max(0.0, value)))
+
+    @staticmethod
+    def _top_peaks(response, count, min_value, radius):
+        """在响应图上取前count个峰值，每取一个峰值屏蔽其邻域
+
+        Args:
+            response: 响应图
+            count: 峰值数量
+            min_value: 峰值最小值，至少保留一个峰值
+            radius: 屏蔽邻域半径 (x方向, y方向)
+
+        Returns:
+            列表，元素为 (x, y, 响应值)
+        """
+        response = response.copy()
+        radius_x, radius_y = radius
+        peaks = []
+        for _ in range(count):
+            _, max_val, _, (x, y) = cv2.minMaxLoc(response)
+            if max_val < min_value and peaks:
+                break
+            peaks.append((x, y, max_val))
+            response[max(0, y - radius_y):y + radius_y + 1, max(0, x - radius_x):x + radius_x + 1] = -1.0
+        return peaks
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板存储模块
+将预处理后的模板、灰度金字塔和ORB描述符持久化到按内容寻址的磁盘缓存中，
+重启后直接以内存映射方式加载，无需重新解码、预处理和提取特征
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .template_matcher import PreparedTemplate
+
+
+class TemplateStore:
+    """按内容寻址的模板磁盘缓存
+
+    缓存键为模板文件内容的哈希加上预处理参数，PNG文件内容变化后自动失效。
+    每个缓存项为缓存目录下的一个子目录，数组以.npy格式保存，加载时使用内存映射；
+    磁盘总占用超过字节预算时按最近使用时间淘汰。meta.json存在表示缓存项完整，
+    写入时最后写入，删除时最后删除。
+    """
+
+    # 默认磁盘字节预算
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    META_FILE = 'meta.json'
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, memory_entries=256):
+        """初始化模板存储
+
+        Args:
+            cache_dir: 缓存目录，默认为data/template_cache
+            max_bytes: 磁盘缓存的字节预算
+            memory_entries: 内存中保留的已加载缓存项数量
+        """
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), '..', 'data', 'template_cache')
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+
+        self._memory = OrderedDict()  # 缓存键 -> 已加载的缓存项，按最近使用排序
+        self._file_keys = {}  # 文件路径 -> (修改时间, 文件大小, 缓存键, 参数)，文件未变化时无需重新计算哈希
+        self._disk_index = None  # 缓存键 -> [字节数, 最近使用时间]，首次写入时扫描缓存目录建立
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def make_key(self, image_path, params=None):
+        """计算模板文件的缓存键
+
+        Args:
+            image_path: 模板文件路径
+            params: 预处理参数字典，参数变化时缓存键随之变化
+
+        Returns:
+            缓存键（十六进制字符串），文件不存在时返回None
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+
+        params_text = json.dumps(params or {}, sort_keys=True, default=str)
+        with self._lock:
+            cached = self._file_keys.get(image_path)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size and cached[3] == params_text:
+                return cached[2]
+
+        digest = hashlib.sha1()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digest.update(params_text.encode('utf-8'))
+        key = digest.hexdigest()
+
+        with self._lock:
+            self._file_keys[image_path] = (stat.st_mtime_ns, stat.st_size, key, params_text)
+        return key
+
+    def load(self, image_path, params, builder):
+        """加载模板缓存项，未命中时调用builder生成并写入磁盘
+
+        Args:
+            image_path: 模板文件路径
+            params: 预处理参数字典
+            builder: 无参函数，返回 (模板图像, 模板灰度图, 特征点列表, 描述符, PreparedTemplate)，失败返回None
+
+        Returns:
+            (模板图像, 模板灰度图, 特征点列表, 描述符, PreparedTemplate)，失败返回None
+        """
+        key = self.make_key(image_path, params)
+        if key is None:
+            return builder()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read(key)
+        if entry is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            entry = builder()
+            if entry is None:
+                return None
+            try:
+                self._write(key, entry)
+            except Exception as e:
+                print(f"写入模板缓存失败: {e}")
+
+        with self._lock:
+            self._memory[key] = entry
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return entry
+
+    def _entry_dir(self, key):
+        """缓存项目录"""
+        return os.path.join(self.cache_dir, key)
+
+    def _read(self, key):
+        """以内存映射方式读取磁盘缓存项
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存项，不存在或损坏时返回None
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, self.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            def load_array(name):
+                return np.load(os.path.join(entry_dir, name), mmap_mode='r')
+
+            template = load_array('template.npy')
+            template_gray = load_array('gray.npy')
+            levels = []
+            for i, (scale, level_count) in enumerate(meta['levels']):
+                levels.append((scale, [load_array(f's{i}_l{j}.npy') for j in range(level_count)]))
+            keypoints = self._decode_keypoints(load_array('keypoints.npy'))
+            descriptors = load_array('descriptors.npy') if meta['has_descriptors'] else None
+
+            # 更新最近使用时间，用于LRU淘汰
+            now = time.time()
+            os.utime(meta_path, (now, now))
+            with self._lock:
+                if self._disk_index is not None and key in self._disk_index:
+                    self._disk_index[key][1] = now
+        except Exception as e:
+            print(f"读取模板缓存失败: {e}")
+            # 缓存项损坏，删除后重新构建并写入
+            with self._lock:
+                if self._remove_entry(key) and self._disk_index is not None:
+                    self._disk_index.pop(key, None)
+            return None
+
+        return template, template_gray, keypoints, descriptors, PreparedTemplate(template_gray, meta['scales'], levels)
+
+    def _write(self, key, entry):
+        """将缓存项写入磁盘，先写临时目录再重命名，保证读取方不会看到写了一半的缓存项
+
+        Args:
+            key: 缓存键
+            entry: 缓存项
+        """
+        template, template_gray, keypoints, descriptors, prepared_template = entry
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(os.path.join(entry_dir, self.META_FILE)):
+            return
+        if os.path.exists(entry_dir):
+            # 没有meta.json的目录是删除了一半的缓存项，删除后重新写入
+            with self._lock:
+                if not self._remove_entry(key):
+                    return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_dir = f"{entry_dir}.tmp{os.getpid()}_{threading.get_ident()}"
+        os.makedirs(temp_dir, exist_ok=True)
+
+        nbytes = 0
+
+        def save_array(name, array):
+            nonlocal nbytes
+            np.save(os.path.join(temp_dir, name), np.ascontiguousarray(array))
+            nbytes += array.nbytes
+
+        save_array('template.npy', template)
+        save_array('gray.npy', template_gray)
+        for i, (_, pyramid) in enumerate(prepared_template.levels):
+            for j, level in enumerate(pyramid):
+                save_array(f's{i}_l{j}.npy', level)
+        save_array('keypoints.npy', self._encode_keypoints(keypoints))
+        if descriptors is not None:
+            save_array('descriptors.npy', descriptors)
+
+        meta = {
+            'scales': list(prepared_template.scales),
+            'levels': [[scale, len(pyramid)] for scale, pyramid in prepared_template.levels],
+            'has_descriptors': descriptors is not None,
+            'nbytes': nbytes,
+        }
+        with open(os.path.join(temp_dir, self.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        try:
+            os.replace(temp_dir, entry_dir)
+        except OSError:
+            # 其他进程已写入同一缓存项
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+
+        with self._lock:
+            index = self._get_disk_index()
+            index[key] = [nbytes, time.time()]
+            self._evict(keep=key)
+
+    def _get_disk_index(self):
+        """获取磁盘缓存索引，首次调用时扫描缓存目录
+
+        其他进程或上次运行遗留的临时目录、删除目录和没有meta.json的目录在扫描时删除，
+        无法删除的目录按实际大小计入索引，并最先被淘汰。
+        """
+        if self._disk_index is None:
+            self._disk_index = {}
+            if os.path.isdir(self.cache_dir):
+                own_suffix = f"{os.getpid()}_"
+                for name in os.listdir(self.cache_dir):
+                    path = os.path.join(self.cache_dir, name)
+                    if '.tmp' in name or '.del' in name:
+                        # 本进程正在写入的临时目录不删除
+                        if not name.split('.', 1)[1][3:].startswith(own_suffix):
+                            shutil.rmtree(path, ignore_errors=True)
+                        continue
+                    if not os.path.isdir(path):
+                        continue
+                    meta_path = os.path.join(path, self.META_FILE)
+                    try:
+                        with open(meta_path, 'r', encoding='utf-8') as f:
+                            nbytes = json.load(f).get('nbytes', 0)
+                        self._disk_index[name] = [nbytes, os.path.getmtime(meta_path)]
+                    except (OSError, ValueError):
+                        if not self._remove_entry(name):
+                            self._disk_index[name] = [self._dir_size(path), 0.0]
+        return self._disk_index
+
+    @staticmethod
+    def _dir_size(path):
+        """目录中文件的总字节数"""
+        total = 0
+        for name in os.listdir(path):
+            try:
+                total += os.path.getsize(os.path.join(path, name))
+            except OSError:
+                continue
+        return total
+
+    def _remove_entry(self, key):
+        """删除磁盘缓存项，在锁内调用
+
+        先释放内存中的缓存项，再将目录重命名为删除目录后删除；Windows上仍被内存映射的文件
+        使目录无法重命名时逐个删除文件，meta.json最后删除，删除失败的缓存项仍在索引中，
+        下次淘汰时重试，在此之前读取失败时也会重试删除。
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存项目录是否已不存在
+        """
+        self._memory.pop(key, None)
+        entry_dir = self._entry_dir(key)
+        tombstone = f"{entry_dir}.del{os.getpid()}_{threading.get_ident()}"
+        try:
+            os.replace(entry_dir, tombstone)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            tombstone = None
+        if tombstone is not None:
+            # 删除目录中残留的文件在下次启动扫描时删除
+            shutil.rmtree(tombstone, ignore_errors=True)
+            return True
+
+        try:
+            names = os.listdir(entry_dir)
+        except OSError:
+            return not os.path.exists(entry_dir)
+        for name in sorted(names, key=lambda name: name == self.META_FILE):
+            try:
+                os.remove(os.path.join(entry_dir, name))
+            except OSError:
+                return False
+        try:
+            os.rmdir(entry_dir)
+        except OSError:
+            return False
+        return True
+
+    def _evict(self, keep=None):
+        """按最近使用时间淘汰缓存项，直到磁盘占用不超过字节预算
+
+        Args:
+            keep: 不淘汰的缓存键（刚写入的缓存项）
+        """
+        index = self._get_disk_index()
+        total = sum(nbytes for nbytes, _ in index.values())
+        for key, (nbytes, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            if self._remove_entry(key):
+                del index[key]
+                total -= nbytes
+
+    @property
+    def disk_usage(self):
+        """磁盘缓存占用的字节数"""
+        with self._lock:
+            return sum(nbytes for nbytes, _ in self._get_disk_index().values())
+
+    def clear(self):
+        """清空内存和磁盘缓存"""
+        with self._lock:
+            self._memory.clear()
+            self._file_keys.clear()
+            self._disk_index = None
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    @staticmethod
+    def _encode_keypoints(keypoints):
+        """将cv2.KeyPoint列表编码为数组"""
+        return np.array([(kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response, kp.octave, kp.class_id)
+                         for kp in keypoints or []], dtype=np.float32).reshape(-1, 7)
+
+    @staticmethod
+    def _decode_keypoints(array):
+        """将数组解码为cv2.KeyPoint列表"""
+        import cv2
+
+        return [cv2.KeyPoint(float(x), float(y), float(size), float(angle), float(response), int(octave), int(class_id))
+                for x, y, size, angle, response, octave, class_id in array]
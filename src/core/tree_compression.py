@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树压缩模块
+结构相同的子树（表格行、图标+文本列表项、工具栏按钮等）共享同一个结构对象，
+每个实例只保存自身不同的值（位置、名称、运行时ID等），稳定性评分按结构计算一次
+"""
+
+from .element import Element
+
+
+# 构成结构指纹的元素属性，同一结构的所有实例这些属性都相同
+SHAPE_FIELDS = ('element_type', 'control_type', 'class_name', 'automation_id', 'is_enabled', 'is_visible',
+                'has_children')
+# 每个实例单独保存的元素属性
+VALUE_FIELDS = ('x', 'y', 'width', 'height', 'name', 'text', 'runtime_id', 'is_checked', 'attributes')
+
+
+def _name_pattern(name):
+    """名称的特征：是否有名称、是否较长、是否包含数字
+
+    稳定性评分只依赖这些特征，把它们纳入结构指纹后同一结构的实例评分一定相同。
+    """
+    if not name:
+        return None
+    return len(name) > 5, any(char.isdigit() for char in name)
+
+
+class TreeShape:
+    """子树结构，同一指纹的子树只创建一个对象"""
+
+    __slots__ = ('fields', 'name_pattern', 'children', 'size', 'instance_count', 'analysis')
+
+    def __init__(self, fields, name_pattern, children):
+        self.fields = fields  # 与SHAPE_FIELDS对应的属性值
+        self.name_pattern = name_pattern
+        self.children = children  # 子结构元组
+        self.size = 1 + sum(child.size for child in children)  # 子树节点数
+        self.instance_count = 0  # 在树中出现的次数
+        self.analysis = {}  # 深度 -> 稳定性分析结果
+
+
+class CompressedTree:
+    """压缩元素树
+
+    整棵树由结构有向无环图和一个按先序排列的实例值列表组成，
+    第i个节点的子树对应values[i:i + shape.size]。
+    """
+
+    def __init__(self, root_element):
+        """压缩元素树
+
+        Args:
+            root_element: 根元素对象
+        """
+        self._shapes = {}  # 结构指纹 -> TreeShape
+        self.values = []  # 先序排列的实例值元组
+        self.root_depth = root_element.depth
+        self.process_id = root_element.process_id
+        self.window_handle = root_element.window_handle
+        self.root_shape = self._compress(root_element)
+
+    def _compress(self, element):
+        """递归压缩子树
+
+        Args:
+            element: 元素对象
+
+        Returns:
+            子树的结构对象
+        """
+        self.values.append(tuple(getattr(element, field) for field in VALUE_FIELDS))
+        children = tuple(self._compress(child) for child in element.children)
+        fields = tuple(getattr(element, field) for field in SHAPE_FIELDS)
+        key = (fields, _name_pattern(element.name), tuple(id(child) for child in children))
+        shape = self._shapes.get(key)
+        if shape is None:
+            shape = self._shapes[key] = TreeShape(fields, key[1], children)
+        shape.instance_count += 1
+        return shape
+
+    @property
+    def node_count(self):
+        """节点总数"""
+        return len(self.values)
+
+    @property
+    def shape_count(self):
+        """不同结构的数量"""
+        return len(self._shapes)
+
+    def get_stats(self):
+        """获取压缩统计
+
+        Returns:
+            包含节点数、结构数和重复结构实例数的字典
+        """
+        return {
+            'nodes': self.node_count,
+            'shapes': self.shape_count,
+            'shared_instances': sum(shape.instance_count - 1 for shape in self._shapes.values()),
+        }
+
+    def iter_nodes(self):
+        """按先序遍历所有节点
+
+        Yields:
+            (结构对象, 深度, 先序序号)
+        """
+        stack = [(self.root_shape, self.root_depth)]
+        index = 0
+        while stack:
+            shape, depth = stack.pop()
+            yield shape, depth, index
+            index += 1
+            stack.extend((child, depth + 1) for child in reversed(shape.children))
+
+    def _make_element(self, shape, depth, index):
+        """根据结构和实例值创建单个元素对象（不含子元素）"""
+        element = Element()
+        for field, value in zip(SHAPE_FIELDS, shape.fields):
+            setattr(element, field, value)
+        for field, value in zip(VALUE_FIELDS, self.values[index]):
+            setattr(element, field, value)
+        element.attributes = dict(element.attributes or {})
+        element.depth = depth
+        element.process_id = self.process_id
+        element.window_handle = self.window_handle
+
+        analysis = shape.analysis.get(depth)
+        if analysis is not None:
+            element.stability_score = analysis['stability_score']
+            element.stability_suggestions = list(analysis['stability_suggestions'])
+            element.locator_scores = dict(analysis['locator_scores'])
+            element.locator_strategy = analysis['locator_strategy']
+            element.locator_priority = list(analysis['locator_priority'])
+        return element
+
+    def get_element(self, index):
+        """获取先序序号为index的单个元素对象，不创建其子元素
+
+        Args:
+            index: 先序序号
+
+        Returns:
+            元素对象，序号无效时返回None
+        """
+        for shape, depth, node_index in self.iter_nodes():
+            if node_index == index:
+                return self._make_element(shape, depth, index)
+            if node_index > index:
+                break
+        return None
+
+    def materialize(self):
+        """还原完整的元素树
+
+        Returns:
+            根元素对象
+        """
+        root = None
+        parents = {}  # 先序序号 -> 元素对象
+        stack = [(self.root_shape, self.root_depth, None)]
+        index = 0
+        while stack:
+            shape, depth, parent_index = stack.pop()
+            element = self._make_element(shape, depth, index)
+            if parent_index is None:
+                root = element
+            else:
+                parent = parents[parent_index]
+                parent.add_child(element)
+                element.depth = depth
+            if shape.children:
+                parents[index] = element
+            stack.extend((child, depth + 1, index) for child in reversed(shape.children))
+            index += 1
+        return root
+
+    def analyze(self, analyzer):
+        """按结构计算稳定性评分和定位策略，每个(结构, 深度)只计算一次
+
+        同一结构重复出现时，结构内相同的automation_id和类名无法区分各个实例，
+        会追加相应的定位建议。
+
+        Args:
+            analyzer: ElementAnalyzer实例
+
+        Returns:
+            实际计算的次数
+        """
+        computed = 0
+        for shape, depth, index in self.iter_nodes():
+            if depth in shape.analysis:
+                continue
+            element = self._make_element(shape, depth, index)
+            analyzer.calculate_stability_score(element)
+            suggestions = list(element.stability_suggestions)
+            if shape.instance_count > 1 and (element.automation_id or element.class_name):
+                suggestions.append(f"同结构元素重复出现{shape.instance_count}次，"
+                                   f"automation_id和类名不唯一，建议结合名称或索引定位")
+            shape.analysis[depth] = {
+                'stability_score': element.stability_score,
+                'stability_suggestions': suggestions,
+                'locator_scores': element.locator_scores,
+                'locator_strategy': element.locator_strategy,
+                'locator_priority': element.locator_priority,
+            }
+            computed += 1
+        return computed
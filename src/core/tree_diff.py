@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树比较模块
+比较两个版本应用的元素树或快照，找出新增、删除、移动和属性变化的节点，并列出受影响的已保存定位
+"""
+
+from .tree_snapshot import TreeSnapshot
+
+
+# 参与比较的元素属性
+DIFF_FIELDS = ('element_type', 'control_type', 'class_name', 'automation_id', 'name', 'is_enabled', 'is_visible')
+RECT_FIELDS = ('x', 'y', 'width', 'height')
+
+ADDED = 'added'
+REMOVED = 'removed'
+MOVED = 'moved'
+CHANGED = 'changed'
+
+
+class _FlatTree:
+    """按先序展开的元素树，节点以序号表示"""
+
+    def __init__(self, source, compare_rect=False):
+        """展开元素树
+
+        Args:
+            source: 根元素对象或TreeSnapshot对象
+            compare_rect: 是否比较位置和尺寸
+        """
+        fields = DIFF_FIELDS + RECT_FIELDS if compare_rect else DIFF_FIELDS
+        if isinstance(source, TreeSnapshot):
+            self._load_snapshot(source, fields)
+        else:
+            self._load_elements(source, fields)
+
+        count = len(self.values)
+        self.children = [[] for _ in range(count)]
+        for index in range(1, count):
+            self.children[self.parent[index]].append(index)
+
+        # 自底向上计算子树指纹和子树大小，先序的逆序保证子节点先于父节点
+        self.fingerprint = [0] * count
+        self.size = [1] * count
+        for index in range(count - 1, -1, -1):
+            children = self.children[index]
+            if children:
+                self.fingerprint[index] = hash((self.values[index], tuple(self.fingerprint[c] for c in children)))
+                self.size[index] += sum(self.size[c] for c in children)
+            else:
+                self.fingerprint[index] = hash(self.values[index])
+
+    def _load_elements(self, root, fields):
+        """从Element树展开"""
+        self.values = []
+        self.parent = []
+        stack = [(root, -1)]
+        while stack:
+            element, parent = stack.pop()
+            index = len(self.values)
+            self.values.append(tuple(getattr(element, field) for field in fields))
+            self.parent.append(parent)
+            stack.extend((child, index) for child in reversed(element.children))
+
+    def _load_snapshot(self, snapshot, fields):
+        """从快照展开，字符串按ID解码一次"""
+        nodes = snapshot.nodes
+        columns = []
+        for field in fields:
+            if field in ('is_enabled', 'is_visible'):
+                flag = 1 if field == 'is_enabled' else 2
+                columns.append([bool(flags & flag) for flags in nodes['flags'].tolist()])
+            elif field in RECT_FIELDS:
+                columns.append(nodes[field].tolist())
+            else:
+                strings = {}
+                column = []
+                for string_id in nodes[field].tolist():
+                    value = strings.get(string_id)
+                    if value is None and string_id not in strings:
+                        value = strings[string_id] = snapshot.get_string(string_id)
+                    column.append(value)
+                columns.append(column)
+        self.values = list(zip(*columns))
+        self.parent = nodes['parent'].tolist()
+
+    def key(self, index):
+        """与运行时无关的节点键：有automation_id时使用类型和automation_id，否则使用类型、名称和类名"""
+        element_type, _, class_name, automation_id, name = self.values[index][:5]
+        if automation_id:
+            return element_type, automation_id
+        return element_type, name, class_name
+
+    def keyed_children(self, index):
+        """子节点按 (节点键, 同键兄弟中的序号) 索引"""
+        keyed = {}
+        occurrences = {}
+        for child in self.children[index]:
+            key = self.key(child)
+            ordinal = occurrences.get(key, 0)
+            occurrences[key] = ordinal + 1
+            keyed[(key, ordinal)] = child
+        return keyed
+
+    def path(self, index):
+        """节点路径字符串，如 Window(main) > Pane(panel) > Button(save)"""
+        parts = []
+        while index >= 0:
+            element_type, _, class_name, automation_id, name = self.values[index][:5]
+            parts.append(f"{element_type}({automation_id or name or class_name or ''})")
+            index = self.parent[index]
+        return ' > '.join(reversed(parts))
+
+    def describe(self, index):
+        """节点属性字典"""
+        return dict(zip(DIFF_FIELDS, self.values[index][:len(DIFF_FIELDS)]))
+
+    def iter_subtree(self, index):
+        """先序遍历子树"""
+        # 先序展开时子树是连续的
+        return range(index, index + self.size[index])
+
+
+class TreeDiffResult:
+    """元素树比较结果"""
+
+    def __init__(self, old_tree, new_tree):
+        self._old = old_tree
+        self._new = new_tree
+        self.entries = []  # 差异项列表
+        self.identical_nodes = 0  # 因子树指纹相同而跳过的节点数
+
+    def _add(self, change_type, old_index=None, new_index=None, changes=None):
+        """添加差异项"""
+        tree, index = (self._old, old_index) if old_index is not None else (self._new, new_index)
+        entry = tree.describe(index)
+        entry.update({
+            'type': change_type,
+            'old_index': old_index,
+            'new_index': new_index,
+            'old_path': self._old.path(old_index) if old_index is not None else None,
+            'new_path': self._new.path(new_index) if new_index is not None else None,
+        })
+        if changes:
+            entry['changes'] = changes
+        self.entries.append(entry)
+
+    def get_entries(self, change_type=None):
+        """获取差异项
+
+        Args:
+            change_type: 差异类型，added/removed/moved/changed，默认返回全部
+
+        Returns:
+            差异项列表
+        """
+        if change_type is None:
+            return list(self.entries)
+        return [entry for entry in self.entries if entry['type'] == change_type]
+
+    def summary(self):
+        """差异统计
+
+        Returns:
+            各类差异的数量和跳过的相同节点数
+        """
+        counts = {change_type: 0 for change_type in (ADDED, REMOVED, MOVED, CHANGED)}
+        for entry in self.entries:
+            counts[entry['type']] += 1
+        counts['identical'] = self.identical_nodes
+        return counts
+
+    def find_affected_locators(self, records, source='favorites'):
+        """找出受差异影响的已保存定位
+
+        Args:
+            records: 收藏夹或历史记录列表，记录中包含element_type、element_name、automation_id和class_name
+            source: 记录来源名称，写入结果中
+
+        Returns:
+            受影响定位列表，每项包含来源、记录、原因和对应的差异项
+        """
+        by_automation_id = {}
+        by_name = {}
+        for entry in self.entries:
+            if entry['old_index'] is None:
+                continue
+            if entry['automation_id']:
+                by_automation_id.setdefault((entry['element_type'], entry['automation_id']), entry)
+            by_name.setdefault((entry['element_type'], entry['name'], entry['class_name']), entry)
+
+        affected = []
+        for record in records:
+            automation_id = record.get('automation_id')
+            if automation_id:
+                entry = by_automation_id.get((record.get('element_type'), automation_id))
+            else:
+                entry = by_name.get((record.get('element_type'), record.get('element_name'), record.get('class_name')))
+            if entry is None:
+                continue
+            reason = self._describe_impact(entry, bool(automation_id))
+            if reason:
+                affected.append({'source': source, 'record': record, 'reason': reason, 'entry': entry})
+        return affected
+
+    @staticmethod
+    def _describe_impact(entry, uses_automation_id):
+        """描述差异对定位的影响，不影响时返回None"""
+        if entry['type'] == REMOVED:
+            return "元素已删除，定位将失败"
+        if entry['type'] == MOVED:
+            return f"元素位置已变化: {entry['old_path']} -> {entry['new_path']}，基于路径的定位将失败"
+        changes = entry.get('changes', {})
+        if 'automation_id' in changes:
+            return f"automation_id已变化: {changes['automation_id'][0]} -> {changes['automation_id'][1]}"
+        if not uses_automation_id and ('name' in changes or 'class_name' in changes):
+            field = 'name' if 'name' in changes else 'class_name'
+            return f"{field}已变化: {changes[field][0]} -> {changes[field][1]}"
+        if 'is_enabled' in changes or 'is_visible' in changes:
+            return "元素可用性或可见性已变化，定位后的操作可能失败"
+        return None
+
+
+def diff_trees(old, new, compare_rect=False):
+    """比较两个元素树或快照
+
+    按节点键（automation_id或类型+名称+类名，以及同键兄弟中的序号）自顶向下对齐子树，
+    子树指纹相同的对齐子树直接跳过；未对齐的子树再按指纹或automation_id全局匹配，识别为移动。
+
+    Args:
+        old: 旧版本的根元素对象或TreeSnapshot对象
+        new: 新版本的根元素对象或TreeSnapshot对象
+        compare_rect: 是否把位置和尺寸变化视为属性变化
+
+    Returns:
+        TreeDiffResult对象
+    """
+    old_tree = _FlatTree(old, compare_rect)
+    new_tree = _FlatTree(new, compare_rect)
+    result = TreeDiffResult(old_tree, new_tree)
+    fields = DIFF_FIELDS + RECT_FIELDS if compare_rect else DIFF_FIELDS
+
+    def align(pairs, unmatched_old, unmatched_new):
+        """对齐节点对及其子树，未对齐的子节点加入unmatched_old/unmatched_new"""
+        stack = list(pairs)
+        while stack:
+            old_index, new_index = stack.pop()
+            if old_tree.fingerprint[old_index] == new_tree.fingerprint[new_index]:
+                result.identical_nodes += old_tree.size[old_index]
+                continue
+
+            old_values, new_values = old_tree.values[old_index], new_tree.values[new_index]
+            if old_values != new_values:
+                changes = {field: (old_value, new_value) for field, old_value, new_value
+                           in zip(fields, old_values, new_values) if old_value != new_value}
+                result._add(CHANGED, old_index, new_index, changes)
+
+            old_children = old_tree.keyed_children(old_index)
+            new_children = new_tree.keyed_children(new_index)
+            for key, old_child in old_children.items():
+                new_child = new_children.get(key)
+                if new_child is None:
+                    unmatched_old.append(old_child)
+                else:
+                    stack.append((old_child, new_child))
+            unmatched_new.extend(child for key, child in new_children.items() if key not in old_children)
+
+    unmatched_old = []
+    unmatched_new = []
+    if old_tree.values and new_tree.values:
+        align([(0, 0)], unmatched_old, unmatched_new)
+
+    # 未对齐的子树按指纹或automation_id全局匹配，识别移动的节点
+    new_by_fingerprint = {}
+    new_by_automation_id = {}
+    for new_index in unmatched_new:
+        new_by_fingerprint.setdefault(new_tree.fingerprint[new_index], []).append(new_index)
+        if new_tree.values[new_index][3]:
+            new_by_automation_id.setdefault(new_tree.key(new_index), []).append(new_index)
+
+    moved_new = set()
+    for old_index in unmatched_old:
+        candidates = [index for index in new_by_fingerprint.get(old_tree.fingerprint[old_index], [])
+                      if index not in moved_new]
+        if not candidates and old_tree.values[old_index][3]:
+            candidates = [index for index in new_by_automation_id.get(old_tree.key(old_index), [])
+                          if index not in moved_new]
+        if candidates:
+            new_index = candidates[0]
+            moved_new.add(new_index)
+            result._add(MOVED, old_index, new_index)
+            # 移动子树内部未对齐的节点直接视为新增/删除
+            inner_old, inner_new = [], []
+            align([(old_index, new_index)], inner_old, inner_new)
+            for index in inner_old:
+                for node in old_tree.iter_subtree(index):
+                    result._add(REMOVED, old_index=node)
+            for index in inner_new:
+                for node in new_tree.iter_subtree(index):
+                    result._add(ADDED, new_index=node)
+        else:
+            for node in old_tree.iter_subtree(old_index):
+                result._add(REMOVED, old_index=node)
+
+    for new_index in unmatched_new:
+        if new_index not in moved_new:
+            for node in new_tree.iter_subtree(new_index):
+                result._add(ADDED, new_index=node)
+
+    return result
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树快照模块
+将分析得到的元素树保存为可内存映射的二进制快照，打开时只映射文件，按需读取节点，不创建全部Element对象
+
+文件布局（小端序，各段按8字节对齐）：
+    文件头      魔数、版本、节点记录长度、节点数、字符串数和各段偏移
+    节点段      定长节点记录（父节点序号、深度、标志、位置尺寸、字符串ID、子节点索引位置和数量），按先序排列
+    子节点索引  按父节点分组的子节点序号，节点记录中的first_child/child_count指向此段
+    字符串偏移  字符串数据段中第i个字符串的起始偏移，第i+1项为其结束偏移，字符串ID 0表示None
+    字符串数据  UTF-8编码的字符串
+    元数据      JSON，包含进程ID、窗口句柄和创建时间等
+"""
+
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from .element import Element
+
+
+MAGIC = b'LTSNAP\x00\x01'
+VERSION = 1
+
+# 文件头：魔数、版本、节点记录长度、保留、节点数、字符串数、节点段、子节点索引、字符串偏移、字符串数据、元数据的偏移和元数据长度
+HEADER = struct.Struct('<8sHHIQQQQQQQQ')
+
+NODE_DTYPE = np.dtype([
+    ('parent', '<i4'),
+    ('depth', '<u2'),
+    ('flags', '<u2'),
+    ('x', '<i4'),
+    ('y', '<i4'),
+    ('width', '<i4'),
+    ('height', '<i4'),
+    ('element_type', '<u4'),
+    ('control_type', '<u4'),
+    ('class_name', '<u4'),
+    ('automation_id', '<u4'),
+    ('name', '<u4'),
+    ('text', '<u4'),
+    ('runtime_id', '<u4'),
+    ('first_child', '<u4'),
+    ('child_count', '<u4'),
+])
+
+# 节点标志位
+FLAG_ENABLED = 1
+FLAG_VISIBLE = 2
+FLAG_CHECKED = 4
+FLAG_CHECKABLE = 8  # is_checked不为None
+FLAG_HAS_CHILDREN = 16  # 还有未加载的子元素
+FLAG_HAS_RECT = 32
+
+# 以字符串ID保存的元素属性
+STRING_FIELDS = ('element_type', 'control_type', 'class_name', 'automation_id', 'name', 'text', 'runtime_id')
+
+
+def _align(offset):
+    """按8字节对齐"""
+    return (offset + 7) & ~7
+
+
+class TreeSnapshot:
+    """内存映射的元素树快照，节点序号即先序序号，根节点为0"""
+
+    def __init__(self, path):
+        """打开快照文件
+
+        Args:
+            path: 快照文件路径
+
+        Raises:
+            ValueError: 文件不是有效的快照
+        """
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        if len(self._data) < HEADER.size:
+            raise ValueError(f"无效的快照文件: {path}")
+
+        (magic, version, node_size, _, node_count, string_count, nodes_offset, children_offset,
+         string_offsets_offset, string_data_offset, metadata_offset, metadata_length) = \
+            HEADER.unpack(self._data[:HEADER.size].tobytes())
+        if magic != MAGIC or version != VERSION or node_size != NODE_DTYPE.itemsize:
+            raise ValueError(f"不支持的快照文件格式: {path}")
+
+        self.nodes = self._data[nodes_offset:nodes_offset + node_count * node_size].view(NODE_DTYPE)
+        child_total = (string_offsets_offset - children_offset) // 4
+        self.child_index = self._data[children_offset:children_offset + child_total * 4].view('<u4')
+        self._string_offsets = self._data[string_offsets_offset:
+                                          string_offsets_offset + (string_count + 2) * 8].view('<u8')
+        self._string_data_offset = string_data_offset
+        self.string_count = string_count
+        self.metadata = json.loads(self._data[metadata_offset:metadata_offset + metadata_length].tobytes()
+                                   .decode('utf-8'))
+        self._strings = {0: None}
+        self._folded = None  # 大小写折叠后的字符串表，首次不区分大小写搜索时创建
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @classmethod
+    def write(cls, path, root_element, metadata=None):
+        """将元素树写入快照文件，先写入临时文件再替换，避免留下不完整的快照
+
+        Args:
+            path: 快照文件路径
+            root_element: 根元素对象
+            metadata: 附加的元数据字典
+
+        Returns:
+            写入的节点数
+        """
+        strings = {None: 0}
+        string_list = [b'']
+
+        def string_id(value):
+            if value is None or value == '':
+                return 0
+            if not isinstance(value, str):
+                value = '.'.join(str(part) for part in value) if isinstance(value, (tuple, list)) else str(value)
+            sid = strings.get(value)
+            if sid is None:
+                sid = strings[value] = len(string_list)
+                string_list.append(value.encode('utf-8'))
+            return sid
+
+        rows = []
+        stack = [(root_element, -1)]
+        while stack:
+            element, parent = stack.pop()
+            index = len(rows)
+            flags = 0
+            if element.is_enabled:
+                flags |= FLAG_ENABLED
+            if element.is_visible:
+                flags |= FLAG_VISIBLE
+            if element.is_checked is not None:
+                flags |= FLAG_CHECKABLE | (FLAG_CHECKED if element.is_checked else 0)
+            if element.has_children:
+                flags |= FLAG_HAS_CHILDREN
+            has_rect = element.x is not None and element.y is not None
+            if has_rect:
+                flags |= FLAG_HAS_RECT
+            rows.append((parent, element.depth or 0, flags,
+                         element.x if has_rect else 0, element.y if has_rect else 0,
+                         element.width or 0, element.height or 0,
+                         *(string_id(getattr(element, field)) for field in STRING_FIELDS), 0, 0))
+            stack.extend((child, index) for child in reversed(element.children))
+
+        nodes = np.array(rows, dtype=NODE_DTYPE)
+
+        # 子节点索引：按父节点分组，先序序号小的在前
+        child_ids = np.nonzero(nodes['parent'] >= 0)[0]
+        parents = nodes['parent'][child_ids]
+        order = np.argsort(parents, kind='stable')
+        child_index = child_ids[order].astype('<u4')
+        counts = np.bincount(parents, minlength=len(nodes)).astype('<u4')
+        nodes['child_count'] = counts
+        nodes['first_child'] = np.concatenate(([0], np.cumsum(counts)[:-1])).astype('<u4')
+
+        string_offsets = np.zeros(len(string_list) + 1, dtype='<u8')
+        np.cumsum([len(value) for value in string_list], out=string_offsets[1:])
+        string_data = b''.join(string_list)
+
+        meta = {
+            'process_id': root_element.process_id,
+            'window_handle': root_element.window_handle,
+            'created_at': time.time(),
+        }
+        meta.update(metadata or {})
+        metadata_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+
+        nodes_offset = _align(HEADER.size)
+        children_offset = _align(nodes_offset + nodes.nbytes)
+        string_offsets_offset = _align(children_offset + child_index.nbytes)
+        string_data_offset = _align(string_offsets_offset + string_offsets.nbytes)
+        metadata_offset = _align(string_data_offset + len(string_data))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, NODE_DTYPE.itemsize, 0, len(nodes), len(string_list) - 1,
+                                nodes_offset, children_offset, string_offsets_offset, string_data_offset,
+                                metadata_offset, len(metadata_bytes)))
+            for offset, data in ((nodes_offset, nodes.tobytes()), (children_offset, child_index.tobytes()),
+                                 (string_offsets_offset, string_offsets.tobytes()),
+                                 (string_data_offset, string_data), (metadata_offset, metadata_bytes)):
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(data)
+        os.replace(temp_path, path)
+        return len(nodes)
+
+    def get_string(self, string_id):
+        """获取字符串ID对应的字符串
+
+        Args:
+            string_id: 字符串ID
+
+        Returns:
+            字符串，ID为0时返回None
+        """
+        string_id = int(string_id)
+        value = self._strings.get(string_id)
+        if value is None and string_id:
+            start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+            value = self._data[self._string_data_offset + start:self._string_data_offset + end].tobytes() \
+                .decode('utf-8')
+            self._strings[string_id] = value
+        return value
+
+    def children(self, index):
+        """获取节点的子节点序号
+
+        Args:
+            index: 节点序号
+
+        Returns:
+            子节点序号列表
+        """
+        node = self.nodes[index]
+        first = int(node['first_child'])
+        return self.child_index[first:first + int(node['child_count'])].tolist()
+
+    def parent(self, index):
+        """获取父节点序号，根节点返回None"""
+        parent = int(self.nodes[index]['parent'])
+        return parent if parent >= 0 else None
+
+    def get_element(self, index):
+        """创建单个节点的Element对象，不包含父子关系
+
+        Args:
+            index: 节点序号
+
+        Returns:
+            元素对象
+        """
+        node = self.nodes[index]
+        flags = int(node['flags'])
+        element = Element()
+        for field in STRING_FIELDS:
+            setattr(element, field, self.get_string(node[field]))
+        if element.runtime_id is not None:
+            element.runtime_id = tuple(int(part) for part in element.runtime_id.split('.') if part)
+        if flags & FLAG_HAS_RECT:
+            element.x, element.y = int(node['x']), int(node['y'])
+            element.width, element.height = int(node['width']), int(node['height'])
+        element.depth = int(node['depth'])
+        element.is_enabled = bool(flags & FLAG_ENABLED)
+        element.is_visible = bool(flags & FLAG_VISIBLE)
+        element.is_checked = bool(flags & FLAG_CHECKED) if flags & FLAG_CHECKABLE else None
+        element.has_children = bool(flags & FLAG_HAS_CHILDREN)
+        element.process_id = self.metadata.get('process_id')
+        element.window_handle = self.metadata.get('window_handle')
+        element.element_id = f"snapshot:{index}"
+        return element
+
+    def materialize(self, index=0, max_depth=None):
+        """创建节点及其子树的Element对象
+
+        Args:
+            index: 子树根节点序号
+            max_depth: 最多创建的相对层数，None表示整棵子树
+
+        Returns:
+            子树根元素对象
+        """
+        root = self.get_element(index)
+        stack = [(index, root, 0)]
+        while stack:
+            node_index, element, level = stack.pop()
+            if max_depth is not None and level >= max_depth:
+                element.has_children = element.has_children or bool(self.nodes[node_index]['child_count'])
+                continue
+            for child_index in self.children(node_index):
+                child = self.get_element(child_index)
+                element.add_child(child)
+                child.depth = int(self.nodes[child_index]['depth'])
+                stack.append((child_index, child, level + 1))
+        return root
+
+    def _get_folded_strings(self):
+        """获取大小写折叠后的字符串表，首次不区分大小写搜索时解码并缓存
+
+        折叠可能改变字符串长度（如ß折叠为ss），因此单独记录每个字符串在折叠文本中的位置。
+
+        Returns:
+            (以\\0分隔的折叠文本, 各字符串在折叠文本中的起始位置数组，最后一项为文本长度)
+        """
+        if self._folded is None:
+            offsets = self._string_offsets
+            blob = self._data[self._string_data_offset:self._string_data_offset + int(offsets[-1])].tobytes()
+            folded = [blob[int(offsets[i]):int(offsets[i + 1])].decode('utf-8').casefold()
+                      for i in range(len(offsets) - 1)]
+            starts = np.zeros(len(folded) + 1, dtype='<u8')
+            np.cumsum([len(value) + 1 for value in folded], out=starts[1:])
+            self._folded = ('\0'.join(folded) + '\0', starts)
+        return self._folded
+
+    def search(self, text, field='name', exact=False):
+        """按属性搜索节点
+
+        在字符串数据段（完全匹配）或折叠后的字符串表（包含匹配）中查找匹配位置并换算为字符串ID，
+        再对节点段做向量化比较，不创建元素。
+
+        Args:
+            text: 搜索文本
+            field: 属性名，STRING_FIELDS之一
+            exact: 是否完全匹配，否则为不区分大小写的包含匹配
+
+        Returns:
+            匹配的节点序号数组
+        """
+        if field not in STRING_FIELDS:
+            raise ValueError(f"不支持搜索的属性: {field}")
+        if exact:
+            keyword = text.encode('utf-8')
+            offsets = self._string_offsets
+            blob = self._data[self._string_data_offset:self._string_data_offset + int(offsets[-1])].tobytes()
+        else:
+            keyword = text.casefold()
+            blob, offsets = self._get_folded_strings()
+
+        positions = []
+        position = blob.find(keyword)
+        while position >= 0 and keyword:
+            positions.append(position)
+            position = blob.find(keyword, position + 1)
+        if not positions:
+            return np.empty(0, dtype=np.int64)
+
+        positions = np.array(positions, dtype='<u8')
+        string_ids = np.searchsorted(offsets, positions, side='right') - 1
+        # 匹配不能跨越字符串边界
+        valid = positions + len(keyword) <= offsets[string_ids + 1]
+        if exact:
+            valid &= (positions == offsets[string_ids]) & (positions + len(keyword) == offsets[string_ids + 1])
+        matched = np.unique(string_ids[valid])
+        return np.nonzero(np.isin(self.nodes[field], matched))[0]
+
+    def close(self):
+        """释放内存映射"""
+        mmap = getattr(self._data, '_mmap', None)
+        self.nodes = self.child_index = self._string_offsets = self._data = None
+        self._strings = {0: None}
+        self._folded = None
+        if mmap is not None:
+            try:
+                mmap.close()
+            except Exception:
+                # 仍有视图引用映射时无法立即关闭，由垃圾回收释放
+                pass
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树预热启动模块
+按 (可执行文件路径, 文件版本, 顶层窗口类名) 保存分析过的元素树，
+下次分析同一应用的窗口时先返回保存的骨架，再在后台逐步校验
+"""
+
+import hashlib
+import json
+import os
+
+from .tree_snapshot import TreeSnapshot
+
+
+class SkeletonStore:
+    """元素树骨架存储"""
+
+    def __init__(self, skeleton_dir=None, max_files=50):
+        """初始化骨架存储
+
+        Args:
+            skeleton_dir: 骨架文件目录，默认为data/tree_skeletons
+            max_files: 最多保留的骨架文件数量，超出时删除最久未使用的文件
+        """
+        self.skeleton_dir = skeleton_dir or os.path.join(os.path.dirname(__file__), '..', 'data', 'tree_skeletons')
+        self.max_files = max_files
+
+    @staticmethod
+    def get_signature(window_handle, process_id):
+        """获取窗口的应用签名
+
+        Args:
+            window_handle: 窗口句柄
+            process_id: 进程ID
+
+        Returns:
+            (可执行文件路径, 文件版本, 顶层窗口类名)，获取失败返回None
+        """
+        try:
+            import win32gui
+            from utils.process_utils import ProcessUtils
+
+            exe_path = ProcessUtils.get_process_exe(process_id)
+            if not exe_path:
+                return None
+            class_name = win32gui.GetClassName(window_handle)
+            return os.path.normcase(exe_path), SkeletonStore.get_file_version(exe_path), class_name
+        except Exception as e:
+            print(f"获取应用签名失败: {e}")
+            return None
+
+    @staticmethod
+    def get_file_version(exe_path):
+        """获取可执行文件版本，没有版本信息时使用修改时间和文件大小
+
+        Args:
+            exe_path: 可执行文件路径
+
+        Returns:
+            版本字符串
+        """
+        try:
+            import win32api
+            info = win32api.GetFileVersionInfo(exe_path, '\\')
+            ms, ls = info['FileVersionMS'], info['FileVersionLS']
+            return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+        except Exception:
+            stat = os.stat(exe_path)
+            return f"mtime:{int(stat.st_mtime)}:{stat.st_size}"
+
+    def _get_path(self, signature):
+        """骨架文件路径"""
+        key = hashlib.sha1(json.dumps(list(signature), ensure_ascii=False).encode('utf-8')).hexdigest()
+        return os.path.join(self.skeleton_dir, f"{key}.snap")
+
+    def load(self, signature, window_handle=None, process_id=None):
+        """加载骨架元素树，所有元素标记为未校验
+
+        Args:
+            signature: 应用签名
+            window_handle: 当前窗口句柄，替换骨架中保存的旧句柄
+            process_id: 当前进程ID，替换骨架中保存的旧进程ID
+
+        Returns:
+            根元素对象，没有骨架时返回None
+        """
+        # element_analyzer导入本模块，在使用时导入
+        from .element_analyzer import ElementAnalyzer
+
+        path = self._get_path(signature)
+        if not os.path.exists(path):
+            return None
+        try:
+            snapshot = TreeSnapshot(path)
+            root = snapshot.materialize()
+            snapshot.close()
+            os.utime(path)
+        except Exception as e:
+            print(f"加载元素树骨架失败: {e}")
+            return None
+
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            element.element_id = None
+            element.window_handle = window_handle
+            element.process_id = process_id
+            element.attributes['unverified'] = True
+            # 快照不保存虚拟节点的标记和分页信息，按元素类型识别"更多"虚拟节点，校验时重新生成
+            element.children = [child for child in element.children
+                                if child.element_type != ElementAnalyzer.MORE_ELEMENT_TYPE]
+            stack.extend(element.children)
+        return root
+
+    def save(self, signature, root_element):
+        """保存元素树骨架
+
+        Args:
+            signature: 应用签名
+            root_element: 根元素对象
+        """
+        try:
+            exe_path, file_version, class_name = signature
+            TreeSnapshot.write(self._get_path(signature), root_element,
+                               {'exe_path': exe_path, 'file_version': file_version, 'window_class': class_name})
+            self._prune()
+        except Exception as e:
+            print(f"保存元素树骨架失败: {e}")
+
+    def _prune(self):
+        """删除超出数量限制的骨架文件"""
+        paths = [os.path.join(self.skeleton_dir, name) for name in os.listdir(self.skeleton_dir)
+                 if name.endswith('.snap')]
+        if len(paths) <= self.max_files:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
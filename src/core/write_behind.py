@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写后持久化模块
+修改先追加到内存日志并立即返回，由后台线程按时间间隔或数量阈值合并后批量写入磁盘，
+文件先写入临时文件再替换，退出时写入所有未写入的修改
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def atomic_write_text(path, text, encoding='utf-8'):
+    """原子地写入文本文件：写入同目录的临时文件并落盘后替换目标文件
+
+    Args:
+        path: 目标文件路径
+        text: 文本内容
+        encoding: 文件编码
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class WriteBehindJournal:
+    """写后日志
+
+    append只把修改追加到内存并立即返回；后台写入线程在最早的未写入修改超过interval秒、
+    未写入修改达到max_pending条或调用flush时取出全部修改，经coalesce合并后交给flush_func写入。
+    写入失败时修改放回日志，在下一个间隔重试；连续失败max_retries次后逐条写入，
+    仍然失败的修改记录到错误日志后丢弃，不会一直阻塞后续的修改。
+    """
+
+    def __init__(self, flush_func, interval=1.0, max_pending=100, coalesce=None, name='write-behind',
+                 max_retries=3, error_log=None):
+        """初始化写后日志
+
+        Args:
+            flush_func: 写入函数，参数为按追加顺序排列的修改列表，在写入线程中调用
+            interval: 最早的未写入修改最多等待的时间，单位：秒
+            max_pending: 未写入修改达到该数量时立即写入
+            coalesce: 合并函数，参数和返回值都是修改列表，对合并结果再次合并应得到相同结果，None表示不合并
+            name: 写入线程名称
+            max_retries: 一批修改最多连续写入失败的次数，之后逐条写入
+            error_log: 错误日志文件路径，无法写入的修改以JSON行追加到该文件，None表示只打印
+        """
+        self.flush_func = flush_func
+        self.interval = interval
+        self.max_pending = max_pending
+        self.coalesce = coalesce
+        self.name = name
+        self.max_retries = max_retries
+        self.error_log = error_log
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._pending_since = None  # 最早的未写入修改的追加时间
+        self._appended = 0  # 已追加的修改数
+        self._written = 0  # 已写入（或被合并掉）的修改数
+        self._flush_requested = False
+        self._closed = False
+        self._thread = None
+        self._failures = 0  # 当前这批修改连续写入失败的次数
+
+        # 指标
+        self._flushes = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._dropped = 0
+        self._last_error = None
+        self._last_flush_ms = None
+
+        atexit.register(self.close)
+
+    def append(self, mutation):
+        """追加一条修改，不等待写入；日志已关闭时同步写入
+
+        Args:
+            mutation: 修改，格式由flush_func决定
+        """
+        with self._cond:
+            if not self._closed:
+                if not self._pending:
+                    self._pending_since = time.monotonic()
+                self._pending.append(mutation)
+                self._appended += 1
+                self._ensure_thread()
+                if len(self._pending) >= self.max_pending:
+                    self._cond.notify_all()
+                return
+        self.flush_func([mutation])
+
+    def _ensure_thread(self):
+        """启动写入线程，在持有锁时调用"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """写入线程主循环"""
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending:
+                        waited = time.monotonic() - self._pending_since
+                        if (self._closed or self._flush_requested or len(self._pending) >= self.max_pending
+                                or waited >= self.interval):
+                            break
+                        self._cond.wait(self.interval - waited)
+                    elif self._closed:
+                        return
+                    else:
+                        self._cond.wait()
+                batch = self._pending
+                self._pending = []
+                self._flush_requested = False
+            self._write(batch)
+
+    def _write(self, batch):
+        """合并并写入一批修改，在写入线程中调用"""
+        count = len(batch)
+        if self.coalesce is not None:
+            batch = self.coalesce(batch)
+        start = time.perf_counter()
+        try:
+            if batch:
+                self.flush_func(batch)
+        except Exception as e:
+            with self._cond:
+                self._errors += 1
+                self._last_error = str(e)
+                self._failures += 1
+                retry = not self._closed and self._failures < self.max_retries
+                if retry:
+                    # 合并后的修改放回日志最前面，代替原来的count条修改
+                    self._pending[:0] = batch
+                    self._pending_since = time.monotonic()
+                    self._coalesced += count - len(batch)
+                    self._written += count - len(batch)
+                    self._cond.notify_all()
+            if retry:
+                print(f"写入{self.name}失败，稍后重试: {e}")
+                return
+            # 重试次数用完或正在关闭：逐条写入，只丢弃无法写入的修改
+            print(f"写入{self.name}失败，逐条写入: {e}")
+            dropped = self._write_each(batch)
+            with self._cond:
+                self._failures = 0
+                self._dropped += dropped
+                self._coalesced += count - len(batch)
+                self._written += count
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._failures = 0
+            self._flushes += 1
+            self._coalesced += count - len(batch)
+            self._written += count
+            self._last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+            self._cond.notify_all()
+
+    def _write_each(self, batch):
+        """逐条写入修改，无法写入的修改记录到错误日志后丢弃
+
+        Returns:
+            丢弃的修改数
+        """
+        dropped = 0
+        for mutation in batch:
+            try:
+                self.flush_func([mutation])
+            except Exception as e:
+                dropped += 1
+                print(f"写入{self.name}失败，已丢弃修改: {e}")
+                self._log_error(mutation, e)
+        return dropped
+
+    def _log_error(self, mutation, error):
+        """将无法写入的修改追加到错误日志"""
+        if self.error_log is None:
+            return
+        entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'error': str(error), 'mutation': mutation}
+        try:
+            with open(self.error_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        except OSError as e:
+            print(f"写入错误日志失败: {e}")
+
+    def flush(self, timeout=None):
+        """立即写入已追加的所有修改并等待写入完成
+
+        Args:
+            timeout: 最长等待时间，单位：秒，None表示一直等待
+
+        Returns:
+            是否在超时前写入完成，写入失败且稍后重试时返回False，无法写入的修改丢弃后视为写入完成
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._appended
+            errors = self._errors
+            while self._written < target:
+                if self._errors > errors or self._thread is None or not self._thread.is_alive():
+                    break
+                self._flush_requested = True
+                self._cond.notify_all()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return self._written >= target
+
+    def close(self, timeout=5.0):
+        """写入所有未写入的修改并停止写入线程，之后的修改同步写入
+
+        Args:
+            timeout: 最长等待时间，单位：秒
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        atexit.unregister(self.close)
+
+    @property
+    def pending(self):
+        """未写入的修改数"""
+        with self._cond:
+            return self._appended - self._written
+
+    def get_metrics(self):
+        """获取写入指标
+
+        Returns:
+            指标字典，包括未写入数、写入次数、被合并的修改数、失败次数、丢弃的修改数和上次写入耗时（毫秒）
+        """
+        with self._cond:
+            return {
+                'pending': self._appended - self._written,
+                'appended': self._appended,
+                'written': self._written,
+                'flushes': self._flushes,
+                'coalesced': self._coalesced,
+                'errors': self._errors,
+                'dropped': self._dropped,
+                'last_error': self._last_error,
+                'last_flush_ms': self._last_flush_ms,
+            }
@@ -4,18 +4,53 @@
 import sys
 import os
 
-# 添加项目根目录到sys.path，解决ModuleNotFoundError问题
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 添加src目录到sys.path，各模块按core、ui、utils顶层包导入
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from PyQt5.QtWidgets import QApplication
-from src.ui.main_window import MainWindow
+from utils.startup_timeline import get_startup_timeline, FIRST_PAINT
+
+timeline = get_startup_timeline()
+
+with timeline.phase('导入PyQt5'):
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+
+
+def launch(argv, startup_timeline=None):
+    """创建应用和主窗口并显示，首次绘制后再启动后台服务
+
+    Args:
+        argv: 命令行参数
+        startup_timeline: 启动时间线，为None时使用全局启动时间线
+
+    Returns:
+        (QApplication对象, MainWindow对象)
+    """
+    startup_timeline = startup_timeline or timeline
+    with startup_timeline.phase('创建QApplication'):
+        app = QApplication.instance() or QApplication(argv)
+
+    with startup_timeline.phase('导入主窗口模块'):
+        from ui.main_window import MainWindow
+
+    with startup_timeline.phase('创建主窗口'):
+        window = MainWindow(startup_timeline)
+
+    def on_first_painted():
+        print(f"首次绘制: {startup_timeline.get_mark(FIRST_PAINT) * 1000:.1f}ms")
+        # 让首帧先提交到屏幕，再在事件循环的下一轮启动后台服务
+        QTimer.singleShot(0, window.start_background_services)
+
+    window.first_painted.connect(on_first_painted)
+
+    with startup_timeline.phase('显示主窗口'):
+        window.show()
+    return app, window
 
 
 def main():
     """应用程序入口"""
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
+    app, window = launch(sys.argv)
     sys.exit(app.exec_())
 
 
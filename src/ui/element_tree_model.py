@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树数据模型
+直接以Element树为数据源供QTreeView显示，不为每一行创建QTreeWidgetItem，
+子元素通过canFetchMore/fetchMore按需加载
+"""
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+
+
+# 元素对象的数据角色
+ELEMENT_ROLE = Qt.UserRole
+
+
+class ElementTreeModel(QAbstractItemModel):
+    """元素树数据模型
+
+    模型索引的internalPointer即Element对象。后台加载子元素时，父元素的子元素列表会在工作线程中被修改，
+    因此加载期间模型使用加载开始时的子元素列表副本，加载完成后在主线程中按差异发出行删除和插入信号。
+    后台分析整个窗口时同理，所有已显示元素都使用副本，分析出的子元素由append_children分批显示。
+    后台校验骨架时也使用副本，每校正一层由sync_children按差异更新。
+    """
+
+    # 骨架校验完成信号，参数为根元素
+    verified = pyqtSignal(object)
+
+    def __init__(self, fetch_children=None, parent=None):
+        """初始化元素树模型
+
+        Args:
+            fetch_children: 加载子元素的回调函数，参数为父元素，加载完成后需在主线程中调用finish_loading
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._root = None
+        self._fetch_children = fetch_children
+        self._frozen = {}  # 正在加载子元素的父元素 -> 模型当前使用的子元素列表副本
+        self._loading = set()  # 通过begin_loading开始加载子元素的父元素
+        self._fetched = set()  # 已按需加载过子元素的父元素，避免重复加载
+        # 元素 -> 在父元素中的行号，只记录视图访问过的元素；同时保持这些元素存活，保证索引指针有效
+        self._rows = {}
+        self._hits = set()  # 搜索命中的元素
+        self._verifying = False  # 当前元素树是否为正在后台校验的骨架
+
+    def set_root(self, root_element):
+        """设置根元素并重置模型
+
+        Args:
+            root_element: 根元素对象，None表示清空
+        """
+        self.beginResetModel()
+        self._root = root_element
+        self._frozen.clear()
+        self._loading.clear()
+        self._fetched.clear()
+        self._rows.clear()
+        self._hits.clear()
+        self._verifying = False
+        self.endResetModel()
+
+    def begin_streaming(self, root_element):
+        """开始显示正在后台分析的元素树，子元素通过append_children分批显示
+
+        Args:
+            root_element: 根元素对象
+        """
+        self.set_root(root_element)
+        self._frozen[root_element] = []
+
+    def append_children(self, parent_element, children):
+        """显示后台分析得到的一批子元素，在主线程中调用
+
+        Args:
+            parent_element: 已显示的父元素
+            children: 新添加的子元素列表
+        """
+        rows = self._frozen.get(parent_element)
+        if rows is None or not children:
+            return
+        first = len(rows)
+        self.beginInsertRows(self.index_for_element(parent_element), first, first + len(children) - 1)
+        rows.extend(children)
+        for child in children:
+            # 子元素的子元素仍可能在工作线程中添加，显示前使用空副本
+            self._frozen.setdefault(child, [])
+        self.endInsertRows()
+
+    def end_streaming(self):
+        """后台分析结束，停止使用子元素列表副本，在主线程中调用"""
+        for element in list(self._frozen):
+            if element not in self._loading:
+                self._sync_children(element)
+
+    def begin_verifying(self, root_element):
+        """开始显示正在后台校验的骨架，校验期间所有元素都使用子元素列表副本
+
+        Args:
+            root_element: 骨架根元素
+        """
+        self.set_root(root_element)
+        queue = [root_element]
+        while queue:
+            element = queue.pop()
+            children = list(element.children)
+            self._frozen[element] = children
+            queue.extend(children)
+        self._verifying = True
+
+    def sync_children(self, element):
+        """后台校验校正了元素的子元素列表，在主线程中调用，按差异更新视图
+
+        Args:
+            element: 子元素列表已校正的元素
+        """
+        if element not in self._loading:
+            self._sync_children(element)
+
+    def end_verifying(self):
+        """后台校验结束，停止使用剩余的子元素列表副本，在主线程中调用"""
+        if not self._verifying:
+            return
+        for element in list(self._frozen):
+            if element not in self._loading:
+                self._sync_children(element)
+        self._verifying = False
+        root_index = self.index_for_element(self._root)
+        if root_index.isValid():
+            self.dataChanged.emit(root_index, root_index)
+        self.verified.emit(self._root)
+
+    def is_verifying(self):
+        """当前元素树是否为正在后台校验的骨架"""
+        return self._verifying
+
+    def root_element(self):
+        """获取根元素"""
+        return self._root
+
+    def _children(self, element):
+        """模型当前使用的子元素列表"""
+        frozen = self._frozen.get(element)
+        return frozen if frozen is not None else element.children
+
+    def _row_of(self, element):
+        """元素在父元素中的行号，元素已不在树中时返回None"""
+        if element is self._root:
+            return 0
+        if element.parent is None:
+            return None
+        siblings = self._children(element.parent)
+        row = self._rows.get(element)
+        if row is None or row >= len(siblings) or siblings[row] is not element:
+            try:
+                row = siblings.index(element)
+            except ValueError:
+                return None
+            self._rows[element] = row
+        return row
+
+    def element_from_index(self, index):
+        """获取模型索引对应的元素
+
+        Args:
+            index: 模型索引
+
+        Returns:
+            元素对象，无效索引返回None
+        """
+        return index.internalPointer() if index.isValid() else None
+
+    def index_for_element(self, element):
+        """获取元素对应的模型索引
+
+        Args:
+            element: 元素对象
+
+        Returns:
+            模型索引，元素不在当前元素树中时返回无效索引
+        """
+        if element is None:
+            return QModelIndex()
+        ancestor = element
+        while ancestor.parent is not None and ancestor is not self._root:
+            ancestor = ancestor.parent
+        if ancestor is not self._root:
+            return QModelIndex()
+        row = self._row_of(element)
+        if row is None:
+            return QModelIndex()
+        return self.createIndex(row, 0, element)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        if not parent.isValid():
+            if row != 0 or self._root is None:
+                return QModelIndex()
+            child = self._root
+        else:
+            children = self._children(parent.internalPointer())
+            if row >= len(children):
+                return QModelIndex()
+            child = children[row]
+        self._rows[child] = row
+        return self.createIndex(row, 0, child)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        element = self.element_from_index(index)
+        if element is None or element is self._root or element.parent is None:
+            return QModelIndex()
+        row = self._row_of(element.parent)
+        if row is None:
+            return QModelIndex()
+        return self.createIndex(row, 0, element.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        if not parent.isValid():
+            return 0 if self._root is None else 1
+        return len(self._children(parent.internalPointer()))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return self._root is not None
+        element = parent.internalPointer()
+        if self._children(element) or element in self._loading:
+            return True
+        return bool(element.has_children) and element not in self._fetched
+
+    def canFetchMore(self, parent):
+        element = self.element_from_index(parent)
+        return (element is not None and element not in self._frozen and element not in self._fetched
+                and not element.children and bool(element.has_children) and not _is_more(element))
+
+    def fetchMore(self, parent):
+        element = self.element_from_index(parent)
+        if element is None or not self.begin_loading(element):
+            return
+        if self._fetch_children is not None:
+            self._fetch_children(element)
+
+    def data(self, index, role=Qt.DisplayRole):
+        element = self.element_from_index(index)
+        if element is None:
+            return None
+        if role == Qt.DisplayRole:
+            if _is_more(element) and element.parent in self._loading:
+                return "Loading..."
+            return f"{element.element_type} - {element.name or ''}"
+        if role == ELEMENT_ROLE:
+            return element
+        if role == Qt.BackgroundRole and element in self._hits:
+            return QBrush(QColor(255, 235, 120))
+        if role == Qt.ForegroundRole and element.attributes.get('unverified'):
+            # 预热启动的骨架元素在后台校验完成前显示为灰色
+            return QBrush(Qt.gray)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section == 0:
+            return "元素"
+        return None
+
+    def begin_loading(self, element):
+        """标记元素开始在后台加载子元素，加载期间模型使用当前子元素列表的副本
+
+        Args:
+            element: 父元素
+
+        Returns:
+            是否成功标记，元素已在加载中时返回False
+        """
+        if element in self._frozen:
+            return False
+        self._frozen[element] = list(element.children)
+        self._loading.add(element)
+        if element.children:
+            # 刷新"更多"虚拟节点的显示文字
+            parent_index = self.index_for_element(element)
+            last = len(element.children) - 1
+            self.dataChanged.emit(self.index(last, 0, parent_index), self.index(last, 0, parent_index))
+        return True
+
+    def finish_loading(self, element):
+        """后台加载子元素完成，在主线程中调用，按加载前后的差异更新视图
+
+        Args:
+            element: 父元素
+        """
+        if element not in self._loading:
+            return
+        self._loading.discard(element)
+        self._fetched.add(element)
+        self._sync_children(element)
+
+    def _sync_children(self, element):
+        """停止使用元素的子元素列表副本，按副本与实际子元素列表的差异发出行删除和插入信号
+
+        保留的元素不移动：先删除已不存在的行，再按实际顺序插入新元素，视图中保留行的展开和选中状态
+        """
+        rows = self._frozen.get(element)
+        if rows is None:
+            return
+        current = element.children
+        parent_index = self.index_for_element(element)
+
+        # 从后往前删除已不存在的连续行，模型在删除信号之间使用的副本同步缩短
+        positions = {id(child): i for i, child in enumerate(current)}
+        end = len(rows)
+        while end > 0:
+            if id(rows[end - 1]) in positions:
+                end -= 1
+                continue
+            start = end - 1
+            while start > 0 and id(rows[start - 1]) not in positions:
+                start -= 1
+            self.beginRemoveRows(parent_index, start, end - 1)
+            del rows[start:end]
+            self.endRemoveRows()
+            end = start
+
+        # 保留的元素顺序变化时全部删除后重新插入
+        kept = [positions[id(child)] for child in rows]
+        if any(a >= b for a, b in zip(kept, kept[1:])):
+            self.beginRemoveRows(parent_index, 0, len(rows) - 1)
+            del rows[:]
+            self.endRemoveRows()
+
+        # 按实际顺序插入新元素，插入后副本与实际子元素列表一致
+        row = 0
+        while row < len(current):
+            if row < len(rows) and rows[row] is current[row]:
+                row += 1
+                continue
+            last = row
+            while last + 1 < len(current) and not (row < len(rows) and rows[row] is current[last + 1]):
+                last += 1
+            new_children = current[row:last + 1]
+            self.beginInsertRows(parent_index, row, last)
+            rows[row:row] = new_children
+            if self._verifying:
+                # 新元素的子元素仍可能在后台校验中被校正，显示前使用副本
+                for child in new_children:
+                    self._frozen.setdefault(child, list(child.children))
+            self.endInsertRows()
+            row = last + 1
+        del self._frozen[element]
+
+        if self._verifying and current:
+            # 校验更新了保留元素的名称和位置等属性
+            self.dataChanged.emit(self.index(0, 0, parent_index), self.index(len(current) - 1, 0, parent_index))
+
+    def is_loading(self, element):
+        """元素是否正在加载子元素"""
+        return element in self._loading
+
+    def add_search_hits(self, elements):
+        """标记搜索命中的元素，命中的元素以背景色突出显示
+
+        Args:
+            elements: 元素列表
+        """
+        for element in elements:
+            self._hits.add(element)
+            self._emit_changed(element)
+
+    def clear_search_hits(self):
+        """清除搜索命中标记"""
+        hits, self._hits = self._hits, set()
+        for element in hits:
+            self._emit_changed(element)
+
+    def _emit_changed(self, element):
+        """通知视图元素的显示数据已变化"""
+        index = self.index_for_element(element)
+        if index.isValid():
+            self.dataChanged.emit(index, index, [Qt.BackgroundRole])
+
+
+def _is_more(element):
+    """是否为"更多"虚拟节点"""
+    return element.attributes.get('virtual') == 'more'
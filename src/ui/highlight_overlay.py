@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素高亮覆盖层模块
+置顶、不接收鼠标和焦点的透明窗口，在目标元素周围显示边框，
+由定时器驱动闪烁和跟踪，不阻塞GUI线程，也不在目标窗口上绘制
+"""
+
+from PyQt5.QtCore import Qt, QRect, QTimer
+from PyQt5.QtGui import QColor, QPainter, QPen
+from PyQt5.QtWidgets import QWidget
+
+
+class HighlightOverlay(QWidget):
+    """元素高亮覆盖层"""
+
+    def __init__(self, color=QColor(255, 0, 0), border_width=3, parent=None):
+        """初始化高亮覆盖层
+
+        Args:
+            color: 边框颜色
+            border_width: 边框宽度，单位：像素
+            parent: 父对象
+        """
+        super().__init__(parent, Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool |
+                         Qt.WindowTransparentForInput | Qt.WindowDoesNotAcceptFocus)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.color = color
+        self.border_width = border_width
+        self._rect = None  # 当前高亮的屏幕矩形 (x, y, width, height)
+
+        # 闪烁
+        self._flash_timer = QTimer(self)
+        self._flash_timer.timeout.connect(self._on_flash_tick)
+        self._flash_remaining = 0
+        self._flash_rect = None  # 闪烁显示的屏幕矩形
+
+        # 跟踪
+        self._track_timer = QTimer(self)
+        self._track_timer.timeout.connect(self._on_track_tick)
+        self._rect_source = None
+
+    def set_rect(self, rect):
+        """移动覆盖层到屏幕矩形，矩形未变化时不做任何处理
+
+        Args:
+            rect: (x, y, width, height)，None表示隐藏
+        """
+        if rect is not None:
+            rect = tuple(int(value) for value in rect)
+            if rect[2] <= 0 or rect[3] <= 0:
+                rect = None
+        if rect == self._rect:
+            return False
+        self._rect = rect
+        if rect is None:
+            self.hide()
+            return True
+
+        x, y, width, height = rect
+        margin = self.border_width
+        self.setGeometry(QRect(x - margin, y - margin, width + 2 * margin, height + 2 * margin))
+        if not self.isVisible():
+            self.show()
+        self.update()
+        return True
+
+    def flash(self, element, count=3, interval=300):
+        """在元素周围闪烁显示边框，立即返回
+
+        Args:
+            element: 元素对象，需要包含位置和尺寸
+            count: 闪烁次数
+            interval: 显示和隐藏的间隔，单位：毫秒
+        """
+        self.stop_tracking()
+        rect = element_rect(element)
+        if rect is None:
+            return
+        self._flash_timer.stop()
+        self._rect = None
+        self.set_rect(rect)
+        self._flash_rect = rect
+        self._flash_remaining = count * 2 - 1
+        self._flash_timer.start(interval)
+
+    def _on_flash_tick(self):
+        """切换闪烁状态"""
+        self._flash_remaining -= 1
+        if self._flash_remaining < 0:
+            self._flash_timer.stop()
+            self.set_rect(None)
+            return
+        self.set_rect(None if self._rect is not None else self._flash_rect)
+
+    def track(self, rect_source, interval=16):
+        """按固定帧率跟踪矩形，如捕获元素时鼠标下的元素
+
+        rect_source在GUI线程中每帧调用一次，应只读取已有数据而不进行跨进程调用；
+        返回的矩形与上一帧相同时覆盖层不移动。
+
+        Args:
+            rect_source: 返回 (x, y, width, height) 或None的函数
+            interval: 跟踪间隔，单位：毫秒，默认约60帧每秒
+        """
+        self._flash_timer.stop()
+        self._rect_source = rect_source
+        self._track_timer.start(interval)
+        self._on_track_tick()
+
+    def stop_tracking(self):
+        """停止跟踪并隐藏覆盖层"""
+        if self._rect_source is None:
+            return
+        self._track_timer.stop()
+        self._rect_source = None
+        self.set_rect(None)
+
+    def _on_track_tick(self):
+        """读取跟踪的矩形"""
+        if self._rect_source is None:
+            return
+        try:
+            rect = self._rect_source()
+        except Exception as e:
+            print(f"获取高亮区域失败: {e}")
+            rect = None
+        self.set_rect(rect)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        pen = QPen(self.color)
+        pen.setWidth(self.border_width)
+        pen.setJoinStyle(Qt.MiterJoin)
+        painter.setPen(pen)
+        half = self.border_width // 2
+        painter.drawRect(self.rect().adjusted(half, half, -half - 1, -half - 1))
+
+
+def element_rect(element):
+    """元素的屏幕矩形
+
+    Args:
+        element: 元素对象
+
+    Returns:
+        (x, y, width, height)，元素没有位置信息时返回None
+    """
+    if element is None or element.x is None or element.y is None or not element.width or not element.height:
+        return None
+    return element.x, element.y, element.width, element.height
@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QGroupBox, QLabel, QLineEdit, QPushButton, QTreeWidget, QTreeWidgetItem,
+    QGroupBox, QLabel, QLineEdit, QPushButton, QTreeView,
     QTextEdit, QComboBox, QTableWidget, QTableWidgetItem, QGridLayout,
     QTabWidget, QRadioButton, QButtonGroup, QMessageBox, QFileDialog,
     QWizard, QWizardPage, QVBoxLayout
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QFont, QIcon
 
 from core.element_capture import ElementCapture
@@ -17,57 +20,177 @@ from core.code_generator import CodeGenerator
 from core.history_manager import HistoryManager
 from core.favorites_manager import FavoritesManager
 from core.plugin_manager import PluginManager
-from core.api_service import APIService
+from core.hybrid_locator import HybridLocator
+from core.locator_stats import LocatorStats
+from core.locate_cache import LocateCache
+from core.automation_executor import (get_automation_executor, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE,
+                                      PRIORITY_NORMAL)
+from core.app_health import get_app_health_monitor
+from core.backend_warmup import get_backend_warmup, FAILED
+from core.element_resolver import ElementResolver
+from ui.element_tree_model import ElementTreeModel, ELEMENT_ROLE
+from ui.tree_loader import TreeLoader
+from ui.tree_search import TreeSearch
+from ui.tree_reveal import TreeRevealer
+from ui.highlight_overlay import HighlightOverlay, element_rect
 from utils.window_utils import WindowUtils
 from utils.process_utils import ProcessUtils
+from utils.startup_timeline import get_startup_timeline, FIRST_PAINT, BACKGROUND_READY
 
 
 class MainWindow(QMainWindow):
-    """主窗口类"""
+    """主窗口类
+
+    构造时只创建界面和轻量的核心对象，插件、API服务、应用列表和自动化后端的预热
+    在首次绘制后由start_background_services启动，不推迟窗口的显示。
+    """
+
+    # 首次绘制完成信号
+    first_painted = pyqtSignal()
+    # 元素捕获完成信号，在工作线程中发出，参数为捕获任务的Future对象
+    _capture_done = pyqtSignal(object)
+    # 测试定位完成信号，在工作线程中发出，参数为 (测试任务的Future对象, 元素, 定位方法, 定位代码)
+    _location_tested = pyqtSignal(object, object, str, str)
+    # 后台启动的状态信息，在后台线程中发出
+    _background_status = pyqtSignal(str)
+    # 历史记录查询完成信号，在查询线程中发出，参数为 (查询序号, 查询任务的Future对象)
+    _history_loaded = pyqtSignal(int, object)
 
-    def __init__(self):
+    # 历史记录列表最多显示的记录数
+    HISTORY_PAGE_SIZE = 500
+    # 测试定位的超时时间，单位：秒
+    TEST_LOCATION_TIMEOUT = 30.0
+
+    def __init__(self, startup_timeline=None):
+        """初始化主窗口
+        
+        Args:
+            startup_timeline: 启动时间线，为None时使用全局启动时间线
+        """
         super().__init__()
+        self.startup_timeline = startup_timeline or get_startup_timeline()
+        self._first_paint_done = False
+        self._background_started = False
         self.setWindowTitle("Locator_desktop - 桌面应用元素定位工具")
         self.setGeometry(100, 100, 1200, 800)
         
-        # 初始化核心模块
+        with self.startup_timeline.phase('初始化核心模块'):
+            self._init_core()
+        
+        # API服务在首次绘制后启动
+        self.api_service = None
+        
+        # 当前选中的元素和进程ID
+        self.current_element = None
+        self._selected_process_id = None
+        
+        # 元素高亮覆盖层，用于定位成功后的闪烁和捕获时跟踪鼠标下的元素
+        self.highlight_overlay = HighlightOverlay()
+        
+        with self.startup_timeline.phase('初始化界面'):
+            # 初始化UI
+            self.init_ui()
+            
+            # 连接信号与槽
+            self.connect_signals()
+            
+            # 初始化历史记录
+            self.refresh_history_list()
+            
+            # 初始化收藏夹
+            self.refresh_favorites_list()
+    
+    def _init_core(self):
+        """初始化核心模块，自动化依赖在第一次使用时才导入"""
+        self.automation_executor = get_automation_executor()  # 所有pywinauto/uiautomation调用都提交到该执行器
+        self.backend_warmup = get_backend_warmup()
         self.element_capture = ElementCapture()
         self.element_analyzer = ElementAnalyzer()
         self.code_generator = CodeGenerator()
         self.window_utils = WindowUtils()
         self.process_utils = ProcessUtils()
         self.history_manager = HistoryManager()
+        # 历史记录查询前需要等待写后日志写入数据库，在单独的线程中查询，不阻塞GUI线程
+        self._history_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history-query')
+        self._history_query = None  # 正在进行的历史记录查询
+        self._history_generation = 0
+        self._history_records = {}  # 历史记录列表中显示的记录，记录ID -> 记录
         self.favorites_manager = FavoritesManager()
         self.plugin_manager = PluginManager()
+        self.locator_stats = LocatorStats()
+        self.locate_cache = LocateCache(self.element_capture)
+        self.hybrid_locator = HybridLocator(self.element_capture, self.code_generator,
+                                            stats=self.locator_stats, locate_cache=self.locate_cache)
+    
+    def paintEvent(self, event):
+        """绘制窗口，第一次绘制时记录首次绘制时间并发出first_painted信号"""
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            self.startup_timeline.mark(FIRST_PAINT)
+            self.first_painted.emit()
+    
+    def start_background_services(self):
+        """启动首次绘制后才需要的服务：插件、应用列表、API服务和自动化后端的预热，只启动一次"""
+        if self._background_started:
+            return
+        self._background_started = True
+        timeline = self.startup_timeline
         
-        # 加载和初始化插件
-        self.plugin_manager.load_plugins()
-        self.plugin_manager.initialize_plugins(self)
-        
-        # 初始化API服务
-        self.api_service = APIService(self)
-        
-        # 启动API服务
-        self.api_service.start()
-        self.update_status("API服务已启动，端口: 5000")
-        
-        # 当前选中的元素
-        self.current_element = None
-        
-        # 初始化UI
-        self.init_ui()
+        # 插件可能修改界面，在主线程中加载
+        with timeline.phase('加载插件'):
+            self.plugin_manager.load_plugins()
+            self.plugin_manager.initialize_plugins(self)
         
-        # 连接信号与槽
-        self.connect_signals()
+        with timeline.phase('刷新应用列表'):
+            self.refresh_process_list()
         
-        # 初始化应用列表
-        self.refresh_process_list()
+        # Flask导入和API服务启动不需要主线程
+        threading.Thread(target=self._start_api_service, name='api-startup', daemon=True).start()
         
-        # 初始化历史记录
-        self.refresh_history_list()
+        # pywinauto、uiautomation在已初始化COM的自动化工作线程中预热，并预先连接当前选择的进程
+        self.automation_executor.submit(self._warm_up_backends, priority=PRIORITY_BACKGROUND, name='backend_warmup')
+    
+    def _start_api_service(self):
+        """导入并启动API服务，在后台线程中调用"""
+        try:
+            with self.startup_timeline.phase('启动API服务'):
+                from core.api_service import APIService
+                api_service = APIService(self)
+                api_service.start()
+            self.api_service = api_service
+            self._background_status.emit(f"API服务已启动，端口: {api_service.port}")
+        except Exception as e:
+            print(f"启动API服务失败: {e}")
+            self._background_status.emit(f"启动API服务失败: {e}")
+    
+    def _warm_up_backends(self):
+        """预热自动化后端并预先连接预热期间最后选择的进程，完成后输出启动时间线报告，在自动化工作线程中调用"""
+        ready = self.backend_warmup.run()
+        if self._selected_process_id is not None:
+            self.backend_warmup.connect(self._selected_process_id)
+        self.startup_timeline.mark(BACKGROUND_READY)
+        print(self.startup_timeline.report())
+        status = self.backend_warmup.get_status()
+        if ready:
+            self._background_status.emit(f"自动化后端已就绪，预热耗时 {status['total_ms']:.0f}ms")
+        else:
+            failed = [name for name, stage in status['stages'].items() if stage['state'] == FAILED]
+            self._background_status.emit(f"自动化后端预热失败: {', '.join(failed)}")
+    
+    def _get_selected_process_id(self):
+        """获取当前选择的进程ID
         
-        # 初始化收藏夹
-        self.refresh_favorites_list()
+        Returns:
+            进程ID，未选择时返回None
+        """
+        current_text = self.process_combo.currentText()
+        if not current_text:
+            return None
+        try:
+            return int(current_text.split("(PID: ")[-1].rstrip(")"))
+        except ValueError:
+            return None
     
     def init_ui(self):
         """初始化UI布局"""
@@ -232,9 +355,7 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(panel)
         
         # 元素树
-        self.element_tree = QTreeWidget()
-        self.element_tree.setHeaderLabel("元素树")
-        self.element_tree.setColumnCount(1)
+        self.element_tree = self.create_element_tree_view()
         layout.addWidget(self.element_tree)
         
         return panel
@@ -491,14 +612,17 @@ class MainWindow(QMainWindow):
         self.element_search_edit = QLineEdit()
         self.element_search_edit.setPlaceholderText("按元素名称或类型搜索")
         search_layout.addWidget(self.element_search_edit)
+        self.element_search_mode_combo = QComboBox()
+        self.element_search_mode_combo.addItem("包含", 'substring')
+        self.element_search_mode_combo.addItem("前缀", 'prefix')
+        self.element_search_mode_combo.addItem("正则", 'regex')
+        search_layout.addWidget(self.element_search_mode_combo)
         self.element_search_btn = QPushButton("搜索")
         search_layout.addWidget(self.element_search_btn)
         element_tree_layout.addLayout(search_layout)
         
         # 元素树
-        self.element_tree = QTreeWidget()
-        self.element_tree.setHeaderLabel("元素")
-        self.element_tree.setColumnCount(1)
+        self.element_tree = self.create_element_tree_view()
         element_tree_layout.addWidget(self.element_tree)
         
         # 加载更多按钮
@@ -512,6 +636,22 @@ class MainWindow(QMainWindow):
         
         return panel
     
+    def create_element_tree_view(self):
+        """创建元素树视图，数据由ElementTreeModel直接从Element树提供，子元素在展开时按需加载"""
+        self.element_tree_model = ElementTreeModel(self.load_child_elements, self)
+        self.tree_loader = TreeLoader(self.element_tree_model, self.element_analyzer, self.automation_executor,
+                                      parent=self)
+        
+        view = QTreeView()
+        view.setModel(self.element_tree_model)
+        # 行高一致时视图无需逐行计算高度，大量节点时滚动仍然流畅
+        view.setUniformRowHeights(True)
+        
+        self.tree_search = TreeSearch(view, self.element_tree_model, parent=self)
+        self.tree_revealer = TreeRevealer(view, self.element_tree_model, ElementResolver(self.element_analyzer),
+                                          self.automation_executor, parent=self)
+        return view
+    
     def connect_signals(self):
         """连接信号与槽"""
         # 进程选择变化
@@ -521,7 +661,11 @@ class MainWindow(QMainWindow):
         self.window_combo.currentIndexChanged.connect(self.on_window_changed)
         
         # 元素树选择变化
-        self.element_tree.itemClicked.connect(self.on_element_selected)
+        self.element_tree.clicked.connect(self.on_element_selected)
+        
+        # 元素树加载完成
+        self.tree_loader.finished.connect(self.on_element_tree_loaded)
+        self.element_tree_model.verified.connect(self.on_skeleton_verified)
         
         # 按钮点击事件
         self.refresh_btn.clicked.connect(self.refresh_process_list)
@@ -560,6 +704,15 @@ class MainWindow(QMainWindow):
         self.load_more_btn.clicked.connect(self.on_load_more_clicked)
         self.element_search_btn.clicked.connect(self.on_element_search)
         self.element_search_edit.returnPressed.connect(self.on_element_search)
+        self.element_search_edit.textChanged.connect(self.on_element_search_changed)
+        self.element_search_mode_combo.currentIndexChanged.connect(self.on_element_search)
+        self.tree_search.progress.connect(self.on_element_search_progress)
+        self.tree_search.error.connect(self.update_status)
+        self.tree_revealer.revealed.connect(self.on_element_revealed)
+        self._capture_done.connect(self.on_capture_finished)
+        self._location_tested.connect(self.on_location_tested)
+        self._history_loaded.connect(self.on_history_loaded)
+        self._background_status.connect(self.update_status)
     
     def refresh_process_list(self):
         """刷新进程列表"""
@@ -585,9 +738,11 @@ class MainWindow(QMainWindow):
         self.update_element_tree()
     
     def update_element_tree(self):
-        """更新元素树"""
-        # 清空当前元素树
-        self.element_tree.clear()
+        """更新元素树，在后台分析窗口并分批显示，取消正在进行的分析"""
+        # 取消正在进行的分析并清空当前元素树
+        self.tree_loader.cancel()
+        self.element_tree_model.set_root(None)
+        self.load_more_btn.setEnabled(False)
         
         # 获取当前选择的窗口
         window_title = self.window_combo.currentText()
@@ -599,25 +754,18 @@ class MainWindow(QMainWindow):
         if not window:
             return
         
-        # 构建根元素
-        root_element = self.element_analyzer.analyze_window(window)
+        self.tree_loader.load(window)
+    
+    def on_element_tree_loaded(self, root_element):
+        """元素树加载完成时的处理"""
         if root_element:
-            # 创建根节点
-            root_item = QTreeWidgetItem(self.element_tree)
-            root_item.setText(0, f"{root_element.element_type} - {root_element.name or ''}")
-            root_item.setData(0, Qt.UserRole, root_element)
-            root_item.setData(0, Qt.UserRole + 1, False)  # 标记为未加载子节点
-            
-            # 添加一个占位节点，表示可以展开
-            placeholder = QTreeWidgetItem(root_item)
-            placeholder.setText(0, "Loading...")
-            
             # 启用加载更多按钮
             self.load_more_btn.setEnabled(True)
-            
-            # 注册展开信号
-            self.element_tree.itemExpanded.connect(self.on_item_expanded)
     
+    def on_skeleton_verified(self, root_element):
+        """元素树骨架校验完成时的处理"""
+        self.update_status("元素树校验完成")
+        
     def on_load_more_clicked(self):
         """处理加载更多按钮点击事件"""
         # 增加加载深度
@@ -627,175 +775,172 @@ class MainWindow(QMainWindow):
         # 重新加载元素树
         self.update_element_tree()
         
+    def on_element_search_changed(self, text):
+        """搜索框内容变化时的处理，输入停止后再搜索"""
+        self.tree_search.set_query(text, self.element_search_mode_combo.currentData())
+    
     def on_element_search(self):
-        """处理元素树搜索事件"""
-        keyword = self.element_search_edit.text().lower()
+        """处理元素树搜索事件，立即搜索"""
+        self.tree_search.set_query(self.element_search_edit.text(), self.element_search_mode_combo.currentData())
+        self.tree_search.search_now()
+    
+    def on_element_search_progress(self, count, finished):
+        """更新元素树搜索进度"""
+        if finished:
+            self.update_status(f"找到 {count} 个匹配的元素")
+        else:
+            self.update_status(f"正在搜索，已找到 {count} 个匹配的元素...")
+    
+    def load_child_elements(self, parent_element):
+        """异步加载子元素，由元素树模型在节点展开时调用"""
+        from PyQt5.QtCore import QMetaObject, Q_ARG
         
-        if not keyword:
-            # 如果搜索框为空，恢复所有节点
-            self.restore_all_tree_items()
-            return
+        def on_loaded(future):
+            """加载完成后在主线程中更新UI"""
+            try:
+                future.result()
+            except Exception as e:
+                print(f"动态加载子元素失败: {e}")
+            QMetaObject.invokeMethod(
+                self, "on_children_loaded",
+                Q_ARG(object, parent_element)
+            )
         
-        # 遍历所有节点，隐藏不匹配的节点
-        self.filter_tree_items(self.element_tree.invisibleRootItem(), keyword)
+        # 提交到自动化执行器，在已初始化COM的工作线程中加载
+        future = self.automation_executor.submit(self._load_child_elements_job, parent_element,
+                                                 priority=PRIORITY_NORMAL, name='load_child_elements')
+        future.add_done_callback(on_loaded)
     
-    def filter_tree_items(self, parent_item, keyword):
-        """过滤树节点
+    def _load_child_elements_job(self, parent_element):
+        """加载子元素的任务，在自动化执行器的工作线程中运行
         
         Args:
-            parent_item: 父节点
-            keyword: 搜索关键字
-        
+            parent_element: 父元素
+            
         Returns:
-            bool: 是否有匹配的子节点
+            子元素列表
         """
-        has_matching_child = False
+        # 检查是否已经加载过子元素
+        if parent_element.children:
+            # 已加载，直接使用
+            return parent_element.children
         
-        for i in range(parent_item.childCount()):
-            child_item = parent_item.child(i)
-            element = child_item.data(0, Qt.UserRole)
-            
-            if element:
-                # 检查元素是否匹配关键字
-                match = keyword in element.element_type.lower() or (element.name and keyword in element.name.lower())
-                
-                # 递归过滤子节点
-                child_has_match = self.filter_tree_items(child_item, keyword)
-                
-                # 如果当前节点匹配或有匹配的子节点，则显示
-                if match or child_has_match:
-                    child_item.setHidden(False)
-                    # 展开有匹配子节点的父节点
-                    if child_has_match:
-                        child_item.setExpanded(True)
-                    has_matching_child = True
-                else:
-                    child_item.setHidden(True)
-            else:
-                # 非元素节点（如Loading...）
-                child_item.setHidden(True)
-        
-        return has_matching_child
-    
-    def restore_all_tree_items(self):
-        """恢复所有树节点的显示"""
-        def restore_items(parent_item):
-            for i in range(parent_item.childCount()):
-                child_item = parent_item.child(i)
-                child_item.setHidden(False)
-                child_item.setExpanded(False)
-                restore_items(child_item)
-        
-        restore_items(self.element_tree.invisibleRootItem())
-    
-    def on_item_expanded(self, item):
-        """处理树节点展开事件，异步加载子节点"""
-        # 检查是否已加载子节点
-        if item.childCount() == 1 and item.child(0).text(0) == "Loading...":
-            # 删除占位节点
-            item.takeChild(0)
-            
-            # 获取元素对象
-            element = item.data(0, Qt.UserRole)
-            
-            # 异步加载子节点
-            self.load_child_elements(element, item)
-    
-    def load_child_elements(self, parent_element, parent_item):
-        """异步加载子元素，支持分层懒加载"""
-        # 使用线程池异步加载子节点
-        from PyQt5.QtCore import QThreadPool, QRunnable, pyqtSlot
-        
-        class LoadChildTask(QRunnable):
-            """加载子元素的任务类"""
-            def __init__(self, parent_element, parent_item, main_window):
-                super().__init__()
-                self.parent_element = parent_element
-                self.parent_item = parent_item
-                self.main_window = main_window
+        if not (hasattr(parent_element, 'has_children') and parent_element.has_children):
+            return []
+        
+        # 需要动态加载子元素
+        analyzer = self.element_analyzer
+        
+        # 重新连接应用并查找父元素
+        found_element = self._find_pywinauto_element(parent_element, analyzer.call_timeout)
+        if found_element is None:
+            return []
+        
+        # 临时存储原始子元素列表
+        original_children = parent_element.children.copy()
+        
+        # 加载子元素
+        analyzer._analyze_element_children(found_element, parent_element, parent_element.depth + 1)
+        
+        # 计算新加载的子元素
+        return [child for child in parent_element.children if child not in original_children]
+    
+    def _find_pywinauto_element(self, element, timeout):
+        """重新连接应用并查找元素对应的pywinauto元素，窗口根元素直接返回窗口
+        
+        Args:
+            element: 元素对象
+            timeout: 超时时间，单位：秒
             
-            @pyqtSlot()
-            def run(self):
-                """执行加载任务"""
-                try:
-                    # 检查是否已经加载过子元素
-                    if self.parent_element.children:
-                        # 已加载，直接使用
-                        child_elements = self.parent_element.children
-                    elif hasattr(self.parent_element, 'has_children') and self.parent_element.has_children:
-                        # 需要动态加载子元素
-                        from core.element_analyzer import ElementAnalyzer
-                        import pywinauto
-                        
-                        # 重新连接应用并获取父元素
-                        analyzer = ElementAnalyzer()
-                        app = pywinauto.Application(backend='uia').connect(handle=self.parent_element.window_handle)
-                        window = app.window(handle=self.parent_element.window_handle)
-                        
-                        # 构建定位条件
-                        conditions = {}
-                        if self.parent_element.automation_id:
-                            conditions['auto_id'] = self.parent_element.automation_id
-                        elif self.parent_element.name:
-                            conditions['name'] = self.parent_element.name
-                        elif self.parent_element.class_name:
-                            conditions['class_name'] = self.parent_element.class_name
-                        
-                        # 查找父元素
-                        if conditions:
-                            found_element = window.child_window(**conditions)
-                            if found_element.exists():
-                                # 临时存储原始子元素列表
-                                original_children = self.parent_element.children.copy()
-                                
-                                # 加载子元素
-                                analyzer._analyze_element_children(found_element, self.parent_element, self.parent_element.depth + 1)
-                                
-                                # 计算新加载的子元素
-                                new_children = [child for child in self.parent_element.children if child not in original_children]
-                                child_elements = new_children
-                            else:
-                                child_elements = []
-                        else:
-                            child_elements = []
-                    else:
-                        child_elements = []
-                except Exception as e:
-                    print(f"动态加载子元素失败: {e}")
-                    child_elements = []
-                
-                # 在主线程中更新UI
-                from PyQt5.QtCore import QMetaObject, Q_ARG
-                QMetaObject.invokeMethod(
-                    self.main_window, "add_child_elements",
-                    Q_ARG(object, child_elements),
-                    Q_ARG(object, self.parent_item)
-                )
+        Returns:
+            pywinauto元素，未找到返回None
+        """
+        import pywinauto
+        
+        monitor = get_app_health_monitor()
+        
+        # 构建定位条件
+        conditions = {}
+        if element.automation_id:
+            conditions['auto_id'] = element.automation_id
+        elif element.name:
+            conditions['name'] = element.name
+        elif element.class_name:
+            conditions['class_name'] = element.class_name
+        
+        # 查找元素
+        if element.parent is not None and not conditions:
+            return None
+        
+        def find_element():
+            app = pywinauto.Application(backend='uia').connect(handle=element.window_handle)
+            window = app.window(handle=element.window_handle)
+            if element.parent is None:
+                return window
+            found = window.child_window(**conditions)
+            return found if found.exists() else None
         
-        # 创建并启动任务
-        task = LoadChildTask(parent_element, parent_item, self)
-        QThreadPool.globalInstance().start(task)
-    
-    def add_child_elements(self, child_elements, parent_item):
-        """将子元素添加到树节点"""
-        for child in child_elements:
-            # 创建子节点
-            child_item = QTreeWidgetItem(parent_item)
-            child_item.setText(0, f"{child.element_type} - {child.name or ''}")
-            child_item.setData(0, Qt.UserRole, child)
-            child_item.setData(0, Qt.UserRole + 1, False)  # 标记为未加载子节点
+        return monitor.call_for_window(element.window_handle, find_element, timeout=timeout)
+    
+    def load_more_children(self, more_element):
+        """异步加载"更多"虚拟节点代表的下一页子元素，加载后替换虚拟节点"""
+        from PyQt5.QtCore import QMetaObject, Q_ARG
+        
+        parent_element = more_element.parent
+        if parent_element is None or not self.element_tree_model.begin_loading(parent_element):
+            return
+        
+        def on_loaded(future):
+            """加载完成后在主线程中更新UI"""
+            try:
+                future.result()
+            except Exception as e:
+                print(f"加载更多子元素失败: {e}")
+            QMetaObject.invokeMethod(
+                self, "on_children_loaded",
+                Q_ARG(object, parent_element)
+            )
+        
+        future = self.automation_executor.submit(self._load_more_children_job, more_element,
+                                                 priority=PRIORITY_INTERACTIVE, name='load_more_children')
+        future.add_done_callback(on_loaded)
+    
+    def _load_more_children_job(self, more_element):
+        """加载下一页子元素的任务，在自动化执行器的工作线程中运行
+        
+        Args:
+            more_element: "更多"虚拟节点
             
-            # 检查是否有子元素或需要后续加载
-            if child.children or (hasattr(child, 'has_children') and child.has_children):
-                placeholder = QTreeWidgetItem(child_item)
-                placeholder.setText(0, "Loading...")
+        Returns:
+            新加载的子元素列表
+        """
+        analyzer = self.element_analyzer
+        child_elements = analyzer.load_more_children(more_element)
+        if child_elements or more_element.parent is None:
+            return child_elements
+        
+        # 分析时的父元素已失效（如元素树来自缓存），重新查找父元素后再加载
+        found_element = self._find_pywinauto_element(more_element.parent, analyzer.call_timeout)
+        if found_element is None:
+            return []
+        return analyzer.load_more_children(more_element, found_element)
     
-    def on_element_selected(self, item, column):
+    @pyqtSlot(object)
+    def on_children_loaded(self, parent_element):
+        """子元素加载完成后更新元素树，在主线程中调用"""
+        self.element_tree_model.finish_loading(parent_element)
+    
+    def on_element_selected(self, index):
         """元素树节点选中时的处理"""
-        element = item.data(0, Qt.UserRole)
+        element = index.data(ELEMENT_ROLE)
         if not element:
             return
         
+        # 点击"更多"虚拟节点时加载下一页子元素
+        if self.element_analyzer.is_more_element(element):
+            self.load_more_children(element)
+            return
+        
         self.current_element = element
         
         # 计算元素稳定性评分和推荐定位策略
@@ -928,19 +1073,46 @@ class MainWindow(QMainWindow):
             self.on_locator_method_changed(method)
     
     def start_capture(self):
-        """开始捕获元素"""
+        """开始捕获元素，捕获在工作线程中进行，期间高亮覆盖层跟踪鼠标下的元素"""
+        # 检查是否有运行中的应用程序
+        if not self.process_combo.currentText():
+            self.show_warning("提示", "请先选择一个运行中的应用程序或启动一个应用程序")
+            return
+        
         self.capture_btn.setText("捕获中...")
         self.capture_btn.setEnabled(False)
         self.update_status("正在捕获元素...")
         
+        # 等待Ctrl键的轮询在独立线程中进行，不占用自动化执行器的工作线程，完成后在主线程中处理结果
+        future = Future()
+        
+        def run_capture():
+            try:
+                future.set_result(self.element_capture.capture_element())
+            except Exception as e:
+                future.set_exception(e)
+        
         try:
-            # 检查是否有运行中的应用程序
-            if not self.process_combo.currentText():
-                self.show_warning("提示", "请先选择一个运行中的应用程序或启动一个应用程序")
-                return
-            
-            # 调用元素捕获模块
-            element = self.element_capture.capture_element()
+            threading.Thread(target=run_capture, name='element-capture', daemon=True).start()
+        except Exception as e:
+            self.capture_btn.setText("捕获元素")
+            self.capture_btn.setEnabled(True)
+            self.show_error("捕获失败", f"捕获元素时发生错误: {str(e)}")
+            return
+        
+        # 只读取工作线程已获取的元素，不在GUI线程中进行UIA调用
+        self.highlight_overlay.track(lambda: element_rect(self.element_capture.last_captured_element))
+        future.add_done_callback(self._capture_done.emit)
+    
+    def on_capture_finished(self, future):
+        """元素捕获完成时的处理
+        
+        Args:
+            future: 捕获任务的Future对象
+        """
+        self.highlight_overlay.stop_tracking()
+        try:
+            element = future.result()
             
             if element:
                 # 更新当前元素
@@ -963,25 +1135,16 @@ class MainWindow(QMainWindow):
             self.capture_btn.setEnabled(True)
     
     def select_element_in_tree(self, target_element):
-        """在元素树中选中目标元素"""
-        def find_element(item):
-            element = item.data(0, Qt.UserRole)
-            if element == target_element:
-                return item
-            for i in range(item.childCount()):
-                child_item = item.child(i)
-                found = find_element(child_item)
-                if found:
-                    return found
-            return None
-        
-        root_item = self.element_tree.invisibleRootItem()
-        found_item = find_element(root_item)
-        if found_item:
-            self.element_tree.setCurrentItem(found_item)
+        """在元素树中选中目标元素，捕获的元素尚未加载到元素树时在后台加载其祖先节点"""
+        self.tree_revealer.reveal(target_element)
+    
+    def on_element_revealed(self, node):
+        """元素树定位完成时的处理"""
+        if node is None:
+            self.update_status("未能在元素树中找到该元素")
     
     def test_location(self):
-        """测试定位代码"""
+        """测试定位代码，测试在工作线程中进行，完成后由on_location_tested处理结果"""
         if not self.current_element:
             self.show_warning("警告", "请先选择或捕获一个元素")
             return
@@ -1000,22 +1163,51 @@ class MainWindow(QMainWindow):
             else:
                 method = 'auto'
         
+        element = self.current_element
         try:
             self.update_status(f"正在测试{method}定位...")
             
             # 生成当前定位代码
-            code = self.code_generator.generate_code_by_method(self.current_element, method)
+            code = self.code_generator.generate_code_by_method(element, method)
             
-            # 测试定位
-            result = self.element_capture.test_element_location(self.current_element)
+            # 测试定位，结果计入定位统计；目标应用卡住时任务超时，不会一直占用按钮
+            future = self.automation_executor.submit(self.hybrid_locator.test_location, element,
+                                                     priority=PRIORITY_INTERACTIVE,
+                                                     timeout=self.TEST_LOCATION_TIMEOUT, name='test_element_location')
+        except Exception as e:
+            self.show_error("测试定位失败", f"测试定位时发生错误: {str(e)}")
+            return
+        
+        self.test_loc_btn.setEnabled(False)
+        future.add_done_callback(lambda f: self._location_tested.emit(f, element, method, code))
+    
+    def on_location_tested(self, future, element, method, code):
+        """测试定位完成时的处理
+        
+        Args:
+            future: 测试任务的Future对象
+            element: 测试的元素
+            method: 定位方法
+            code: 定位代码
+        """
+        self.test_loc_btn.setEnabled(True)
+        try:
+            found = future.result()
+            result = found is not None
             
             # 可视化定位反馈
             if result:
-                self._draw_element_border(self.current_element)
+                self.highlight_overlay.flash(found if found.x is not None else element)
             
-            # 保存历史记录
-            self.history_manager.add_record(self.current_element, method, code, result)
-            self.refresh_history_list()
+            # 保存历史记录，记录在后台写入，直接插入到列表最前面而不重新查询
+            record = self.history_manager.add_record(element, method, code, result)
+            if self._history_query is not None and not self._history_query.done():
+                # 正在进行的查询可能不包含新记录，重新查询
+                self.refresh_history_list()
+            else:
+                self._insert_history_row(0, record)
+                if self.history_table.rowCount() > self.HISTORY_PAGE_SIZE:
+                    self.history_table.removeRow(self.history_table.rowCount() - 1)
             
             if result:
                 self.show_info("成功", "定位成功！")
@@ -1024,80 +1216,64 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.show_error("测试定位失败", f"测试定位时发生错误: {str(e)}")
     
-    def _draw_element_border(self, element):
-        """在元素周围绘制动态边框
+    def refresh_history_list(self):
+        """刷新历史记录列表，只显示最近的HISTORY_PAGE_SIZE条，在查询线程中查询"""
+        self._query_history(lambda: self.history_manager.get_records(limit=self.HISTORY_PAGE_SIZE)[0])
+    
+    def _query_history(self, query):
+        """在查询线程中查询历史记录，完成后由on_history_loaded显示，之前未完成的查询结果被丢弃
         
         Args:
-            element: 要绘制边框的元素
+            query: 查询函数，返回历史记录列表
         """
+        self._history_generation += 1
+        generation = self._history_generation
+        self._history_query = self._history_executor.submit(query)
+        self._history_query.add_done_callback(lambda f: self._history_loaded.emit(generation, f))
+    
+    def on_history_loaded(self, generation, future):
+        """历史记录查询完成时显示查询结果
+        
+        Args:
+            generation: 查询序号
+            future: 查询任务的Future对象
+        """
+        if generation != self._history_generation:
+            # 已开始新的查询
+            return
         try:
-            import win32gui
-            import win32con
-            import win32api
-            import time
-            
-            # 获取窗口句柄
-            hwnd = win32gui.WindowFromPoint((element.x, element.y))
-            if not hwnd:
-                return
-            
-            # 绘制闪烁的红色矩形
-            for i in range(3):  # 闪烁3次
-                # 绘制红色矩形
-                dc = win32gui.GetDC(hwnd)
-                pen = win32gui.CreatePen(win32con.PS_SOLID, 2, win32gui.RGB(255, 0, 0))
-                win32gui.SelectObject(dc, pen)
-                win32gui.Rectangle(dc, element.x, element.y, element.x + element.width, element.y + element.height)
-                win32gui.DeleteObject(pen)
-                win32gui.ReleaseDC(hwnd, dc)
-                
-                # 短暂延迟
-                time.sleep(0.3)
-                
-                # 清除矩形（重绘窗口）
-                win32gui.RedrawWindow(hwnd, (element.x - 10, element.y - 10, element.x + element.width + 10, element.y + element.height + 10), None, win32con.RDW_INVALIDATE | win32con.RDW_ERASE)
-                
-                # 短暂延迟
-                time.sleep(0.3)
+            records = future.result()
         except Exception as e:
-            print(f"绘制元素边框失败: {e}")
-    
-    def refresh_history_list(self):
-        """刷新历史记录列表"""
-        records = self.history_manager.get_all_records()
+            print(f"查询历史记录失败: {e}")
+            return
         self.history_table.setRowCount(0)
-        
+        self._history_records = {}
         for record in records:
-            row = self.history_table.rowCount()
-            self.history_table.insertRow(row)
-            
-            # 格式化时间
-            timestamp = record['timestamp'].split('.')[0] if '.' in record['timestamp'] else record['timestamp']
-            
-            self.history_table.setItem(row, 0, QTableWidgetItem(str(record['id'])))
-            self.history_table.setItem(row, 1, QTableWidgetItem(timestamp))
-            self.history_table.setItem(row, 2, QTableWidgetItem(record['application']))
-            self.history_table.setItem(row, 3, QTableWidgetItem(record['element_type']))
-            self.history_table.setItem(row, 4, QTableWidgetItem(record['method']))
+            self._insert_history_row(self.history_table.rowCount(), record)
+    
+    def _insert_history_row(self, row, record):
+        """在历史记录列表中插入一行
+        
+        Args:
+            row: 行号
+            record: 历史记录
+        """
+        self.history_table.insertRow(row)
+        self._history_records[record['id']] = record
+        
+        # 格式化时间
+        timestamp = record['timestamp'].split('.')[0] if '.' in record['timestamp'] else record['timestamp']
+        
+        self.history_table.setItem(row, 0, QTableWidgetItem(str(record['id'])))
+        self.history_table.setItem(row, 1, QTableWidgetItem(timestamp))
+        self.history_table.setItem(row, 2, QTableWidgetItem(record['application']))
+        self.history_table.setItem(row, 3, QTableWidgetItem(record['element_type']))
+        self.history_table.setItem(row, 4, QTableWidgetItem(record['method']))
     
     def search_history(self):
         """搜索历史记录"""
         keyword = self.history_search_edit.text()
-        records = self.history_manager.search_records(keyword)
-        self.history_table.setRowCount(0)
-        
-        for record in records:
-            row = self.history_table.rowCount()
-            self.history_table.insertRow(row)
-            
-            # 格式化时间
-            timestamp = record['timestamp'].split('.')[0] if '.' in record['timestamp'] else record['timestamp']
-            
-            self.history_table.setItem(row, 0, QTableWidgetItem(str(record['id'])))
-            self.history_table.setItem(row, 1, QTableWidgetItem(timestamp))
-            self.history_table.setItem(row, 2, QTableWidgetItem(record['application']))
-            self.history_table.setItem(row, 3, QTableWidgetItem(record['element_type']))
-            self.history_table.setItem(row, 4, QTableWidgetItem(record['method']))
+        self._query_history(lambda: self.history_manager.search_records(keyword, limit=self.HISTORY_PAGE_SIZE))
     
     def clear_history(self):
         """清空历史记录"""
@@ -1108,6 +1284,8 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             self.history_manager.clear_history()
+            self.history_table.setRowCount(0)
+            self._history_records = {}
             self.refresh_history_list()
             QMessageBox.information(self, "成功", "历史记录已清空")
     
@@ -1118,9 +1296,9 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "警告", "请先选择一条历史记录")
             return
         
-        # 获取选中记录的ID
+        # 列表中的记录是完整的，直接使用，不查询数据库
         record_id = int(self.history_table.item(current_row, 0).text())
-        record = self.history_manager.get_record_by_id(record_id)
+        record = self._history_records.get(record_id)
         
         if record:
             # 显示历史记录详情
@@ -1166,7 +1344,10 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
+            # 先从列表中移除，之后的查询会等待删除写入数据库
             self.history_manager.delete_record(record_id)
+            self.history_table.removeRow(current_row)
+            self._history_records.pop(record_id, None)
             self.refresh_history_list()
             QMessageBox.information(self, "成功", "历史记录已删除")
     
@@ -1450,20 +1631,34 @@ class MainWindow(QMainWindow):
     def on_process_changed(self):
         """进程选择变化时的处理"""
         # 更新窗口列表
-        current_text = self.process_combo.currentText()
-        if current_text:
-            # 提取PID
-            pid_str = current_text.split("(PID: ")[-1].rstrip(")")
-            try:
-                pid = int(pid_str)
-                windows = self.window_utils.get_windows_by_pid(pid)
-                self.window_combo.clear()
-                for window in windows:
-                    self.window_combo.addItem(window.title)
-            except ValueError:
-                pass
+        pid = self._selected_process_id = self._get_selected_process_id()
+        if pid is not None:
+            windows = self.window_utils.get_windows_by_pid(pid)
+            self.window_combo.clear()
+            for window in windows:
+                self.window_combo.addItem(window.title)
+            
+            # 后端已就绪时预先连接新选择的进程，未就绪时由预热完成后连接
+            if self.backend_warmup.is_ready():
+                self.automation_executor.submit(self.backend_warmup.connect, pid,
+                                                priority=PRIORITY_BACKGROUND, name='backend_preconnect')
     
     def on_window_changed(self):
         """窗口选择变化时的处理"""
         # 更新元素树
         self.update_element_tree()
+    
+    def closeEvent(self, event):
+        """关闭窗口时取消元素树分析和元素捕获，写入未保存的历史记录和收藏夹，关闭高亮覆盖层，
+        保存定位统计并释放健康探测线程和自动化工作线程"""
+        self.tree_loader.cancel()
+        self._history_executor.shutdown(wait=True)
+        self.history_manager.close()
+        self.favorites_manager.close()
+        self.element_capture.capturing = False
+        self.highlight_overlay.stop_tracking()
+        self.highlight_overlay.close()
+        self.locator_stats.save()
+        get_app_health_monitor().shutdown()
+        self.automation_executor.shutdown(wait=False)
+        super().closeEvent(event)
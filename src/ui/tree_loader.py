@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树后台加载模块
+在自动化执行器中分析窗口，分析出的元素按帧分批显示到元素树模型，切换窗口时取消正在进行的分析
+"""
+
+import threading
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from core.automation_executor import PRIORITY_NORMAL
+
+
+# 分析结束标记
+_DONE = object()
+
+
+class _LoadJob:
+    """一次窗口分析任务"""
+
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        # 工作线程追加、主线程取出的 (父元素, 子元素列表) 队列，deque的append/popleft是线程安全的
+        self.batches = deque()
+        self.future = None
+        self.streaming = False  # 是否已开始分批显示
+
+
+class TreeLoader(QObject):
+    """元素树后台加载流水线
+
+    分析在自动化执行器的工作线程中进行，GUI线程不等待分析结果；
+    定时器每帧从队列中取出不超过batch_size个元素显示到模型中。
+    分析返回正在后台校验的骨架时，定时器继续按层把校正后的子元素列表同步到模型，直到校验结束。
+    """
+
+    # 加载完成信号，参数为根元素，失败或取消时为None
+    finished = pyqtSignal(object)
+
+    def __init__(self, model, analyzer, executor, batch_size=2000, interval=16, parent=None):
+        """初始化元素树加载器
+
+        Args:
+            model: ElementTreeModel对象
+            analyzer: ElementAnalyzer对象
+            executor: 自动化执行器
+            batch_size: 每帧最多显示的元素数量
+            interval: 显示间隔，单位：毫秒
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.model = model
+        self.analyzer = analyzer
+        self.executor = executor
+        self.batch_size = batch_size
+        self._job = None
+        # 工作线程追加、主线程取出的已校正子元素列表的骨架元素队列，切换窗口后仍保留
+        self._reconciled = deque()
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._drain)
+
+    def load(self, window):
+        """开始在后台分析窗口，取消正在进行的分析
+
+        Args:
+            window: 窗口对象，包含hwnd属性
+        """
+        self.cancel()
+        self.model.set_root(None)
+
+        job = _LoadJob()
+
+        def on_progress(parent_element, children):
+            job.batches.append((parent_element, children))
+
+        def on_done(future):
+            try:
+                root_element = future.result()
+            except Exception as e:
+                print(f"分析窗口元素失败: {e}")
+                root_element = None
+            job.batches.append((_DONE, root_element))
+
+        job.future = self.executor.submit(self.analyzer.analyze_window, window, on_progress=on_progress,
+                                          cancel_event=job.cancel_event, on_reconciled=self._reconciled.append,
+                                          priority=PRIORITY_NORMAL, name='analyze_window')
+        self._job = job
+        job.future.add_done_callback(on_done)
+        self._timer.start()
+
+    def cancel(self):
+        """取消正在进行的分析，已显示的元素保留在模型中"""
+        job = self._job
+        if job is None:
+            return
+        self._job = None
+        self._timer.stop()
+        job.cancel_event.set()
+        job.future.cancel()
+        job.batches.clear()
+
+    def is_loading(self):
+        """是否有正在进行的分析"""
+        return self._job is not None
+
+    def _drain(self):
+        """显示队列中已分析出的元素，由定时器在主线程中调用"""
+        job = self._job
+        if job is None:
+            if not self._sync_verified():
+                self._timer.stop()
+            return
+
+        budget = self.batch_size
+        while budget > 0 and job.batches:
+            parent_element, payload = job.batches.popleft()
+            if parent_element is _DONE:
+                self._finish(job, payload)
+                return
+            if parent_element is None:
+                self.model.begin_streaming(payload[0])
+                job.streaming = True
+            else:
+                self.model.append_children(parent_element, payload)
+            budget -= len(payload)
+
+    def _finish(self, job, root_element):
+        """分析结束，更新模型并发出完成信号"""
+        self._job = None
+        if job.streaming and (root_element is None or root_element is self.model.root_element()):
+            # 分批显示的元素树，分析失败时保留已显示的部分
+            self.model.end_streaming()
+        elif root_element is not None and self.analyzer.is_verifying(root_element):
+            # 正在后台校验的骨架，校正的子元素列表由定时器继续同步
+            self.model.begin_verifying(root_element)
+        elif root_element is not None:
+            # 使用缓存或校验完的骨架时直接显示完整的元素树
+            self.model.set_root(root_element)
+        if not self.model.is_verifying():
+            self._timer.stop()
+        self.finished.emit(root_element)
+
+    def _sync_verified(self):
+        """把后台校验校正的子元素列表同步到模型
+
+        Returns:
+            模型中的骨架是否仍在校验
+        """
+        if not self.model.is_verifying():
+            self._reconciled.clear()
+            return False
+        # 先确认校验状态再取出队列，校验结束前追加的元素都能在结束前同步
+        verifying = self.analyzer.is_verifying(self.model.root_element())
+        for _ in range(len(self._reconciled)):
+            self.model.sync_children(self._reconciled.popleft())
+        if not verifying:
+            self.model.end_verifying()
+        return verifying
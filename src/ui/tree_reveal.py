@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在元素树中显示元素模块
+将捕获到的元素解析为元素树中的节点并选中，节点尚未加载时在后台沿祖先链逐层加载
+"""
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.automation_executor import PRIORITY_INTERACTIVE
+from core.element_resolver import ElementIdentityMap, find_child, matches
+
+
+class TreeRevealer(QObject):
+    """元素树定位控制器
+
+    身份映射在第一次定位时按模型当前的元素树建立，之后随模型插入的行增量更新，模型重置或骨架校验改变元素树时丢弃。
+    """
+
+    # 定位完成信号，参数为选中的元素树节点，未找到时为None
+    revealed = pyqtSignal(object)
+    # 后台任务完成信号，在工作线程中发出，由主线程处理
+    _job_done = pyqtSignal(int, object, object)
+
+    def __init__(self, view, model, resolver, executor, parent=None):
+        """初始化元素树定位控制器
+
+        Args:
+            view: 元素树视图
+            model: ElementTreeModel对象
+            resolver: ElementResolver对象
+            executor: 自动化执行器
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.view = view
+        self.model = model
+        self.resolver = resolver
+        self.executor = executor
+        self._identity_map = None
+        self._generation = 0
+        self._chain = None
+        self._loaded = set()  # 本次定位中已加载过子元素的节点
+
+        self._job_done.connect(self._on_job_done)
+        model.modelReset.connect(self._on_model_reset)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.verified.connect(self._on_tree_verified)
+
+    def reveal(self, element):
+        """在元素树中选中元素，已加载的节点立即选中，否则在后台解析
+
+        Args:
+            element: 元素对象，可以是元素树中的节点或新捕获的元素
+        """
+        self._generation += 1
+        self._chain = None
+        self._loaded = set()
+
+        node = element if self.model.index_for_element(element).isValid() else self._get_identity_map().lookup(element)
+        if node is not None:
+            self._finish(node)
+            return
+        if self.model.root_element() is None:
+            self._finish(None)
+            return
+
+        self._submit(self.resolver.get_ancestor_chain, element, name='get_ancestor_chain')
+
+    def _get_identity_map(self):
+        """获取身份映射，第一次使用时建立"""
+        if self._identity_map is None:
+            self._identity_map = ElementIdentityMap(self.model.root_element())
+        return self._identity_map
+
+    def _submit(self, func, *args, name=None, node=None):
+        """提交后台任务，完成后在主线程中继续定位"""
+        generation = self._generation
+        future = self.executor.submit(func, *args, priority=PRIORITY_INTERACTIVE, name=name)
+        future.add_done_callback(lambda f: self._job_done.emit(generation, node, f))
+
+    def _on_job_done(self, generation, node, future):
+        """后台任务完成，在主线程中调用"""
+        if node is not None:
+            self.model.finish_loading(node)
+        if generation != self._generation:
+            # 已开始新的定位
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"在元素树中定位元素失败: {e}")
+            self._finish(None)
+            return
+        if node is None:
+            self._chain = result
+        self._advance()
+
+    def _advance(self):
+        """沿祖先链向下查找，遇到未加载的节点时提交后台加载"""
+        chain = self._chain
+        root = self.model.root_element()
+        if not chain or root is None or not matches(root, chain[0][1]):
+            self._finish(None)
+            return
+
+        node = self._get_identity_map().lookup_path([descriptor for _, descriptor in chain])
+        if node is not None:
+            self._finish(node)
+            return
+
+        node = root
+        for level in range(1, len(chain)):
+            child = find_child(node, chain[level][1])
+            if child is None:
+                if node in self._loaded or not self.model.begin_loading(node):
+                    self._finish(None)
+                    return
+                self._loaded.add(node)
+                self._submit(self.resolver.load_children, node, chain[level - 1][0], chain[level][1],
+                             name='load_ancestor_children', node=node)
+                return
+            node = child
+        self._finish(node)
+
+    def _finish(self, node):
+        """选中节点并发出定位完成信号"""
+        self._chain = None
+        if node is not None:
+            index = self.model.index_for_element(node)
+            if index.isValid():
+                ancestors = []
+                ancestor = node.parent
+                while ancestor is not None:
+                    ancestors.append(ancestor)
+                    ancestor = ancestor.parent
+                for ancestor in reversed(ancestors):
+                    self.view.expand(self.model.index_for_element(ancestor))
+                self.view.setCurrentIndex(index)
+                self.view.scrollTo(index)
+            else:
+                node = None
+        self.revealed.emit(node)
+
+    def _on_model_reset(self):
+        """元素树被替换，丢弃身份映射和正在进行的定位"""
+        self._identity_map = None
+        self._generation += 1
+        self._chain = None
+
+    def _on_rows_removed(self, parent, first, last):
+        """骨架校验删除了已不存在的元素，丢弃身份映射"""
+        if self.model.is_verifying():
+            self._identity_map = None
+
+    def _on_tree_verified(self, root_element):
+        """骨架校验更新了元素属性，丢弃身份映射"""
+        self._identity_map = None
+
+    def _on_rows_inserted(self, parent, first, last):
+        """新加载的子元素加入身份映射"""
+        if self._identity_map is None:
+            return
+        for row in range(first, last + 1):
+            element = self.model.element_from_index(self.model.index(row, 0, parent))
+            if element is not None:
+                self._identity_map.add_subtree(element)
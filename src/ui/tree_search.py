@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树搜索模块
+输入停止一段时间后在元素索引中搜索，按帧逐批显示结果：突出显示命中的元素，只展开命中元素的祖先节点
+"""
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from core.element_index import ElementIndex, SUBSTRING
+
+
+class TreeSearch(QObject):
+    """元素树搜索控制器
+
+    索引在第一次搜索时按模型当前的元素树建立，之后随模型插入的行增量更新，模型重置或骨架校验改变元素树时丢弃。
+    """
+
+    # 搜索进度信号，参数为已找到的匹配数和搜索是否结束
+    progress = pyqtSignal(int, bool)
+    # 搜索出错信号，参数为错误信息
+    error = pyqtSignal(str)
+
+    def __init__(self, view, model, debounce=250, batch_size=200, interval=16, parent=None):
+        """初始化搜索控制器
+
+        Args:
+            view: 元素树视图
+            model: ElementTreeModel对象
+            debounce: 输入停止多长时间后开始搜索，单位：毫秒
+            batch_size: 每帧最多处理的匹配数
+            interval: 处理间隔，单位：毫秒
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.view = view
+        self.model = model
+        self.batch_size = batch_size
+        self.query = ''
+        self.mode = SUBSTRING
+        self._index = None
+        self._results = None  # 当前搜索的匹配元素生成器
+        self._hit_count = 0
+        self._expanded = set()  # 当前搜索已展开的元素
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce)
+        self._debounce_timer.timeout.connect(self.search_now)
+        self._stream_timer = QTimer(self)
+        self._stream_timer.setInterval(interval)
+        self._stream_timer.timeout.connect(self._stream)
+
+        model.modelReset.connect(self._on_model_reset)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.verified.connect(self._on_tree_verified)
+
+    def set_query(self, query, mode=None):
+        """设置搜索条件，输入停止debounce毫秒后开始搜索
+
+        Args:
+            query: 搜索文本
+            mode: 匹配方式，substring/prefix/regex，None表示不变
+        """
+        self.query = query
+        if mode is not None:
+            self.mode = mode
+        self._debounce_timer.start()
+
+    def search_now(self):
+        """立即按当前条件搜索，停止正在进行的搜索"""
+        self._debounce_timer.stop()
+        self._stop()
+        self.model.clear_search_hits()
+        self._hit_count = 0
+        self._expanded = set()
+        if not self.query:
+            return
+
+        if self._index is None:
+            self._index = ElementIndex(self.model.root_element())
+        try:
+            self._results = self._index.search(self.query, self.mode)
+        except ValueError as e:
+            self.error.emit(str(e))
+            return
+        self._stream()
+        if self._results is not None:
+            self._stream_timer.start()
+
+    def _stop(self):
+        """停止正在进行的搜索"""
+        self._stream_timer.stop()
+        self._results = None
+
+    def _stream(self):
+        """处理一批匹配元素，由定时器在主线程中调用"""
+        results = self._results
+        if results is None:
+            self._stream_timer.stop()
+            return
+
+        hits = []
+        for element in results:
+            hits.append(element)
+            if len(hits) >= self.batch_size:
+                break
+        else:
+            self._stop()
+
+        self.model.add_search_hits(hits)
+        for element in hits:
+            self._expand_ancestors(element)
+        if hits and not self._hit_count:
+            # 选中第一个匹配的元素
+            index = self.model.index_for_element(hits[0])
+            self.view.setCurrentIndex(index)
+            self.view.scrollTo(index)
+        self._hit_count += len(hits)
+        self.progress.emit(self._hit_count, self._results is None)
+
+    def _expand_ancestors(self, element):
+        """展开元素的祖先节点，命中的元素本身不展开"""
+        chain = []
+        ancestor = element.parent
+        while ancestor is not None and ancestor not in self._expanded:
+            chain.append(ancestor)
+            ancestor = ancestor.parent
+        for ancestor in reversed(chain):
+            self._expanded.add(ancestor)
+            self.view.expand(self.model.index_for_element(ancestor))
+
+    def _on_model_reset(self):
+        """元素树被替换，丢弃索引和正在进行的搜索"""
+        self._stop()
+        self._index = None
+
+    def _on_rows_removed(self, parent, first, last):
+        """骨架校验删除了已不存在的元素，丢弃索引"""
+        if self.model.is_verifying():
+            self._index = None
+
+    def _on_tree_verified(self, root_element):
+        """骨架校验更新了元素属性，丢弃索引"""
+        self._index = None
+
+    def _on_rows_inserted(self, parent, first, last):
+        """新加载的子元素加入索引"""
+        if self._index is None:
+            return
+        for row in range(first, last + 1):
+            element = self.model.element_from_index(self.model.index(row, 0, parent))
+            if element is not None:
+                self._index.add_subtree(element)
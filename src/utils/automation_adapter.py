@@ -3,8 +3,11 @@
 
 """自动化依赖适配层，用于封装不同版本依赖库的API差异"""
 
-import uiautomation
-import pywinauto
+from .lazy_import import lazy_import
+
+# 自动化依赖导入耗时较长，第一次使用时才导入
+uiautomation = lazy_import('uiautomation')
+pywinauto = lazy_import('pywinauto')
 
 
 class AutomationAdapter:
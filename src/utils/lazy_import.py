@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟导入模块
+pywinauto、uiautomation、win32等模块导入耗时较长，模块级引用改为延迟模块对象，
+第一次访问属性时才真正导入，启动后可在后台线程中预先导入
+"""
+
+import importlib
+import sys
+import threading
+import types
+
+from .startup_timeline import get_startup_timeline
+
+
+def import_module(name):
+    """导入模块，实际导入时记录到启动时间线
+
+    Args:
+        name: 模块名
+
+    Returns:
+        模块对象
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    timeline = get_startup_timeline()
+    start = timeline.now()
+    module = importlib.import_module(name)
+    timeline.record_import(name, start, timeline.now() - start)
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """延迟模块，第一次访问属性时导入实际模块
+
+    属性访问始终转发到实际模块，子模块和测试中对实际模块的patch都能看到；
+    与自动化调用本身的耗时相比，转发的开销可以忽略。
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_loaded'] = None
+
+    def _lazy_load(self):
+        """导入实际模块"""
+        module = self.__dict__['_lazy_loaded']
+        if module is None:
+            module = self.__dict__['_lazy_loaded'] = import_module(self.__name__)
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_load(), name)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        state = '已导入' if self.__dict__['_lazy_loaded'] is not None else '未导入'
+        return f"<延迟模块 {self.__name__} ({state})>"
+
+
+_lazy_modules = {}
+_lazy_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """获取延迟模块，同名模块共享同一个延迟模块对象
+
+    Args:
+        name: 模块名
+
+    Returns:
+        LazyModule对象
+    """
+    with _lazy_lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = _lazy_modules[name] = LazyModule(name)
+        return module
+
+
+def preload_modules(names):
+    """在当前线程中依次导入模块，用于启动后的后台预热
+
+    Args:
+        names: 模块名列表
+
+    Returns:
+        {模块名: 错误信息}，全部导入成功时为空字典
+    """
+    errors = {}
+    for name in names:
+        try:
+            lazy_import(name)._lazy_load()
+        except Exception as e:
+            errors[name] = str(e)
+            print(f"预先导入模块 {name} 失败: {e}")
+    return errors
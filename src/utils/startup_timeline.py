@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动时间线模块
+记录启动各阶段、模块导入和关键时间点（如首次绘制）的耗时，生成启动时间线报告
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+# 关键时间点
+FIRST_PAINT = '首次绘制'
+BACKGROUND_READY = '后台预热完成'
+
+
+class StartupTimeline:
+    """启动时间线，所有时间相对于创建时间线的时刻，单位：秒，可在多个线程中记录"""
+
+    def __init__(self, clock=time.perf_counter):
+        """初始化启动时间线
+
+        Args:
+            clock: 计时函数
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.started_at = clock()
+        self.phases = []  # [(阶段名称, 开始时间, 耗时, 线程名)]
+        self.imports = []  # [(模块名, 开始时间, 耗时, 线程名)]
+        self.marks = {}  # 时间点名称 -> 时间
+
+    def now(self):
+        """当前时间，相对于时间线创建的时刻"""
+        return self._clock() - self.started_at
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个启动阶段的耗时
+
+        Args:
+            name: 阶段名称
+        """
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.record_phase(name, start, self.now() - start)
+
+    def record_phase(self, name, start, duration):
+        """记录一个已完成的启动阶段
+
+        Args:
+            name: 阶段名称
+            start: 开始时间，相对于时间线创建的时刻
+            duration: 耗时
+        """
+        with self._lock:
+            self.phases.append((name, start, duration, threading.current_thread().name))
+
+    def record_import(self, module_name, start, duration):
+        """记录一次模块导入
+
+        Args:
+            module_name: 模块名
+            start: 开始时间，相对于时间线创建的时刻
+            duration: 耗时
+        """
+        with self._lock:
+            self.imports.append((module_name, start, duration, threading.current_thread().name))
+
+    def mark(self, name):
+        """记录关键时间点，同名时间点只记录第一次
+
+        Args:
+            name: 时间点名称
+
+        Returns:
+            时间点的时间
+        """
+        with self._lock:
+            return self.marks.setdefault(name, self.now())
+
+    def get_mark(self, name):
+        """获取关键时间点
+
+        Args:
+            name: 时间点名称
+
+        Returns:
+            时间点的时间，尚未记录返回None
+        """
+        return self.marks.get(name)
+
+    def imported_before(self, name):
+        """获取在关键时间点之前导入的模块
+
+        Args:
+            name: 时间点名称
+
+        Returns:
+            模块名列表，时间点尚未记录时返回全部已导入的模块
+        """
+        limit = self.marks.get(name)
+        with self._lock:
+            return [module for module, start, _, _ in self.imports if limit is None or start < limit]
+
+    def report(self):
+        """生成启动时间线报告
+
+        Returns:
+            报告文本，按开始时间排列各阶段、模块导入和关键时间点
+        """
+        with self._lock:
+            rows = [(start, f"{name:<24}{duration * 1000:>9.1f}ms  [{thread}]")
+                    for name, start, duration, thread in self.phases]
+            rows += [(start, f"导入 {name:<19}{duration * 1000:>9.1f}ms  [{thread}]")
+                     for name, start, duration, thread in self.imports]
+            rows += [(at, f"● {name}") for name, at in self.marks.items()]
+        rows.sort(key=lambda row: row[0])
+        lines = ["启动时间线:"]
+        lines += [f"  {start * 1000:>9.1f}ms  {text}" for start, text in rows]
+        return "\n".join(lines)
+
+
+_startup_timeline = StartupTimeline()
+
+
+def get_startup_timeline():
+    """获取全局启动时间线，从首次导入本模块开始计时
+
+    Returns:
+        StartupTimeline实例
+    """
+    return _startup_timeline
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pygetwindow as gw
-import win32gui
-import win32con
-import win32process
+from .lazy_import import lazy_import
+
+# win32相关模块第一次使用时才导入
+gw = lazy_import('pygetwindow')
+win32gui = lazy_import('win32gui')
+win32con = lazy_import('win32con')
+win32process = lazy_import('win32process')
 
 
 class WindowUtils:
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单元测试公共工具
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.element import Element
+
+
+def make_element(element_type, name=None, detailed=False, children=(), **fields):
+    """创建测试用元素对象
+
+    Args:
+        element_type: 元素类型，同时作为控件类型
+        name: 元素名称
+        detailed: 是否填充类名、文本、位置和状态，快照、比较和骨架等需要完整属性的测试使用
+        children: 依次添加的子元素
+        **fields: 其他元素属性，如automation_id、runtime_id、has_children、x、y，覆盖默认值
+
+    Returns:
+        Element对象
+    """
+    element = Element()
+    element.element_type = element_type
+    element.control_type = element_type
+    element.name = name
+    if detailed:
+        element.class_name = f"{element_type}Class"
+        element.text = name
+        element.x, element.y, element.width, element.height = 0, 0, 100, 20
+        element.is_enabled = True
+        element.is_visible = True
+    for field, value in fields.items():
+        setattr(element, field, value)
+    for child in children:
+        element.add_child(child)
+    return element
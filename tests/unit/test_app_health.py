@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AppHealthMonitor类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from core.app_health import AppHealthMonitor, AppUnresponsiveError, GuardPoolExhaustedError
+from core.automation_executor import AutomationExecutor, AutomationTimeoutError
+
+
+@pytest.fixture
+def executor():
+    """测试用的自动化执行器，替换全局执行器"""
+    automation_executor = AutomationExecutor(num_workers=1, watchdog_interval=0.01)
+    with patch('core.app_health.get_automation_executor', return_value=automation_executor):
+        yield automation_executor
+    automation_executor.shutdown(wait=False)
+
+
+@pytest.fixture
+def monitor(executor):
+    """连续2次超时即降级的健康监控"""
+    app_health_monitor = AppHealthMonitor(failure_threshold=2, default_timeout=0.05,
+                                          probe_interval=0.02, retry_after=60)
+    yield app_health_monitor
+    app_health_monitor.shutdown()
+
+
+def test_call_returns_result(monitor):
+    """测试正常调用返回结果，异常原样传递且不计为超时"""
+    assert monitor.call(100, lambda a, b: a + b, 1, b=2) == 3
+
+    def fail():
+        raise ValueError("boom")
+    with pytest.raises(ValueError):
+        monitor.call(100, fail)
+    assert not monitor.is_degraded(100)
+
+
+def test_repeated_timeouts_degrade_and_fail_fast(monitor):
+    """测试连续超时后进程被标记为降级，之后的调用立即失败"""
+    release = threading.Event()
+    for _ in range(2):
+        with pytest.raises(AutomationTimeoutError):
+            monitor.call(100, release.wait, 5)
+    assert monitor.is_degraded(100)
+    assert monitor.get_status()[100]['total_timeouts'] == 2
+
+    called = []
+    start = time.perf_counter()
+    with pytest.raises(AppUnresponsiveError) as exc_info:
+        monitor.call(100, called.append, 1)
+    assert time.perf_counter() - start < 0.05
+    assert not called
+    assert exc_info.value.process_id == 100
+
+    # 其他进程不受影响
+    assert monitor.call(200, lambda: 'ok') == 'ok'
+    release.set()
+
+
+def test_success_resets_consecutive_timeouts(monitor):
+    """测试成功调用重置连续超时计数"""
+    monitor.record_timeout(100)
+    monitor.record_success(100)
+    monitor.record_timeout(100)
+    assert not monitor.is_degraded(100)
+    assert monitor.get_status()[100]['consecutive_timeouts'] == 1
+
+
+def test_call_on_worker_thread_is_bounded(monitor, executor):
+    """测试在执行器工作线程中发起的调用也有超时，不会卡住工作线程"""
+    release = threading.Event()
+
+    def job():
+        with pytest.raises(AutomationTimeoutError):
+            monitor.call(100, release.wait, 5)
+        return 'done'
+
+    assert executor.submit(job).result(1) == 'done'
+    assert monitor.get_status()[100]['consecutive_timeouts'] == 1
+    release.set()
+
+
+def test_full_guard_pool_fails_fast(executor):
+    """测试守护线程被未返回的调用占满时，新的调用立即失败且不计入超时"""
+    monitor = AppHealthMonitor(failure_threshold=5, default_timeout=0.05, guard_workers=1)
+    release = threading.Event()
+
+    def job():
+        with pytest.raises(AutomationTimeoutError):
+            monitor.call(100, release.wait, 5)
+        start = time.perf_counter()
+        with pytest.raises(GuardPoolExhaustedError):
+            monitor.call(200, lambda: 'ok', timeout=1)
+        return time.perf_counter() - start
+
+    try:
+        assert executor.submit(job).result(2) < 0.5
+        assert 200 not in monitor.get_status()
+        release.set()
+        deadline = time.perf_counter() + 1
+        while monitor._guard_busy and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert executor.submit(monitor.call, 200, lambda: 'ok').result(1) == 'ok'
+    finally:
+        release.set()
+        monitor.shutdown()
+
+
+def test_probe_recovers_degraded_window(monitor):
+    """测试后台探测到窗口恢复响应后解除降级"""
+    responsive = threading.Event()
+    with patch.object(AppHealthMonitor, 'probe_window', side_effect=lambda hwnd, timeout: responsive.is_set()):
+        monitor.record_timeout(100)
+        with monitor._lock:
+            monitor._get_health(100).window_handle = 12345
+        monitor.record_timeout(100)
+        assert monitor.is_degraded(100)
+
+        time.sleep(0.1)
+        assert monitor.is_degraded(100)
+        assert monitor.get_status()[100]['last_probe'] is not None
+
+        responsive.set()
+        deadline = time.time() + 1
+        while monitor.is_degraded(100) and time.time() < deadline:
+            time.sleep(0.01)
+        assert not monitor.is_degraded(100)
+
+
+def test_trial_call_after_retry_after(monitor):
+    """测试无法探测的降级进程在等待一段时间后放行一次试探调用"""
+    monitor.record_timeout(100)
+    monitor.record_timeout(100)
+    with pytest.raises(AppUnresponsiveError):
+        monitor.check(100)
+
+    with monitor._lock:
+        monitor._get_health(100).degraded_since -= 60
+    assert monitor.call(100, lambda: 'ok') == 'ok'
+    assert not monitor.is_degraded(100)
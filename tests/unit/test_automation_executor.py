@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AutomationExecutor类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import threading
+import time
+import pytest
+from core.automation_executor import (
+    AutomationExecutor, AutomationTimeoutError,
+    PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND
+)
+
+
+@pytest.fixture
+def executor():
+    """单工作线程的执行器"""
+    automation_executor = AutomationExecutor(num_workers=1, watchdog_interval=0.01)
+    yield automation_executor
+    automation_executor.shutdown(wait=False)
+
+
+def test_submit_returns_future(executor):
+    """测试提交任务返回Future，异常通过Future传递"""
+    assert executor.submit(lambda a, b: a + b, 1, b=2).result(1) == 3
+
+    def fail():
+        raise ValueError("boom")
+    with pytest.raises(ValueError):
+        executor.submit(fail).result(1)
+
+    metrics = executor.get_metrics()
+    assert metrics['completed'] == 1
+    assert metrics['failed'] == 1
+
+
+def test_interactive_jobs_run_first(executor):
+    """测试交互任务优先于后台任务执行"""
+    gate = threading.Event()
+    order = []
+    executor.submit(gate.wait)  # 占住唯一的工作线程
+    time.sleep(0.02)
+
+    futures = [
+        executor.submit(order.append, 'background', priority=PRIORITY_BACKGROUND),
+        executor.submit(order.append, 'normal', priority=PRIORITY_NORMAL),
+        executor.submit(order.append, 'interactive', priority=PRIORITY_INTERACTIVE),
+    ]
+    assert executor.get_metrics()['queue_depth'] == 3
+    assert executor.get_metrics()['queue_depth_by_priority'] == {0: 1, 10: 1, 20: 1}
+
+    gate.set()
+    for future in futures:
+        future.result(1)
+    assert order == ['interactive', 'normal', 'background']
+
+
+def test_timeout_replaces_stuck_worker(executor):
+    """测试任务超时后Future立即结束，并启动新工作线程继续处理队列"""
+    release = threading.Event()
+    stuck = executor.submit(release.wait, 5, timeout=0.05, name='hung')
+
+    with pytest.raises(AutomationTimeoutError):
+        stuck.result(1)
+
+    # 被卡住的线程未返回，新任务仍能执行
+    assert executor.submit(lambda: 'ok').result(1) == 'ok'
+    metrics = executor.get_metrics()
+    assert metrics['timed_out'] == 1
+    assert metrics['replaced_workers'] == 1
+    release.set()
+
+
+def test_call_inside_worker_runs_inline(executor):
+    """测试在工作线程中调用call直接执行，不会死锁"""
+    def outer():
+        return executor.call(lambda: threading.current_thread().name)
+
+    assert executor.call(outer, timeout=1).startswith('automation-')
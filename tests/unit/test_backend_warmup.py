@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BackendWarmup类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from unittest.mock import Mock
+
+from core import backend_warmup
+from core.backend_warmup import BackendWarmup, FAILED, PENDING, READY
+from utils.startup_timeline import StartupTimeline
+
+
+def _patch_stages(monkeypatch, calls, fail=None):
+    """将各预热阶段替换为记录调用顺序的函数"""
+    def stage(name):
+        def run(*args):
+            calls.append((name,) + args)
+            if name == fail:
+                raise RuntimeError(f"{name}失败")
+        return run
+
+    for name in ('_import_modules', '_generate_comtypes_wrappers', '_init_pywinauto', '_init_uiautomation',
+                 '_connect_process'):
+        monkeypatch.setattr(backend_warmup, name, stage(name))
+    health_monitor = Mock()
+    health_monitor.call.side_effect = lambda process_id, func, *args, timeout=None: func(*args)
+    health_monitor.is_degraded.return_value = False
+    monkeypatch.setattr(backend_warmup, 'get_app_health_monitor', lambda: health_monitor)
+    return health_monitor
+
+
+def test_run_reports_ready_and_timings(monkeypatch):
+    """测试依次执行各阶段，记录耗时并预先连接进程"""
+    calls = []
+    _patch_stages(monkeypatch, calls)
+    timeline = StartupTimeline()
+    warmup = BackendWarmup(timeline)
+    assert not warmup.is_ready()
+    assert warmup.get_status()['stages']['import']['state'] == PENDING
+
+    assert warmup.run(1234)
+    assert [call[0] for call in calls] == ['_import_modules', '_generate_comtypes_wrappers', '_init_pywinauto',
+                                           '_init_uiautomation', '_connect_process']
+    assert calls[-1] == ('_connect_process', 1234)
+
+    status = warmup.get_status()
+    assert status['ready'] and warmup.wait_ready(0)
+    assert status['process_id'] == 1234
+    assert all(stage['state'] == READY and stage['duration_ms'] is not None for stage in status['stages'].values())
+    assert [phase[0] for phase in timeline.phases][-1] == '预热 connect'
+
+    # 已连接同一进程时不再连接
+    assert warmup.connect(1234)
+    assert len(calls) == 5
+
+    # 启动后切换进程时的预先连接不再记录到启动时间线
+    phases = len(timeline.phases)
+    assert warmup.connect(5678)
+    assert calls[-1] == ('_connect_process', 5678)
+    assert len(timeline.phases) == phases
+
+
+def test_failed_stage_is_reported(monkeypatch):
+    """测试某个阶段失败时继续后续阶段，后端不就绪并记录错误"""
+    calls = []
+    _patch_stages(monkeypatch, calls, fail='_init_uiautomation')
+    warmup = BackendWarmup()
+
+    assert not warmup.run()
+    assert not warmup.is_ready()
+    stages = warmup.get_status()['stages']
+    assert stages['pywinauto']['state'] == READY
+    assert stages['uiautomation']['state'] == FAILED
+    assert 'uiautomation失败' in stages['uiautomation']['error']
+    assert stages['connect']['state'] == PENDING
+
+
+def test_connect_failure_clears_process(monkeypatch):
+    """测试预先连接失败时不记录已连接的进程"""
+    calls = []
+    _patch_stages(monkeypatch, calls, fail='_connect_process')
+    warmup = BackendWarmup()
+
+    assert warmup.run(1234)
+    status = warmup.get_status()
+    assert status['process_id'] is None
+    assert status['stages']['connect']['state'] == FAILED
+
+
+def test_connect_is_not_counted_by_circuit_breaker(monkeypatch):
+    """测试预先连接的超时不计入目标应用的熔断，已熔断的应用不再预先连接"""
+    calls = []
+    health_monitor = _patch_stages(monkeypatch, calls)
+    warmup = BackendWarmup()
+
+    assert warmup.connect(1234)
+    assert health_monitor.call.call_args[0][0] is None
+
+    health_monitor.is_degraded.return_value = True
+    assert not warmup.connect(5678)
+    assert calls == [('_connect_process', 1234)]
+    assert warmup.get_status()['stages']['connect']['state'] == FAILED
@@ -169,9 +169,47 @@ def test_generate_image_recognition_code():
     assert "# 模板匹配" in code
     assert "# 设置匹配阈值" in code
     assert "if max_val >= threshold:" in code
+    assert "for scale in (1.0, 1.25, 1.5):" in code
     assert "win32api.SetCursorPos((center_x, center_y))" in code
 
 
+def test_generate_image_recognition_code_with_roi():
+    """测试生成带搜索区域的图像识别代码"""
+    generator = CodeGenerator()
+    
+    element = Element()
+    
+    # 使用矩形作为搜索区域
+    code = generator.generate_image_recognition_code(element, roi=(100, 200, 500, 600))
+    assert "roi = (100, 200, 500, 600)" in code
+    assert "ImageGrab.grab(bbox=roi, all_screens=True)" in code
+    assert "center_x = roi[0] + max_loc[0] + match_size[1] // 2" in code
+    
+
+
+@patch('core.code_generator.win32gui')
+def test_generate_image_recognition_code_with_window_roi(mock_win32gui):
+    """测试窗口句柄作为搜索区域时生成的代码在运行时按类名和标题查找窗口，不写入句柄"""
+    generator = CodeGenerator()
+    mock_win32gui.GetAncestor.return_value = 1234
+    mock_win32gui.GetClassName.return_value = "Notepad"
+    mock_win32gui.GetWindowText.return_value = "无标题 - 记事本"
+
+    code = generator.generate_image_recognition_code(Element(), roi=5678)
+    mock_win32gui.GetClassName.assert_called_once_with(1234)
+    assert "import win32gui" in code
+    assert "hwnd = win32gui.FindWindow('Notepad', '无标题 - 记事本')" in code
+    assert "roi = win32gui.GetWindowRect(hwnd)" in code
+    assert "5678" not in code and "1234" not in code
+    compile(code, '<generated>', 'exec')
+
+    # 无法获取窗口信息时搜索整个屏幕
+    mock_win32gui.GetClassName.side_effect = Exception("无效的窗口句柄")
+    code = generator.generate_image_recognition_code(Element(), roi=5678)
+    assert "win32gui" not in code
+    assert "screenshot = ImageGrab.grab()" in code
+
+
 def test_generate_code_by_method_unknown():
     """测试根据未知方法生成代码"""
     generator = CodeGenerator()
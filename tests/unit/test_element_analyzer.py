@@ -285,4 +285,156 @@ def test_build_path_part():
     element4.depth = 4
     
     path_part4 = analyzer._build_path_part(element4)
-    assert path_part4 == '<Custom depth=4>'
\ No newline at end of file
+    assert path_part4 == '<Custom depth=4>'
+
+class _FakeElementArray:
+    """模拟FindAll返回的UIA元素数组"""
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.Length = len(elements)
+        self.requested = []
+
+    def GetElement(self, index):
+        self.requested.append(index)
+        return self.elements[index]
+
+
+def _fake_uia_modules(element_array):
+    """构造模拟的pywinauto UIA模块，UIAWrapper直接包装元素信息"""
+    uia_defines = Mock()
+    uia_defines.IUIA.return_value.tree_scope = {'children': 2}
+    uia_defines.get_elem_interface.side_effect = Exception("不支持该模式")
+    uiawrapper = Mock()
+    uiawrapper.UIAWrapper.side_effect = lambda info: Mock(element_info=info)
+    uia_element_info = Mock()
+    uia_element_info.UIAElementInfo.side_effect = lambda element: element
+    return {
+        'pywinauto.uia_defines': uia_defines,
+        'pywinauto.controls.uiawrapper': uiawrapper,
+        'pywinauto.uia_element_info': uia_element_info,
+    }
+
+
+def _make_paged_parent(count):
+    """创建有count个子元素的父元素，子元素名称为序号"""
+    children = [Mock(name=str(index)) for index in range(count)]
+    array = _FakeElementArray(children)
+    parent_pywinauto_element = Mock()
+    parent_pywinauto_element.element_info.element.FindAll.return_value = array
+
+    parent_element = Element()
+    parent_element.control_type = "List"
+    parent_element.process_id = 1234
+    return parent_pywinauto_element, parent_element, array
+
+
+def test_analyze_children_pages_large_sibling_sets():
+    """测试子元素数量超过阈值时只加载一页，其余以"更多"虚拟节点表示"""
+    analyzer = ElementAnalyzer()
+    analyzer.paging_threshold = 10
+    analyzer.page_size = 4
+    analyzer.initial_load_depth = 1
+    parent_pywinauto_element, parent_element, array = _make_paged_parent(11)
+
+    with patch.dict(sys.modules, _fake_uia_modules(array)), \
+            patch.object(analyzer, '_convert_pywinauto_to_element', side_effect=lambda info: Element()):
+        analyzer._analyze_element_children(parent_pywinauto_element, parent_element, 1)
+
+        # 只为第一页创建了pywinauto元素
+        assert array.requested == [0, 1, 2, 3]
+        assert len(parent_element.children) == 5
+        more_element = parent_element.children[-1]
+        assert analyzer.is_more_element(more_element)
+        assert more_element.name == "更多 (7)"
+        assert more_element.attributes['page_start'] == 4
+
+        # 加载下一页，替换虚拟节点
+        loaded = analyzer.load_more_children(more_element)
+        assert array.requested[4:] == [4, 5, 6, 7]
+        assert len(loaded) == 5
+        assert more_element not in parent_element.children
+        assert analyzer.is_more_element(loaded[-1])
+        assert loaded[-1].name == "更多 (3)"
+
+        # 最后一页不再有虚拟节点
+        loaded = analyzer.load_more_children(loaded[-1])
+        assert len(loaded) == 3
+        assert not any(analyzer.is_more_element(child) for child in parent_element.children)
+        assert len(parent_element.children) == 11
+
+
+def test_load_more_failure_keeps_more_element_for_retry():
+    """测试加载下一页失败时保留"更多"虚拟节点，用新的父元素重试后替换虚拟节点"""
+    analyzer = ElementAnalyzer()
+    analyzer.paging_threshold = 10
+    analyzer.page_size = 4
+    analyzer.initial_load_depth = 1
+    parent_pywinauto_element, parent_element, array = _make_paged_parent(11)
+
+    with patch.dict(sys.modules, _fake_uia_modules(array)), \
+            patch.object(analyzer, '_convert_pywinauto_to_element', side_effect=lambda info: Element()):
+        analyzer._analyze_element_children(parent_pywinauto_element, parent_element, 1)
+        more_element = parent_element.children[-1]
+
+        # 分析时记录的父元素已失效
+        stale_parent = Mock()
+        stale_parent.element_info.element.FindAll.side_effect = RuntimeError("元素不可用")
+        assert analyzer.load_more_children(more_element, stale_parent) == []
+        assert parent_element.children[-1] is more_element
+
+        loaded = analyzer.load_more_children(more_element, parent_pywinauto_element)
+        assert len(loaded) == 5
+        assert more_element not in parent_element.children
+        assert len(parent_element.children) == 9
+        # 已被替换的虚拟节点不再重复加载
+        assert analyzer.load_more_children(more_element, parent_pywinauto_element) == []
+
+
+def test_analyze_children_below_threshold_loads_all():
+    """测试子元素数量不超过阈值时一次加载全部子元素"""
+    analyzer = ElementAnalyzer()
+    analyzer.paging_threshold = 10
+    analyzer.initial_load_depth = 1
+    parent_pywinauto_element, parent_element, array = _make_paged_parent(10)
+
+    with patch.dict(sys.modules, _fake_uia_modules(array)), \
+            patch.object(analyzer, '_convert_pywinauto_to_element', side_effect=lambda info: Element()):
+        analyzer._analyze_element_children(parent_pywinauto_element, parent_element, 1)
+
+    assert len(parent_element.children) == 10
+    assert not any(analyzer.is_more_element(child) for child in parent_element.children)
+
+
+def test_analyze_children_reports_progress_and_cancels():
+    """测试逐层报告分析进度，设置取消标记后停止分析"""
+    import threading
+    
+    class FakeNode:
+        def __init__(self, name, kids=()):
+            self.element_info = Element()
+            self.element_info.element_type = "Pane"
+            self.element_info.name = name
+            self.kids = list(kids)
+    
+    analyzer = ElementAnalyzer()
+    analyzer.initial_load_depth = 3
+    window = FakeNode("窗口", [FakeNode("A", [FakeNode("A1"), FakeNode("A2")]), FakeNode("B", [FakeNode("B1")])])
+    root = Element()
+    
+    progress = []
+    cancel_event = threading.Event()
+    
+    def on_progress(parent, children):
+        progress.append((parent.name, [child.name for child in children]))
+        if parent.name == "A":
+            cancel_event.set()
+    
+    with patch.object(analyzer, '_get_children_page', side_effect=lambda node, control_type, start: (node.kids, len(node.kids))), \
+            patch.object(analyzer, '_convert_pywinauto_to_element', side_effect=lambda info: info):
+        root.name = "窗口"
+        analyzer._analyze_element_children(window, root, 1, on_progress=on_progress, cancel_event=cancel_event)
+    
+    # 父元素的一页子元素全部添加后才报告，取消后不再分析B的子元素
+    assert progress == [("窗口", ["A", "B"]), ("A", ["A1", "A2"])]
+    assert root.children[1].children == []
@@ -50,6 +50,25 @@ def test_capture_element(mock_win32gui, mock_win32api):
         assert mock_get_element.called
         assert capture.last_captured_element == mock_element
 
+@patch('core.element_capture.win32api')
+@patch('core.element_capture.win32gui')
+def test_capture_element_submits_only_lookups(mock_win32gui, mock_win32api):
+    """测试等待Ctrl键的轮询在调用线程中进行，只有元素查找提交到自动化执行器"""
+    capture = ElementCapture()
+    mock_win32api.GetCursorPos.return_value = (100, 200)
+    mock_win32gui.WindowFromPoint.return_value = 1234
+    mock_win32api.GetKeyState.side_effect = [0, -1]
+    mock_element = Element()
+    executor = Mock()
+    executor.call.return_value = mock_element
+    
+    with patch('core.automation_executor.get_automation_executor', return_value=executor):
+        assert capture.capture_element() is mock_element
+    
+    assert executor.call.call_count == 2
+    assert executor.call.call_args[0] == (capture._get_element_by_coordinate, 1234, 100, 200)
+    assert executor.call.call_args[1]['name'] == 'capture_point'
+
 @patch('core.element_capture.win32api')
 @patch('core.element_capture.win32gui')
 def test_capture_element_no_element(mock_win32gui, mock_win32api):
@@ -190,6 +209,44 @@ def test_test_element_location_failure(mock_win32gui, mock_win32api):
             # 验证结果
             assert result is False
 
+def test_test_element_location_guards_located_element_update():
+    """测试定位成功后读取控件位置和运行时ID同样带超时执行，超时时不更新元素"""
+    from core.automation_executor import AutomationTimeoutError
+    capture = ElementCapture()
+    element = Element()
+    element.window_handle = 1234
+    element.automation_id = "button_ok"
+
+    mock_element = Mock()
+    mock_element.exists.return_value = True
+    wrapper = mock_element.wrapper_object.return_value
+    wrapper.rectangle.return_value = Mock(left=10, top=20, right=90, bottom=50)
+    wrapper.element_info.runtime_id = [42, 7]
+    mock_window = Mock()
+    mock_window.child_window.return_value = mock_element
+    guarded = []
+
+    def call_for_window(window_handle, func, *args, timeout=None, **kwargs):
+        guarded.append(window_handle)
+        return func(*args, **kwargs)
+
+    monitor = Mock()
+    monitor.call_for_window.side_effect = call_for_window
+    with patch.object(capture, '_detect_application_type', return_value='WPF'), \
+            patch('core.element_capture.pywinauto') as mock_pywinauto, \
+            patch('core.element_capture.get_app_health_monitor', return_value=monitor):
+        mock_pywinauto.Application.return_value.connect.return_value.window.return_value = mock_window
+        assert capture.test_element_location(element) is True
+        # 连接窗口、检查元素存在、读取控件位置
+        assert guarded == [1234, 1234, 1234]
+        assert (element.x, element.y, element.width, element.height) == (10, 20, 80, 30)
+        assert element.runtime_id == (42, 7)
+
+        element.x = element.runtime_id = None
+        monitor.call_for_window.side_effect = [(mock_window, True), True, AutomationTimeoutError("超时")]
+        assert capture.test_element_location(element) is True
+        assert element.x is None and element.runtime_id is None
+
 @patch('core.element_capture.win32api')
 def test_get_element_by_coordinate(mock_win32api):
     """测试根据坐标获取元素"""
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ElementIndex类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import pytest
+from conftest import make_element
+from core.element_index import ElementIndex
+
+
+def _make_tree():
+    """创建测试元素树：窗口下有工具栏和文件列表，列表末尾有"更多"虚拟节点"""
+    root = make_element("Window", "主窗口")
+    toolbar = make_element("ToolBar", "工具栏")
+    root.add_child(toolbar)
+    toolbar.add_child(make_element("Button", "Save File"))
+    toolbar.add_child(make_element("Button", "Open"))
+    item_list = make_element("List", "文件列表")
+    root.add_child(item_list)
+    for index in range(20):
+        item_list.add_child(make_element("ListItem", f"file_{index:02d}.txt"))
+    more = make_element("More", "更多 (100)")
+    more.attributes = {'virtual': 'more'}
+    item_list.add_child(more)
+    return root
+
+
+def _names(elements):
+    return [element.name for element in elements]
+
+
+def test_substring_search():
+    """测试子串搜索不区分大小写，同时匹配类型和名称，不返回"更多"虚拟节点"""
+    index = ElementIndex(_make_tree(), chunk_size=8)
+    assert len(index) == 25
+    assert _names(index.search("FILE")) == ["Save File"] + [f"file_{i:02d}.txt" for i in range(20)]
+    assert _names(index.search("button")) == ["Save File", "Open"]
+    assert _names(index.search("更多")) == []
+    # 匹配不能跨越元素类型和名称
+    assert _names(index.search("buttonsave")) == []
+
+
+def test_prefix_search():
+    """测试前缀搜索只匹配类型或名称的开头"""
+    index = ElementIndex(_make_tree(), chunk_size=8)
+    assert _names(index.search("file_1", 'prefix')) == [f"file_{i}.txt" for i in range(10, 20)]
+    assert _names(index.search("file", 'prefix')) == [f"file_{i:02d}.txt" for i in range(20)]
+    assert _names(index.search("list", 'prefix')) == ["文件列表"] + [f"file_{i:02d}.txt" for i in range(20)]
+
+
+def test_regex_search():
+    """测试正则表达式搜索"""
+    index = ElementIndex(_make_tree())
+    assert _names(index.search(r"^file_0[0-2]\.txt$", 'regex')) == ["file_00.txt", "file_01.txt", "file_02.txt"]
+    with pytest.raises(ValueError):
+        index.search("(", 'regex')
+    with pytest.raises(ValueError):
+        index.search("x", 'fuzzy')
+
+
+def test_incremental_add():
+    """测试新加载的子元素增量加入索引"""
+    root = _make_tree()
+    index = ElementIndex(root, chunk_size=8)
+    assert _names(index.search("Close")) == []
+
+    toolbar = root.children[0]
+    toolbar.add_child(make_element("Button", "Close"))
+    assert index.add_subtree(toolbar) == 1
+    assert index.add_subtree(toolbar) == 0
+    assert _names(index.search("close")) == ["Close"]
+    assert len(index) == 26
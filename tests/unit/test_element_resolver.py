@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素身份映射和ElementResolver类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from unittest.mock import Mock
+from conftest import make_element
+from core.element_resolver import ElementIdentityMap, ElementResolver, find_child, matches
+
+
+def _make_tree():
+    """创建测试元素树：窗口 > 面板 > 保存/打开按钮"""
+    root = make_element("Window", "主窗口", runtime_id=(42, 1))
+    panel = make_element("Pane", "面板", automation_id="panel", runtime_id=(42, 2))
+    root.add_child(panel)
+    panel.add_child(make_element("Button", "保存", automation_id="save", runtime_id=(42, 3)))
+    panel.add_child(make_element("Button", "打开", runtime_id=(42, 4)))
+    return root
+
+
+def test_matches_prefers_runtime_id():
+    """测试有运行时ID时按运行时ID比较，骨架元素按类型和名称比较"""
+    node = make_element("Button", "保存", automation_id="save", runtime_id=(42, 3))
+    assert matches(node, make_element("Button", "另存为", automation_id="save", runtime_id=(42, 3)))
+    assert not matches(node, make_element("Button", "保存", automation_id="save", runtime_id=(42, 9)))
+    node.attributes['unverified'] = True
+    assert matches(node, make_element("Button", "保存", automation_id="save", runtime_id=(42, 9)))
+    assert matches(node, make_element("Button", "保存", automation_id="save"))
+
+
+def test_identity_map_lookup():
+    """测试按运行时ID和祖先链查找节点"""
+    root = _make_tree()
+    identity_map = ElementIdentityMap(root)
+    save_button = root.children[0].children[0]
+    assert len(identity_map) == 4
+
+    assert identity_map.lookup(make_element("Button", "保存", runtime_id=(42, 3))) is save_button
+    assert identity_map.lookup(make_element("Button", "保存")) is None
+    chain = [make_element("Window", "主窗口"), make_element("Pane", "面板", automation_id="panel"),
+             make_element("Button", "打开")]
+    assert identity_map.lookup_path(chain) is root.children[0].children[1]
+
+    # 新加载的子元素增量加入
+    close_button = make_element("Button", "关闭", runtime_id=(42, 5))
+    root.children[0].add_child(close_button)
+    identity_map.add_subtree(close_button)
+    assert identity_map.lookup(close_button) is close_button
+
+
+def test_load_children_follows_pages():
+    """测试目标元素在后续分页中时继续加载分页"""
+    panel = make_element("Pane", "面板", automation_id="panel")
+    target = make_element("Button", "按钮5")
+    analyzer = Mock()
+
+    def analyze(parent_pyw, node, depth):
+        for index in range(2):
+            node.add_child(make_element("Button", f"按钮{index}"))
+        more = make_element("More", "更多")
+        more.attributes = {'virtual': 'more'}
+        node.add_child(more)
+
+    def load_more(more, parent_pyw):
+        node = more.parent
+        node.children.remove(more)
+        start = len(node.children)
+        for index in range(start, start + 2):
+            node.add_child(make_element("Button", f"按钮{index}"))
+        if len(node.children) < 8:
+            node.add_child(more)
+        return node.children[start:]
+
+    analyzer._analyze_element_children.side_effect = analyze
+    analyzer.load_more_children.side_effect = load_more
+    analyzer.is_more_element.side_effect = lambda element: element.attributes.get('virtual') == 'more'
+
+    child = ElementResolver(analyzer).load_children(panel, Mock(), target)
+    assert child is find_child(panel, target)
+    assert child.name == "按钮5"
+    assert analyzer.load_more_children.call_count == 2
+
+    assert ElementResolver(analyzer).load_children(panel, Mock(), make_element("Button", "不存在")) is None
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ElementTreeModel类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QAbstractItemModelTester
+from conftest import make_element
+from ui.element_tree_model import ElementTreeModel, ELEMENT_ROLE
+
+
+def _make_tree():
+    """创建测试元素树：窗口下有工具栏和一个未加载子元素的列表"""
+    root = make_element("Window", "主窗口")
+    toolbar = make_element("ToolBar", "工具栏")
+    root.add_child(toolbar)
+    toolbar.add_child(make_element("Button", "保存"))
+    toolbar.add_child(make_element("Button", "打开"))
+    root.add_child(make_element("List", "文件列表", has_children=True))
+    return root
+
+
+def _more(start, total):
+    """创建"更多"虚拟节点"""
+    more = make_element("More", f"更多 ({total - start})")
+    more.attributes = {'virtual': 'more', 'page_start': start, 'total': total}
+    return more
+
+
+def test_model_structure():
+    """测试模型行列、父子关系和显示数据"""
+    root = _make_tree()
+    model = ElementTreeModel()
+    QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.set_root(root)
+
+    root_index = model.index(0, 0)
+    assert model.rowCount() == 1
+    assert model.rowCount(root_index) == 2
+    toolbar_index = model.index(0, 0, root_index)
+    open_index = model.index(1, 0, toolbar_index)
+    assert open_index.data() == "Button - 打开"
+    assert open_index.data(ELEMENT_ROLE) is root.children[0].children[1]
+    assert model.parent(open_index) == toolbar_index
+    assert model.index_for_element(root.children[0].children[1]) == open_index
+    assert not model.index_for_element(make_element("Button", "其他")).isValid()
+
+
+def test_fetch_more_children():
+    """测试展开未加载的节点时请求加载，加载完成后插入子元素"""
+    root = _make_tree()
+    requested = []
+    model = ElementTreeModel(requested.append)
+    QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.set_root(root)
+    list_element = root.children[1]
+    list_index = model.index_for_element(list_element)
+
+    assert model.hasChildren(list_index)
+    assert model.canFetchMore(list_index)
+    model.fetchMore(list_index)
+    assert requested == [list_element]
+    assert not model.canFetchMore(list_index)
+
+    # 工作线程中添加的子元素在加载完成前不可见
+    for index in range(3):
+        list_element.add_child(make_element("ListItem", f"file_{index}.txt"))
+    list_element.add_child(_more(3, 10))
+    assert model.rowCount(list_index) == 0
+
+    model.finish_loading(list_element)
+    assert model.rowCount(list_index) == 4
+    assert model.index(3, 0, list_index).data() == "More - 更多 (7)"
+
+    # 加载下一页时替换"更多"虚拟节点
+    assert model.begin_loading(list_element)
+    assert not model.begin_loading(list_element)
+    assert model.index(3, 0, list_index).data() == "Loading..."
+    more = list_element.children.pop()
+    for index in range(3, 5):
+        list_element.add_child(make_element("ListItem", f"file_{index}.txt"))
+    model.finish_loading(list_element)
+    assert model.rowCount(list_index) == 5
+    assert model.index(4, 0, list_index).data() == "ListItem - file_4.txt"
+    assert more not in list_element.children
+
+
+def test_empty_fetch_is_not_repeated():
+    """测试没有加载到子元素时不再重复请求加载"""
+    root = _make_tree()
+    requested = []
+    model = ElementTreeModel(requested.append)
+    model.set_root(root)
+    list_index = model.index_for_element(root.children[1])
+
+    model.fetchMore(list_index)
+    model.finish_loading(root.children[1])
+    assert not model.canFetchMore(list_index)
+    assert not model.hasChildren(list_index)
+    assert len(requested) == 1
+
+
+def test_search_hits():
+    """测试搜索命中的元素以背景色显示"""
+    root = _make_tree()
+    model = ElementTreeModel()
+    model.set_root(root)
+    open_index = model.index_for_element(root.children[0].children[1])
+    changed = []
+    model.dataChanged.connect(lambda top_left, bottom_right, roles: changed.append(top_left))
+
+    assert open_index.data(Qt.BackgroundRole) is None
+    model.add_search_hits([root.children[0].children[1]])
+    assert open_index.data(Qt.BackgroundRole) is not None
+    assert changed == [open_index]
+
+    model.clear_search_hits()
+    assert open_index.data(Qt.BackgroundRole) is None
+
+
+def test_verifying_syncs_reconciled_levels():
+    """测试骨架校验期间使用副本，按层同步时只删除和插入变化的行，顺序变化时重新插入"""
+    root = _make_tree()
+    toolbar, file_list = root.children
+    save, open_ = toolbar.children
+    model = ElementTreeModel()
+    QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.begin_verifying(root)
+    toolbar_index = model.index_for_element(toolbar)
+    removed = []
+    inserted = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    # 校正前修改子元素列表不影响模型
+    new_button = make_element("Button", "新建")
+    new_button.parent = toolbar
+    toolbar.children = [open_, new_button, save]
+    assert model.rowCount(toolbar_index) == 2
+    assert not model.canFetchMore(model.index_for_element(file_list))
+
+    model.sync_children(toolbar)
+    assert removed == [(0, 1)]
+    assert inserted == [(0, 2)]
+    assert [model.index(row, 0, toolbar_index).data() for row in range(3)] == \
+        ["Button - 打开", "Button - 新建", "Button - 保存"]
+
+    # 根元素的子元素未变化，同步时不删除或插入行
+    removed.clear()
+    inserted.clear()
+    verified = []
+    model.verified.connect(verified.append)
+    model.end_verifying()
+    assert removed == [] and inserted == []
+    assert verified == [root]
+    assert model.canFetchMore(model.index_for_element(file_list))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FrameProvider类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import pytest
+import cv2
+import numpy as np
+from unittest.mock import patch
+from PIL import Image
+from core.frame_provider import ImageGrabFrameProvider, SyntheticFrameSource
+from core.element_capture import ElementCapture
+
+
+def test_synthetic_source_zero_copy():
+    """测试合成帧来源交付内部缓冲区的视图，修改画面不影响已交付的帧"""
+    source = SyntheticFrameSource(320, 240)
+    frame = source.grab()
+    assert np.shares_memory(frame.image, source.image)
+    assert frame.frame_id == 1
+
+    roi_frame = source.grab((10, 20, 110, 70))
+    assert roi_frame.origin == (10, 20)
+    assert (roi_frame.width, roi_frame.height) == (100, 50)
+    assert roi_frame.frame_id == 2
+
+    before = frame.image.copy()
+    source.paint((0, 0, 50, 50), (0, 0, 255))
+    assert np.array_equal(frame.image, before)
+
+
+def test_changed_since_uses_tiles():
+    """测试区域变化检测"""
+    source = SyntheticFrameSource(640, 480, tile_size=64)
+    first = source.grab()
+
+    source.paint((300, 300, 340, 340), (1, 2, 3))
+    second = source.grab()
+
+    assert source.changed_since(first.frame_id, (0, 0, 200, 200)) is False
+    assert source.changed_since(first.frame_id, (290, 290, 400, 400)) is True
+    assert source.changed_since(first.frame_id) is True
+    assert source.changed_tiles(first.frame_id) == [(256, 256, 320, 320), (320, 256, 384, 320),
+                                                    (256, 320, 320, 384), (320, 320, 384, 384)]
+    # 与区域截图比较时退化为像素比较
+    roi_frame = source.grab((0, 0, 200, 200))
+    assert source.changed_since(first.frame_id, (0, 0, 200, 200), frame=roi_frame) is False
+    # 基准帧已淘汰时按已变化处理
+    assert source.changed_since(999, (0, 0, 10, 10)) is True
+
+
+def test_image_to_array_single_copy():
+    """测试PIL图像转换为BGR数组"""
+    rgb = np.zeros((4, 6, 3), dtype=np.uint8)
+    rgb[..., 0] = 255  # 红色
+    array = ImageGrabFrameProvider.image_to_array(Image.fromarray(rgb))
+
+    assert array.shape == (4, 6, 3)
+    assert (array[0, 0] == [0, 0, 255]).all()
+
+
+def test_capture_element_by_image_skips_unchanged_region(tmp_path):
+    """测试搜索区域未变化时复用上次的识别结果"""
+    rng = np.random.default_rng(0)
+    icon = rng.integers(0, 255, (40, 40, 3), dtype=np.uint8)
+    image_path = str(tmp_path / 'icon.png')
+    cv2.imwrite(image_path, icon)
+
+    capture = ElementCapture()
+    source = SyntheticFrameSource(640, 480)
+    capture.frame_provider = source
+    template = capture._build_template(image_path)[0]
+    source.paint((100, 100, 100 + template.shape[1], 100 + template.shape[0]), patch=template)
+
+    with patch.object(capture, '_load_template', return_value=capture._build_template(image_path)):
+        element = capture.capture_element_by_image(image_path, roi=(0, 0, 320, 240))
+        assert (element.x, element.y) == (100, 100)
+
+        # 区域外的变化不会触发重新匹配
+        capture.roi_frame_cache.clear()
+        source.paint((400, 400, 450, 450), (0, 0, 0))
+        with patch.object(capture, '_match_image') as mock_match:
+            assert capture.capture_element_by_image(image_path, roi=(0, 0, 320, 240)) is element
+            mock_match.assert_not_called()
+
+        # 区域内变化后重新匹配
+        capture.roi_frame_cache.clear()
+        source.paint((0, 0, 20, 20), (0, 0, 0))
+        with patch.object(capture, '_match_image', return_value=None) as mock_match:
+            assert capture.capture_element_by_image(image_path, roi=(0, 0, 320, 240)) is None
+            mock_match.assert_called_once()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HighlightOverlay类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from core.element import Element
+from ui.highlight_overlay import HighlightOverlay, element_rect
+
+
+@pytest.fixture(scope='module')
+def app():
+    """创建Qt应用对象"""
+    return QApplication.instance() or QApplication([])
+
+
+def _make_element(x, y, width, height):
+    """创建带位置的元素对象"""
+    element = Element()
+    element.x, element.y, element.width, element.height = x, y, width, height
+    return element
+
+
+def test_set_rect_moves_only_when_changed(app):
+    """测试矩形未变化时覆盖层不移动"""
+    overlay = HighlightOverlay(border_width=3)
+    assert overlay.set_rect((10, 20, 100, 50))
+    assert overlay.isVisible()
+    assert overlay.geometry().getRect() == (7, 17, 106, 56)
+    assert not overlay.set_rect((10, 20, 100, 50))
+    assert overlay.set_rect((10, 20, 0, 50))
+    assert not overlay.isVisible()
+    overlay.close()
+
+
+def test_flash_is_timer_driven(app):
+    """测试闪烁立即返回，由定时器切换显示并最终隐藏"""
+    overlay = HighlightOverlay()
+    overlay.flash(_make_element(10, 20, 100, 50), count=2)
+    assert overlay.isVisible()
+
+    visible = []
+    for _ in range(4):
+        overlay._on_flash_tick()
+        visible.append(overlay.isVisible())
+    assert visible == [False, True, False, False]
+    assert not overlay._flash_timer.isActive()
+
+    overlay.flash(_make_element(None, None, 0, 0))
+    assert not overlay._flash_timer.isActive()
+    overlay.close()
+
+
+def test_track_follows_rect_source(app):
+    """测试跟踪时按矩形来源移动，停止后隐藏"""
+    overlay = HighlightOverlay()
+    current = [None]
+    overlay.track(lambda: element_rect(current[0]))
+    assert overlay._track_timer.isActive()
+    assert not overlay.isVisible()
+
+    current[0] = _make_element(10, 20, 100, 50)
+    overlay._on_track_tick()
+    geometry = overlay.geometry().getRect()
+    current[0] = _make_element(10, 20, 100, 50)
+    overlay._on_track_tick()
+    assert overlay.geometry().getRect() == geometry
+
+    current[0] = _make_element(30, 40, 10, 10)
+    overlay._on_track_tick()
+    assert overlay.geometry().getRect() != geometry
+
+    overlay.stop_tracking()
+    assert not overlay._track_timer.isActive()
+    assert not overlay.isVisible()
+    overlay.close()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HistoryStore类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import json
+
+import pytest
+from core.history_store import HistoryStore
+
+
+def _record(index, application="记事本", element_type="Button", method="attribute", result=True):
+    """创建历史记录"""
+    return {
+        'timestamp': f"2024-01-01T00:00:{index:02d}",
+        'application': application,
+        'element_type': element_type,
+        'element_name': f"按钮{index}",
+        'automation_id': f"btn_{index}",
+        'class_name': "Button",
+        'method': method,
+        'code': f"app.window().child_window(auto_id='btn_{index}').click()",
+        'result': result,
+        'coordinates': {'x': index, 'y': 0, 'width': 10, 'height': 10}
+    }
+
+
+def test_add_get_delete(tmp_path):
+    """测试记录ID自增且删除后不复用，WAL模式持久化"""
+    db_path = str(tmp_path / 'history.db')
+    store = HistoryStore(db_path)
+    first = store.add(_record(1))
+    second = store.add(_record(2))
+    assert store.delete(second)
+    third = store.add(_record(3))
+    assert third > second > first
+    assert len(store) == 2
+
+    record = store.get(first)
+    assert record['element_name'] == "按钮1"
+    assert record['result'] is True
+    assert record['coordinates'] == {'x': 1, 'y': 0, 'width': 10, 'height': 10}
+    assert store.get(second) is None
+    store.close()
+
+    reopened = HistoryStore(db_path)
+    assert len(reopened) == 2
+    assert reopened._conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    reopened.close()
+
+
+def test_query_pages_with_cursor():
+    """测试按时间倒序分页和按列过滤"""
+    store = HistoryStore(':memory:')
+    store.add_many([_record(i, method='image' if i % 2 else 'attribute') for i in range(10)])
+
+    records, cursor = store.query(limit=4)
+    assert [r['element_name'] for r in records] == ["按钮9", "按钮8", "按钮7", "按钮6"]
+    records, cursor = store.query(limit=4, cursor=cursor)
+    assert [r['element_name'] for r in records] == ["按钮5", "按钮4", "按钮3", "按钮2"]
+    records, cursor = store.query(limit=4, cursor=cursor)
+    assert len(records) == 2 and cursor is None
+
+    records, _ = store.query(method='image', since="2024-01-01T00:00:05")
+    assert [r['element_name'] for r in records] == ["按钮9", "按钮7", "按钮5"]
+    assert len(list(store.iter_records(batch_size=3))) == 10
+    with pytest.raises(ValueError):
+        store.query(code="x")
+
+
+def test_keyword_search():
+    """测试关键词在名称和代码中按子串匹配，短关键词同样可以匹配"""
+    store = HistoryStore(':memory:')
+    store.add(_record(1, application="记事本"))
+    store.add(_record(2, application="计算器"))
+    store.add(_record(3, application="Calculator"))
+
+    assert [r['element_name'] for r in store.query(keyword="btn_2")[0]] == ["按钮2"]
+    assert [r['element_name'] for r in store.query(keyword="计算")[0]] == ["按钮2"]
+    assert [r['element_name'] for r in store.query(keyword="calcul")[0]] == ["按钮3"]
+    assert len(store.query(keyword="click()")[0]) == 3
+    assert store.query(keyword="%")[0] == []
+
+    store.delete(2)
+    assert store.query(keyword="btn_2")[0] == []
+
+
+def test_retention():
+    """测试超出保留数量时删除最旧的记录"""
+    store = HistoryStore(':memory:', retention=5)
+    store.add_many([_record(i) for i in range(8)])
+    assert len(store) == 5
+    records, _ = store.query()
+    assert records[-1]['element_name'] == "按钮3"
+    assert store.query(keyword="btn_1")[0] == []
+
+
+def test_import_json_once(tmp_path):
+    """测试导入旧版history.json，最新的记录ID最大，同一数据库只导入一次"""
+    json_path = tmp_path / 'history.json'
+    legacy = [dict(_record(2), id=2), dict(_record(1), id=1)]
+    json_path.write_text(json.dumps(legacy, ensure_ascii=False), encoding='utf-8')
+
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    assert store.import_json(str(json_path)) == 2
+    assert store.import_json(str(json_path)) == 0
+    records, _ = store.query()
+    assert [r['element_name'] for r in records] == ["按钮2", "按钮1"]
+    assert store.import_json(str(tmp_path / 'missing.json')) == 0
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HybridLocator类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from core.element import Element
+from core.automation_executor import AutomationExecutor
+from core.hybrid_locator import HybridLocator
+
+
+@pytest.fixture
+def executor():
+    """测试用自动化执行器"""
+    executor = AutomationExecutor(num_workers=2, name='test-automation')
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def make_locator(attribute_delay, attribute_result, image_delay, image_result, executor=None):
+    """创建使用模拟元素捕获的混合定位器"""
+    element_capture = Mock()
+
+    def test_element_location(element, cancel_event=None):
+        deadline = time.perf_counter() + attribute_delay
+        while time.perf_counter() < deadline:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            time.sleep(0.005)
+        return attribute_result
+
+    def capture_element_by_image(image_path, confidence, cancel_event=None):
+        element_capture.image_threads.append(threading.current_thread().name)
+        deadline = time.perf_counter() + image_delay
+        while time.perf_counter() < deadline:
+            if cancel_event is not None and cancel_event.is_set():
+                element_capture.image_cancelled = True
+                return None
+            time.sleep(0.005)
+        if not image_result:
+            return None
+        element = Element()
+        element.element_type = "ImageMatched"
+        return element
+
+    element_capture.image_threads = []
+    element_capture.image_cancelled = False
+    element_capture.test_element_location.side_effect = test_element_location
+    element_capture.capture_element_by_image.side_effect = capture_element_by_image
+    return HybridLocator(element_capture, Mock(), concurrent=True, executor=executor)
+
+
+ELEMENT_INFO = {'name': '确定', 'class_name': 'Button', 'image_path': 'ok.png', 'x': 10, 'y': 20}
+
+
+def test_concurrent_prefers_attribute_success(executor):
+    """测试并发模式下属性定位成功时优先返回属性定位结果"""
+    locator = make_locator(0.1, True, 0.01, True, executor)
+    element = locator.locate_element(ELEMENT_INFO, window_handle=1234)
+
+    assert element.element_type != "ImageMatched"
+    assert element.name == '确定'
+    assert locator.last_strategy == '_attribute_locator'
+    assert locator.last_timings['_attribute_locator'] >= 100
+
+
+def test_concurrent_time_is_slowest_strategy(executor):
+    """测试属性定位失败时耗时约为最慢的单个策略，而不是各策略耗时之和"""
+    locator = make_locator(0.2, False, 0.2, True, executor)
+    start = time.perf_counter()
+    element = locator.locate_element(ELEMENT_INFO, window_handle=1234)
+    elapsed = time.perf_counter() - start
+
+    assert element.element_type == "ImageMatched"
+    assert locator.last_strategy == '_image_locator'
+    assert elapsed < 0.35
+    assert set(locator.last_timings) == {'_attribute_locator', '_image_locator'}
+
+
+def test_concurrent_cancels_slower_strategy(executor):
+    """测试属性定位成功后不再等待仍在运行的图像定位"""
+    locator = make_locator(0.01, True, 0.3, True, executor)
+    start = time.perf_counter()
+    locator.locate_element(ELEMENT_INFO, window_handle=1234)
+
+    assert time.perf_counter() - start < 0.25
+    # 被取消的策略不记录耗时
+    assert locator.last_timings['_image_locator'] is None
+
+
+def test_concurrent_image_runs_off_automation_workers(executor):
+    """测试并发模式下图像定位在图像匹配线程池中运行，其他策略成功后放弃匹配"""
+    locator = make_locator(0.05, True, 2.0, True, executor)
+    locator.locate_element(ELEMENT_INFO, window_handle=1234)
+
+    element_capture = locator.element_capture
+    assert element_capture.image_threads and element_capture.image_threads[0].startswith('image-match')
+    deadline = time.perf_counter() + 1
+    while not element_capture.image_cancelled and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert element_capture.image_cancelled
+    assert executor.get_metrics()['submitted'] == 0
+
+
+def test_sequential_falls_back_to_coordinate():
+    """测试顺序模式下所有策略失败时回退到坐标定位并记录耗时"""
+    locator = make_locator(0.0, False, 0.0, False)
+    element = locator.locate_element(ELEMENT_INFO, window_handle=1234, concurrent=False)
+
+    assert (element.x, element.y) == (10, 20)
+    assert locator.last_strategy == '_coordinate_locator'
+    assert list(locator.last_timings) == ['_attribute_locator', '_image_locator', '_coordinate_locator']
+
+
+def test_concurrent_does_not_wait_on_own_executor():
+    """测试在执行器唯一的工作线程中并发定位时，尚未开始的策略在当前线程执行而不是死锁"""
+    executor = AutomationExecutor(num_workers=1, name='test-automation')
+    locator = make_locator(0.0, False, 0.0, True, executor)
+    try:
+        element = executor.call(locator.locate_element, ELEMENT_INFO, 1234, timeout=2)
+    finally:
+        executor.shutdown(wait=False)
+
+    assert element.element_type == "ImageMatched"
+    assert locator.last_strategy == '_image_locator'
+
+
+def test_test_location_records_stats():
+    """测试测试定位只使用属性定位，并把结果计入定位统计"""
+    stats = Mock()
+    locator = make_locator(0.0, True, 0.0, True)
+    locator.stats = stats
+    element = Element()
+    element.name, element.class_name, element.control_type = '确定', 'Button', 'Button'
+    element.window_handle = 1234
+    element.process_id = 42
+
+    found = locator.test_location(element)
+    assert found is not None and found.element_type != "ImageMatched"
+    assert locator.last_strategy == '_attribute_locator'
+    app, control_type, strategy, success, _ = stats.record.call_args[0]
+    assert (control_type, strategy, success) == ('Button', 'attribute', True)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LocateCache类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import pytest
+from unittest.mock import Mock, patch
+from core.app_health import AppUnresponsiveError
+from core.element import Element
+from core.hybrid_locator import HybridLocator
+from core.locate_cache import LocateCache
+
+
+ELEMENT_INFO = {'name': '确定', 'class_name': 'Button', 'process_name': 'app.exe'}
+
+
+def make_control(runtime_id, rect=(100, 200, 180, 230)):
+    """创建模拟的uiautomation控件"""
+    control = Mock()
+    control.GetRuntimeId.return_value = list(runtime_id)
+    control.BoundingRectangle = Mock(left=rect[0], top=rect[1], right=rect[2], bottom=rect[3])
+    return control
+
+
+@pytest.fixture(autouse=True)
+def monitor():
+    """模拟目标应用健康监控，校验调用直接在当前线程执行"""
+    mock_monitor = Mock()
+    mock_monitor.call_for_window.side_effect = lambda window_handle, func, *args, timeout=None, **kwargs: \
+        func(*args, **kwargs)
+    with patch('core.locate_cache.get_app_health_monitor', return_value=mock_monitor):
+        yield mock_monitor
+
+
+def make_located_element():
+    """创建带位置和运行时ID的定位结果"""
+    element = Element()
+    element.name = '确定'
+    element.x, element.y, element.width, element.height = 100, 200, 80, 30
+    element.runtime_id = (42, 7)
+    return element
+
+
+def test_lookup_validates_runtime_id(monitor):
+    """测试命中时通过中心点控件的运行时ID校验"""
+    cache = LocateCache(Mock())
+    element = make_located_element()
+    cache.store(ELEMENT_INFO, 1234, element, search_ms=500)
+
+    mock_auto = Mock()
+    mock_auto.ControlFromPoint.return_value = make_control((42, 7), rect=(110, 200, 190, 230))
+    with patch('core.locate_cache.auto', mock_auto):
+        assert cache.lookup(ELEMENT_INFO, 1234) is element
+
+    mock_auto.ControlFromPoint.assert_called_once_with(140, 215)
+    assert monitor.call_for_window.call_args[0][0] == 1234
+    assert monitor.call_for_window.call_args[1]['timeout'] == cache.call_timeout
+    # 位置随控件更新
+    assert element.x == 110
+    metrics = cache.get_metrics()
+    assert metrics['hits'] == 1
+    assert metrics['hit_rate'] == 1.0
+    assert 0 < metrics['saved_ms'] <= 500
+
+
+def test_lookup_checks_parent_controls():
+    """测试中心点落在子控件上时向上查找父控件"""
+    cache = LocateCache(Mock())
+    cache.store(ELEMENT_INFO, 1234, make_located_element(), search_ms=100)
+
+    child = make_control((99,))
+    child.GetParentControl.return_value = make_control((42, 7))
+    mock_auto = Mock()
+    mock_auto.ControlFromPoint.return_value = child
+    with patch('core.locate_cache.auto', mock_auto):
+        assert cache.lookup(ELEMENT_INFO, 1234) is not None
+
+
+def test_lookup_invalidates_on_mismatch():
+    """测试校验失败时清除缓存项并计入未命中"""
+    cache = LocateCache(Mock())
+    cache.store(ELEMENT_INFO, 1234, make_located_element(), search_ms=100)
+
+    control = make_control((1, 2))
+    control.GetParentControl.return_value = None
+    mock_auto = Mock()
+    mock_auto.ControlFromPoint.return_value = control
+    with patch('core.locate_cache.auto', mock_auto):
+        assert cache.lookup(ELEMENT_INFO, 1234) is None
+        assert cache.lookup(ELEMENT_INFO, 1234) is None
+
+    metrics = cache.get_metrics()
+    assert metrics['invalidations'] == 1
+    assert metrics['misses'] == 2
+    assert metrics['entries'] == 0
+
+
+def test_unresponsive_app_is_a_miss(monitor):
+    """测试目标应用无响应时按未命中处理，不访问控件且保留缓存项"""
+    cache = LocateCache(Mock())
+    cache.store(ELEMENT_INFO, 1234, make_located_element(), search_ms=100)
+
+    monitor.call_for_window.side_effect = AppUnresponsiveError(4321)
+    mock_auto = Mock()
+    with patch('core.locate_cache.auto', mock_auto):
+        assert cache.lookup(ELEMENT_INFO, 1234) is None
+    mock_auto.ControlFromPoint.assert_not_called()
+    metrics = cache.get_metrics()
+    assert metrics['misses'] == 1 and metrics['invalidations'] == 0 and metrics['entries'] == 1
+
+
+def test_lookup_without_comparable_fields_misses():
+    """测试没有运行时ID且没有可比较的属性时不把任意控件当作命中"""
+    cache = LocateCache(Mock())
+    element = make_located_element()
+    element.name, element.runtime_id = None, None
+    cache.store(ELEMENT_INFO, 1234, element, search_ms=100)
+
+    control = make_control((1, 2))
+    control.GetParentControl.return_value = None
+    mock_auto = Mock()
+    mock_auto.ControlFromPoint.return_value = control
+    with patch('core.locate_cache.auto', mock_auto):
+        assert cache.lookup(ELEMENT_INFO, 1234) is None
+    assert cache.get_metrics()['hits'] == 0
+
+
+def test_image_entries_rematch_near_last_position():
+    """测试图像定位结果只在原位置附近重新匹配"""
+    element_capture = Mock()
+    cache = LocateCache(element_capture, image_padding=5)
+    element = make_located_element()
+    element.element_type = "ImageMatched"
+    info = {'image_path': 'ok.png', 'confidence': 0.9}
+    cache.store(info, None, element, search_ms=300)
+
+    element_capture.capture_element_by_image.return_value = element
+    assert cache.lookup(info, None) is element
+    element_capture.capture_element_by_image.assert_called_once_with('ok.png', 0.9, roi=(95, 195, 185, 235))
+
+
+def test_hybrid_locator_uses_cache():
+    """测试混合定位器缓存完整搜索的结果，重复定位时跳过搜索"""
+    element_capture = Mock()
+
+    def test_element_location(element, cancel_event=None):
+        element.x, element.y, element.width, element.height = 100, 200, 80, 30
+        element.runtime_id = (42, 7)
+        return True
+
+    element_capture.test_element_location.side_effect = test_element_location
+    locator = HybridLocator(element_capture, Mock(), locate_cache=LocateCache(element_capture))
+
+    first = locator.locate_element(ELEMENT_INFO, window_handle=1234)
+    assert locator.last_strategy == '_attribute_locator'
+
+    mock_auto = Mock()
+    mock_auto.ControlFromPoint.return_value = make_control((42, 7))
+    with patch('core.locate_cache.auto', mock_auto):
+        assert locator.locate_element(ELEMENT_INFO, window_handle=1234) is first
+    assert locator.last_strategy == 'cache'
+    assert element_capture.test_element_location.call_count == 1
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LocatorStats类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import pytest
+from unittest.mock import Mock
+from core.element import Element
+from core.hybrid_locator import HybridLocator
+from core.locator_stats import LocatorStats
+
+
+@pytest.fixture
+def stats(tmp_path):
+    """使用临时文件的定位统计"""
+    return LocatorStats(stats_file=str(tmp_path / 'locator_stats.json'), min_samples=3)
+
+
+def test_cold_app_keeps_default_order(stats):
+    """测试样本不足时保持默认顺序"""
+    stats.record('app.exe', 'Button', 'attribute', False, 500)
+    assert stats.order_strategies('app.exe', 'Button', ['attribute', 'image']) == ['attribute', 'image']
+    assert stats.expected_cost('app.exe', 'Button', 'attribute') is None
+
+
+def test_order_by_expected_cost(stats):
+    """测试按成功率和耗时中位数排序"""
+    for _ in range(5):
+        stats.record('app.exe', 'Button', 'attribute', False, 800)
+        stats.record('app.exe', 'Button', 'image', True, 50)
+
+    assert stats.order_strategies('app.exe', 'Button', ['attribute', 'image']) == ['image', 'attribute']
+    # 其他控件类型不受影响
+    assert stats.order_strategies('app.exe', 'Edit', ['attribute', 'image']) == ['attribute', 'image']
+
+    summary = stats.get_stats('app.exe')['app.exe']['Button']['image']
+    assert summary['attempts'] == 5
+    assert summary['success_rate'] == 1.0
+    assert summary['median_latency'] == 50
+
+
+def test_stats_persisted(stats, tmp_path):
+    """测试统计数据保存后可重新加载"""
+    stats.record('app.exe', 'Button', 'image', True, 12.5)
+    stats.save()
+
+    reloaded = LocatorStats(stats_file=stats.stats_file)
+    assert reloaded.get_stats()['app.exe']['Button']['image']['successes'] == 1
+
+
+def test_hybrid_locator_records_and_reorders(stats):
+    """测试混合定位器记录定位结果并按统计调整策略顺序"""
+    element_capture = Mock()
+    element_capture.test_element_location.return_value = False
+    image_element = Element()
+    element_capture.capture_element_by_image.return_value = image_element
+    locator = HybridLocator(element_capture, Mock(), stats=stats)
+
+    element_info = {'name': '确定', 'control_type': 'Button', 'image_path': 'ok.png', 'process_name': 'app.exe'}
+    for _ in range(3):
+        assert locator.locate_element(element_info, window_handle=1234) is image_element
+    assert element_capture.test_element_location.call_count == 3
+
+    # 属性定位总是失败，统计充足后先尝试图像定位
+    assert locator.locate_element(element_info, window_handle=1234) is image_element
+    assert element_capture.test_element_location.call_count == 3
+    assert locator.last_strategy == '_image_locator'
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ScreenFrame类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+from core.screen_frame import ScreenFrame
+from core.element_capture import ElementCapture
+from core.element import Element
+
+
+def test_screen_frame_creation():
+    """测试屏幕帧创建"""
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    frame = ScreenFrame(image, timestamp=10.0, origin=(5, 6))
+
+    assert frame.width == 200
+    assert frame.height == 100
+    assert frame.timestamp == 10.0
+    assert frame.to_screen(1, 2) == (6, 8)
+
+
+def test_screen_frame_expired():
+    """测试屏幕帧过期判断"""
+    frame = ScreenFrame(np.zeros((10, 10, 3), dtype=np.uint8), timestamp=10.0)
+
+    assert frame.is_expired(0.5, now=10.6) is True
+    assert frame.is_expired(0.5, now=10.2) is False
+
+
+def test_screen_frame_features_computed_once():
+    """测试同一检测器只提取一次特征"""
+    frame = ScreenFrame(np.zeros((10, 10, 3), dtype=np.uint8))
+    detector = Mock()
+    detector.detectAndCompute.return_value = (['kp'], 'des')
+
+    assert frame.get_features(detector) == (['kp'], 'des')
+    assert frame.get_features(detector) == (['kp'], 'des')
+    assert detector.detectAndCompute.call_count == 1
+
+    # 更换检测器后重新提取
+    other_detector = Mock()
+    other_detector.detectAndCompute.return_value = ([], None)
+    assert frame.get_features(other_detector) == ([], None)
+    assert other_detector.detectAndCompute.call_count == 1
+
+
+def test_capture_elements_by_image_shares_frame():
+    """测试批量图像识别共享同一帧"""
+    capture = ElementCapture()
+    frame = ScreenFrame(np.zeros((10, 10, 3), dtype=np.uint8))
+
+    with patch.object(capture, 'capture_frame', return_value=frame) as mock_capture_frame:
+        with patch.object(capture, 'capture_element_by_image', return_value=None) as mock_capture:
+            results = capture.capture_elements_by_image(['a.png', 'b.png', 'c.png'])
+
+            assert list(results.keys()) == ['a.png', 'b.png', 'c.png']
+            assert mock_capture_frame.call_count == 1
+            for call in mock_capture.call_args_list:
+                assert call.kwargs['frame'] is frame
+
+
+def test_screen_frame_crop():
+    """测试按屏幕坐标裁剪子帧"""
+    image = np.arange(100 * 200 * 3, dtype=np.uint8).reshape((100, 200, 3))
+    frame = ScreenFrame(image, origin=(1000, 500))
+
+    sub_frame = frame.crop((1010, 520, 1050, 560))
+    assert sub_frame.width == 40
+    assert sub_frame.height == 40
+    assert sub_frame.origin == (1010, 520)
+    assert sub_frame.to_screen(0, 0) == (1010, 520)
+    # 子帧与原帧共享像素内存
+    assert np.shares_memory(sub_frame.image, frame.image)
+
+    # 超出帧范围的部分被裁掉
+    clipped = frame.crop((1190, 590, 1300, 700))
+    assert (clipped.width, clipped.height) == (10, 10)
+
+    # 无交集返回None
+    assert frame.crop((0, 0, 10, 10)) is None
+
+
+def test_resolve_roi():
+    """测试搜索区域参数解析"""
+    capture = ElementCapture()
+
+    parent = Element()
+    parent.x, parent.y, parent.width, parent.height = 10, 20, 30, 40
+    assert capture._resolve_roi(parent) == (10, 20, 40, 60)
+    assert capture._resolve_roi([1, 2, 3, 4]) == (1, 2, 3, 4)
+    assert capture._resolve_roi(None) is None
+
+    with patch('core.element_capture.win32gui') as mock_win32gui:
+        mock_win32gui.GetWindowRect.return_value = (0, 0, 800, 600)
+        assert capture._resolve_roi(1234) == (0, 0, 800, 600)
+
+
+def test_capture_frame_roi_crops_cached_frame():
+    """测试全屏缓存包含搜索区域时直接裁剪"""
+    capture = ElementCapture()
+    capture.screenshot_cache = ScreenFrame(np.zeros((600, 800, 3), dtype=np.uint8))
+
+    frame = capture.capture_frame(roi=(100, 100, 300, 200))
+    assert frame.origin == (100, 100)
+    assert (frame.width, frame.height) == (200, 100)
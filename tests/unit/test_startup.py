@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动时间线、延迟导入和首次绘制时间的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import importlib.abc
+import importlib.machinery
+import time
+import types
+from functools import partial
+from unittest.mock import MagicMock
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QApplication
+
+from utils.lazy_import import lazy_import, preload_modules
+from utils.startup_timeline import StartupTimeline, get_startup_timeline, FIRST_PAINT
+
+# 首次绘制时间预算，单位：秒，自动化依赖和Flask均已替换为桩模块
+FIRST_PAINT_BUDGET = 1.5
+
+# 启动时不应导入的重量级模块
+HEAVY_MODULES = ('pywinauto', 'uiautomation', 'win32gui', 'win32api', 'win32con', 'win32process',
+                 'pygetwindow', 'comtypes', 'pythoncom', 'flask', 'cv2')
+
+# 测试首次绘制时重新导入的本项目顶层包
+APP_PACKAGES = ('main', 'core', 'ui', 'utils')
+
+
+class _StubModule(types.ModuleType):
+    """桩模块，访问任意属性返回MagicMock"""
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        value = MagicMock(name=f"{self.__name__}.{name}")
+        setattr(self, name, value)
+        return value
+
+
+class _ImportRecorder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """记录重量级模块的导入，并以桩模块代替实际模块"""
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.before_first_paint = []  # 首次绘制前导入的重量级模块
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.split('.')[0] not in HEAVY_MODULES:
+            return None
+        if self.timeline.get_mark(FIRST_PAINT) is None:
+            self.before_first_paint.append(fullname)
+        return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+
+    def create_module(self, spec):
+        return _StubModule(spec.name)
+
+    def exec_module(self, module):
+        pass
+
+
+def test_timeline_report():
+    """测试时间线按开始时间排列阶段、模块导入和关键时间点"""
+    clock = iter([0.0, 0.1, 0.4, 0.5]).__next__
+    timeline = StartupTimeline(clock=clock)
+    with timeline.phase('创建主窗口'):
+        pass
+    timeline.record_import('pywinauto', 0.2, 0.05)
+    assert timeline.mark(FIRST_PAINT) == 0.5
+    assert timeline.phases[0][:3] == ('创建主窗口', 0.1, pytest.approx(0.3))
+    assert timeline.imported_before(FIRST_PAINT) == ['pywinauto']
+
+    lines = timeline.report().splitlines()
+    assert lines[0] == "启动时间线:"
+    assert '创建主窗口' in lines[1] and '300.0ms' in lines[1]
+    assert '导入 pywinauto' in lines[2]
+    assert FIRST_PAINT in lines[3]
+
+
+def test_lazy_import(tmp_path, monkeypatch):
+    """测试延迟模块第一次访问属性时才导入，并记录到启动时间线"""
+    (tmp_path / 'lazy_probe_module.py').write_text("VALUE = 42\n", encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'lazy_probe_module', raising=False)
+
+    module = lazy_import('lazy_probe_module')
+    assert module is lazy_import('lazy_probe_module')
+    assert 'lazy_probe_module' not in sys.modules
+    assert module.VALUE == 42
+    assert 'lazy_probe_module' in sys.modules
+    assert 'lazy_probe_module' in get_startup_timeline().imported_before('不存在的时间点')
+
+    errors = preload_modules(['lazy_probe_module', 'lazy_missing_module'])
+    assert list(errors) == ['lazy_missing_module']
+
+
+def _isolate_main_window(monkeypatch, tmp_path):
+    """主窗口的历史记录、收藏夹和定位统计写入临时目录，执行器和健康监控使用新实例，关闭窗口时不影响其他测试"""
+    from core import app_health, automation_executor, favorites_manager, history_manager, locator_stats
+
+    factories = {
+        'HistoryManager': partial(history_manager.HistoryManager, history_file=str(tmp_path / 'history.json'),
+                                  db_file=str(tmp_path / 'history.db')),
+        'FavoritesManager': partial(favorites_manager.FavoritesManager, str(tmp_path / 'favorites.json')),
+        'LocatorStats': partial(locator_stats.LocatorStats, str(tmp_path / 'locator_stats.json')),
+    }
+    for module in (history_manager, favorites_manager, locator_stats, sys.modules.get('ui.main_window')):
+        for name, factory in factories.items():
+            if module is not None and hasattr(module, name):
+                monkeypatch.setattr(module, name, factory)
+    monkeypatch.setattr(automation_executor, '_automation_executor', None)
+    monkeypatch.setattr(app_health, '_app_health_monitor', None)
+
+
+def test_time_to_first_paint_within_budget(monkeypatch, tmp_path):
+    """测试首次绘制前不导入重量级模块，从创建应用到首次绘制不超过预算，且后台服务在首次绘制后才启动
+
+    本项目的模块重新导入，重量级模块的导入由导入记录器记录并替换为桩模块，
+    已被其他测试导入的模块不会掩盖启动时的导入。
+    """
+    if QCoreApplication.instance() is not None and not isinstance(QCoreApplication.instance(), QApplication):
+        pytest.skip("已存在非GUI的Qt应用对象")
+    for name in list(sys.modules):
+        if name.split('.')[0] in HEAVY_MODULES + APP_PACKAGES:
+            monkeypatch.delitem(sys.modules, name)
+    timeline = StartupTimeline()
+    recorder = _ImportRecorder(timeline)
+    monkeypatch.setattr(sys, 'meta_path', [recorder] + sys.meta_path)
+    _isolate_main_window(monkeypatch, tmp_path)
+
+    import main
+
+    app, window = main.launch([], timeline)
+    # 不真正启动插件、API服务和预热，只记录启动时间
+    started = []
+    monkeypatch.setattr(window, 'start_background_services', lambda: started.append(timeline.now()))
+    deadline = time.perf_counter() + 10
+    while not started and time.perf_counter() < deadline:
+        app.processEvents()
+    try:
+        first_paint = timeline.get_mark(FIRST_PAINT)
+        assert first_paint is not None
+        assert first_paint < FIRST_PAINT_BUDGET, timeline.report()
+        assert recorder.before_first_paint == []
+        assert started and started[0] >= first_paint
+        assert window.api_service is None
+    finally:
+        # 关闭窗口写入并关闭历史记录和收藏夹，停止本测试创建的工作线程
+        window.close()
+        window.deleteLater()
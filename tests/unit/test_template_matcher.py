@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TemplateMatcher类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import threading
+import pytest
+import cv2
+import numpy as np
+from core.screen_frame import ScreenFrame
+from core.template_matcher import TemplateMatcher, PreparedTemplate
+
+
+def make_screen(width=640, height=480, seed=0):
+    """生成带随机矩形的合成截图"""
+    rng = np.random.default_rng(seed)
+    screen = np.full((height, width, 3), 230, dtype=np.uint8)
+    for _ in range(60):
+        x, y = int(rng.integers(0, width - 60)), int(rng.integers(0, height - 30))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(screen, (x, y), (x + int(rng.integers(10, 60)), y + int(rng.integers(5, 30))), color, -1)
+    return screen
+
+
+def make_icon(size=32):
+    """生成图标模板"""
+    icon = np.full((size, size, 3), 255, dtype=np.uint8)
+    cv2.circle(icon, (size // 2, size // 2), size // 3, (0, 0, 200), -1)
+    cv2.line(icon, (3, 3), (size - 4, size - 4), (20, 20, 20), 2)
+    return icon
+
+
+def test_prepare_builds_pyramids():
+    """测试模板预处理生成各缩放比例的金字塔"""
+    matcher = TemplateMatcher(scales=(1.0, 1.5))
+    icon_gray = cv2.cvtColor(make_icon(48), cv2.COLOR_BGR2GRAY)
+
+    prepared = matcher.prepare(icon_gray)
+
+    assert isinstance(prepared, PreparedTemplate)
+    assert [scale for scale, _ in prepared.levels] == [1.0, 1.5]
+    assert prepared.levels[1][1][0].shape == (72, 72)
+    # 金字塔每层尺寸减半
+    pyramid = prepared.levels[0][1]
+    assert len(pyramid) >= 2
+    assert pyramid[1].shape == (24, 24)
+    assert prepared.nbytes > 0
+
+
+def test_match_exact_position():
+    """测试在原始尺寸下定位模板"""
+    screen = make_screen()
+    icon = make_icon()
+    screen[200:232, 300:332] = icon
+
+    matcher = TemplateMatcher()
+    result = matcher.match(ScreenFrame(screen), cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY), threshold=0.8)
+
+    assert result is not None
+    assert (result.x, result.y) == (300, 200)
+    assert (result.width, result.height) == (32, 32)
+    assert result.scale == 1.0
+    assert result.confidence > 0.99
+
+
+@pytest.mark.parametrize("scale", [1.25, 1.5])
+def test_match_dpi_scaled(scale):
+    """测试模板在DPI缩放后的屏幕上仍能定位"""
+    screen = make_screen()
+    icon = make_icon()
+    scaled = cv2.resize(icon, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    h, w = scaled.shape[:2]
+    screen[100:100 + h, 50:50 + w] = scaled
+
+    matcher = TemplateMatcher()
+    result = matcher.match(ScreenFrame(screen), cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY), threshold=0.8)
+
+    assert result is not None
+    assert abs(result.x - 50) <= 1 and abs(result.y - 100) <= 1
+    assert result.scale == scale
+
+
+def test_match_below_threshold_returns_none():
+    """测试没有匹配时返回None"""
+    screen = make_screen()
+    icon = make_icon()
+
+    matcher = TemplateMatcher()
+    result = matcher.match(ScreenFrame(screen), cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY), threshold=0.95)
+
+    assert result is None
+
+
+def test_match_stops_when_cancelled():
+    """测试取消事件被设置后不再匹配剩余的缩放比例"""
+    screen = make_screen()
+    icon = make_icon()
+    scaled = cv2.resize(icon, None, fx=1.5, fy=1.5, interpolation=cv2.INTER_LINEAR)
+    h, w = scaled.shape[:2]
+    screen[100:100 + h, 50:50 + w] = scaled
+
+    matcher = TemplateMatcher()
+    cancel_event = threading.Event()
+    matched_scales = []
+    match_scale = matcher._match_scale
+
+    def cancel_after_first_scale(frame, template_pyramid, scale, threshold, cancel_event=None):
+        matched_scales.append(scale)
+        cancel_event.set()
+        return match_scale(frame, template_pyramid, scale, threshold, cancel_event)
+
+    matcher._match_scale = cancel_after_first_scale
+    icon_gray = cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY)
+    assert matcher.match(ScreenFrame(screen), icon_gray, threshold=0.8, cancel_event=cancel_event) is None
+    assert matched_scales == [matcher.scales[0]]
+
+
+def test_match_flat_template():
+    """测试纯色模板不会产生NaN置信度"""
+    screen = np.full((100, 100, 3), 230, dtype=np.uint8)
+    screen[40:50, 40:60] = 10
+    template = np.full((10, 20), 10, dtype=np.uint8)
+
+    result = TemplateMatcher().match(ScreenFrame(screen), template, threshold=0.9)
+
+    assert result is not None
+    assert (result.x, result.y) == (40, 40)
+    assert 0.0 <= result.confidence <= 1.0
+
+
+def test_match_all_returns_every_instance():
+    """测试查找模板的所有匹配，重叠峰值被抑制"""
+    screen = make_screen(seed=3)
+    icon = make_icon()
+    positions = [(40, 400), (300, 200), (500, 60), (120, 120)]
+    for x, y in positions:
+        screen[y:y + 32, x:x + 32] = icon
+
+    matcher = TemplateMatcher(scales=(1.0,))
+    results = matcher.match_all(ScreenFrame(screen), cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY), threshold=0.9)
+
+    assert sorted((r.x, r.y) for r in results) == sorted(positions)
+    assert all(r.confidence >= 0.9 for r in results)
+    # 按置信度从高到低排序
+    assert [r.confidence for r in results] == sorted((r.confidence for r in results), reverse=True)
+
+    # 限制返回数量
+    assert len(matcher.match_all(ScreenFrame(screen), cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY),
+                                 threshold=0.9, max_results=2)) == 2
+
+
+def test_find_all_by_image_sorted_by_position():
+    """测试find_all_by_image返回按位置排序的元素列表"""
+    from core.element_capture import ElementCapture
+
+    screen = make_screen(seed=4)
+    icon = make_icon()
+    for x, y in [(400, 300), (100, 300), (200, 50)]:
+        screen[y:y + 32, x:x + 32] = icon
+
+    capture = ElementCapture()
+    frame = ScreenFrame(screen, origin=(1000, 0))
+    elements = capture.find_all_by_image(icon, frame=frame, confidence=0.9)
+
+    assert [(e.x, e.y) for e in elements] == [(1200, 50), (1100, 300), (1400, 300)]
+    assert all(e.element_type == "ImageMatched" for e in elements)
+
+    # 限定搜索区域后只返回区域内的匹配
+    elements = capture.find_all_by_image(icon, roi=(1000, 250, 1300, 400), frame=frame, confidence=0.9)
+    assert [(e.x, e.y) for e in elements] == [(1100, 300)]
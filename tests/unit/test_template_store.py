@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TemplateStore类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import pytest
+import cv2
+import numpy as np
+from unittest.mock import Mock
+from core.template_matcher import TemplateMatcher
+from core.template_store import TemplateStore
+
+
+def build_entry(image_path):
+    """构建缓存项：模板、灰度图、特征点、描述符和金字塔"""
+    template = cv2.imread(image_path)
+    template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+    keypoints, descriptors = cv2.ORB_create().detectAndCompute(template_gray, None)
+    return template, template_gray, keypoints, descriptors, TemplateMatcher().prepare(template_gray)
+
+
+def write_icon(path, seed=0):
+    """写入带纹理的图标文件"""
+    rng = np.random.default_rng(seed)
+    icon = rng.integers(0, 255, (160, 160, 3), dtype=np.uint8)
+    cv2.circle(icon, (80, 80), 40, (0, 0, 200), -1)
+    cv2.imwrite(str(path), icon)
+
+
+def test_store_persists_across_instances(tmp_path):
+    """测试缓存项写入磁盘后，新实例以内存映射方式加载"""
+    image_path = str(tmp_path / 'icon.png')
+    write_icon(image_path)
+    cache_dir = str(tmp_path / 'cache')
+
+    store = TemplateStore(cache_dir=cache_dir)
+    builder = Mock(side_effect=lambda: build_entry(image_path))
+    entry = store.load(image_path, {'scales': [1.0]}, builder)
+    assert builder.call_count == 1
+    # 再次加载命中内存缓存
+    assert store.load(image_path, {'scales': [1.0]}, builder) is entry
+    assert builder.call_count == 1
+
+    # 模拟重启：新实例从磁盘加载，无需重新构建
+    new_store = TemplateStore(cache_dir=cache_dir)
+    loaded = new_store.load(image_path, {'scales': [1.0]}, builder)
+    assert builder.call_count == 1
+    assert new_store.disk_hits == 1
+
+    template, template_gray, keypoints, descriptors, prepared = loaded
+    assert isinstance(template_gray, np.memmap)
+    assert np.array_equal(template, entry[0])
+    assert np.array_equal(descriptors, entry[3])
+    assert len(keypoints) == len(entry[2])
+    assert keypoints[0].pt == pytest.approx(entry[2][0].pt)
+    assert [scale for scale, _ in prepared.levels] == [scale for scale, _ in entry[4].levels]
+
+
+def test_store_invalidates_on_content_and_params_change(tmp_path):
+    """测试文件内容或预处理参数变化后缓存失效"""
+    image_path = str(tmp_path / 'icon.png')
+    write_icon(image_path, seed=1)
+    store = TemplateStore(cache_dir=str(tmp_path / 'cache'))
+
+    key = store.make_key(image_path, {'scales': [1.0]})
+    assert store.make_key(image_path, {'scales': [1.0, 1.25]}) != key
+
+    write_icon(image_path, seed=2)
+    os.utime(image_path, ns=(1, 1))
+    assert store.make_key(image_path, {'scales': [1.0]}) != key
+    assert store.make_key(str(tmp_path / 'missing.png')) is None
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    """测试磁盘占用超过字节预算时淘汰最久未使用的缓存项"""
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f'icon{i}.png')
+        write_icon(path, seed=i)
+        paths.append(path)
+
+    store = TemplateStore(cache_dir=str(tmp_path / 'cache'))
+    store.load(paths[0], {}, lambda: build_entry(paths[0]))
+    entry_size = store.disk_usage
+    store.max_bytes = entry_size * 2
+
+    store.load(paths[1], {}, lambda: build_entry(paths[1]))
+    store.load(paths[2], {}, lambda: build_entry(paths[2]))
+
+    assert store.disk_usage <= store.max_bytes
+    assert not os.path.exists(store._entry_dir(store.make_key(paths[0], {})))
+    assert os.path.exists(store._entry_dir(store.make_key(paths[2], {})))
+
+
+def test_store_rebuilds_half_deleted_entries(tmp_path):
+    """测试没有meta.json的缓存项目录和遗留的临时目录在扫描时删除，模板重新写入缓存"""
+    image_path = str(tmp_path / 'icon.png')
+    write_icon(image_path)
+    cache_dir = tmp_path / 'cache'
+    store = TemplateStore(cache_dir=str(cache_dir))
+    store.load(image_path, {}, lambda: build_entry(image_path))
+    key = store.make_key(image_path, {})
+    os.remove(os.path.join(store._entry_dir(key), TemplateStore.META_FILE))
+    stale_temp = cache_dir / f"{key}.tmp999999_1"
+    stale_temp.mkdir()
+
+    new_store = TemplateStore(cache_dir=str(cache_dir))
+    assert new_store.disk_usage == 0
+    assert not stale_temp.exists()
+    builder = Mock(side_effect=lambda: build_entry(image_path))
+    new_store.load(image_path, {}, builder)
+    assert builder.call_count == 1
+    assert os.path.exists(os.path.join(new_store._entry_dir(key), TemplateStore.META_FILE))
+
+
+def test_store_keeps_entry_indexed_when_eviction_fails(tmp_path, monkeypatch):
+    """测试淘汰时文件无法删除（Windows上仍被内存映射）的缓存项保留meta.json和索引，下次淘汰时重试"""
+    paths = []
+    for i in range(2):
+        path = str(tmp_path / f'icon{i}.png')
+        write_icon(path, seed=i)
+        paths.append(path)
+    store = TemplateStore(cache_dir=str(tmp_path / 'cache'))
+    store.load(paths[0], {}, lambda: build_entry(paths[0]))
+    first_key = store.make_key(paths[0], {})
+    store.max_bytes = store.disk_usage
+
+    real_replace, real_remove = os.replace, os.remove
+
+    def replace(src, dst):
+        if '.del' in str(dst):
+            raise PermissionError("目录中的文件正在使用")
+        return real_replace(src, dst)
+
+    def remove(path):
+        if str(path).endswith('gray.npy'):
+            raise PermissionError("文件正在使用")
+        return real_remove(path)
+
+    monkeypatch.setattr(os, 'replace', replace)
+    monkeypatch.setattr(os, 'remove', remove)
+    store.load(paths[1], {}, lambda: build_entry(paths[1]))
+    first_dir = store._entry_dir(first_key)
+    assert first_key not in store._memory
+    assert os.path.exists(os.path.join(first_dir, TemplateStore.META_FILE))
+    assert first_key in store._get_disk_index()
+
+    # 文件释放后下次淘汰时删除
+    monkeypatch.setattr(os, 'remove', real_remove)
+    store._evict()
+    assert not os.path.exists(first_dir)
+    assert store.disk_usage <= store.max_bytes
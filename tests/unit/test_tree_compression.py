@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CompressedTree类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import time
+import tracemalloc
+from functools import partial
+from unittest.mock import patch
+from conftest import make_element
+from core.element_analyzer import ElementAnalyzer
+from core.tree_compression import CompressedTree
+
+
+# 表格窗口中的元素都带有完整属性和相同的进程、窗口
+_make_element = partial(make_element, detailed=True, process_id=1234, window_handle=5678)
+
+
+def _make_grid(rows, columns=4):
+    """创建包含rows行、每行columns个单元格的表格窗口"""
+    window = _make_element("Window", "测试窗口", automation_id="main")
+    grid = _make_element("DataGrid", automation_id="grid")
+    window.add_child(grid)
+    for row in range(rows):
+        row_element = _make_element("DataItem", f"Row {row:03d}", y=row * 20, automation_id="row")
+        row_element.runtime_id = (42, row)
+        grid.add_child(row_element)
+        for column in range(columns):
+            row_element.add_child(_make_element("Text", f"Cell {row}-{column}", x=column * 100, y=row * 20))
+    return window
+
+
+def test_repeated_rows_share_shapes():
+    """测试重复的表格行共享同一个结构"""
+    tree = CompressedTree(_make_grid(100))
+
+    assert tree.node_count == 1 + 1 + 100 * 5
+    # 窗口、表格、行、单元格各一种结构
+    assert tree.shape_count == 4
+    assert tree.get_stats()['shared_instances'] == tree.node_count - 4
+
+
+def test_materialize_round_trip():
+    """测试还原出的元素树与原树一致"""
+    root = _make_grid(3)
+    restored = CompressedTree(root).materialize()
+
+    def flatten(element):
+        yield element
+        for child in element.children:
+            yield from flatten(child)
+
+    originals = list(flatten(root))
+    restored_elements = list(flatten(restored))
+    assert len(originals) == len(restored_elements)
+    for original, element in zip(originals, restored_elements):
+        for field in ('element_type', 'class_name', 'automation_id', 'name', 'x', 'y', 'width',
+                      'runtime_id', 'depth', 'process_id', 'window_handle'):
+            assert getattr(original, field) == getattr(element, field)
+        assert len(original.children) == len(element.children)
+    assert restored.children[0].children[2].parent is restored.children[0]
+
+
+def test_get_element_by_index():
+    """测试按先序序号获取单个元素"""
+    tree = CompressedTree(_make_grid(3))
+
+    # 0: 窗口，1: 表格，2: 第0行，3-6: 第0行的单元格，7: 第1行
+    assert tree.get_element(7).name == "Row 001"
+    assert tree.get_element(8).name == "Cell 1-0"
+    assert tree.get_element(8).children == []
+    assert tree.get_element(1000) is None
+
+
+def test_analyze_runs_once_per_shape():
+    """测试稳定性评分按结构计算，结果与逐个元素计算一致"""
+    analyzer = ElementAnalyzer()
+    root = _make_grid(50)
+    tree = CompressedTree(root)
+
+    computed = tree.analyze(analyzer)
+    assert computed == 4
+    assert tree.analyze(analyzer) == 0
+
+    restored = tree.materialize()
+    cell = restored.children[0].children[10].children[1]
+    expected = _make_element("Text", "Cell 10-1")
+    expected.depth = cell.depth
+    analyzer.calculate_stability_score(expected)
+    assert cell.stability_score == expected.stability_score
+    assert cell.locator_priority == expected.locator_priority
+
+    # 重复结构追加唯一性建议
+    row = restored.children[0].children[0]
+    assert any("重复出现50次" in suggestion for suggestion in row.stability_suggestions)
+
+
+def test_compressed_tree_uses_less_memory():
+    """测试重复行表格压缩后内存显著下降"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    root = _make_grid(500)
+    element_tree_size = tracemalloc.get_traced_memory()[0] - before
+
+    before = tracemalloc.get_traced_memory()[0]
+    tree = CompressedTree(root)
+    compressed_size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    assert tree.node_count == 2502
+    assert compressed_size * 3 < element_tree_size
+
+
+def test_analyzer_caches_compressed_tree():
+    """测试压缩模式下缓存压缩树，命中缓存时还原元素树"""
+    analyzer = ElementAnalyzer()
+    analyzer.compress_trees = True
+    root = _make_grid(5)
+
+    compressed = analyzer.compress_tree(root)
+    analyzer.element_tree_cache[(1234, 5678)] = (compressed, time.time())
+
+    class Window:
+        hwnd = 5678
+
+    with patch('win32process.GetWindowThreadProcessId', return_value=(1, 1234)):
+        restored = analyzer.analyze_window(Window())
+
+    assert restored is not root
+    assert restored.children[0].children[4].name == "Row 004"
+    assert restored.stability_score is not None
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树比较的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from types import SimpleNamespace
+
+from conftest import make_element
+from core.api_service import APIService
+from core.tree_diff import diff_trees
+from core.tree_snapshot import TreeSnapshot
+
+
+def _make_tree(toolbar_names=("保存", "打开"), list_size=5):
+    """创建窗口 > 工具栏/列表 的元素树"""
+    root = make_element("Window", "主窗口", detailed=True, automation_id="main")
+    toolbar = make_element("ToolBar", "工具栏", detailed=True, automation_id="toolbar")
+    root.add_child(toolbar)
+    for name in toolbar_names:
+        toolbar.add_child(make_element("Button", name, detailed=True, automation_id=f"btn_{name}"))
+    item_list = make_element("List", "文件列表", detailed=True, automation_id="files")
+    root.add_child(item_list)
+    for index in range(list_size):
+        item_list.add_child(make_element("ListItem", f"file_{index}.txt", detailed=True))
+    return root
+
+
+def test_identical_trees():
+    """测试相同的元素树没有差异，整棵树按指纹跳过"""
+    result = diff_trees(_make_tree(), _make_tree())
+    assert result.entries == []
+    assert result.identical_nodes == 10
+
+
+def test_added_removed_and_changed():
+    """测试新增、删除和属性变化"""
+    old = _make_tree()
+    new = _make_tree(toolbar_names=("保存", "新建"), list_size=6)
+    new.children[0].children[0].is_enabled = False
+
+    result = diff_trees(old, new)
+    summary = result.summary()
+    assert summary['added'] == 2
+    assert summary['removed'] == 1
+    assert summary['changed'] == 1
+    # 文件列表的前5项未变化，被跳过
+    assert summary['identical'] >= 5
+
+    changed = result.get_entries('changed')[0]
+    assert changed['automation_id'] == "btn_保存"
+    assert changed['changes'] == {'is_enabled': (True, False)}
+    assert result.get_entries('removed')[0]['old_path'] == "Window(main) > ToolBar(toolbar) > Button(btn_打开)"
+    assert {entry['name'] for entry in result.get_entries('added')} == {"新建", "file_5.txt"}
+
+
+def test_moved_subtree():
+    """测试子树移动到其他父节点"""
+    old = _make_tree()
+    new = _make_tree()
+    button = new.children[0].children.pop(1)
+    new.children[1].add_child(button)
+
+    result = diff_trees(old, new)
+    moved = result.get_entries('moved')
+    assert len(moved) == 1
+    assert moved[0]['old_path'].endswith("ToolBar(toolbar) > Button(btn_打开)")
+    assert moved[0]['new_path'].endswith("List(files) > Button(btn_打开)")
+    assert not result.get_entries('added') and not result.get_entries('removed')
+
+
+def test_diff_snapshots(tmp_path):
+    """测试直接比较快照文件"""
+    old_path, new_path = str(tmp_path / "old.snap"), str(tmp_path / "new.snap")
+    TreeSnapshot.write(old_path, _make_tree())
+    TreeSnapshot.write(new_path, _make_tree(toolbar_names=("保存",)))
+
+    result = diff_trees(TreeSnapshot(old_path), TreeSnapshot(new_path))
+    removed = result.get_entries('removed')
+    assert [entry['name'] for entry in removed] == ["打开"]
+    assert result.summary()['added'] == 0
+
+
+def test_tree_diff_api_only_reads_snapshot_directory(tmp_path):
+    """测试比较API只读取快照目录中的快照文件"""
+    snapshot_dir = tmp_path / "snapshots"
+    snapshot_dir.mkdir()
+    TreeSnapshot.write(str(snapshot_dir / "old.snap"), _make_tree())
+    TreeSnapshot.write(str(snapshot_dir / "new.snap"), _make_tree(toolbar_names=("保存",)))
+    TreeSnapshot.write(str(tmp_path / "outside.snap"), _make_tree())
+    service = APIService(SimpleNamespace())
+    service.snapshot_dir = str(snapshot_dir)
+    client = service.flask_app.test_client()
+
+    response = client.post('/api/v1/tree_diff', json={'old_snapshot': "old.snap", 'new_snapshot': "new.snap"})
+    assert response.status_code == 200
+    assert response.get_json()['data']['summary']['removed'] == 1
+
+    for path in ("../outside.snap", str(tmp_path / "outside.snap")):
+        response = client.post('/api/v1/tree_diff', json={'old_snapshot': path, 'new_snapshot': "new.snap"})
+        assert response.status_code == 400
+
+
+def test_tree_snapshot_api_writes_snapshot_directory(tmp_path):
+    """测试快照API将窗口元素树保存到快照目录，保存的快照可以直接比较"""
+    trees = iter([_make_tree(), _make_tree(toolbar_names=("保存",))])
+
+    def snapshot_window(window_handle, path, metadata=None):
+        return TreeSnapshot.write(path, next(trees), metadata)
+
+    snapshot_dir = tmp_path / "snapshots"
+    service = APIService(SimpleNamespace(element_analyzer=SimpleNamespace(snapshot_window=snapshot_window)))
+    service.snapshot_dir = str(snapshot_dir)
+    client = service.flask_app.test_client()
+
+    response = client.post('/api/v1/tree_snapshot', json={'window_handle': 1234, 'name': "old.snap"})
+    assert response.status_code == 200
+    assert response.get_json()['data']['snapshot'] == "old.snap"
+    response = client.post('/api/v1/tree_snapshot', json={'window_handle': 1234})
+    new_snapshot = response.get_json()['data']['snapshot']
+    assert new_snapshot.startswith("1234_") and (snapshot_dir / new_snapshot).exists()
+
+    response = client.post('/api/v1/tree_diff', json={'old_snapshot': "old.snap", 'new_snapshot': new_snapshot})
+    assert response.get_json()['data']['summary']['removed'] == 1
+
+    response = client.post('/api/v1/tree_snapshot', json={'window_handle': 1234, 'name': "../outside.snap"})
+    assert response.status_code == 400
+    assert not (tmp_path / "outside.snap").exists()
+
+
+def test_find_affected_locators():
+    """测试找出受影响的收藏夹定位"""
+    old = _make_tree()
+    new = _make_tree(toolbar_names=("保存",))
+    new.children[1].children[2].name = "renamed.txt"
+
+    favorites = [
+        {'element_type': "Button", 'element_name': "打开", 'automation_id': "btn_打开", 'class_name': "ButtonClass"},
+        {'element_type': "Button", 'element_name': "保存", 'automation_id': "btn_保存", 'class_name': "ButtonClass"},
+        {'element_type': "ListItem", 'element_name': "file_2.txt", 'automation_id': None, 'class_name': "ListItemClass"},
+    ]
+    affected = diff_trees(old, new).find_affected_locators(favorites)
+    assert [item['record']['element_name'] for item in affected] == ["打开", "file_2.txt"]
+    assert affected[0]['source'] == 'favorites'
+    assert "已删除" in affected[0]['reason']
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TreeLoader类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from PyQt5.QtCore import QCoreApplication, QPersistentModelIndex
+from PyQt5.QtTest import QAbstractItemModelTester
+from conftest import make_element
+from ui.element_tree_model import ElementTreeModel
+from ui.tree_loader import TreeLoader
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    """定时器需要Qt应用对象"""
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+class _SyncExecutor:
+    """在提交时直接执行任务的执行器"""
+
+    def submit(self, func, *args, priority=None, name=None, **kwargs):
+        future = Future()
+        future.set_result(func(*args, **kwargs))
+        return future
+
+
+class _ThreadExecutor:
+    """在后台线程中执行任务的执行器"""
+
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(max_workers=2)
+
+    def submit(self, func, *args, priority=None, name=None, **kwargs):
+        return self.pool.submit(func, *args, **kwargs)
+
+
+class _StreamingAnalyzer:
+    """模拟逐层分析窗口并报告进度的分析器"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+
+    def analyze_window(self, window, on_verified=None, on_progress=None, cancel_event=None, on_reconciled=None):
+        root = make_element("Window", window)
+        on_progress(None, [root])
+        panes = []
+        for index in range(3):
+            pane = make_element("Pane", f"{window}_{index}")
+            root.add_child(pane)
+            panes.append(pane)
+        on_progress(root, list(panes))
+        if self.gate is not None:
+            self.gate.wait(5)
+        for pane in panes:
+            if cancel_event.is_set():
+                return None
+            for index in range(4):
+                pane.add_child(make_element("Button", f"{pane.name}_{index}"))
+            on_progress(pane, list(pane.children))
+        return root
+
+    def is_verifying(self, root_element):
+        return False
+
+
+def _drain_all(loader):
+    """处理队列直到加载结束"""
+    for _ in range(100):
+        if not loader.is_loading():
+            return
+        loader._drain()
+    raise AssertionError("加载未结束")
+
+
+def test_streams_batches_into_model():
+    """测试分析出的元素按批显示，每帧不超过batch_size个"""
+    model = ElementTreeModel()
+    QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    loader = TreeLoader(model, _StreamingAnalyzer(), _SyncExecutor(), batch_size=4)
+    finished = []
+    loader.finished.connect(finished.append)
+
+    loader.load("主窗口")
+    loader._drain()
+    root = model.root_element()
+    root_index = model.index(0, 0)
+    # 第一帧：根元素（1个）和3个面板
+    assert model.rowCount(root_index) == 3
+    assert model.rowCount(model.index(0, 0, root_index)) == 0
+
+    _drain_all(loader)
+    assert finished == [root]
+    for row in range(3):
+        assert model.rowCount(model.index(row, 0, root_index)) == 4
+    assert model.index(3, 0, model.index(2, 0, root_index)).data() == "Button - 主窗口_2_3"
+
+
+def test_switching_window_cancels_previous_load():
+    """测试切换窗口时取消正在进行的分析，旧分析的结果不会显示"""
+    model = ElementTreeModel()
+    gate = threading.Event()
+    executor = _ThreadExecutor()
+    slow_analyzer = _StreamingAnalyzer(gate)
+    loader = TreeLoader(model, slow_analyzer, executor)
+
+    loader.load("窗口A")
+    first_job = loader._job
+    loader.load("窗口B")
+    assert first_job.cancel_event.is_set()
+    assert model.root_element() is None
+
+    gate.set()
+    first_job.future.result(5)
+    loader._job.future.result(5)
+    _drain_all(loader)
+    executor.pool.shutdown()
+
+    assert model.root_element().name == "窗口B"
+    root_index = model.index(0, 0)
+    assert model.index(0, 0, model.index(0, 0, root_index)).data() == "Button - 窗口B_0_0"
+
+
+def test_cached_tree_is_shown_at_once():
+    """测试分析器直接返回完整元素树（缓存或骨架）时一次性显示"""
+    root = make_element("Window", "缓存窗口")
+    root.add_child(make_element("Button", "确定"))
+
+    class CachedAnalyzer:
+        def analyze_window(self, window, on_verified=None, on_progress=None, cancel_event=None,
+                           on_reconciled=None):
+            return root
+
+        def is_verifying(self, root_element):
+            return False
+
+    model = ElementTreeModel()
+    loader = TreeLoader(model, CachedAnalyzer(), _SyncExecutor())
+    loader.load("缓存窗口")
+    _drain_all(loader)
+    assert model.root_element() is root
+    assert model.rowCount(model.index(0, 0)) == 1
+
+
+def test_verified_skeleton_levels_update_rows_in_place():
+    """测试骨架校验按层同步到模型，保留的行不被重置，校验结束后发出verified信号"""
+    root = make_element("Window", "骨架窗口")
+    for name in ("确定", "旧按钮", "取消"):
+        root.add_child(make_element("Button", name))
+
+    class VerifyingAnalyzer:
+        running = True
+        on_reconciled = None
+
+        def analyze_window(self, window, on_verified=None, on_progress=None, cancel_event=None,
+                           on_reconciled=None):
+            self.on_reconciled = on_reconciled
+            return root
+
+        def is_verifying(self, root_element):
+            return self.running and root_element is root
+
+    analyzer = VerifyingAnalyzer()
+    model = ElementTreeModel()
+    QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    resets = []
+    verified = []
+    model.modelReset.connect(lambda: resets.append(True))
+    model.verified.connect(verified.append)
+    loader = TreeLoader(model, analyzer, _SyncExecutor())
+    loader.load("骨架窗口")
+    loader._drain()
+    assert model.is_verifying()
+    root_index = model.index(0, 0)
+    kept = QPersistentModelIndex(model.index(2, 0, root_index))
+    resets.clear()
+
+    # 工作线程替换子元素列表：删除旧按钮，末尾新增应用
+    ok, _, cancel = root.children
+    added = make_element("Button", "应用")
+    added.parent = root
+    root.children = [ok, cancel, added]
+    analyzer.on_reconciled(root)
+    assert model.rowCount(root_index) == 3
+    loader._drain()
+    assert [model.index(row, 0, root_index).data() for row in range(3)] == \
+        ["Button - 确定", "Button - 取消", "Button - 应用"]
+    assert kept.isValid() and kept.row() == 1
+
+    analyzer.running = False
+    loader._drain()
+    assert verified == [root]
+    assert not model.is_verifying()
+    assert not loader._timer.isActive()
+    assert resets == []
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TreeRevealer类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from concurrent.futures import Future
+from unittest.mock import Mock
+
+from conftest import make_element
+from ui.element_tree_model import ElementTreeModel
+from ui.tree_reveal import TreeRevealer
+
+
+class _SyncExecutor:
+    """在提交时直接执行任务的执行器"""
+
+    def __init__(self):
+        self.names = []
+
+    def submit(self, func, *args, priority=None, name=None, **kwargs):
+        self.names.append(name)
+        future = Future()
+        future.set_result(func(*args, **kwargs))
+        return future
+
+
+def _setup(resolver):
+    """创建窗口 > 面板(未加载) 的元素树和定位控制器"""
+    root = make_element("Window", "主窗口", runtime_id=(1,))
+    panel = make_element("Pane", "面板", runtime_id=(2,), has_children=True)
+    root.add_child(panel)
+    model = ElementTreeModel()
+    model.set_root(root)
+    view = Mock()
+    executor = _SyncExecutor()
+    revealer = TreeRevealer(view, model, resolver, executor)
+    revealed = []
+    revealer.revealed.connect(revealed.append)
+    return root, model, view, executor, revealer, revealed
+
+
+def test_reveal_loaded_element_by_runtime_id():
+    """测试已加载的元素按运行时ID立即选中，不提交后台任务"""
+    root, model, view, executor, revealer, revealed = _setup(Mock())
+    revealer.reveal(make_element("Pane", "面板", runtime_id=(2,)))
+    assert revealed == [root.children[0]]
+    assert executor.names == []
+    assert view.setCurrentIndex.call_args[0][0].internalPointer() is root.children[0]
+
+
+def test_reveal_loads_ancestor_chain():
+    """测试节点未加载时沿祖先链加载子元素后选中"""
+    captured = make_element("Button", "确定", runtime_id=(3,))
+    chain = [(Mock(), make_element("Window", "主窗口", runtime_id=(1,))), (Mock(), make_element("Pane", "面板", runtime_id=(2,))),
+             (Mock(), make_element("Button", "确定", runtime_id=(3,)))]
+    resolver = Mock()
+    resolver.get_ancestor_chain.return_value = chain
+
+    def load_children(node, parent_pyw, descriptor):
+        node.add_child(make_element("Button", "取消", runtime_id=(4,)))
+        node.add_child(make_element("Button", "确定", runtime_id=(3,)))
+        return node.children[-1]
+
+    resolver.load_children.side_effect = load_children
+    root, model, view, executor, revealer, revealed = _setup(resolver)
+
+    revealer.reveal(captured)
+    panel = root.children[0]
+    assert revealed == [panel.children[1]]
+    assert executor.names == ['get_ancestor_chain', 'load_ancestor_children']
+    assert resolver.load_children.call_args[0][1] is chain[1][0]
+    assert model.rowCount(model.index_for_element(panel)) == 2
+    assert not model.is_loading(panel)
+
+    # 加载后的元素加入身份映射，再次定位时立即选中
+    revealer.reveal(captured)
+    assert revealed[-1] is panel.children[1]
+    assert len(executor.names) == 2
+
+
+def test_reveal_not_found():
+    """测试祖先链与当前元素树不符时报告未找到"""
+    resolver = Mock()
+    resolver.get_ancestor_chain.return_value = [(Mock(), make_element("Window", "其他窗口", runtime_id=(9,)))]
+    _, _, _, _, revealer, revealed = _setup(resolver)
+    revealer.reveal(make_element("Button", "确定", runtime_id=(3,)))
+    assert revealed == [None]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TreeSearch类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from unittest.mock import Mock
+
+import pytest
+from PyQt5.QtCore import Qt, QCoreApplication
+from conftest import make_element
+from ui.element_tree_model import ElementTreeModel
+from ui.tree_search import TreeSearch
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    """定时器需要Qt应用对象"""
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _make_tree():
+    """创建测试元素树：窗口下有3个面板，每个面板有5个按钮"""
+    root = make_element("Window", "主窗口")
+    for pane_index in range(3):
+        pane = make_element("Pane", f"面板{pane_index}")
+        root.add_child(pane)
+        for index in range(5):
+            pane.add_child(make_element("Button", f"按钮{pane_index}_{index}"))
+    return root
+
+
+def _run(search):
+    """处理搜索结果直到结束"""
+    for _ in range(100):
+        if search._results is None:
+            return
+        search._stream()
+    raise AssertionError("搜索未结束")
+
+
+def test_search_expands_only_ancestors():
+    """测试搜索结果分批处理，只展开命中元素的祖先节点并选中第一个命中的元素"""
+    root = _make_tree()
+    model = ElementTreeModel()
+    model.set_root(root)
+    view = Mock()
+    search = TreeSearch(view, model, batch_size=2)
+    progress = []
+    search.progress.connect(lambda count, finished: progress.append((count, finished)))
+
+    search.set_query("按钮1_", 'prefix')
+    search.search_now()
+    assert progress == [(2, False)]
+    _run(search)
+    assert progress[-1] == (5, True)
+
+    pane = root.children[1]
+    expanded = [call[0][0].internalPointer() for call in view.expand.call_args_list]
+    assert expanded == [root, pane]
+    assert view.setCurrentIndex.call_args[0][0].internalPointer() is pane.children[0]
+    assert all(model.index_for_element(button).data(Qt.BackgroundRole) is not None for button in pane.children)
+
+
+def test_search_covers_newly_loaded_children():
+    """测试索引建立后新插入的子元素也能被搜索到，模型重置后重新建立索引"""
+    root = _make_tree()
+    lazy = make_element("List", "列表", has_children=True)
+    root.add_child(lazy)
+    model = ElementTreeModel(lambda element: None)
+    model.set_root(root)
+    search = TreeSearch(Mock(), model)
+
+    search.set_query("列表项")
+    search.search_now()
+    assert search._hit_count == 0
+
+    model.fetchMore(model.index_for_element(lazy))
+    lazy.add_child(make_element("ListItem", "列表项"))
+    model.finish_loading(lazy)
+    search.search_now()
+    _run(search)
+    assert search._hit_count == 1
+
+    model.set_root(_make_tree())
+    assert search._index is None
+
+
+def test_invalid_regex_reports_error():
+    """测试无效的正则表达式通过error信号报告"""
+    model = ElementTreeModel()
+    model.set_root(_make_tree())
+    search = TreeSearch(Mock(), model)
+    errors = []
+    search.error.connect(errors.append)
+    search.set_query("按钮(", 'regex')
+    search.search_now()
+    assert errors and "正则" in errors[0]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TreeSnapshot类的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import pytest
+from conftest import make_element
+from core.element_analyzer import ElementAnalyzer
+from core.tree_snapshot import TreeSnapshot
+
+
+def _make_tree():
+    """创建测试元素树：窗口下有工具栏和列表，列表中有若干列表项"""
+    root = make_element("Window", "测试窗口", detailed=True, automation_id="main", process_id=1234,
+                        window_handle=5678)
+    toolbar = make_element("ToolBar", "工具栏", detailed=True)
+    root.add_child(toolbar)
+    toolbar.add_child(make_element("Button", "保存", detailed=True, automation_id="save"))
+    toolbar.add_child(make_element("Button", "打开", detailed=True, automation_id="open"))
+    item_list = make_element("List", "文件列表", detailed=True, automation_id="files")
+    root.add_child(item_list)
+    for index in range(5):
+        item_list.add_child(make_element("ListItem", f"file_{index}.txt", detailed=True, y=index * 20,
+                                         runtime_id=(42, 7, index), is_checked=index % 2 == 0))
+    item_list.children[-1].has_children = True
+    item_list.children[0].x = None
+    item_list.children[0].y = None
+    return root
+
+
+def test_snapshot_round_trip(tmp_path):
+    """测试保存后打开快照，节点属性和父子关系保持一致"""
+    analyzer = ElementAnalyzer()
+    path = str(tmp_path / "tree.snap")
+    assert analyzer.save_snapshot(_make_tree(), path, {'app': 'test.exe'}) == 10
+
+    snapshot = analyzer.load_snapshot(path)
+    assert len(snapshot) == 10
+    assert snapshot.metadata['process_id'] == 1234
+    assert snapshot.metadata['app'] == 'test.exe'
+
+    # 先序：0窗口 1工具栏 2保存 3打开 4列表 5-9列表项
+    assert snapshot.children(0) == [1, 4]
+    assert snapshot.children(4) == [5, 6, 7, 8, 9]
+    assert snapshot.parent(6) == 4
+    assert snapshot.parent(0) is None
+
+    item = snapshot.get_element(7)
+    assert item.name == "file_2.txt"
+    assert item.runtime_id == (42, 7, 2)
+    assert item.is_checked is True
+    assert (item.x, item.y, item.width, item.height) == (0, 40, 100, 20)
+    assert item.depth == 2
+    assert item.window_handle == 5678
+    assert snapshot.get_element(6).is_checked is False
+    assert snapshot.get_element(5).x is None
+    assert snapshot.get_element(9).has_children
+    assert snapshot.get_element(1).automation_id is None
+    snapshot.close()
+
+
+def test_snapshot_materialize(tmp_path):
+    """测试从快照还原子树，可限制层数"""
+    path = str(tmp_path / "tree.snap")
+    TreeSnapshot.write(path, _make_tree())
+    snapshot = TreeSnapshot(path)
+
+    root = snapshot.materialize()
+    assert [child.name for child in root.children] == ["工具栏", "文件列表"]
+    assert root.children[1].children[3].parent is root.children[1]
+    assert root.children[1].children[3].depth == 2
+
+    shallow = snapshot.materialize(max_depth=1)
+    assert len(shallow.children) == 2
+    assert shallow.children[1].children == []
+    assert shallow.children[1].has_children
+
+
+def test_snapshot_search(tmp_path):
+    """测试按属性搜索节点"""
+    path = str(tmp_path / "tree.snap")
+    TreeSnapshot.write(path, _make_tree())
+    snapshot = TreeSnapshot(path)
+
+    assert snapshot.search("FILE_").tolist() == [5, 6, 7, 8, 9]
+    assert snapshot.search("save", field='automation_id', exact=True).tolist() == [2]
+    assert snapshot.search("不存在").tolist() == []
+    with pytest.raises(ValueError):
+        snapshot.search("x", field='x')
+
+
+def test_snapshot_search_folds_non_ascii_case(tmp_path):
+    """测试包含匹配对非ASCII字母同样不区分大小写"""
+    root = _make_tree()
+    toolbar = root.children[0]
+    toolbar.children[0].name = "ÉDITION"
+    toolbar.children[1].name = "Straße"
+    path = str(tmp_path / "tree.snap")
+    TreeSnapshot.write(path, root)
+    snapshot = TreeSnapshot(path)
+
+    assert snapshot.search("édition").tolist() == [2]
+    assert snapshot.search("STRASSE").tolist() == [3]
+    assert snapshot.search("ÉDITION", exact=True).tolist() == [2]
+    assert snapshot.search("édition", exact=True).tolist() == []
+    snapshot.close()
+
+
+def test_invalid_snapshot(tmp_path):
+    """测试打开无效文件时报错"""
+    path = tmp_path / "invalid.snap"
+    path.write_bytes(b'not a snapshot' * 10)
+    with pytest.raises(ValueError):
+        TreeSnapshot(str(path))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元素树预热启动的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from unittest.mock import Mock, patch
+from conftest import make_element
+from core.element import Element
+from core.element_analyzer import ElementAnalyzer
+from core.warm_start import SkeletonStore
+
+
+SIGNATURE = ('c:\\app\\app.exe', '1.2.3.4', 'MainWindowClass')
+
+
+def _make_tree(names):
+    """创建窗口 > 面板 > 按钮 的元素树"""
+    root = make_element("Window", "主窗口", detailed=True, automation_id="main")
+    panel = make_element("Pane", "面板", detailed=True, automation_id="panel")
+    root.add_child(panel)
+    for index, name in enumerate(names):
+        panel.add_child(make_element("Button", name, detailed=True, automation_id=f"btn_{name}", y=index * 20))
+    return root
+
+
+class _FakeNode:
+    """模拟pywinauto元素，element_info直接是实际元素"""
+
+    def __init__(self, element, kids=()):
+        self.element_info = element
+        self.kids = list(kids)
+
+
+def _live_tree(names):
+    """创建模拟的实际窗口，按钮位置与骨架不同"""
+    buttons = [_FakeNode(make_element("Button", name, detailed=True, automation_id=f"btn_{name}", y=100 + index * 20)) for index, name in enumerate(names)]
+    panel = _FakeNode(make_element("Pane", "面板", detailed=True, automation_id="panel"), buttons)
+    return _FakeNode(make_element("Window", "主窗口", detailed=True, automation_id="main"), [panel])
+
+
+def test_store_round_trip(tmp_path):
+    """测试保存和加载骨架，加载的元素都标记为未校验"""
+    store = SkeletonStore(str(tmp_path))
+    root = _make_tree(["保存", "打开"])
+    more = Element()
+    more.element_type = ElementAnalyzer.MORE_ELEMENT_TYPE
+    more.attributes = {'virtual': 'more', 'page_start': 2, 'total': 10}
+    root.children[0].add_child(more)
+    store.save(SIGNATURE, root)
+
+    skeleton = store.load(SIGNATURE, window_handle=99, process_id=7)
+    assert skeleton.name == "主窗口"
+    assert [child.name for child in skeleton.children[0].children] == ["保存", "打开"]
+    assert skeleton.children[0].children[1].attributes['unverified']
+    assert skeleton.children[0].children[1].window_handle == 99
+    assert skeleton.process_id == 7
+
+    assert store.load(('other.exe', '1.0', 'X')) is None
+
+
+def test_store_prunes_old_files(tmp_path):
+    """测试超出数量限制时删除最久未使用的骨架"""
+    store = SkeletonStore(str(tmp_path), max_files=2)
+    for version in range(4):
+        store.save(('app.exe', str(version), 'X'), _make_tree(["按钮"]))
+    assert len(os.listdir(str(tmp_path))) == 2
+
+
+def test_verify_skeleton_corrects_nodes(tmp_path):
+    """测试后台校验更新已有元素、删除消失的元素并添加新元素"""
+    analyzer = ElementAnalyzer()
+    analyzer.skeleton_store = SkeletonStore(str(tmp_path))
+    analyzer.skeleton_store.save(SIGNATURE, _make_tree(["保存", "删除", "打开"]))
+    skeleton = analyzer.skeleton_store.load(SIGNATURE, 99, None)
+    save_button = skeleton.children[0].children[0]
+
+    live = _live_tree(["保存", "打开", "新建"])
+    verified = []
+    with patch.object(analyzer, '_connect_window', return_value=(live, live.element_info)), \
+            patch.object(analyzer, '_get_children_page', side_effect=lambda node, control_type: (node.kids, len(node.kids))), \
+            patch.object(analyzer, '_convert_pywinauto_to_element', side_effect=lambda info: info):
+        result = analyzer.verify_skeleton(skeleton, 99, None, SIGNATURE, verified.append)
+
+    assert result is skeleton
+    assert verified == [skeleton]
+    buttons = skeleton.children[0].children
+    assert [button.name for button in buttons] == ["保存", "打开", "新建"]
+    # 已有元素原地更新
+    assert buttons[0] is save_button
+    assert buttons[0].y == 100
+    assert buttons[2].parent is skeleton.children[0]
+    assert not any(button.attributes.get('unverified') for button in buttons)
+    assert not skeleton.attributes.get('unverified')
+
+    # 校验结果已缓存并重新保存
+    assert analyzer.element_tree_cache[(None, 99)][0] is skeleton
+    reloaded = analyzer.skeleton_store.load(SIGNATURE)
+    assert [button.name for button in reloaded.children[0].children] == ["保存", "打开", "新建"]
+
+
+def test_analyze_window_returns_skeleton_immediately(tmp_path):
+    """测试有骨架时立即返回骨架并提交后台校验"""
+    analyzer = ElementAnalyzer()
+    analyzer.skeleton_store = SkeletonStore(str(tmp_path))
+    analyzer.skeleton_store.save(SIGNATURE, _make_tree(["保存"]))
+
+    class Window:
+        hwnd = 99
+
+    executor = Mock()
+    with patch('win32process.GetWindowThreadProcessId', return_value=(1, 7)), \
+            patch.object(SkeletonStore, 'get_signature', return_value=SIGNATURE), \
+            patch('core.automation_executor.get_automation_executor', return_value=executor), \
+            patch.object(analyzer, '_connect_window') as connect:
+        root = analyzer.analyze_window(Window())
+        # 校验结束前再次分析同一窗口时返回同一骨架，不重复提交校验
+        again = analyzer.analyze_window(Window())
+
+    assert root.attributes['unverified']
+    assert root.children[0].children[0].name == "保存"
+    assert not connect.called
+    assert executor.submit.call_args[0][0] == analyzer.verify_skeleton
+    assert again is root
+    assert executor.submit.call_count == 1
+    assert analyzer.is_verifying(root)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写后持久化模块的单元测试
+"""
+
+import sys
+import os
+# 将src目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+import json
+import threading
+from types import SimpleNamespace
+
+from core.write_behind import WriteBehindJournal, atomic_write_text
+from core.history_manager import HistoryManager
+from core.favorites_manager import FavoritesManager
+
+
+def _element(name="确定"):
+    """创建元素"""
+    return SimpleNamespace(name=name, element_type="Button", automation_id="btn_ok", class_name="Button",
+                           x=1, y=2, width=30, height=20)
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    """测试原子写入替换目标文件且不留下临时文件"""
+    path = tmp_path / 'favorites.json'
+    path.write_text("旧内容", encoding='utf-8')
+    atomic_write_text(str(path), "新内容")
+    assert path.read_text(encoding='utf-8') == "新内容"
+    assert os.listdir(tmp_path) == ['favorites.json']
+
+
+def test_append_returns_before_write():
+    """测试追加立即返回，超过时间间隔后批量写入"""
+    batches = []
+    written = threading.Event()
+
+    def flush_func(batch):
+        batches.append(list(batch))
+        written.set()
+
+    journal = WriteBehindJournal(flush_func, interval=0.05, max_pending=100)
+    for i in range(5):
+        journal.append(i)
+    assert written.wait(2)
+    assert journal.flush(2)
+    assert sum(batches, []) == [0, 1, 2, 3, 4]
+    assert len(batches) <= 2
+    assert journal.pending == 0
+    journal.close()
+
+
+def test_threshold_triggers_write_and_coalesce():
+    """测试达到数量阈值时立即写入，合并后只写入最后的修改"""
+    batches = []
+    written = threading.Event()
+
+    def flush_func(batch):
+        batches.append(list(batch))
+        written.set()
+
+    journal = WriteBehindJournal(flush_func, interval=60, max_pending=3, coalesce=lambda batch: batch[-1:])
+    for i in range(3):
+        journal.append(i)
+    assert written.wait(2)
+    assert journal.flush(2)
+    assert batches == [[2]]
+    metrics = journal.get_metrics()
+    assert metrics['flushes'] == 1 and metrics['coalesced'] == 2 and metrics['pending'] == 0
+    journal.close()
+
+
+def test_failed_write_is_retried():
+    """测试写入失败时修改放回日志，重试时和新修改一起写入"""
+    batches = []
+    failures = [RuntimeError("磁盘已满")]
+
+    def flush_func(batch):
+        if failures:
+            raise failures.pop()
+        batches.append(list(batch))
+
+    journal = WriteBehindJournal(flush_func, interval=0.02, max_pending=100)
+    journal.append('a')
+    assert not journal.flush(2)
+    assert journal.get_metrics()['errors'] == 1
+    journal.append('b')
+    assert journal.flush(2)
+    assert sum(batches, []) == ['a', 'b']
+    journal.close()
+
+
+def test_failing_mutation_is_logged_after_retries(tmp_path):
+    """测试一批修改连续失败max_retries次后逐条写入，无法写入的修改记录到错误日志"""
+    written = []
+
+    def flush_func(batch):
+        if 'bad' in batch:
+            raise RuntimeError("UNIQUE constraint failed")
+        written.extend(batch)
+
+    error_log = tmp_path / 'errors.log'
+    journal = WriteBehindJournal(flush_func, interval=60, max_pending=100, max_retries=2,
+                                 error_log=str(error_log))
+    journal.append('a')
+    journal.append('bad')
+    journal.append('b')
+    assert not journal.flush(2)
+    # 第二次失败后逐条写入，丢弃无法写入的修改后写入完成
+    assert journal.flush(2)
+    assert written == ['a', 'b']
+    metrics = journal.get_metrics()
+    assert metrics['pending'] == 0 and metrics['dropped'] == 1 and metrics['errors'] == 2
+    entry = json.loads(error_log.read_text(encoding='utf-8'))
+    assert entry['mutation'] == 'bad' and 'UNIQUE' in entry['error']
+    journal.close()
+
+
+def test_close_writes_pending_and_later_appends_are_synchronous():
+    """测试关闭时写入未写入的修改，关闭后的修改同步写入"""
+    batches = []
+    journal = WriteBehindJournal(lambda batch: batches.append(list(batch)), interval=60, max_pending=100)
+    journal.append(1)
+    journal.append(2)
+    journal.close()
+    assert batches == [[1, 2]]
+    journal.append(3)
+    assert batches == [[1, 2], [3]]
+
+
+def test_history_manager_reads_its_writes(tmp_path):
+    """测试历史记录在后台写入，查询前写入日志中的修改"""
+    manager = HistoryManager(db_file=str(tmp_path / 'history.db'), flush_interval=60)
+    first = manager.add_record(_element("确定"), 'attribute', "code1", True)
+    second = manager.add_record(_element("取消"), 'attribute', "code2", False)
+    assert second['id'] > first['id']
+
+    records, _ = manager.get_records()
+    assert [r['id'] for r in records] == [second['id'], first['id']]
+    assert manager.get_record_by_id(first['id'])['element_name'] == "确定"
+
+    # 同一批中新增后又删除的记录不再写入
+    third = manager.add_record(_element("应用"), 'attribute', "code3", True)
+    manager.delete_record(third['id'])
+    manager.delete_record(first['id'])
+    assert [r['id'] for r in manager.get_all_records()] == [second['id']]
+
+    manager.clear_history()
+    manager.close()
+    reopened = HistoryManager(db_file=str(tmp_path / 'history.db'))
+    assert reopened.get_all_records() == []
+    fourth = reopened.add_record(_element(), 'attribute', "code4", True)
+    assert fourth['id'] > second['id']
+    reopened.close()
+
+
+def test_history_managers_sharing_database_reserve_distinct_ids(tmp_path):
+    """测试两个历史记录管理器共用同一数据库时分配的ID不重复，记录都能写入"""
+    db_file = str(tmp_path / 'history.db')
+    first = HistoryManager(db_file=db_file, flush_interval=60)
+    second = HistoryManager(db_file=db_file, flush_interval=60)
+    ids = [manager.add_record(_element(), 'attribute', "code", True)['id']
+           for manager in (first, second, first, second)]
+    assert len(set(ids)) == 4
+    first.close()
+    second.close()
+
+    reopened = HistoryManager(db_file=db_file)
+    assert sorted(r['id'] for r in reopened.get_all_records()) == sorted(ids)
+    assert reopened.journal.get_metrics()['dropped'] == 0
+    reopened.close()
+
+
+def test_add_record_takes_ids_reserved_in_background(tmp_path):
+    """测试添加记录使用预留的ID，不在调用线程中访问数据库，剩余不足一半时在后台补充"""
+    manager = HistoryManager(db_file=str(tmp_path / 'history.db'), flush_interval=60, id_block_size=4)
+    reserve_ids = manager.store.reserve_ids
+    reserved_on = []
+
+    def record_thread(count):
+        reserved_on.append(threading.current_thread().name)
+        return reserve_ids(count)
+
+    manager.store.reserve_ids = record_thread
+    ids = [manager.add_record(_element(), 'attribute', "code", True)['id'] for _ in range(3)]
+    refill = manager._id_refill
+    if refill is not None:
+        refill.join()
+    ids += [manager.add_record(_element(), 'attribute', "code", True)['id'] for _ in range(3)]
+    manager.close()
+    assert ids == sorted(set(ids))
+    assert reserved_on and set(reserved_on) == {'history-ids'}
+
+
+def test_favorites_written_on_close(tmp_path):
+    """测试收藏夹修改合并为最新快照，关闭时写入文件"""
+    path = tmp_path / 'favorites.json'
+    manager = FavoritesManager(str(path), flush_interval=60)
+    for i in range(3):
+        manager.favorites.append({'id': i})
+        manager._save_favorites()
+    assert not path.exists()
+
+    manager.close()
+    assert json.loads(path.read_text(encoding='utf-8')) == [{'id': 0}, {'id': 1}, {'id': 2}]
+    assert manager.journal.get_metrics()['flushes'] == 1